@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Recall@k versus latency of the IVF-int8 ANN index against exact KNN.
+
+By default a local fixture corpus (clustered unit vectors, fixed seed) is
+generated, loaded into a sqlite-vec table for the exact baseline, indexed with
+search_stack.ann_index, and queried with a sweep of nprobe values. Pass
+--vectors-db to benchmark an existing vectors.db instead (queries are sampled
+from its own vectors). When sqlite-vec cannot be loaded, the exact baseline
+falls back to a NumPy brute-force scan (same results, different latency).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from search_stack.ann_index import IVFIndex, build_ivf_index, iter_vec_table  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark ANN recall/latency vs exact KNN")
+    parser.add_argument("--vectors-db", type=Path, help="Existing sqlite-vec vectors.db")
+    parser.add_argument(
+        "--table",
+        default="vec_decisions",
+        choices=["vec_decisions", "vec_chunks"],
+        help="Vector table to benchmark (default: vec_decisions)",
+    )
+    parser.add_argument("--size", type=int, default=50_000, help="Fixture corpus size")
+    parser.add_argument("--dim", type=int, default=256, help="Fixture vector dimension")
+    parser.add_argument("--clusters", type=int, default=200, help="Fixture topic clusters")
+    parser.add_argument("--queries", type=int, default=100, help="Number of queries")
+    parser.add_argument("-k", type=int, default=50, help="Neighbours per query (default: 50)")
+    parser.add_argument("--nlist", type=int, default=None, help="IVF lists (default: ~4*sqrt(N))")
+    parser.add_argument(
+        "--nprobe",
+        default="1,4,8,16,32,64",
+        help="Comma-separated nprobe values to sweep",
+    )
+    parser.add_argument("--language", help="Also prefilter by this language")
+    parser.add_argument(
+        "--json-output",
+        type=Path,
+        help="Optional path to write machine-readable benchmark report JSON",
+    )
+    return parser.parse_args()
+
+
+def _fixture_corpus(size: int, dim: int, clusters: int, seed: int = 13):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    topic = rng.integers(0, clusters, size=size)
+    vecs = centers[topic] + 0.6 * rng.normal(size=(size, dim)).astype(np.float32)
+    vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+    ids = [f"fixture_{i}" for i in range(size)]
+    langs = [("de", "fr", "it")[i % 3] for i in range(size)]
+    return ids, langs, vecs.astype(np.float32)
+
+
+def _open_vec(path: str) -> sqlite3.Connection | None:
+    """sqlite connection with sqlite-vec loaded, or None if unavailable."""
+    try:
+        import sqlite_vec  # type: ignore[import-untyped]
+
+        conn = sqlite3.connect(path)
+        conn.enable_load_extension(True)
+        sqlite_vec.load(conn)
+        conn.enable_load_extension(False)
+        return conn
+    except Exception:
+        return None
+
+
+def _percentiles(samples: list[float]) -> tuple[float, float]:
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(0.95 * (len(ordered) - 1) + 0.5))]
+    return 1000 * statistics.median(ordered), 1000 * p95
+
+
+def main() -> int:
+    args = parse_args()
+    nprobes = [int(v) for v in args.nprobe.split(",") if v.strip()]
+    rng = np.random.default_rng(0)
+    id_col = "chunk_id" if args.table == "vec_chunks" else "decision_id"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.vectors_db:
+            vec_conn = _open_vec(str(args.vectors_db))
+            if vec_conn is None:
+                print("sqlite-vec is required to read --vectors-db", file=sys.stderr)
+                return 2
+            ids: list[str] = []
+            langs: list[str] = []
+            parts: list[np.ndarray] = []
+            for b_ids, b_langs, b_vecs in iter_vec_table(vec_conn, args.table):
+                ids.extend(b_ids)
+                langs.extend(b_langs)
+                parts.append(b_vecs)
+            vecs = np.concatenate(parts)
+            source = str(args.vectors_db)
+        else:
+            ids, langs, vecs = _fixture_corpus(args.size, args.dim, args.clusters)
+            source = f"fixture(size={args.size}, dim={args.dim}, clusters={args.clusters})"
+            vec_conn = _open_vec(str(Path(tmp) / "fixture_vectors.db"))
+            if vec_conn is not None:
+                vec_conn.execute(
+                    f"CREATE VIRTUAL TABLE {args.table} USING vec0("
+                    f"{id_col} TEXT PRIMARY KEY, embedding float[{args.dim}] "
+                    "distance_metric=cosine, language TEXT partition key)"
+                )
+                vec_conn.executemany(
+                    f"INSERT INTO {args.table} ({id_col}, embedding, language) VALUES (?, ?, ?)",
+                    [(ids[i], vecs[i].tobytes(), langs[i]) for i in range(len(ids))],
+                )
+                vec_conn.commit()
+
+        def batches():
+            for start in range(0, len(ids), 4096):
+                yield ids[start:start + 4096], langs[start:start + 4096], vecs[start:start + 4096]
+
+        build = build_ivf_index(batches, Path(tmp) / "ann", nlist=args.nlist)
+        index = IVFIndex(Path(tmp) / "ann")
+
+        query_rows = rng.choice(len(ids), size=min(args.queries, len(ids)), replace=False)
+        queries = vecs[query_rows] + 0.05 * rng.normal(size=(len(query_rows), vecs.shape[1]))
+        queries = (queries / np.linalg.norm(queries, axis=1, keepdims=True)).astype(np.float32)
+        lang_mask = np.array([lang == args.language for lang in langs]) if args.language else None
+
+        exact: list[set[str]] = []
+        exact_times: list[float] = []
+        for q in queries:
+            t0 = time.perf_counter()
+            if vec_conn is not None:
+                sql = (
+                    f"SELECT {id_col} FROM {args.table} WHERE embedding MATCH ? AND k = ?"
+                    + (" AND language = ?" if args.language else "")
+                )
+                params = [q.tobytes(), args.k] + ([args.language] if args.language else [])
+                exact.append({r[0] for r in vec_conn.execute(sql, params)})
+            else:
+                sims = vecs @ q
+                if lang_mask is not None:
+                    sims = np.where(lang_mask, sims, -np.inf)
+                top = np.argpartition(-sims, args.k)[:args.k]
+                exact.append({ids[i] for i in top})
+            exact_times.append(time.perf_counter() - t0)
+
+        exact_p50, exact_p95 = _percentiles(exact_times)
+        rows = [{
+            "method": "exact-sqlite-vec" if vec_conn is not None else "exact-numpy",
+            "nprobe": None,
+            "recall_at_k": 1.0,
+            "latency_p50_ms": round(exact_p50, 2),
+            "latency_p95_ms": round(exact_p95, 2),
+        }]
+        for nprobe in nprobes:
+            hits = 0
+            times: list[float] = []
+            for q, truth in zip(queries, exact):
+                t0 = time.perf_counter()
+                got = index.search(
+                    q, args.k, nprobe=nprobe,
+                    languages=[args.language] if args.language else None,
+                )
+                times.append(time.perf_counter() - t0)
+                hits += len(truth & {vid for vid, _ in got})
+            p50, p95 = _percentiles(times)
+            rows.append({
+                "method": "ivf-int8",
+                "nprobe": nprobe,
+                "recall_at_k": round(hits / max(1, sum(len(t) for t in exact)), 4),
+                "latency_p50_ms": round(p50, 2),
+                "latency_p95_ms": round(p95, 2),
+            })
+        if vec_conn is not None:
+            vec_conn.close()
+
+    print(f"Corpus: {source}  vectors={len(ids)}  nlist={build['nlist']}  "
+          f"index={build['bytes'] / 1e6:.1f} MB (float32 {vecs.nbytes / 1e6:.1f} MB)")
+    print(f"{'method':>18} {'nprobe':>7} {'recall@' + str(args.k):>10} {'p50 ms':>8} {'p95 ms':>8}")
+    for r in rows:
+        nprobe = "-" if r["nprobe"] is None else str(r["nprobe"])
+        print(f"{r['method']:>18} {nprobe:>7} {r['recall_at_k']:>10.4f} "
+              f"{r['latency_p50_ms']:>8.2f} {r['latency_p95_ms']:>8.2f}")
+
+    if args.json_output:
+        args.json_output.write_text(json.dumps({
+            "source": source,
+            "k": args.k,
+            "language": args.language,
+            "index": build,
+            "results": rows,
+        }, indent=2) + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
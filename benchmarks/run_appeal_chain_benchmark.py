@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Appeal-chain latency by chain depth: appeal_edges CTE vs the per-node walk.
+
+Generates a synthetic reference graph (SCHEMA_SQL of build_reference_graph)
+with many appeal chains of each requested depth; every chain node also has
+doctrinal (non-prior-instance) citations so the legacy joins do real work.
+Each chain is queried from its middle node with both strategies:
+
+- edges: the appeal_edges table, one recursive query + in-memory walk
+- legacy: per-node GROUP BY joins over decision_citations/citation_targets
+  (what graph DBs built without appeal_edges still use)
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark appeal-chain traversal")
+    parser.add_argument("--depths", default="2,4,6,8", help="Comma-separated chain lengths")
+    parser.add_argument("--chains", type=int, default=200, help="Chains per depth")
+    parser.add_argument("--noise", type=int, default=20, help="Doctrinal citations per decision")
+    parser.add_argument("--queries", type=int, default=200, help="Chain lookups per depth")
+    parser.add_argument(
+        "--json-output",
+        type=Path,
+        help="Optional path to write machine-readable benchmark report JSON",
+    )
+    return parser.parse_args()
+
+
+def build_synthetic_graph(
+    path: Path, *, depths: list[int], chains: int, noise: int, seed: int = 11,
+) -> dict[int, list[list[str]]]:
+    """Write a graph DB with appeal chains; returns {depth: [[ids bottom->top]]}."""
+    from search_stack.build_reference_graph import SCHEMA_SQL, _build_appeal_edges
+
+    rng = random.Random(seed)
+    conn = sqlite3.connect(str(path))
+    conn.executescript(SCHEMA_SQL)
+    out: dict[int, list[list[str]]] = {}
+    all_ids: list[str] = []
+    for depth in depths:
+        out[depth] = []
+        for c in range(chains):
+            ids = [f"d{depth}_{c}_{level}" for level in range(depth)]
+            for level, did in enumerate(ids):
+                conn.execute(
+                    "INSERT INTO decisions VALUES (?, ?, ?, ?, 'CH', 'de', ?)",
+                    (did, f"X_{did}", f"x{did}", f"court{level}", f"{2000 + level}-01-01"),
+                )
+                if level:
+                    ref = f"x{ids[level - 1]}"
+                    conn.execute(
+                        "INSERT INTO decision_citations VALUES (?, ?, 'docket', 1, 1)", (did, ref),
+                    )
+                    conn.execute(
+                        "INSERT INTO citation_targets VALUES (?, ?, ?, 'docket_norm', ?)",
+                        (did, ref, ids[level - 1], round(rng.uniform(0.5, 1.0), 3)),
+                    )
+            out[depth].append(ids)
+            all_ids.extend(ids)
+    for did in all_ids:
+        for target in rng.sample(all_ids, k=min(noise, len(all_ids))):
+            if target == did:
+                continue
+            ref = f"x{target}"
+            conn.execute(
+                "INSERT OR IGNORE INTO decision_citations VALUES (?, ?, 'docket', 1, 0)", (did, ref),
+            )
+            conn.execute(
+                "INSERT OR IGNORE INTO citation_targets VALUES (?, ?, ?, 'docket_norm', 0.9)",
+                (did, ref, target),
+            )
+    _build_appeal_edges(conn)
+    conn.commit()
+    conn.close()
+    return out
+
+
+def _percentiles(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]  # noqa: E731
+    return {"p50_ms": round(1000 * pick(0.5), 3), "p95_ms": round(1000 * pick(0.95), 3)}
+
+
+def main() -> int:
+    args = parse_args()
+    depths = [int(d) for d in args.depths.split(",") if d.strip()]
+    import mcp_server
+
+    report = []
+    with tempfile.TemporaryDirectory(prefix="appeal-bench-") as tmp:
+        graph_path = Path(tmp) / "reference_graph.db"
+        chains = build_synthetic_graph(
+            graph_path, depths=depths, chains=args.chains, noise=args.noise,
+        )
+        mcp_server.GRAPH_DB_PATH = graph_path
+        mcp_server._resolve_decision_id = lambda decision_id: decision_id
+
+        legacy_path = Path(tmp) / "legacy_graph.db"
+        legacy = sqlite3.connect(str(legacy_path))
+        sqlite3.connect(str(graph_path)).backup(legacy)
+        legacy.execute("DROP TABLE appeal_edges")
+        legacy.commit()
+        legacy.close()
+
+        print(f"{'depth':>5} {'strategy':>8} {'p50 ms':>9} {'p95 ms':>9} {'chain':>6}")
+        for depth in depths:
+            for strategy, path in (("edges", graph_path), ("legacy", legacy_path)):
+                mcp_server.GRAPH_DB_PATH = path
+                samples = []
+                sizes = []
+                for i in range(args.queries):
+                    ids = chains[depth][i % len(chains[depth])]
+                    t0 = time.perf_counter()
+                    result = mcp_server._find_appeal_chain(ids[len(ids) // 2])
+                    samples.append(time.perf_counter() - t0)
+                    sizes.append(len(result.get("chain", [])))
+                stats = _percentiles(samples)
+                row = {"depth": depth, "strategy": strategy, "chain_len": max(sizes), **stats}
+                report.append(row)
+                print(
+                    f"{depth:>5} {strategy:>8} {stats['p50_ms']:>9.3f} {stats['p95_ms']:>9.3f} "
+                    f"{row['chain_len']:>6}"
+                )
+
+    if args.json_output:
+        args.json_output.write_text(json.dumps({
+            "chains_per_depth": args.chains,
+            "noise_citations": args.noise,
+            "results": report,
+        }, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
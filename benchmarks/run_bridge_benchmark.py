@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Measure web_api MCPBridge queueing latency under concurrent chat sessions.
+
+Runs the same workload (N sessions, each issuing M sequential tool calls)
+against bridge pools of different sizes and reports per-call latency
+percentiles and aggregate throughput. Use --simulate to replace the real
+mcp_server.py with a stub that sleeps, which isolates bridge/queueing cost
+from search cost and needs no local database.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import tempfile
+import textwrap
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from web_api import mcp_bridge  # noqa: E402
+
+# Handles one call at a time, like a worker whose tool calls are CPU-bound
+# under the GIL, so any parallelism has to come from the bridge pool.
+SIMULATED_SERVER = textwrap.dedent('''
+    import json, sys, time
+
+    DELAY = __DELAY__
+
+    for line in sys.stdin:
+        msg = json.loads(line)
+        if "id" not in msg:
+            continue
+        if msg.get("method") == "tools/call":
+            time.sleep(DELAY)
+        out = {"jsonrpc": "2.0", "id": msg["id"],
+               "result": {"content": [{"type": "text", "text": "ok"}]}}
+        sys.stdout.write(json.dumps(out) + "\\n")
+        sys.stdout.flush()
+''')
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark MCPBridge worker pools")
+    parser.add_argument(
+        "--workers",
+        default="1,2,4",
+        help="Comma-separated pool sizes to compare (default: 1,2,4)",
+    )
+    parser.add_argument("--sessions", type=int, default=8, help="Concurrent sessions")
+    parser.add_argument("--calls", type=int, default=5, help="Sequential calls per session")
+    parser.add_argument("--tool", default="search_decisions", help="MCP tool to call")
+    parser.add_argument(
+        "--arguments",
+        default='{"query": "Tierhalterhaftung", "limit": 10}',
+        help="Tool arguments as JSON",
+    )
+    parser.add_argument(
+        "--simulate",
+        type=float,
+        metavar="SECONDS",
+        help="Use a stub server that serves one call at a time, each taking SECONDS",
+    )
+    parser.add_argument(
+        "--json-output",
+        type=Path,
+        help="Optional path to write machine-readable benchmark report JSON",
+    )
+    return parser.parse_args()
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+async def _run_pool(workers: int, args: argparse.Namespace, tool_args: dict) -> dict:
+    bridge = mcp_bridge.MCPBridge(workers=workers)
+    await bridge.start()
+    latencies: list[float] = []
+    errors = 0
+
+    async def session() -> None:
+        nonlocal errors
+        for _ in range(args.calls):
+            started = time.perf_counter()
+            try:
+                await bridge.call_tool(args.tool, tool_args)
+            except RuntimeError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    try:
+        wall_start = time.perf_counter()
+        await asyncio.gather(*(session() for _ in range(args.sessions)))
+        wall = time.perf_counter() - wall_start
+    finally:
+        await bridge.stop()
+
+    return {
+        "workers": workers,
+        "calls": len(latencies),
+        "errors": errors,
+        "wall_seconds": round(wall, 3),
+        "throughput_per_s": round(len(latencies) / wall, 2) if wall else 0.0,
+        "latency_p50_ms": round(1000 * statistics.median(latencies), 1),
+        "latency_p95_ms": round(1000 * _percentile(latencies, 95), 1),
+        "latency_max_ms": round(1000 * max(latencies), 1),
+    }
+
+
+def main() -> int:
+    args = parse_args()
+    try:
+        pool_sizes = [max(1, int(w)) for w in args.workers.split(",") if w.strip()]
+        tool_args = json.loads(args.arguments)
+    except ValueError as e:
+        print(f"Invalid arguments: {e}", file=sys.stderr)
+        return 2
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.simulate is not None:
+            stub = Path(tmp) / "simulated_mcp_server.py"
+            stub.write_text(
+                SIMULATED_SERVER.replace("__DELAY__", repr(args.simulate)),
+                encoding="utf-8",
+            )
+            mcp_bridge.MCP_SERVER_PATH = str(stub)
+            mcp_bridge.PYTHON = sys.executable
+
+        reports = [asyncio.run(_run_pool(w, args, tool_args)) for w in pool_sizes]
+
+    print(f"{args.sessions} sessions x {args.calls} calls of {args.tool}")
+    print(f"{'workers':>8} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'calls/s':>9} {'errors':>7}")
+    for r in reports:
+        print(
+            f"{r['workers']:>8} {r['latency_p50_ms']:>9.1f} {r['latency_p95_ms']:>9.1f} "
+            f"{r['latency_max_ms']:>9.1f} {r['throughput_per_s']:>9.2f} {r['errors']:>7}"
+        )
+
+    if args.json_output:
+        args.json_output.write_text(
+            json.dumps({"sessions": args.sessions, "calls": args.calls,
+                        "tool": args.tool, "simulate": args.simulate,
+                        "results": reports}, indent=2) + "\n",
+            encoding="utf-8",
+        )
+    return 1 if any(r["errors"] for r in reports) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
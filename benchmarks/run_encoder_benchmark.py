@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Startup time, RSS and query-encode latency of the torch vs ONNX int8 encoders.
+
+Each backend runs in a fresh subprocess (so import cost and peak RSS are not
+shared) that loads the model the same way mcp_server does — via
+SWISS_CASELAW_ENCODER_BACKEND — then encodes the query set one query at a
+time (the server's dominant pattern) and reports p50/p95 per stage. The
+cross-encoder is measured on (query, passage) pairs when --cross is given.
+
+Export the ONNX graphs first:
+    python -m search_stack.onnx_encoder --out-dir ~/.swiss-caselaw/onnx
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+DEFAULT_QUERIES = [
+    "Tierhalterhaftung Hundebiss",
+    "Kündigung Mietvertrag Eigenbedarf",
+    "responsabilité du détenteur d'animal",
+    "licenziamento immediato giusti motivi",
+    "Art. 8 EMRK Familiennachzug",
+    "Verjährung Schadenersatz Art. 60 OR",
+    "bail à loyer résiliation abusive",
+    "unentgeltliche Rechtspflege Aussichtslosigkeit",
+]
+
+PASSAGE = "Der Halter eines Tieres haftet für den von ihm verursachten Schaden (Art. 56 OR)."
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark torch vs ONNX query encoders")
+    parser.add_argument(
+        "--backends", default="torch,onnx", help="Comma-separated backends (default: torch,onnx)",
+    )
+    parser.add_argument("--queries-file", type=Path, help="One query per line (default: built-in set)")
+    parser.add_argument("--repeat", type=int, default=5, help="Passes over the query set")
+    parser.add_argument("--cross", action="store_true", help="Also benchmark the cross-encoder")
+    parser.add_argument("--onnx-dir", type=Path, help="Override SWISS_CASELAW_ONNX_DIR")
+    parser.add_argument(
+        "--json-output",
+        type=Path,
+        help="Optional path to write machine-readable benchmark report JSON",
+    )
+    parser.add_argument("--_child", help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def _percentiles(samples: list[float]) -> dict:
+    if not samples:
+        return {"p50_ms": None, "p95_ms": None}
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]  # noqa: E731
+    return {"p50_ms": round(1000 * pick(0.50), 2), "p95_ms": round(1000 * pick(0.95), 2)}
+
+
+def _max_rss_mb() -> float | None:
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024, 1)
+
+
+def _child(backend: str, queries: list[str], repeat: int, cross: bool) -> dict:
+    import time
+
+    started = time.perf_counter()
+    import mcp_server
+
+    model = mcp_server._get_vector_model()
+    if model is None:
+        return {"backend": backend, "error": "query encoder unavailable"}
+    report = {
+        "backend": backend,
+        "model_class": type(model).__name__,
+        "startup_s": round(time.perf_counter() - started, 2),
+    }
+    latencies = []
+    for _ in range(repeat):
+        for q in queries:
+            t0 = time.perf_counter()
+            mcp_server._encode_queries(model, [q])
+            latencies.append(time.perf_counter() - t0)
+    report["encode"] = _percentiles(latencies)
+
+    if cross:
+        t0 = time.perf_counter()
+        ce = mcp_server._get_cross_encoder()
+        report["cross_startup_s"] = round(time.perf_counter() - t0, 2)
+        if ce is not None:
+            pairs = [(q, PASSAGE) for q in queries]
+            latencies = []
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                ce.predict(pairs, batch_size=len(pairs))
+                latencies.append(time.perf_counter() - t0)
+            report["cross_batch"] = _percentiles(latencies)
+    report["max_rss_mb"] = _max_rss_mb()
+    return report
+
+
+def main() -> int:
+    args = parse_args()
+    queries = DEFAULT_QUERIES
+    if args.queries_file:
+        queries = [
+            line.strip() for line in args.queries_file.read_text(encoding="utf-8").splitlines()
+            if line.strip()
+        ]
+
+    if args._child:
+        print(json.dumps(_child(args._child, queries, args.repeat, args.cross)))
+        return 0
+
+    results = []
+    for backend in [b.strip() for b in args.backends.split(",") if b.strip()]:
+        env = dict(os.environ, SWISS_CASELAW_ENCODER_BACKEND=backend)
+        if args.onnx_dir:
+            env["SWISS_CASELAW_ONNX_DIR"] = str(args.onnx_dir)
+        cmd = [sys.executable, __file__, "--_child", backend, "--repeat", str(args.repeat)]
+        if args.queries_file:
+            cmd += ["--queries-file", str(args.queries_file)]
+        if args.cross:
+            cmd.append("--cross")
+        proc = subprocess.run(cmd, env=env, capture_output=True, text=True, cwd=REPO_ROOT)
+        lines = [line for line in proc.stdout.splitlines() if line.startswith("{")]
+        if proc.returncode != 0 or not lines:
+            result = {"backend": backend, "error": proc.stderr.strip()[-500:] or "no output"}
+        else:
+            result = json.loads(lines[-1])
+        results.append(result)
+
+        if "error" in result:
+            print(f"{backend:>6}: ERROR {result['error']}")
+            continue
+        enc = result["encode"]
+        line = (
+            f"{backend:>6}: {result['model_class']:<22} startup={result['startup_s']:>6.2f}s "
+            f"rss={result['max_rss_mb']}MB encode p50={enc['p50_ms']}ms p95={enc['p95_ms']}ms"
+        )
+        if "cross_batch" in result:
+            cb = result["cross_batch"]
+            line += f" cross p50={cb['p50_ms']}ms p95={cb['p95_ms']}ms"
+        print(line)
+
+    if args.json_output:
+        args.json_output.write_text(json.dumps({
+            "queries": len(queries),
+            "repeat": args.repeat,
+            "results": results,
+        }, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
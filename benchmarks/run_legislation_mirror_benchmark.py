@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Legislation tool latency: local mirror vs live LexFind on a cache miss.
+
+Serves a recorded LexFind fixture (default: benchmarks/lexfind_replay.json)
+from a local HTTP stub with a configurable upstream delay, then times
+get_legislation (by LexFind ID) and browse_legislation_changes for every
+text / feed in the fixture:
+
+- live: LEXFIND_BASE_URL points at the stub, the LexFind caches are emptied
+  before each call and no mirror is present
+- mirror: the same stub is synced into a legislation_mirror.db first
+  (search_stack.sync_legislation_mirror), and the tools read from it
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the local legislation mirror")
+    parser.add_argument(
+        "--fixture",
+        type=Path,
+        default=REPO_ROOT / "benchmarks" / "lexfind_replay.json",
+        help="Replay fixture ({'GET de/path': response})",
+    )
+    parser.add_argument("--upstream-latency-ms", type=float, default=250.0)
+    parser.add_argument("--rounds", type=int, default=5, help="Passes over the fixture per strategy")
+    parser.add_argument(
+        "--json-output",
+        type=Path,
+        help="Optional path to write machine-readable benchmark report JSON",
+    )
+    return parser.parse_args()
+
+
+def start_replay_server(responses: dict, latency_s: float) -> ThreadingHTTPServer:
+    """HTTP stub answering GET /{lang}/{path} from *responses* after *latency_s*."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            time.sleep(latency_s)
+            payload = responses.get(f"GET {self.path.lstrip('/')}")
+            body = json.dumps(payload).encode() if payload is not None else b"{}"
+            self.send_response(200 if payload is not None else 404)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *_args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _percentiles(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]  # noqa: E731
+    return {"p50_ms": round(1000 * pick(0.5), 3), "p95_ms": round(1000 * pick(0.95), 3)}
+
+
+def main() -> int:
+    args = parse_args()
+    responses = json.loads(args.fixture.read_text(encoding="utf-8"))
+    law_ids = sorted({
+        int(m.group(1)) for key in responses
+        if (m := re.match(r"GET de/texts-of-law/(\d+)/with-version-groups$", key))
+    })
+    from search_stack.sync_legislation_mirror import ENTITY_IDS, HttpTransport, open_mirror, sync_mirror
+
+    by_id = {eid: abbr for abbr, eid in ENTITY_IDS.items()}
+    cantons = sorted({
+        by_id[int(m.group(1))] for key in responses
+        if (m := re.match(r"GET de/entities/(\d+)/recent-changes$", key))
+    })
+
+    import mcp_server
+
+    server = start_replay_server(responses, args.upstream_latency_ms / 1000.0)
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    mcp_server.LEXFIND_BASE_URL = base_url
+    mcp_server._get_legislation_local = lambda *a, **k: None
+
+    calls = [("get_legislation", lambda i=i: mcp_server._get_legislation(lexfind_id=i)) for i in law_ids]
+    calls += [
+        ("browse_changes", lambda c=c: mcp_server._browse_legislation_changes(canton=c)) for c in cantons
+    ]
+
+    report = []
+    with tempfile.TemporaryDirectory(prefix="mirror-bench-") as tmp:
+        mcp_server.LEXFIND_CACHE_DB_PATH = Path(tmp) / "lexfind_cache.db"
+        mirror_path = Path(tmp) / "legislation_mirror.db"
+
+        print(f"{'strategy':>8} {'tool':>16} {'p50 ms':>9} {'p95 ms':>9} {'n':>4}")
+        for strategy in ("live", "mirror"):
+            if strategy == "mirror":
+                conn = open_mirror(mirror_path)
+                sync_mirror(conn, HttpTransport(base_url), entities=cantons)
+                conn.close()
+            mcp_server.LEGISLATION_MIRROR_DB_PATH = mirror_path
+            samples: dict[str, list[float]] = {}
+            for _ in range(args.rounds):
+                for tool, fn in calls:
+                    with mcp_server._LEXFIND_DB_LOCK:
+                        mcp_server._LEXFIND_MEMORY.clear()
+                        conn = mcp_server._get_lexfind_cache_conn()
+                        if conn is not None:
+                            conn.execute("DELETE FROM cache")
+                            conn.commit()
+                    t0 = time.perf_counter()
+                    result = fn()
+                    samples.setdefault(tool, []).append(time.perf_counter() - t0)
+                    if result.get("error"):
+                        print(f"warning: {tool}: {result['error']}", file=sys.stderr)
+            for tool, values in samples.items():
+                stats = _percentiles(values)
+                report.append({"strategy": strategy, "tool": tool, "n": len(values), **stats})
+                print(f"{strategy:>8} {tool:>16} {stats['p50_ms']:>9.3f} {stats['p95_ms']:>9.3f} {len(values):>4}")
+
+    server.shutdown()
+    if args.json_output:
+        args.json_output.write_text(json.dumps({
+            "upstream_latency_ms": args.upstream_latency_ms,
+            "results": report,
+        }, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
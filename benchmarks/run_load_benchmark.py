@@ -0,0 +1,602 @@
+#!/usr/bin/env python3
+"""
+Load test for search: replay a query mix at fixed concurrency or arrival rate.
+
+Targets:
+- fts5: call mcp_server.search_fts5 / get_decision_by_id in-process. Stage
+  timings (docket, fts, vector, sparse, rerank, cross_encoder, snippet) are
+  collected by wrapping the pipeline functions; each stage is reported
+  exclusive of the stages nested inside it, and "other" is the remainder.
+- http: GET the REST endpoints (/api/decisions, /api/decisions/{id}) of a
+  running server (--base-url), or of one spawned on the fixture DB
+  (--spawn-server). Only end-to-end latency is measured from outside.
+
+Load models:
+- --concurrency N: closed loop, N workers issue requests back to back.
+- --rate R: open loop, requests are scheduled R per second; latency is
+  measured from the scheduled start, so queueing delay is not hidden.
+
+Without --db the harness generates a synthetic fixture decisions.db (seeded,
+offline) and a matching query mix. Compare runs with --baseline; the exit
+status is 1 when a stage's p95 regresses beyond --max-regression.
+
+Query mix (--queries): JSONL, one object per line, e.g.
+    {"query": "Mietzins Herabsetzung", "court": "bger", "limit": 10}
+    {"op": "get", "decision_id": "bger_4A_12_2020"}
+or plain text with one query per line.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+STAGES = ("docket", "fts", "vector", "sparse", "rerank", "cross_encoder", "snippet", "other")
+
+# Functions wrapped for stage timing: mcp_server attribute -> stage name.
+STAGE_FUNCTIONS = {
+    "_search_by_docket": "docket",
+    "_search_vectors": "vector",
+    "_search_vectors_chunks": "vector",
+    "_search_sparse": "sparse",
+    "_rerank_rows": "rerank",
+    "_apply_cross_encoder_boosts": "cross_encoder",
+    "_select_best_passage_snippet": "snippet",
+}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Replay a query mix and report per-stage latency")
+    parser.add_argument("--target", choices=["fts5", "http"], default="fts5")
+    parser.add_argument("--db", type=Path, help="Existing decisions.db (default: synthetic fixture)")
+    parser.add_argument("--fixture-size", type=int, default=5000, help="Synthetic decisions to generate")
+    parser.add_argument("--queries", type=Path, help="Recorded query mix (JSONL or one query per line)")
+    parser.add_argument("--requests", type=int, default=500, help="Requests to issue (default: 500)")
+    parser.add_argument("--warmup", type=int, default=20, help="Unmeasured requests before the run")
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument("--concurrency", type=int, default=4, help="Closed-loop workers (default: 4)")
+    load.add_argument("--rate", type=float, help="Open-loop arrival rate in requests/second")
+    parser.add_argument("--base-url", help="Server for --target http, e.g. http://127.0.0.1:8765")
+    parser.add_argument(
+        "--spawn-server",
+        action="store_true",
+        help="For --target http: start mcp_server --remote on the DB and stop it afterwards",
+    )
+    parser.add_argument(
+        "--tracing-overhead",
+        action="store_true",
+        help="For --target fts5: also measure search_stack.tracing overhead (spans off vs on)",
+    )
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--baseline", type=Path, help="Baseline report JSON to compare against")
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=0.25,
+        help="Allowed relative p95 increase per stage vs --baseline (default: 0.25)",
+    )
+    parser.add_argument(
+        "--min-baseline-ms",
+        type=float,
+        default=1.0,
+        help="Ignore stages whose baseline p95 is below this (noise floor)",
+    )
+    parser.add_argument(
+        "--json-output",
+        type=Path,
+        help="Optional path to write machine-readable benchmark report JSON",
+    )
+    return parser.parse_args()
+
+
+# ---------------------------------------------------------------------------
+# Synthetic fixture
+# ---------------------------------------------------------------------------
+
+FIXTURE_TOPICS = {
+    "de": [
+        ("Mietrecht", ["Mietzins", "Herabsetzung", "Kündigung", "Eigenbedarf", "Nebenkosten", "Mängel"]),
+        ("Arbeitsrecht", ["fristlose", "Entlassung", "Überstunden", "Lohn", "Kündigungsschutz", "Zeugnis"]),
+        ("Haftpflicht", ["Tierhalter", "Schadenersatz", "Genugtuung", "Kausalzusammenhang", "Verschulden"]),
+        ("Strafrecht", ["Betrug", "Vorsatz", "Freiheitsstrafe", "bedingt", "Strafzumessung", "Landesverweisung"]),
+        ("Sozialversicherung", ["Invalidenrente", "Invaliditätsgrad", "Einkommensvergleich", "Taggeld"]),
+        ("Asylrecht", ["Wegweisung", "Flüchtlingseigenschaft", "Vollzug", "Zumutbarkeit", "Dublin"]),
+    ],
+    "fr": [
+        ("Bail", ["loyer", "résiliation", "abusive", "défaut", "consignation", "prolongation"]),
+        ("Travail", ["licenciement", "immédiat", "heures", "supplémentaires", "salaire", "certificat"]),
+        ("Responsabilité", ["détenteur", "animal", "dommage", "tort", "moral", "causalité"]),
+    ],
+    "it": [
+        ("Lavoro", ["licenziamento", "immediato", "giusti", "motivi", "salario", "disdetta"]),
+        ("Locazione", ["pigione", "disdetta", "abusiva", "difetti", "restituzione"]),
+    ],
+}
+
+FIXTURE_STATUTES = ["Art. 41 OR", "Art. 56 OR", "Art. 271 OR", "Art. 337 OR", "Art. 8 EMRK", "Art. 29 BV"]
+FIXTURE_COURTS = [("bger", "CH"), ("bvger", "CH"), ("zh_obergericht", "ZH"), ("ge_cj", "GE")]
+
+
+def build_fixture_db(path: Path, size: int, seed: int = 7) -> list[dict]:
+    """Write a synthetic decisions.db with *size* rows; return a query mix."""
+    from db_schema import INSERT_COLUMNS, INSERT_SQL, SCHEMA_SQL, decision_year, migrate_decisions_schema
+
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA_SQL)
+    migrate_decisions_schema(conn)
+    dockets = []
+    rows = []
+    for i in range(size):
+        language = rng.choices(["de", "fr", "it"], weights=[6, 3, 1])[0]
+        area, terms = rng.choice(FIXTURE_TOPICS[language])
+        court, canton = rng.choice(FIXTURE_COURTS)
+        year = rng.randint(2000, 2024)
+        docket = f"{rng.choice(['4A', '5A', '6B', '8C', '1C'])}_{i}/{year}"
+        date = f"{year}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        statute = rng.choice(FIXTURE_STATUTES)
+        picked = rng.sample(terms, k=min(3, len(terms)))
+        sentences = [
+            f"{area}: {' '.join(rng.sample(terms, k=min(4, len(terms))))} gemäss {statute}."
+            for _ in range(rng.randint(20, 60))
+        ]
+        row = {
+            "decision_id": f"{court}_{docket.replace('/', '_')}",
+            "court": court,
+            "canton": canton,
+            "docket_number": docket,
+            "decision_date": date,
+            "language": language,
+            "title": f"{area} {picked[0]}",
+            "legal_area": area,
+            "regeste": f"{' '.join(picked)}; {statute}.",
+            "full_text": "\n\n".join(sentences),
+            "decision_year": decision_year(date),
+        }
+        rows.append(tuple(row.get(col) for col in INSERT_COLUMNS))
+        dockets.append((row["decision_id"], docket))
+        if len(rows) >= 1000:
+            conn.executemany(INSERT_SQL, rows)
+            rows = []
+    if rows:
+        conn.executemany(INSERT_SQL, rows)
+    conn.commit()
+    conn.close()
+
+    mix: list[dict] = []
+    for _ in range(200):
+        language = rng.choices(["de", "fr", "it"], weights=[6, 3, 1])[0]
+        _area, terms = rng.choice(FIXTURE_TOPICS[language])
+        kind = rng.random()
+        if kind < 0.55:
+            mix.append({"query": " ".join(rng.sample(terms, k=2)), "limit": 10})
+        elif kind < 0.70:
+            mix.append({"query": f'"{rng.choice(terms)}" {rng.choice(FIXTURE_STATUTES)}', "limit": 10})
+        elif kind < 0.80:
+            mix.append({"query": rng.choice(terms), "court": rng.choice(FIXTURE_COURTS)[0], "limit": 20})
+        elif kind < 0.90:
+            mix.append({"query": rng.choice(dockets)[1], "limit": 5})
+        else:
+            mix.append({"op": "get", "decision_id": rng.choice(dockets)[0]})
+    return mix
+
+
+def load_query_mix(path: Path) -> list[dict]:
+    mix = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("{"):
+            mix.append(json.loads(line))
+        else:
+            mix.append({"query": line, "limit": 10})
+    return mix
+
+
+# ---------------------------------------------------------------------------
+# Stage timing (in-process target)
+# ---------------------------------------------------------------------------
+
+
+class StageRecorder:
+    """Per-thread exclusive stage timings for the request in flight."""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def begin(self) -> None:
+        self._local.stages = {}
+        self._local.stack = []
+
+    def end(self) -> dict[str, float]:
+        stages = getattr(self._local, "stages", {})
+        self._local.stages = {}
+        return stages
+
+    def timed(self, stage: str, fn):
+        def wrapper(*args, **kwargs):
+            stack = getattr(self._local, "stack", None)
+            if stack is None:
+                return fn(*args, **kwargs)
+            stack.append(0.0)
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - t0
+                nested = stack.pop()
+                if stack:
+                    stack[-1] += elapsed
+                stages = self._local.stages
+                stages[stage] = stages.get(stage, 0.0) + elapsed - nested
+        return wrapper
+
+
+class _TimedConnection:
+    """sqlite3 connection proxy timing FTS MATCH statements as the fts stage."""
+
+    def __init__(self, conn: sqlite3.Connection, recorder: StageRecorder):
+        self._conn = conn
+        self._recorder = recorder
+
+    def execute(self, sql, *args):
+        if "MATCH" not in sql:
+            return self._conn.execute(sql, *args)
+        run = self._recorder.timed("fts", lambda: self._conn.execute(sql, *args).fetchall())
+        return _Prefetched(run())
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+class _Prefetched:
+    def __init__(self, rows: list):
+        self._rows = rows
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+
+def instrument(mcp_server, recorder: StageRecorder) -> None:
+    for attr, stage in STAGE_FUNCTIONS.items():
+        setattr(mcp_server, attr, recorder.timed(stage, getattr(mcp_server, attr)))
+    get_db = mcp_server.get_db
+    mcp_server.get_db = lambda: _TimedConnection(get_db(), recorder)
+
+
+# ---------------------------------------------------------------------------
+# Runners
+# ---------------------------------------------------------------------------
+
+
+def _fts5_call(mcp_server, recorder: StageRecorder):
+    def call(item: dict) -> dict[str, float]:
+        recorder.begin()
+        if item.get("op") == "get":
+            mcp_server.get_decision_by_id(item["decision_id"])
+        else:
+            params = {k: v for k, v in item.items() if k != "op"}
+            mcp_server.search_fts5(**params)
+        return recorder.end()
+    return call
+
+
+def _http_call(base_url: str, timeout: float = 60.0):
+    base = base_url.rstrip("/")
+
+    def call(item: dict) -> dict[str, float]:
+        if item.get("op") == "get":
+            url = f"{base}/api/decisions/{urllib.parse.quote(item['decision_id'], safe='')}"
+        else:
+            params = {k: v for k, v in item.items() if k != "op" and v is not None}
+            url = f"{base}/api/decisions?{urllib.parse.urlencode(params)}"
+        try:
+            with urllib.request.urlopen(url, timeout=timeout) as resp:
+                resp.read()
+        except urllib.error.HTTPError as e:
+            if e.code != 404:
+                raise
+        return {}
+    return call
+
+
+def run_load(call, mix: list[dict], *, requests: int, concurrency: int, rate: float | None) -> dict:
+    """Issue *requests* calls; returns latency samples per stage plus errors."""
+    samples: dict[str, list[float]] = {"total": []}
+    errors = 0
+    lock = threading.Lock()
+
+    def one(i: int, scheduled: float) -> None:
+        nonlocal errors
+        item = mix[i % len(mix)]
+        t0 = time.perf_counter()
+        try:
+            stages = call(item)
+        except Exception:
+            with lock:
+                errors += 1
+            return
+        finished = time.perf_counter()
+        total = finished - scheduled
+        if stages:
+            # Query analysis, candidate fetches, result shaping, ...
+            stages["other"] = max(0.0, finished - t0 - sum(stages.values()))
+        with lock:
+            samples["total"].append(total)
+            for stage, seconds in stages.items():
+                samples.setdefault(stage, []).append(seconds)
+
+    started = time.perf_counter()
+    if rate:
+        interval = 1.0 / rate
+        workers = max(4, min(256, int(rate * 2)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for i in range(requests):
+                scheduled = started + i * interval
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(one, i, scheduled)
+    else:
+        counter = iter(range(requests))
+        counter_lock = threading.Lock()
+
+        def worker() -> None:
+            while True:
+                with counter_lock:
+                    i = next(counter, None)
+                if i is None:
+                    return
+                one(i, time.perf_counter())
+
+        threads = [threading.Thread(target=worker) for _ in range(max(1, concurrency))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    wall = time.perf_counter() - started
+    return {"samples": samples, "errors": errors, "wall_s": wall}
+
+
+def summarize(samples: dict[str, list[float]], completed: int) -> dict[str, dict]:
+    """p50/p95/p99/mean in ms per stage; calls = requests that hit the stage."""
+    out = {}
+    for stage, values in samples.items():
+        if not values:
+            continue
+        ordered = sorted(values)
+
+        def pct(q: float) -> float:
+            return round(1000 * ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
+
+        out[stage] = {
+            "calls": len(ordered),
+            "share": round(len(ordered) / completed, 3) if completed else 0.0,
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "p99_ms": pct(0.99),
+            "mean_ms": round(1000 * sum(ordered) / len(ordered), 3),
+        }
+    return out
+
+
+def compare_to_baseline(
+    current: dict[str, dict],
+    baseline: dict[str, dict],
+    *,
+    max_regression: float,
+    min_baseline_ms: float,
+) -> list[dict]:
+    """Stages whose p95 grew more than *max_regression* relative to baseline."""
+    regressions = []
+    for stage, base in baseline.items():
+        cur = current.get(stage)
+        if cur is None or base.get("p95_ms") is None or base["p95_ms"] < min_baseline_ms:
+            continue
+        ratio = cur["p95_ms"] / base["p95_ms"]
+        if ratio > 1.0 + max_regression:
+            regressions.append({
+                "stage": stage,
+                "baseline_p95_ms": base["p95_ms"],
+                "p95_ms": cur["p95_ms"],
+                "ratio": round(ratio, 3),
+            })
+    return regressions
+
+
+def measure_tracing_overhead(call, mix: list[dict], *, requests: int, rounds: int = 3) -> dict:
+    """Mean request time with tracing spans disabled vs enabled (serial, interleaved)."""
+    from search_stack import tracing
+
+    per_round = max(1, requests // rounds)
+    totals = {False: 0.0, True: 0.0}
+    counts = {False: 0, True: 0}
+    saved = tracing.ENABLED
+    try:
+        for _ in range(rounds):
+            for enabled in (False, True):
+                tracing.ENABLED = enabled
+                result = run_load(call, mix, requests=per_round, concurrency=1, rate=None)
+                totals[enabled] += sum(result["samples"]["total"])
+                counts[enabled] += len(result["samples"]["total"])
+    finally:
+        tracing.ENABLED = saved
+    off = totals[False] / counts[False] if counts[False] else 0.0
+    on = totals[True] / counts[True] if counts[True] else 0.0
+    return {
+        "mean_ms_off": round(1000 * off, 3),
+        "mean_ms_on": round(1000 * on, 3),
+        "overhead_pct": round(100 * (on - off) / off, 2) if off else None,
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _spawn_server(data_dir: Path) -> tuple[subprocess.Popen, str]:
+    import os
+
+    port = _free_port()
+    env = dict(
+        os.environ,
+        SWISS_CASELAW_DIR=str(data_dir),
+        SWISS_CASELAW_AUTH_TOKEN="",
+        SWISS_CASELAW_METADATA_STORE="0",
+    )
+    proc = subprocess.Popen(
+        [sys.executable, str(REPO_ROOT / "mcp_server.py"), "--remote", "--host", "127.0.0.1", "--port", str(port)],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited with status {proc.returncode}")
+        try:
+            with urllib.request.urlopen(f"{base_url}/health", timeout=2):
+                return proc, base_url
+        except OSError:
+            time.sleep(0.25)
+    proc.terminate()
+    raise RuntimeError("server did not become healthy within 60s")
+
+
+def main() -> int:
+    args = parse_args()
+    tmp = None
+    if args.db:
+        db_path = args.db.expanduser().resolve()
+        if not db_path.exists():
+            print(f"Database not found: {db_path}", file=sys.stderr)
+            return 1
+        mix = []
+    else:
+        tmp = tempfile.TemporaryDirectory(prefix="load-bench-")
+        db_path = Path(tmp.name) / "decisions.db"
+        t0 = time.perf_counter()
+        mix = build_fixture_db(db_path, args.fixture_size, seed=args.seed)
+        print(f"Fixture: {args.fixture_size} decisions in {time.perf_counter() - t0:.1f}s ({db_path})")
+    if args.queries:
+        mix = load_query_mix(args.queries)
+    if not mix:
+        print("No query mix: pass --queries when using --db", file=sys.stderr)
+        return 1
+    random.Random(args.seed).shuffle(mix)
+
+    proc = None
+    try:
+        if args.target == "http":
+            base_url = args.base_url
+            if args.spawn_server:
+                proc, base_url = _spawn_server(db_path.parent)
+            if not base_url:
+                print("--target http needs --base-url or --spawn-server", file=sys.stderr)
+                return 1
+            call = _http_call(base_url)
+        else:
+            from benchmarks.run_search_benchmark import _configure_search_db
+
+            mcp_server = _configure_search_db(db_path)
+            recorder = StageRecorder()
+            instrument(mcp_server, recorder)
+            call = _fts5_call(mcp_server, recorder)
+
+        if args.warmup:
+            run_load(call, mix, requests=args.warmup, concurrency=1, rate=None)
+        result = run_load(
+            call, mix, requests=args.requests, concurrency=args.concurrency, rate=args.rate,
+        )
+        overhead = None
+        if args.tracing_overhead and args.target == "fts5":
+            overhead = measure_tracing_overhead(call, mix, requests=args.requests)
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+        if tmp is not None:
+            tmp.cleanup()
+
+    completed = len(result["samples"]["total"])
+    stages = summarize(result["samples"], completed)
+    throughput = completed / result["wall_s"] if result["wall_s"] else 0.0
+    mode = f"rate={args.rate}/s" if args.rate else f"concurrency={args.concurrency}"
+    print(f"Target: {args.target}  {mode}  requests={args.requests}  errors={result['errors']}")
+    print(f"Throughput: {throughput:.1f} req/s over {result['wall_s']:.1f}s")
+    print(f"{'stage':<14} {'calls':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for stage in ("total",) + STAGES:
+        s = stages.get(stage)
+        if s:
+            print(f"{stage:<14} {s['calls']:>6} {s['p50_ms']:>9.2f} {s['p95_ms']:>9.2f} {s['p99_ms']:>9.2f}")
+
+    if overhead is not None:
+        print(
+            f"Tracing overhead: {overhead['overhead_pct']}% "
+            f"(mean {overhead['mean_ms_off']:.2f} ms off, {overhead['mean_ms_on']:.2f} ms on)"
+        )
+
+    regressions = []
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        regressions = compare_to_baseline(
+            stages,
+            baseline.get("stages", {}),
+            max_regression=args.max_regression,
+            min_baseline_ms=args.min_baseline_ms,
+        )
+        for r in regressions:
+            print(
+                f"REGRESSION {r['stage']}: p95 {r['baseline_p95_ms']:.2f} -> {r['p95_ms']:.2f} ms "
+                f"(x{r['ratio']})"
+            )
+        if not regressions:
+            print(f"Within {args.max_regression:.0%} of baseline p95 for all stages")
+
+    if args.json_output:
+        args.json_output.write_text(json.dumps({
+            "target": args.target,
+            "db": str(args.db) if args.db else f"fixture:{args.fixture_size}",
+            "requests": args.requests,
+            "concurrency": None if args.rate else args.concurrency,
+            "rate": args.rate,
+            "errors": result["errors"],
+            "throughput_rps": round(throughput, 2),
+            "stages": stages,
+            "tracing_overhead": overhead,
+            "regressions": regressions,
+        }, indent=2), encoding="utf-8")
+
+    if result["errors"]:
+        return 1
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+get_law / get_commentary latency: legacy schema vs lookup indexes vs hot cache.
+
+Generates a synthetic statutes.db and ok_commentaries.db (default: 400 laws
+x 300 articles x 3 languages, 20 commented laws) and replays a skewed
+workload of abbreviation lookups, single articles, article prefixes and
+article listings against three setups:
+
+- legacy: DBs without law_aliases / sort_key / abbr_norm (UPPER() and CAST()
+  queries), result cache off
+- indexed: DBs from the current builders, result cache off
+- cached: DBs from the current builders with the get_law / get_commentary
+  result cache on
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark statute and commentary lookups")
+    parser.add_argument("--laws", type=int, default=400)
+    parser.add_argument("--articles", type=int, default=300, help="Articles per law and language")
+    parser.add_argument("--commented-laws", type=int, default=20)
+    parser.add_argument("--queries", type=int, default=3000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument(
+        "--json-output",
+        type=Path,
+        help="Optional path to write machine-readable benchmark report JSON",
+    )
+    return parser.parse_args()
+
+
+def _article_nums(n: int) -> list[str]:
+    nums = []
+    for i in range(1, n + 1):
+        nums.append(str(i))
+        if i % 10 == 0:
+            nums.append(f"{i}a")
+    return nums[:n]
+
+
+def build_statutes_fixture(path: Path, *, laws: int, articles: int, legacy: bool) -> None:
+    from search_stack import build_statutes_db as bsd
+
+    conn = sqlite3.connect(str(path))
+    if legacy:
+        conn.executescript("""
+            CREATE TABLE laws (sr_number TEXT PRIMARY KEY, title_de TEXT, title_fr TEXT, title_it TEXT,
+                               abbr_de TEXT, abbr_fr TEXT, abbr_it TEXT,
+                               consolidation_date TEXT, work_uri TEXT);
+            CREATE TABLE articles (id INTEGER PRIMARY KEY AUTOINCREMENT, sr_number TEXT NOT NULL,
+                                   article_num TEXT NOT NULL, heading TEXT, text TEXT NOT NULL,
+                                   lang TEXT NOT NULL);
+            CREATE INDEX idx_articles_sr_art ON articles(sr_number, article_num);
+            CREATE INDEX idx_articles_sr_lang ON articles(sr_number, lang);
+        """)
+    else:
+        bsd.create_schema(conn)
+    nums = _article_nums(articles)
+    for i in range(laws):
+        sr = f"{100 + i}.{i % 7}"
+        conn.execute(
+            "INSERT INTO laws (sr_number, title_de, abbr_de, abbr_fr, abbr_it, consolidation_date) "
+            "VALUES (?, ?, ?, ?, ?, '2024-01-01')",
+            (sr, f"Gesetz {i}", f"G{i}", f"L{i}", f"L{i}I"),
+        )
+        conn.executemany(
+            "INSERT INTO articles (sr_number, article_num, heading, text, lang) VALUES (?, ?, ?, ?, ?)",
+            [
+                (sr, num, f"Titel {num}", f"Art. {num} {lang} " + "Text " * 40, lang)
+                for lang in ("de", "fr", "it")
+                for num in nums
+            ],
+        )
+    conn.commit()
+    if not legacy:
+        bsd.build_lookup_tables(conn)
+    conn.close()
+
+
+def build_commentaries_fixture(path: Path, *, laws: int, articles: int, legacy: bool) -> None:
+    from search_stack import build_ok_commentaries_db as bok
+
+    conn = sqlite3.connect(str(path))
+    bok.create_schema(conn)
+    rows = [
+        (f"c{i}-{num}-{lang}", f"act{i}", f"{100 + i}.{i % 7}", f"G{i}", num, f"Art. {num} G{i}", lang,
+         "[]", "Kommentar " * 200, f"G{i}".upper())
+        for i in range(laws)
+        for num in _article_nums(articles)
+        for lang in ("de", "fr")
+    ]
+    conn.executemany(
+        """INSERT INTO commentaries (ok_uuid, legislative_act_uuid, sr_number, abbr, article_num,
+                                     title, language, authors, content_text, abbr_norm)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        rows,
+    )
+    if legacy:
+        # Same rows, old layout: no normalized columns or their indexes
+        for index in ("idx_commentaries_abbr_norm_art", "idx_commentaries_sr_sort",
+                      "idx_commentaries_abbr_norm_sort"):
+            conn.execute(f"DROP INDEX {index}")
+        conn.execute("ALTER TABLE commentaries DROP COLUMN abbr_norm")
+        conn.execute("ALTER TABLE commentaries DROP COLUMN sort_key")
+    else:
+        conn.execute("UPDATE commentaries SET sort_key = CAST(article_num AS INTEGER)")
+    conn.commit()
+    conn.close()
+
+
+def build_workload(args: argparse.Namespace) -> list[tuple[str, dict]]:
+    rng = random.Random(args.seed)
+    nums = _article_nums(args.articles)
+    # Skewed towards a few popular laws and articles, like real tool traffic
+    law_weights = [1.0 / (rank + 1) for rank in range(args.laws)]
+    art_weights = [1.0 / (rank + 1) ** 0.8 for rank in range(len(nums))]
+    workload = []
+    for _ in range(args.queries):
+        law = rng.choices(range(args.laws), law_weights)[0]
+        num = rng.choices(nums, art_weights)[0]
+        kind = rng.choices(["article", "prefix", "listing", "commentary"], [0.55, 0.1, 0.1, 0.25])[0]
+        abbr = rng.choice([f"g{law}", f"L{law}", f"G{law}"])
+        if kind == "article":
+            workload.append(("get_law", {"abbreviation": abbr, "article": num}))
+        elif kind == "prefix":
+            workload.append(("get_law", {"abbreviation": abbr, "article": num[:-1] or num}))
+        elif kind == "listing":
+            workload.append(("get_law", {"abbreviation": abbr}))
+        else:
+            commented = law % args.commented_laws
+            workload.append(("get_commentary", {"abbreviation": f"g{commented}", "article": num}))
+    return workload
+
+
+def _percentiles(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]  # noqa: E731
+    return {"p50_ms": round(1000 * pick(0.5), 3), "p95_ms": round(1000 * pick(0.95), 3)}
+
+
+def main() -> int:
+    args = parse_args()
+    import mcp_server
+
+    workload = build_workload(args)
+    report = []
+    with tempfile.TemporaryDirectory(prefix="statute-bench-") as tmp:
+        dbs = {}
+        for layout in ("legacy", "current"):
+            statutes = Path(tmp) / f"statutes-{layout}.db"
+            commentaries = Path(tmp) / f"ok-{layout}.db"
+            build_statutes_fixture(statutes, laws=args.laws, articles=args.articles, legacy=layout == "legacy")
+            build_commentaries_fixture(
+                commentaries, laws=args.commented_laws, articles=args.articles, legacy=layout == "legacy",
+            )
+            dbs[layout] = (statutes, commentaries)
+
+        print(f"{'strategy':>8} {'tool':>15} {'p50 ms':>9} {'p95 ms':>9} {'n':>5} {'hits':>6}")
+        for strategy, layout, cache_size in (
+            ("legacy", "legacy", 0), ("indexed", "current", 0), ("cached", "current", 512),
+        ):
+            mcp_server.STATUTES_DB_PATH, mcp_server.OK_COMMENTARIES_DB_PATH = dbs[layout]
+            mcp_server.STATUTE_CACHE_SIZE = cache_size
+            with mcp_server._STATUTE_CACHE_LOCK:
+                mcp_server._STATUTE_CACHE.clear()
+            tools = {"get_law": mcp_server.get_law, "get_commentary": mcp_server.get_commentary}
+            samples: dict[str, list[float]] = {}
+            hits_before = mcp_server._STATUTE_CACHE_STATS["hits"]
+            for tool, kwargs in workload:
+                t0 = time.perf_counter()
+                result = tools[tool](**kwargs)
+                samples.setdefault(tool, []).append(time.perf_counter() - t0)
+                if result.get("error") and "Database error" in result["error"]:
+                    print(f"warning: {tool}: {result['error']}", file=sys.stderr)
+            hit_rate = (mcp_server._STATUTE_CACHE_STATS["hits"] - hits_before) / len(workload)
+            for tool, values in samples.items():
+                stats = _percentiles(values)
+                report.append({
+                    "strategy": strategy, "tool": tool, "n": len(values),
+                    "cache_hit_rate": round(hit_rate, 3), **stats,
+                })
+                print(
+                    f"{strategy:>8} {tool:>15} {stats['p50_ms']:>9.3f} {stats['p95_ms']:>9.3f} "
+                    f"{len(values):>5} {hit_rate:>6.1%}"
+                )
+
+    if args.json_output:
+        args.json_output.write_text(json.dumps({
+            "laws": args.laws,
+            "articles_per_law": args.articles,
+            "queries": args.queries,
+            "results": report,
+        }, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -29,7 +29,14 @@ from collections import defaultdict
 from datetime import datetime, timezone
 from pathlib import Path
 
-from db_schema import COVERAGE_SCHEMA_SQL, INSERT_COLUMNS, INSERT_OR_IGNORE_SQL, SCHEMA_SQL
+from db_schema import (
+    COVERAGE_SCHEMA_SQL,
+    INSERT_COLUMNS,
+    INSERT_OR_IGNORE_SQL,
+    SCHEMA_SQL,
+    decision_year,
+    migrate_decisions_schema,
+)
 from models import make_canonical_key
 
 logger = logging.getLogger("build_fts5")
@@ -433,6 +440,7 @@ def insert_decision(conn: sqlite3.Connection, row: dict) -> bool:
         row["canonical_key"] = make_canonical_key(
             row.get("court", ""), row.get("docket_number", ""), row.get("decision_date"),
         )
+        row["decision_year"] = decision_year(row.get("decision_date"))
 
         # Build values tuple matching INSERT_COLUMNS order.
         # Convert None-like values properly (avoid storing literal "None" strings).
@@ -568,18 +576,10 @@ def import_parquet(conn: sqlite3.Connection, parquet_dir: Path) -> tuple[int, in
 def _migrate_schema(conn: sqlite3.Connection) -> None:
     """Add missing columns to an existing decisions table.
 
-    Safe to call on every startup — ALTER TABLE ADD COLUMN is a no-op
-    if the column already exists (caught by the try/except).
+    Safe to call on every startup — see db_schema.migrate_decisions_schema.
     """
-    migrations = [
-        ("canonical_key", "TEXT"),
-    ]
-    for col_name, col_type in migrations:
-        try:
-            conn.execute(f"ALTER TABLE decisions ADD COLUMN {col_name} {col_type}")
-            logger.info(f"Schema migration: added column '{col_name}'")
-        except sqlite3.OperationalError:
-            pass  # column already exists
+    for col_name in migrate_decisions_schema(conn):
+        logger.info(f"Schema migration: added column '{col_name}'")
 
 
 def build_database(
@@ -5,6 +5,9 @@ Shared between build_fts5.py (ingestion), mcp_server.py (search),
 and pipeline.py (daily FTS import).
 Single source of truth — edit here, all consumers pick it up.
 """
+from __future__ import annotations
+
+import sqlite3
 
 SCHEMA_SQL = """
     CREATE TABLE IF NOT EXISTS decisions (
@@ -31,7 +34,8 @@ SCHEMA_SQL = """
         source_spider TEXT,
         content_hash TEXT,
         json_data TEXT,
-        canonical_key TEXT
+        canonical_key TEXT,
+        decision_year INTEGER
     );
 
     CREATE INDEX IF NOT EXISTS idx_decisions_court ON decisions(court);
@@ -74,7 +78,10 @@ SCHEMA_SQL = """
             old.full_text);
     END;
 
-    CREATE TRIGGER IF NOT EXISTS decisions_au AFTER UPDATE ON decisions BEGIN
+    -- Only indexed columns re-sync FTS, so metadata backfills stay cheap
+    CREATE TRIGGER IF NOT EXISTS decisions_au AFTER UPDATE OF
+        decision_id, court, canton, docket_number, language, title, regeste,
+        full_text ON decisions BEGIN
         INSERT INTO decisions_fts(decisions_fts, rowid, decision_id, court,
             canton, docket_number, language, title, regeste, full_text)
         VALUES ('delete', old.rowid, old.decision_id, old.court, old.canton,
@@ -88,6 +95,12 @@ SCHEMA_SQL = """
     END;
 """
 
+# Indexes on columns that older databases only gain through
+# migrate_decisions_schema() (SCHEMA_SQL runs before the migration).
+MIGRATED_INDEX_SQL = """
+    CREATE INDEX IF NOT EXISTS idx_decisions_year ON decisions(decision_year, court);
+"""
+
 # Coverage tracking schema (completeness / reconciliation)
 COVERAGE_SCHEMA_SQL = """
     CREATE TABLE IF NOT EXISTS coverage_targets (
@@ -185,7 +198,7 @@ INSERT_COLUMNS = (
     "legal_area", "regeste", "full_text", "decision_type",
     "outcome", "source_url", "pdf_url", "cited_decisions",
     "scraped_at", "source", "source_id", "source_spider",
-    "content_hash", "json_data", "canonical_key",
+    "content_hash", "json_data", "canonical_key", "decision_year",
 )
 
 INSERT_SQL = f"""INSERT INTO decisions
@@ -195,3 +208,53 @@ INSERT_SQL = f"""INSERT INTO decisions
 INSERT_OR_IGNORE_SQL = f"""INSERT OR IGNORE INTO decisions
     ({', '.join(INSERT_COLUMNS)})
     VALUES ({', '.join('?' for _ in INSERT_COLUMNS)})"""
+
+
+# Columns added after the first release, as (name, type), for ALTER TABLE.
+MIGRATED_COLUMNS = (
+    ("canonical_key", "TEXT"),
+    ("decision_year", "INTEGER"),
+)
+
+
+def decision_year(decision_date) -> int | None:
+    """Integer year of an ISO decision_date, or None if missing/implausible."""
+    if not decision_date:
+        return None
+    try:
+        year = int(str(decision_date)[:4])
+    except ValueError:
+        return None
+    return year if 1800 < year < 2100 else None
+
+
+def migrate_decisions_schema(conn: sqlite3.Connection) -> list[str]:
+    """Bring an existing decisions table up to SCHEMA_SQL.
+
+    Adds missing MIGRATED_COLUMNS, backfills decision_year from
+    decision_date and creates MIGRATED_INDEX_SQL. Safe to call on every
+    startup. Returns the names of the columns that were added.
+    """
+    existing = {r[1] for r in conn.execute("PRAGMA table_info(decisions)")}
+    added = []
+    for col_name, col_type in MIGRATED_COLUMNS:
+        if col_name not in existing:
+            conn.execute(f"ALTER TABLE decisions ADD COLUMN {col_name} {col_type}")
+            added.append(col_name)
+
+    if "decision_year" in added:
+        # Older databases carry an unscoped update trigger that would rewrite
+        # the FTS index for every backfilled row — swap in the scoped one.
+        conn.execute("DROP TRIGGER IF EXISTS decisions_au")
+        conn.executescript(SCHEMA_SQL)
+        conn.execute(
+            """
+            UPDATE decisions
+            SET decision_year = CAST(substr(decision_date, 1, 4) AS INTEGER)
+            WHERE decision_date IS NOT NULL
+              AND CAST(substr(decision_date, 1, 4) AS INTEGER) > 1800
+              AND CAST(substr(decision_date, 1, 4) AS INTEGER) < 2100
+            """
+        )
+    conn.executescript(MIGRATED_INDEX_SQL)
+    return added
@@ -6,20 +6,35 @@ export_parquet.py — Export decisions to per-court Parquet files
 Reads from the deduplicated FTS5 SQLite database (preferred) or falls
 back to JSONL files.  One Parquet file per court in output/dataset/.
 
+Courts are exported in parallel worker processes. Within a file, rows are
+sorted by decision_date then decision_id and written in row groups of
+ROW_GROUP_SIZE rows, with min/max statistics on the filterable columns, so
+readers can skip row groups by date, language, canton etc.
+
+output/dataset/_export_manifest.json records per court a hash of the source
+rows, the file size, and per row group its row count, date range and hash
+of its source rows. A court whose source rows are unchanged keeps its file;
+importers can use changed_row_groups() to read only new row groups.
+
 Usage:
     python3 export_parquet.py                          # auto-detect DB
     python3 export_parquet.py --db output/decisions.db  # explicit DB
     python3 export_parquet.py --jsonl                   # force JSONL
+    python3 export_parquet.py --full --workers 8        # rewrite every court
 """
 from __future__ import annotations
 
 import argparse
+import hashlib
 import json
 import logging
 import os
 import sqlite3
 import sys
-from datetime import date, datetime
+import time
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timezone
 from pathlib import Path
 
 import pyarrow as pa
@@ -156,17 +171,269 @@ def load_decisions(input_dir: Path) -> dict[str, dict]:
 
 
 BATCH_SIZE = 5000  # rows per batch to stay under memory limits
+ROW_GROUP_SIZE = BATCH_SIZE  # rows per Parquet row group, one batch in memory per worker
+MANIFEST_NAME = "_export_manifest.json"  # "_" prefix: ignored by Parquet dataset readers
+MANIFEST_VERSION = 1
+
+REQUIRED_FIELDS = ("court", "canton", "docket_number", "language")
+SCHEMA_FIELDS = [f.name for f in DECISION_SCHEMA]
+
+# Min/max statistics only for short columns readers filter on; statistics of
+# long text columns are truncated (useless for pushdown) but still cost space.
+STATISTICS_COLUMNS = [
+    "decision_id", "court", "canton", "chamber", "docket_number", "decision_date",
+    "publication_date", "language", "legal_area", "outcome", "decision_type",
+    "source", "has_full_text", "text_length",
+]
+# Rows within each court file are ordered by decision_date (missing last), then decision_id
+SORTING_COLUMNS = [
+    pq.SortingColumn(DECISION_SCHEMA.get_field_index("court")),
+    pq.SortingColumn(DECISION_SCHEMA.get_field_index("decision_date"), nulls_first=False),
+    pq.SortingColumn(DECISION_SCHEMA.get_field_index("decision_id")),
+]
+
+
+def _date_key(value) -> str | None:
+    """decision_date as normalize_row() will write it."""
+    if isinstance(value, (date, datetime)):
+        value = value.isoformat()
+    if value is None or value in ("None", "1970-01-01"):
+        return None
+    return value
+
+
+def _sort_key(decision_date: str | None, decision_id: str) -> tuple:
+    return (decision_date is None, decision_date or "", decision_id or "")
+
+
+def _schema_id() -> str:
+    return hashlib.sha256(DECISION_SCHEMA.to_string().encode()).hexdigest()[:16]
+
+
+def load_manifest(path: Path, source: str) -> dict:
+    """Per-court entries of the last export from *source*, or {} if unusable."""
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if (
+        data.get("version") != MANIFEST_VERSION
+        or data.get("source") != source
+        or data.get("row_group_size") != ROW_GROUP_SIZE
+        or data.get("schema") != _schema_id()
+    ):
+        return {}
+    return data.get("courts", {})
+
+
+def save_manifest(path: Path, source: str, courts: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps({
+        "version": MANIFEST_VERSION,
+        "source": source,
+        "row_group_size": ROW_GROUP_SIZE,
+        "schema": _schema_id(),
+        "updated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "courts": courts,
+    }, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def changed_row_groups(previous: dict | None, current: dict) -> list[int]:
+    """Row groups of a court file whose source rows were not in the previous export.
+
+    *previous* and *current* are manifest entries for the same court. An
+    importer that loaded the previous file only needs to read these row
+    groups (pq.ParquetFile.read_row_group); a group's hash covers exactly
+    its rows, so unchanged history keeps its hash even when new decisions
+    are appended at the end.
+    """
+    known = {g["hash"] for g in (previous or {}).get("row_groups", [])}
+    return [i for i, g in enumerate(current["row_groups"]) if g["hash"] not in known]
+
+
+def _plan_row_groups(keyed: list[tuple]) -> dict:
+    """Manifest entry for (sort key, row digest, location) items in output order."""
+    file_digest = hashlib.sha256()
+    groups = []
+    for start in range(0, len(keyed), ROW_GROUP_SIZE):
+        chunk = keyed[start:start + ROW_GROUP_SIZE]
+        digest = hashlib.sha256()
+        for _, row_digest, _ in chunk:
+            digest.update(row_digest)
+        dates = [key[1] for key, _, _ in chunk if not key[0]]
+        groups.append({
+            "rows": len(chunk),
+            "hash": digest.hexdigest(),
+            "min_date": dates[0] if dates else None,
+            "max_date": dates[-1] if dates else None,
+        })
+        file_digest.update(digest.digest())
+    return {"source_hash": file_digest.hexdigest(), "rows": len(keyed), "row_groups": groups}
+
+
+def _is_current(entry: dict, previous: dict | None, path: Path) -> bool:
+    """True if *path* was written from exactly the rows described by *entry*."""
+    if not previous or previous.get("source_hash") != entry["source_hash"]:
+        return False
+    try:
+        return path.stat().st_size == previous.get("file_size")
+    except OSError:
+        return False
+
+
+def _write_court_file(court: str, output_dir: Path, row_groups: Iterable[list[dict]]) -> int:
+    """Write one court's row groups to {court}.parquet (via .tmp). Returns the file size."""
+    tmp_path = output_dir / f"{court}.parquet.tmp"
+    final_path = output_dir / f"{court}.parquet"
+    writer = pq.ParquetWriter(
+        str(tmp_path), DECISION_SCHEMA, compression="zstd",
+        write_statistics=STATISTICS_COLUMNS, sorting_columns=SORTING_COLUMNS,
+    )
+    try:
+        for rows in row_groups:
+            normalized = [normalize_row(row) for row in rows]
+            table = pa.Table.from_pylist(
+                [{k: r.get(k) for k in SCHEMA_FIELDS} for r in normalized], schema=DECISION_SCHEMA,
+            )
+            writer.write_table(table, row_group_size=ROW_GROUP_SIZE)
+    except BaseException:
+        writer.close()
+        tmp_path.unlink(missing_ok=True)
+        raise
+    writer.close()
+    os.replace(str(tmp_path), str(final_path))
+    return final_path.stat().st_size
+
+
+def _run_court_jobs(jobs: dict, previous: dict) -> tuple[dict, list[str], int]:
+    """Wait for {court: future}; returns (manifest entries, failed courts, files written)."""
+    entries: dict[str, dict] = {}
+    failed: list[str] = []
+    written = 0
+    for court, future in jobs.items():
+        try:
+            outcome = future.result()
+        except Exception as e:
+            logger.error(f"  {court}: export failed: {e}")
+            failed.append(court)
+            # The previous file (if any) is untouched; keep its entry so the
+            # next run compares against what is actually on disk.
+            if court in previous:
+                entries[court] = previous[court]
+            continue
+        entries[court] = outcome["entry"]
+        if outcome["status"] == "exported":
+            written += 1
+            logger.info(
+                f"  {court}: {outcome['entry']['rows']} decisions, "
+                f"{len(outcome['entry']['row_groups'])} row groups ({outcome['seconds']:.1f}s)"
+            )
+        else:
+            logger.debug(f"  {court}: unchanged ({outcome['entry']['rows']} decisions)")
+    return entries, failed, written
+
+
+def _finish_export(
+    output_dir: Path, manifest_path: Path, source: str, entries: dict, failed: list[str], t0: float,
+    exported: int,
+) -> dict[str, int]:
+    """Save the manifest, remove files of vanished courts, log the summary."""
+    save_manifest(manifest_path, source, entries)
+
+    stale = {p.stem for p in output_dir.glob("*.parquet")} - set(entries) - set(failed)
+    for court_name in sorted(stale):
+        (output_dir / f"{court_name}.parquet").unlink()
+        logger.info(f"  Removed stale {court_name}.parquet")
+
+    results = {court: entry["rows"] for court, entry in entries.items()}
+    logger.info(
+        f"Exported {sum(results.values())} decisions across {len(results)} courts "
+        f"({exported} rewritten, {len(results) - exported} unchanged) in {time.perf_counter() - t0:.1f}s"
+    )
+    if failed:
+        raise RuntimeError(f"Export failed for {len(failed)} courts: {', '.join(sorted(failed))}")
+    return results
 
 
-def export_parquet(input_dir: Path, output_dir: Path) -> dict[str, int]:
-    """Export decisions to per-court Parquet files. Returns {court: count}.
+def _index_jsonl_file(path: str) -> list[tuple]:
+    """One (decision_id, court, date, offset, length, digest, missing) per JSON line."""
+    entries = []
+    offset = 0
+    with open(path, "rb") as f:
+        for line in f:
+            start, offset = offset, offset + len(line)
+            stripped = line.strip()
+            if not stripped:
+                continue
+            try:
+                row = json.loads(stripped)
+            except ValueError:
+                continue
+            did = row.get("decision_id") if isinstance(row, dict) else None
+            if not did:
+                continue
+            entries.append((
+                did,
+                row.get("court"),
+                _date_key(row.get("decision_date")),
+                start,
+                len(line),
+                hashlib.blake2b(stripped, digest_size=16).digest(),
+                [k for k in REQUIRED_FIELDS if not row.get(k)],
+            ))
+    return entries
+
+
+def _export_jsonl_court(
+    court: str, output_dir: str, entry: dict, files: list[str], locations: list[tuple],
+) -> dict:
+    """Worker: write one court from (file index, offset, length) line locations."""
+    t0 = time.perf_counter()
+    handles: dict[int, object] = {}
+
+    def row_groups():
+        for start in range(0, len(locations), ROW_GROUP_SIZE):
+            rows = []
+            for file_idx, offset, length in locations[start:start + ROW_GROUP_SIZE]:
+                if file_idx not in handles:
+                    handles[file_idx] = open(files[file_idx], "rb")
+                f = handles[file_idx]
+                f.seek(offset)
+                rows.append(json.loads(f.read(length)))
+            yield rows
 
-    Two-pass approach to stay memory-efficient:
-    1. First pass: collect all unique decision_ids per court (just IDs, not data)
-    2. Second pass: stream data, write per-court Parquet using ParquetWriter
+    try:
+        size = _write_court_file(court, Path(output_dir), row_groups())
+    finally:
+        for f in handles.values():
+            f.close()
+    return {
+        "status": "exported",
+        "entry": {**entry, "file_size": size},
+        "seconds": time.perf_counter() - t0,
+    }
 
-    This avoids loading full texts into memory.
+
+def export_parquet(
+    input_dir: Path,
+    output_dir: Path,
+    *,
+    workers: int | None = None,
+    manifest_path: Path | None = None,
+    full: bool = False,
+) -> dict[str, int]:
+    """Export decisions from JSONL files to per-court Parquet files. Returns {court: count}.
+
+    1. Index: each JSONL file is parsed in a worker process into (id, court,
+       date, line offset, line hash) entries; the main process deduplicates
+       by decision_id (first-seen wins) and groups the lines by court.
+    2. Export: courts whose line hashes match the manifest and whose file is
+       still on disk are skipped; the rest are written in parallel, one
+       court per worker, reading lines back by offset, one row group at a time.
     """
+    t0 = time.perf_counter()
     output_dir.mkdir(parents=True, exist_ok=True)
     jsonl_files = sorted(input_dir.glob("*.jsonl"))
 
@@ -174,153 +441,157 @@ def export_parquet(input_dir: Path, output_dir: Path) -> dict[str, int]:
         logger.warning(f"No JSONL files found in {input_dir}")
         return {}
 
-    schema_fields = {f.name for f in DECISION_SCHEMA}
-    results = {}
+    workers = workers or os.cpu_count() or 1
+    manifest_path = manifest_path or output_dir / MANIFEST_NAME
+    previous = {} if full else load_manifest(manifest_path, "jsonl")
+    files = [str(p) for p in jsonl_files]
 
     # Global dedup: keep first-seen immutable record for each decision_id.
     global_seen: set[str] = set()
+    by_court: dict[str, list[tuple]] = {}
 
-    # Use per-court ParquetWriter objects for streaming writes
-    writers: dict[str, pq.ParquetWriter] = {}
-
-    try:
-        for jsonl_file in jsonl_files:
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for file_idx, indexed in enumerate(pool.map(_index_jsonl_file, files)):
             file_count = 0
-            batch_by_court: dict[str, list[dict]] = {}
-
-            with open(jsonl_file, encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    try:
-                        row = json.loads(line)
-                        did = row.get("decision_id")
-                        if not did or did in global_seen:
-                            continue
-                        global_seen.add(did)
-
-                        # Skip rows missing required fields (match FTS5 constraints)
-                        if not all(row.get(k) for k in ("court", "canton", "docket_number", "language")):
-                            missing = [k for k in ("court", "canton", "docket_number", "language") if not row.get(k)]
-                            logger.warning(f"Skipping {did}: missing {', '.join(missing)}")
-                            continue
-
-                        court = row.get("court", "unknown")
-                        batch_by_court.setdefault(court, []).append(row)
-                        file_count += 1
-
-                        # Flush per-court batches when they get large
-                        if len(batch_by_court.get(court, [])) >= BATCH_SIZE:
-                            rows = batch_by_court.pop(court)
-                            _write_rows(rows, court, output_dir, writers, schema_fields)
-                            results[court] = results.get(court, 0) + len(rows)
-                    except json.JSONDecodeError:
-                        continue
-
-            # Flush remaining rows for this file
-            for court, rows in batch_by_court.items():
-                _write_rows(rows, court, output_dir, writers, schema_fields)
-                results[court] = results.get(court, 0) + len(rows)
-
+            for did, court, decision_date, offset, length, digest, missing in indexed:
+                if did in global_seen:
+                    continue
+                global_seen.add(did)
+                # Skip rows missing required fields (match FTS5 constraints)
+                if missing:
+                    logger.warning(f"Skipping {did}: missing {', '.join(missing)}")
+                    continue
+                by_court.setdefault(court, []).append(
+                    (_sort_key(decision_date, did), digest, (file_idx, offset, length))
+                )
+                file_count += 1
             if file_count:
-                logger.info(f"  Processed {jsonl_file.name}: {file_count} decisions")
+                logger.info(f"  Indexed {jsonl_files[file_idx].name}: {file_count} decisions")
+        del global_seen
+
+        entries: dict[str, dict] = {}
+        jobs = {}
+        for court in sorted(by_court):
+            keyed = by_court.pop(court)
+            keyed.sort(key=lambda item: item[0])
+            entry = _plan_row_groups(keyed)
+            if _is_current(entry, previous.get(court), output_dir / f"{court}.parquet"):
+                entries[court] = previous[court]
+                continue
+            jobs[court] = pool.submit(
+                _export_jsonl_court, court, str(output_dir), entry, files, [loc for _, _, loc in keyed],
+            )
+        logger.info(f"Writing {len(jobs)} of {len(jobs) + len(entries)} courts with {workers} workers")
 
-    finally:
-        # Close all writers and atomically rename .tmp → .parquet
-        for court, writer in writers.items():
-            writer.close()
-            tmp_path = output_dir / f"{court}.parquet.tmp"
-            final_path = output_dir / f"{court}.parquet"
-            if tmp_path.exists():
-                os.replace(str(tmp_path), str(final_path))
-            logger.info(f"  {court}: {results.get(court, 0)} total")
-
-    logger.info(f"Exported {sum(results.values())} decisions across {len(results)} courts")
-    return results
+        written, failed, exported = _run_court_jobs(jobs, previous)
+    entries.update(written)
+    return _finish_export(output_dir, manifest_path, "jsonl", entries, failed, t0, exported)
 
 
-def _write_rows(
-    rows: list[dict],
-    court: str,
-    output_dir: Path,
-    writers: dict[str, pq.ParquetWriter],
-    schema_fields: set,
-):
-    """Write rows to a per-court ParquetWriter (streaming, no read-back)."""
-    normalized = [normalize_row(row) for row in rows]
-    clean_rows = [{k: r.get(k) for k in schema_fields} for r in normalized]
-    table = pa.Table.from_pylist(clean_rows, schema=DECISION_SCHEMA)
+def _connect_immutable(db_path: str) -> sqlite3.Connection:
+    return sqlite3.connect(f"file:{db_path}?immutable=1", uri=True)
+
+
+def _db_row_groups(conn: sqlite3.Connection, rowids: list[int]):
+    """Full rows for *rowids*, in that order, one row group at a time."""
+    for start in range(0, len(rowids), ROW_GROUP_SIZE):
+        group = rowids[start:start + ROW_GROUP_SIZE]
+        by_rowid: dict[int, dict] = {}
+        for i in range(0, len(group), 500):
+            part = group[i:i + 500]
+            cursor = conn.execute(
+                f"SELECT rowid AS _rowid, * FROM decisions WHERE rowid IN ({','.join('?' * len(part))})",
+                part,
+            )
+            col_names = [desc[0] for desc in cursor.description]
+            for row_tuple in cursor:
+                d = dict(zip(col_names, row_tuple))
+                by_rowid[d.pop("_rowid")] = d
+        yield [by_rowid[rowid] for rowid in group]
 
-    if court not in writers:
-        filepath = output_dir / f"{court}.parquet.tmp"
-        writers[court] = pq.ParquetWriter(str(filepath), DECISION_SCHEMA, compression="zstd")
 
-    writers[court].write_table(table)
+def _export_db_court(db_path: str, court: str, output_dir: str, previous: dict | None) -> dict:
+    """Worker: fingerprint one court's rows and rewrite its file if they changed.
 
+    The fingerprint reads every exported column except full_text, which is
+    represented by content_hash (its length when no hash was computed yet)
+    and the rowid, so replaced rows are detected without reading the texts.
+    The same pass yields the output order, by which the full rows are then
+    fetched one row group at a time.
+    """
+    t0 = time.perf_counter()
+    path = Path(output_dir) / f"{court}.parquet"
+    conn = _connect_immutable(db_path)
+    try:
+        columns = [r[1] for r in conn.execute("PRAGMA table_info(decisions)")]
+        tracked = [
+            c for c in columns
+            if c in SCHEMA_FIELDS and c not in ("decision_id", "decision_date", "full_text")
+        ]
+        text_probe = "length(full_text)"
+        if "content_hash" in columns:
+            text_probe = f"COALESCE(content_hash, {text_probe})"
+        keyed = []
+        for row in conn.execute(
+            f"SELECT rowid, decision_id, decision_date, {text_probe}"
+            f"{''.join(', ' + c for c in tracked)} FROM decisions WHERE court = ?",
+            (court,),
+        ):
+            digest = hashlib.blake2b(repr(row).encode(), digest_size=16).digest()
+            keyed.append((_sort_key(_date_key(row[2]), row[1]), digest, row[0]))
+        keyed.sort(key=lambda item: item[0])
+        entry = _plan_row_groups(keyed)
+
+        if _is_current(entry, previous, path):
+            return {"status": "unchanged", "entry": previous, "seconds": time.perf_counter() - t0}
+        size = _write_court_file(court, path.parent, _db_row_groups(conn, [rowid for _, _, rowid in keyed]))
+    finally:
+        conn.close()
+    return {
+        "status": "exported",
+        "entry": {**entry, "file_size": size},
+        "seconds": time.perf_counter() - t0,
+    }
 
-def export_from_db(db_path: Path, output_dir: Path) -> dict[str, int]:
+
+def export_from_db(
+    db_path: Path,
+    output_dir: Path,
+    *,
+    workers: int | None = None,
+    manifest_path: Path | None = None,
+    full: bool = False,
+) -> dict[str, int]:
     """Export decisions from the deduplicated FTS5 SQLite DB to Parquet.
 
     Reads from the database built by build_fts5.py, ensuring Parquet files
-    match the search index exactly (same dedup, same row count).
+    match the search index exactly (same dedup, same row count). Courts are
+    exported in parallel, one per worker process; a court whose rows are
+    unchanged since the manifest was written keeps its file.
     """
+    t0 = time.perf_counter()
     output_dir.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(f"file:{db_path}?immutable=1", uri=True)
-    conn.row_factory = sqlite3.Row
-
-    schema_fields = {f.name for f in DECISION_SCHEMA}
-    results: dict[str, int] = {}
-    writers: dict[str, pq.ParquetWriter] = {}
+    workers = workers or os.cpu_count() or 1
+    manifest_path = manifest_path or output_dir / MANIFEST_NAME
+    previous = {} if full else load_manifest(manifest_path, "db")
 
+    conn = _connect_immutable(str(db_path))
     try:
         total = conn.execute("SELECT COUNT(*) FROM decisions").fetchone()[0]
         courts = [r[0] for r in conn.execute(
             "SELECT DISTINCT court FROM decisions ORDER BY court"
         ).fetchall()]
-        logger.info(f"Exporting {total} decisions from {len(courts)} courts")
-
-        for court in courts:
-            cursor = conn.execute(
-                "SELECT * FROM decisions WHERE court = ?", (court,)
-            )
-            col_names = [desc[0] for desc in cursor.description]
-
-            batch: list[dict] = []
-            for row_tuple in cursor:
-                d = dict(zip(col_names, row_tuple))
-                batch.append(d)
-
-                if len(batch) >= BATCH_SIZE:
-                    _write_rows(batch, court, output_dir, writers, schema_fields)
-                    results[court] = results.get(court, 0) + len(batch)
-                    batch = []
-
-            if batch:
-                _write_rows(batch, court, output_dir, writers, schema_fields)
-                results[court] = results.get(court, 0) + len(batch)
-
-            logger.info(f"  {court}: {results.get(court, 0)} decisions")
-
     finally:
         conn.close()
-        for court, writer in writers.items():
-            writer.close()
-            tmp_path = output_dir / f"{court}.parquet.tmp"
-            final_path = output_dir / f"{court}.parquet"
-            if tmp_path.exists():
-                os.replace(str(tmp_path), str(final_path))
-
-    # Remove stale parquet files for courts no longer in DB
-    existing_pq = {p.stem for p in output_dir.glob("*.parquet")}
-    stale = existing_pq - set(results.keys())
-    for court_name in stale:
-        stale_path = output_dir / f"{court_name}.parquet"
-        stale_path.unlink()
-        logger.info(f"  Removed stale {court_name}.parquet")
+    logger.info(f"Exporting {total} decisions from {len(courts)} courts with {workers} workers")
 
-    logger.info(f"Exported {sum(results.values())} decisions across {len(results)} courts")
-    return results
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        jobs = {
+            court: pool.submit(_export_db_court, str(db_path), court, str(output_dir), previous.get(court))
+            for court in courts
+        }
+        entries, failed, exported = _run_court_jobs(jobs, previous)
+    return _finish_export(output_dir, manifest_path, "db", entries, failed, t0, exported)
 
 
 def main():
@@ -341,6 +612,15 @@ def main():
         "--output", type=str, default="output/dataset",
         help="Output directory for Parquet files (default: output/dataset)",
     )
+    parser.add_argument("--workers", type=int, default=None, help="Export processes (default: CPU count)")
+    parser.add_argument(
+        "--full", action="store_true",
+        help="Rewrite every court, ignoring the export manifest",
+    )
+    parser.add_argument(
+        "--manifest", type=str, default=None,
+        help=f"Export manifest (default: <output>/{MANIFEST_NAME})",
+    )
     parser.add_argument("-v", "--verbose", action="store_true")
     args = parser.parse_args()
 
@@ -349,14 +629,19 @@ def main():
         format="%(asctime)s %(name)s %(levelname)s %(message)s",
     )
 
+    options = {
+        "workers": args.workers,
+        "manifest_path": Path(args.manifest) if args.manifest else None,
+        "full": args.full,
+    }
     db_path = Path(args.db)
     if not args.jsonl and db_path.exists():
         logger.info(f"Reading from FTS5 database: {db_path}")
-        results = export_from_db(db_path, Path(args.output))
+        results = export_from_db(db_path, Path(args.output), **options)
     else:
         if not args.jsonl:
             logger.warning(f"No database at {db_path}, falling back to JSONL")
-        results = export_parquet(Path(args.input), Path(args.output))
+        results = export_parquet(Path(args.input), Path(args.output), **options)
     if results:
         total = sum(results.values())
         print(f"\nExported {total} decisions to {len(results)} Parquet files")
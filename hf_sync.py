@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+hf_sync.py — Delta upload of Parquet shards to HuggingFace
+==========================================================
+
+Keeps a local manifest of what was last pushed (per file: SHA-256, size,
+Parquet row count) and uploads only shards whose content changed, as one
+batched commit. Shards that disappeared locally are deleted in the same
+commit when pruning is enabled. Hashes are reused from the manifest while a
+file's size and mtime are unchanged, so a nightly run only reads new or
+rewritten shards.
+
+Without a manifest (first run, or another machine) the remote listing is
+used instead: HuggingFace reports the SHA-256 of LFS files, so shards that
+are already up to date are not uploaded again.
+
+A plain directory can stand in for the dataset repo (LocalDirRemote), which
+is what the tests use; --dry-run reports the planned transfer only.
+
+Usage:
+    python3 hf_sync.py output/dataset --repo voilaj/swiss-caselaw --prefix data --prune
+    python3 hf_sync.py output/dataset --repo voilaj/swiss-caselaw --dry-run
+    python3 hf_sync.py output/dataset --local-remote /tmp/fake-hub --prefix data
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+logger = logging.getLogger("hf_sync")
+
+MANIFEST_VERSION = 1
+
+
+def sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def parquet_rows(path: Path) -> int | None:
+    """Row count from the Parquet footer (no data pages read), or None."""
+    if path.suffix != ".parquet":
+        return None
+    try:
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(path).metadata.num_rows
+    except Exception as e:
+        logger.debug(f"Could not read row count of {path}: {e}")
+        return None
+
+
+class HubRemote:
+    """A HuggingFace dataset repo."""
+
+    def __init__(self, repo_id: str, token: str | None = None, repo_type: str = "dataset"):
+        from huggingface_hub import HfApi
+
+        self.api = HfApi(token=token)
+        self.repo_id = repo_id
+        self.repo_type = repo_type
+
+    @property
+    def name(self) -> str:
+        return f"hf:{self.repo_type}/{self.repo_id}"
+
+    def list_hashes(self, prefix: str) -> dict[str, str | None]:
+        """path_in_repo → SHA-256 (None for non-LFS files) below *prefix*."""
+        from huggingface_hub.hf_api import RepoFile
+
+        hashes: dict[str, str | None] = {}
+        try:
+            entries = self.api.list_repo_tree(
+                self.repo_id, path_in_repo=prefix or None, recursive=True, repo_type=self.repo_type,
+            )
+            for entry in entries:
+                if not isinstance(entry, RepoFile):
+                    continue
+                lfs = entry.lfs
+                if isinstance(lfs, dict):
+                    hashes[entry.path] = lfs.get("sha256")
+                else:
+                    hashes[entry.path] = getattr(lfs, "sha256", None)
+        except Exception as e:
+            logger.warning(f"Could not list {self.name}/{prefix}: {e}")
+        return hashes
+
+    def commit(self, uploads: list[tuple[Path, str]], deletions: list[str], message: str) -> None:
+        from huggingface_hub import CommitOperationAdd, CommitOperationDelete
+
+        operations = [
+            CommitOperationAdd(path_in_repo=remote, path_or_fileobj=str(local))
+            for local, remote in uploads
+        ] + [CommitOperationDelete(path_in_repo=remote) for remote in deletions]
+        self.api.create_commit(
+            self.repo_id, operations, commit_message=message, repo_type=self.repo_type,
+        )
+
+
+class LocalDirRemote:
+    """A local directory standing in for the dataset repo (tests, mirrors)."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.commits: list[dict] = []
+
+    @property
+    def name(self) -> str:
+        return f"dir:{self.root}"
+
+    def list_hashes(self, prefix: str) -> dict[str, str | None]:
+        base = self.root / prefix if prefix else self.root
+        if not base.exists():
+            return {}
+        return {
+            p.relative_to(self.root).as_posix(): sha256_file(p)
+            for p in sorted(base.rglob("*")) if p.is_file()
+        }
+
+    def commit(self, uploads: list[tuple[Path, str]], deletions: list[str], message: str) -> None:
+        for local, remote in uploads:
+            target = self.root / remote
+            target.parent.mkdir(parents=True, exist_ok=True)
+            tmp = target.with_name(target.name + ".tmp")
+            shutil.copyfile(local, tmp)
+            os.replace(tmp, target)
+        for remote in deletions:
+            (self.root / remote).unlink(missing_ok=True)
+        self.commits.append({
+            "message": message,
+            "uploads": [remote for _, remote in uploads],
+            "deletions": list(deletions),
+        })
+
+
+def load_manifest(path: Path, remote_name: str) -> dict | None:
+    """Files last pushed to *remote_name*, or None if unknown."""
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if data.get("version") != MANIFEST_VERSION or data.get("remote") != remote_name:
+        return None
+    return data.get("files", {})
+
+
+def save_manifest(path: Path, remote_name: str, files: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps({
+        "version": MANIFEST_VERSION,
+        "remote": remote_name,
+        "updated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "files": files,
+    }, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def scan_local(
+    local_dir: Path,
+    *,
+    prefix: str,
+    pattern: str,
+    extra_files: list[tuple[Path, str]],
+    previous: dict,
+) -> tuple[dict, dict[str, Path]]:
+    """Current manifest entries and their local paths.
+
+    Files are matched non-recursively with *pattern* and mapped below
+    *prefix*; *extra_files* are (local path, path_in_repo) pairs such as the
+    dataset card. A previous entry's hash is reused while size and mtime
+    match.
+    """
+    sources: dict[str, Path] = {}
+    if local_dir.exists():
+        for path in sorted(local_dir.glob(pattern)):
+            if path.is_file():
+                sources[f"{prefix}/{path.name}" if prefix else path.name] = path
+    for path, remote in extra_files:
+        if Path(path).is_file():
+            sources[remote] = Path(path)
+
+    entries = {}
+    for remote, path in sources.items():
+        st = path.stat()
+        old = previous.get(remote) or {}
+        if old.get("size") == st.st_size and old.get("mtime_ns") == st.st_mtime_ns and old.get("sha256"):
+            entries[remote] = dict(old)
+            continue
+        entries[remote] = {
+            "sha256": sha256_file(path),
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "rows": parquet_rows(path),
+        }
+    return entries, sources
+
+
+def sync(
+    local_dir: Path,
+    remote,
+    *,
+    manifest_path: Path,
+    prefix: str = "data",
+    pattern: str = "*.parquet",
+    extra_files: list[tuple[Path, str]] | None = None,
+    prune: bool = False,
+    dry_run: bool = False,
+    message: str | None = None,
+) -> dict:
+    """Upload changed shards of *local_dir* to *remote* in one commit.
+
+    Returns the plan: {"upload": [...], "delete": [...], "unchanged": n,
+    "upload_bytes": n, "local_bytes": n, "rows_uploaded": n, "committed": bool}.
+    """
+    extra_files = extra_files or []
+    previous = load_manifest(manifest_path, remote.name)
+    local_state = previous or {}
+    current, sources = scan_local(
+        local_dir, prefix=prefix, pattern=pattern, extra_files=extra_files, previous=local_state,
+    )
+
+    if previous is None:
+        # No record of the last push: compare against what the remote holds
+        # below the prefix. Files without a content hash (non-LFS, or extra
+        # files outside the prefix) are re-sent once.
+        remote_hashes = remote.list_hashes(prefix)
+        logger.info(f"No manifest for {remote.name}; compared against {len(remote_hashes)} remote files")
+        pushed = {path: {"sha256": sha} for path, sha in remote_hashes.items()}
+    else:
+        pushed = previous
+
+    upload = sorted(p for p, e in current.items() if (pushed.get(p) or {}).get("sha256") != e["sha256"])
+    delete = []
+    if prune:
+        scope = f"{prefix}/" if prefix else ""
+        delete = sorted(
+            p for p in pushed
+            if p not in current and p.startswith(scope) and "/" not in p[len(scope):]
+            and Path(p).match(pattern)
+        )
+
+    plan = {
+        "remote": remote.name,
+        "upload": upload,
+        "delete": delete,
+        "unchanged": len(current) - len(upload),
+        "upload_bytes": sum(current[p]["size"] for p in upload),
+        "local_bytes": sum(e["size"] for e in current.values()),
+        "rows_uploaded": sum(current[p].get("rows") or 0 for p in upload),
+        "committed": False,
+    }
+    logger.info(
+        f"Planned transfer to {remote.name}: {len(upload)} files, "
+        f"{plan['upload_bytes'] / 1e6:.1f} MB of {plan['local_bytes'] / 1e6:.1f} MB local "
+        f"({plan['unchanged']} unchanged, {len(delete)} deletions)"
+    )
+    for path in upload:
+        logger.debug(f"  upload {path} ({current[path]['size']} bytes, {current[path].get('rows')} rows)")
+    for path in delete:
+        logger.debug(f"  delete {path}")
+
+    if dry_run:
+        return plan
+
+    if upload or delete:
+        today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+        remote.commit(
+            [(sources[p], p) for p in upload],
+            delete,
+            message or f"Update {len(upload)} shards, delete {len(delete)} ({today})",
+        )
+        plan["committed"] = True
+    else:
+        logger.info("Remote is up to date, nothing to commit")
+
+    # Manifest = what the remote now holds
+    files = dict(pushed)
+    for path in delete:
+        files.pop(path, None)
+    files.update(current)
+    save_manifest(manifest_path, remote.name, files)
+    return plan
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Delta upload of Parquet shards to HuggingFace")
+    parser.add_argument("local_dir", type=Path, help="Directory with the shards")
+    parser.add_argument("--repo", type=str, default="voilaj/swiss-caselaw", help="HuggingFace dataset repo")
+    parser.add_argument("--local-remote", type=Path, help="Sync to this directory instead of HuggingFace")
+    parser.add_argument("--prefix", type=str, default="data", help="Target directory in the repo (default: data)")
+    parser.add_argument("--pattern", type=str, default="*.parquet")
+    parser.add_argument("--card", type=Path, help="Dataset card uploaded as README.md when changed")
+    parser.add_argument(
+        "--manifest", type=Path, default=None,
+        help="Manifest path (default: <local_dir>/../hf_manifest.json)",
+    )
+    parser.add_argument("--prune", action="store_true", help="Delete remote shards missing locally")
+    parser.add_argument("--dry-run", action="store_true", help="Only report the planned transfer")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format="%(asctime)s %(name)s %(levelname)s %(message)s",
+    )
+
+    if args.local_remote:
+        remote = LocalDirRemote(args.local_remote)
+    else:
+        try:
+            remote = HubRemote(args.repo, token=os.environ.get("HF_TOKEN"))
+        except ImportError:
+            logger.error("huggingface_hub not installed. Run: pip install huggingface_hub")
+            sys.exit(1)
+
+    plan = sync(
+        args.local_dir,
+        remote,
+        manifest_path=args.manifest or args.local_dir.parent / "hf_manifest.json",
+        prefix=args.prefix,
+        pattern=args.pattern,
+        extra_files=[(args.card, "README.md")] if args.card else None,
+        prune=args.prune,
+        dry_run=args.dry_run,
+    )
+    print(json.dumps(plan, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -54,6 +54,10 @@ Tools exposed:
 from __future__ import annotations
 
 import asyncio
+import contextvars
+import copy
+import functools
+import hashlib
 import json
 import logging
 import os
@@ -65,7 +69,10 @@ import threading
 import time
 import unicodedata
 import html as html_lib
-from datetime import datetime, timezone
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from datetime import datetime
 from pathlib import Path
 
 from mcp.server import Server
@@ -92,7 +99,10 @@ class MockDecisionRequest(BaseModel):
 
 # Add repo root to path so db_schema can be imported when run from any directory
 sys.path.insert(0, str(Path(__file__).parent))
-from db_schema import SCHEMA_SQL, INSERT_OR_IGNORE_SQL, INSERT_COLUMNS  # noqa: E402
+from db_schema import (  # noqa: E402
+    SCHEMA_SQL, INSERT_OR_IGNORE_SQL, INSERT_COLUMNS, MIGRATED_INDEX_SQL, decision_year,
+)
+from search_stack import tracing  # noqa: E402
 
 # Set to True when running with --remote (SSE transport).
 # Gates off update_database / check_update_status for remote clients.
@@ -126,6 +136,15 @@ DOCKET_MIN_CANDIDATE_POOL = 80
 RRF_RANK_CONSTANT = 60
 FULL_TEXT_RERANK_CHARS = 1400
 PASSAGE_SENTENCE_WINDOW = 4
+# Snippet selection looks at most this many characters of a decision and
+# scores only windows around query-term hits within them.
+SNIPPET_SCAN_CHARS = max(1000, int(os.environ.get("SWISS_CASELAW_SNIPPET_SCAN_CHARS", "120000")))
+SNIPPET_MAX_ANCHORS = 400
+SNIPPET_MAX_WINDOWS = 40
+SNIPPET_LEAD_CHARS = 160
+# Distinct raw queries whose QueryAnalysis (terms, refs, highlight regexes)
+# is memoized; repeated and paginated searches skip re-analysis.
+QUERY_ANALYSIS_CACHE_SIZE = max(0, int(os.environ.get("SWISS_CASELAW_QUERY_ANALYSIS_CACHE", "1024")))
 
 CROSS_ENCODER_ENABLED = os.environ.get("SWISS_CASELAW_CROSS_ENCODER", "0").lower() in {
     "1",
@@ -136,18 +155,43 @@ CROSS_ENCODER_MODEL = os.environ.get(
     "SWISS_CASELAW_CROSS_ENCODER_MODEL",
     "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1",
 )
+# Inference backend for the query encoder and cross-encoder: "auto" uses the
+# ONNX Runtime int8 graphs exported by search_stack.onnx_encoder when present
+# under SWISS_CASELAW_ONNX_DIR, "onnx" requires them, "torch" never uses them.
+ENCODER_BACKEND = os.environ.get("SWISS_CASELAW_ENCODER_BACKEND", "auto").lower()
+ONNX_MODEL_DIR = Path(os.environ.get("SWISS_CASELAW_ONNX_DIR", str(DATA_DIR / "onnx")))
+ONNX_THREADS = int(os.environ.get("SWISS_CASELAW_ONNX_THREADS", "0")) or None
 CROSS_ENCODER_TOP_N = max(1, int(os.environ.get("SWISS_CASELAW_CROSS_ENCODER_TOP_N", "30")))
 CROSS_ENCODER_WEIGHT = float(os.environ.get("SWISS_CASELAW_CROSS_ENCODER_WEIGHT", "1.4"))
+# Reranking is bounded per request: candidates are scored in pre-rank order,
+# one round of CROSS_ENCODER_BATCH_SIZE pairs at a time (shorter passages are
+# batched more densely), until the time budget would be exceeded or the
+# top CROSS_ENCODER_STABLE_K order stops changing and no unscored candidate
+# could still enter it. (query, decision) scores are cached across requests.
+CROSS_ENCODER_BUDGET_MS = float(os.environ.get("SWISS_CASELAW_CROSS_ENCODER_BUDGET_MS", "300"))
+CROSS_ENCODER_BATCH_SIZE = max(1, int(os.environ.get("SWISS_CASELAW_CROSS_ENCODER_BATCH", "8")))
+CROSS_ENCODER_STABLE_K = max(1, int(os.environ.get("SWISS_CASELAW_CROSS_ENCODER_STABLE_K", "10")))
+CROSS_ENCODER_CACHE_SIZE = max(0, int(os.environ.get("SWISS_CASELAW_CROSS_ENCODER_CACHE", "20000")))
 
 GRAPH_DB_PATH = Path(os.environ.get("SWISS_CASELAW_GRAPH_DB", str(DATA_DIR / "reference_graph.db")))
 STATUTES_DB_PATH = Path(os.environ.get("SWISS_CASELAW_STATUTES_DB", str(DATA_DIR / "statutes.db")))
 OK_COMMENTARIES_DB_PATH = Path(os.environ.get("SWISS_CASELAW_OK_DB", str(DATA_DIR / "ok_commentaries.db")))
+# get_law / get_commentary results kept in memory (0 disables); entries are
+# keyed by the DB file identity, so a rebuilt DB never serves stale results.
+STATUTE_CACHE_SIZE = max(0, int(os.environ.get("SWISS_CASELAW_STATUTE_CACHE", "512")))
+LEGISLATION_MIRROR_DB_PATH = Path(
+    os.environ.get("SWISS_CASELAW_LEGISLATION_MIRROR", str(DATA_DIR / "legislation_mirror.db"))
+)
 LEXFIND_CACHE_DB_PATH = Path(os.environ.get("SWISS_CASELAW_LEXFIND_CACHE", str(DATA_DIR / "lexfind_cache.db")))
 GRAPH_SIGNALS_ENABLED = os.environ.get("SWISS_CASELAW_GRAPH_SIGNALS", "1").lower() not in {
     "0",
     "false",
     "no",
 }
+# Unfiltered FTS trend queries matching more decisions than this are counted
+# on a 1-in-N rowid sample and scaled up (0 disables sampling).
+TREND_SAMPLE_THRESHOLD = max(0, int(os.environ.get("SWISS_CASELAW_TREND_SAMPLE_THRESHOLD", "200000")))
+TREND_STREAM_WINDOW = max(1000, int(os.environ.get("SWISS_CASELAW_TREND_STREAM_WINDOW", "100000")))
 
 # ── Vector search ─────────────────────────────────────────────
 VECTOR_DB_PATH = Path(os.environ.get("SWISS_CASELAW_VECTORS_DB", str(DATA_DIR / "vectors.db")))
@@ -155,12 +199,53 @@ VECTOR_SEARCH_ENABLED = os.environ.get("SWISS_CASELAW_VECTOR_SEARCH", "auto").lo
 VECTOR_WEIGHT = float(os.environ.get("SWISS_CASELAW_VECTOR_WEIGHT", "1.0"))
 VECTOR_K = int(os.environ.get("SWISS_CASELAW_VECTOR_K", "50"))
 VECTOR_SIGNAL_WEIGHT = float(os.environ.get("SWISS_CASELAW_VECTOR_SIGNAL_WEIGHT", "3.0"))
+VECTOR_MODEL_ID = "BAAI/bge-m3"
+# IVF-int8 ANN indexes built by build_vectors.py --ann-index; used instead of
+# sqlite-vec brute-force KNN when present ("auto") unless disabled ("0").
+ANN_SEARCH_ENABLED = os.environ.get("SWISS_CASELAW_ANN", "auto").lower()
+ANN_INDEX_DIR = Path(os.environ.get(
+    "SWISS_CASELAW_ANN_DIR", str(VECTOR_DB_PATH.parent / f"{VECTOR_DB_PATH.stem}_ann"),
+))
+# Recall/latency knob: IVF lists probed per query.
+ANN_NPROBE = max(1, int(os.environ.get("SWISS_CASELAW_ANN_NPROBE", "16")))
 
 # ── Sparse search ────────────────────────────────────────────
 SPARSE_SEARCH_ENABLED = os.environ.get("SPARSE_SEARCH_ENABLED", "auto").lower()
 SPARSE_SIGNAL_WEIGHT = float(os.environ.get("SWISS_CASELAW_SPARSE_SIGNAL_WEIGHT", "2.5"))
 SPARSE_RRF_WEIGHT = float(os.environ.get("SWISS_CASELAW_SPARSE_RRF_WEIGHT", "1.2"))
 SPARSE_K = int(os.environ.get("SWISS_CASELAW_SPARSE_K", "100"))
+# Memory-mapped postings built by build_vectors.py --sparse-postings; scored
+# with MaxScore instead of the sparse_terms GROUP BY when present.
+SPARSE_POSTINGS_DIR = Path(os.environ.get(
+    "SWISS_CASELAW_SPARSE_POSTINGS_DIR",
+    str(VECTOR_DB_PATH.parent / f"{VECTOR_DB_PATH.stem}_sparse"),
+))
+
+# ── Query encoder ────────────────────────────────────────────
+# Query embeddings (dense vector + sparse token ids) are cached in memory and,
+# unless SWISS_CASELAW_QUERY_EMBED_CACHE is set to "", in a SQLite file.
+# Concurrent cache misses are coalesced into one batched forward pass.
+QUERY_EMBED_CACHE_SIZE = int(os.environ.get("SWISS_CASELAW_QUERY_EMBED_CACHE_SIZE", "2048"))
+QUERY_EMBED_CACHE_PATH = os.environ.get(
+    "SWISS_CASELAW_QUERY_EMBED_CACHE", str(DATA_DIR / "query_embeddings.db"),
+).strip() or None
+QUERY_ENCODE_MAX_BATCH = max(1, int(os.environ.get("SWISS_CASELAW_QUERY_ENCODE_BATCH", "16")))
+QUERY_ENCODE_MAX_WAIT_MS = float(os.environ.get("SWISS_CASELAW_QUERY_ENCODE_WAIT_MS", "5"))
+
+# ── Metadata store ───────────────────────────────────────────
+# Opt-in: keeps court/canton/language/date/docket/authority columns for all
+# decisions in NumPy arrays (tens of MB) to filter/dedupe vector and sparse
+# hits without SQL.
+METADATA_STORE_ENABLED = os.environ.get("SWISS_CASELAW_METADATA_STORE", "0").lower() in {
+    "1", "true", "yes",
+}
+# After a failed load, wait this long before retrying; doubles per
+# consecutive failure up to METADATA_STORE_RETRY_MAX_SECONDS. The Fedlex
+# cache DB reopens on the same schedule.
+METADATA_STORE_RETRY_SECONDS = max(
+    1.0, float(os.environ.get("SWISS_CASELAW_METADATA_STORE_RETRY_S", "30"))
+)
+METADATA_STORE_RETRY_MAX_SECONDS = 900.0
 
 # ── LLM query expansion ───────────────────────────────────────
 LLM_EXPANSION_ENABLED = os.environ.get("LLM_EXPANSION_ENABLED", "true").lower() in {
@@ -168,6 +253,17 @@ LLM_EXPANSION_ENABLED = os.environ.get("LLM_EXPANSION_ENABLED", "true").lower()
 }
 ANTHROPIC_API_KEY = os.environ.get("ANTHROPIC_API_KEY", "")
 LLM_EXPANSION_TIMEOUT = float(os.environ.get("LLM_EXPANSION_TIMEOUT", "2.0"))
+LLM_EXPANSION_URL = os.environ.get("LLM_EXPANSION_URL", "https://api.anthropic.com/v1/messages")
+LLM_EXPANSION_MODEL = os.environ.get("LLM_EXPANSION_MODEL", "claude-haiku-4-5-20251001")
+# search_fts5 starts the expansion in the background before its first FTS
+# strategy and only merges the terms if they arrive within this deadline
+# (measured from the start of the search); late results still fill the cache.
+LLM_EXPANSION_DEADLINE_MS = float(os.environ.get("LLM_EXPANSION_DEADLINE_MS", "400"))
+LLM_EXPANSION_CACHE_DB_PATH = Path(
+    os.environ.get("LLM_EXPANSION_CACHE_DB", str(DATA_DIR / "llm_expansion_cache.db"))
+)
+LLM_EXPANSION_MEMORY_SIZE = int(os.environ.get("LLM_EXPANSION_MEMORY_SIZE", "2000"))
+LLM_EXPANSION_CACHE_MAX_ROWS = int(os.environ.get("LLM_EXPANSION_CACHE_MAX_ROWS", "50000"))
 
 EXPANSION_SYSTEM_PROMPT = (
     "You are a Swiss legal search assistant. Given a user's search query about "
@@ -185,11 +281,27 @@ EXPANSION_SYSTEM_PROMPT = (
     "Output ONLY the terms, one per line, no numbering or explanation."
 )
 
-_LLM_EXPANSION_CACHE: dict[str, list[str]] = {}
-
+_LLM_EXPANSION_CACHE: "OrderedDict[str, list[str]]" = OrderedDict()  # normalized query -> terms
+_LLM_EXPANSION_LOCK = threading.Lock()
+_LLM_EXPANSION_INFLIGHT: dict[str, Future] = {}
+_LLM_EXPANSION_EXECUTOR = None
+_LLM_EXPANSION_CLIENT = None
+_LLM_EXPANSION_DB: tuple[str, sqlite3.Connection] | None = None
+_LLM_EXPANSION_DB_FAILED = False
+_LLM_EXPANSION_WRITES = 0
+
+# Fetched article excerpts live in a WAL-mode SQLite cache shared by all
+# server processes. FEDLEX_CACHE_PATH is the former JSON cache, imported once
+# into the DB on first use.
+FEDLEX_CACHE_DB_PATH = Path(
+    os.environ.get("SWISS_CASELAW_FEDLEX_CACHE_DB", str(DATA_DIR / "fedlex_cache.db"))
+)
 FEDLEX_CACHE_PATH = Path(
     os.environ.get("SWISS_CASELAW_FEDLEX_CACHE", str(DATA_DIR / "fedlex_cache.json"))
 )
+FEDLEX_CACHE_TTL_DAYS = float(os.environ.get("SWISS_CASELAW_FEDLEX_CACHE_TTL_DAYS", "30"))
+FEDLEX_CACHE_MAX_ROWS = int(os.environ.get("SWISS_CASELAW_FEDLEX_CACHE_MAX_ROWS", "50000"))
+FEDLEX_CACHE_EVICT_EVERY = 200
 FEDLEX_TIMEOUT_SECONDS = float(os.environ.get("SWISS_CASELAW_FEDLEX_TIMEOUT", "5"))
 FEDLEX_USER_AGENT = os.environ.get(
     "SWISS_CASELAW_FEDLEX_USER_AGENT",
@@ -206,9 +318,18 @@ AUTH_TOKEN = os.environ.get("SWISS_CASELAW_AUTH_TOKEN", "")
 _cors_raw = os.environ.get("SWISS_CASELAW_CORS_ORIGINS", "")
 CORS_ORIGINS: list[str] = [o.strip() for o in _cors_raw.split(",") if o.strip()]
 
+# ── Observability ────────────────────────────────────────────
+# Per-stage spans feed /metrics (Prometheus text format, behind the same
+# bearer auth as the MCP endpoints). Tool calls / REST requests slower than
+# SLOW_QUERY_MS are appended to SLOW_QUERY_LOG (JSON lines) when it is set.
+METRICS_ENABLED = os.environ.get("SWISS_CASELAW_METRICS", "1").lower() in {"1", "true", "yes"}
+SLOW_QUERY_LOG = os.environ.get("SWISS_CASELAW_SLOW_QUERY_LOG", "")
+SLOW_QUERY_MS = float(os.environ.get("SWISS_CASELAW_SLOW_QUERY_MS", "2000"))
+tracing.configure_slow_log(Path(SLOW_QUERY_LOG) if SLOW_QUERY_LOG else None, SLOW_QUERY_MS)
+
 # ── LexFind legislation API ──────────────────────────────────
 LEXFIND_ENABLED = os.environ.get("LEXFIND_ENABLED", "true").lower() in {"1", "true", "yes"}
-LEXFIND_BASE_URL = "https://www.lexfind.ch/api/fe"
+LEXFIND_BASE_URL = os.environ.get("LEXFIND_BASE_URL", "https://www.lexfind.ch/api/fe").rstrip("/")
 LEXFIND_SEARCH_TIMEOUT = float(os.environ.get("LEXFIND_SEARCH_TIMEOUT", "10"))
 LEXFIND_LOOKUP_TIMEOUT = float(os.environ.get("LEXFIND_LOOKUP_TIMEOUT", "30"))
 LEXFIND_ENTITY_IDS: dict[str, int] = {
@@ -217,6 +338,17 @@ LEXFIND_ENTITY_IDS: dict[str, int] = {
     "NW": 14, "OW": 15, "SG": 16, "SH": 17, "SO": 18, "SZ": 19, "TG": 20,
     "TI": 21, "UR": 22, "VD": 23, "VS": 24, "ZG": 25, "ZH": 26, "INTLEX": 28,
 }
+# Calls share one keep-alive session; lookups hit an in-process LRU before
+# lexfind_cache.db, which is trimmed in the background every N writes.
+LEXFIND_POOL_SIZE = int(os.environ.get("LEXFIND_POOL_SIZE", "8"))
+LEXFIND_MEMORY_CACHE_SIZE = int(os.environ.get("LEXFIND_MEMORY_CACHE_SIZE", "1000"))
+LEXFIND_CACHE_MAX_ROWS = int(os.environ.get("LEXFIND_CACHE_MAX_ROWS", "5000"))
+LEXFIND_CACHE_EVICT_EVERY = int(os.environ.get("LEXFIND_CACHE_EVICT_EVERY", "100"))
+# Texts of law / change feeds mirrored by search_stack.sync_legislation_mirror
+# are served locally while younger than these ages; older entries are
+# refreshed live and only served when the live call fails.
+LEGISLATION_MIRROR_MAX_AGE_H = float(os.environ.get("LEGISLATION_MIRROR_MAX_AGE_H", "168"))
+LEGISLATION_CHANGES_MAX_AGE_H = float(os.environ.get("LEGISLATION_CHANGES_MAX_AGE_H", "24"))
 _lexfind_cache_broken = False  # set True on first SQLite failure, skip cache for process lifetime
 
 # Known FTS-searchable columns for explicit column filters (e.g., regeste:foo)
@@ -533,59 +665,246 @@ QUERY_DOCKET_PATTERNS = [
 
 _CROSS_ENCODER = None
 _CROSS_ENCODER_FAILED = False
+_CROSS_SCORE_CACHE: OrderedDict[tuple[str, str, bytes], float] = OrderedDict()
+_CROSS_SCORE_LOCK = threading.Lock()
+_CROSS_SCORE_STATS = {"hits": 0, "misses": 0}
 
 _VECTOR_MODEL = None
 _VECTOR_MODEL_FAILED = False
 
+_ANN_INDEXES: dict[str, tuple[float, object]] = {}
+_ANN_WARNED: set[str] = set()
+_ANN_LOCK = threading.Lock()
+
+_SPARSE_POSTINGS: tuple[float, object] | None = None
+_SPARSE_POSTINGS_WARNED = False
+_SPARSE_POSTINGS_LOCK = threading.Lock()
+
+_QUERY_ENCODER = None
+_QUERY_ENCODER_LOCK = threading.Lock()
+
+_METADATA_STORE = None
+_METADATA_STORE_FAILURES = 0
+_METADATA_STORE_RETRY_AT = 0.0  # time.monotonic() before which no reload is attempted
+_METADATA_STORE_LOCK = threading.Lock()
+_METADATA_STORE_LOADING = threading.Event()
+
 
 # ── LLM query expansion function ─────────────────────────────
 
 
-def _expand_query_with_llm(query: str) -> list[str]:
-    """Expand a search query using Claude Haiku for legal synonym/cross-lingual terms.
+def _llm_expansion_key(query: str) -> str:
+    """Cache key: NFC, case-folded, whitespace-collapsed query."""
+    return " ".join(unicodedata.normalize("NFC", query).lower().split())
 
-    Returns additional search terms, or empty list on failure/timeout/disabled.
-    Results are cached in-memory for the lifetime of the process.
-    Called from search_fts5 which runs in asyncio.to_thread, so sync HTTP is fine.
-    """
-    if not LLM_EXPANSION_ENABLED or not ANTHROPIC_API_KEY:
-        return []
 
-    cache_key = query.strip().lower()
-    if cache_key in _LLM_EXPANSION_CACHE:
-        return _LLM_EXPANSION_CACHE[cache_key]
+def _get_llm_expansion_db() -> sqlite3.Connection | None:
+    """Shared connection to the persistent expansion cache; callers hold the lock."""
+    global _LLM_EXPANSION_DB, _LLM_EXPANSION_DB_FAILED
+    if _LLM_EXPANSION_DB_FAILED:
+        return None
+    path = str(LLM_EXPANSION_CACHE_DB_PATH)
+    if _LLM_EXPANSION_DB is not None:
+        if _LLM_EXPANSION_DB[0] == path:
+            return _LLM_EXPANSION_DB[1]
+        _LLM_EXPANSION_DB[1].close()
+        _LLM_EXPANSION_DB = None
+    try:
+        LLM_EXPANSION_CACHE_DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(path, timeout=3.0, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA busy_timeout = 3000")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS expansions (
+                model TEXT NOT NULL,
+                query_key TEXT NOT NULL,
+                terms TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (model, query_key)
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_expansions_created ON expansions(created_at)")
+        conn.commit()
+    except Exception as e:
+        logger.warning("LLM expansion cache DB unavailable, using memory only: %s", e)
+        _LLM_EXPANSION_DB_FAILED = True
+        return None
+    _LLM_EXPANSION_DB = (path, conn)
+    return conn
+
+
+def _llm_expansion_cache_get(key: str) -> list[str] | None:
+    """Cached terms from the memory LRU, then the persistent DB."""
+    with _LLM_EXPANSION_LOCK:
+        terms = _LLM_EXPANSION_CACHE.get(key)
+        if terms is not None:
+            _LLM_EXPANSION_CACHE.move_to_end(key)
+            return terms
+        conn = _get_llm_expansion_db()
+        if conn is None:
+            return None
+        try:
+            row = conn.execute(
+                "SELECT terms FROM expansions WHERE model = ? AND query_key = ?",
+                (LLM_EXPANSION_MODEL, key),
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.debug("LLM expansion cache read failed: %s", e)
+            return None
+        if row is None:
+            return None
+        terms = json.loads(row[0])
+        _llm_expansion_memory_put(key, terms)
+        return terms
+
+
+def _llm_expansion_memory_put(key: str, terms: list[str]) -> None:
+    _LLM_EXPANSION_CACHE[key] = terms
+    _LLM_EXPANSION_CACHE.move_to_end(key)
+    while len(_LLM_EXPANSION_CACHE) > LLM_EXPANSION_MEMORY_SIZE:
+        _LLM_EXPANSION_CACHE.popitem(last=False)
+
+
+def _llm_expansion_cache_put(key: str, terms: list[str]) -> None:
+    global _LLM_EXPANSION_WRITES
+    with _LLM_EXPANSION_LOCK:
+        _llm_expansion_memory_put(key, terms)
+        conn = _get_llm_expansion_db()
+        if conn is None:
+            return
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO expansions (model, query_key, terms, created_at) VALUES (?, ?, ?, ?)",
+                (LLM_EXPANSION_MODEL, key, json.dumps(terms, ensure_ascii=False), time.time()),
+            )
+            _LLM_EXPANSION_WRITES += 1
+            if _LLM_EXPANSION_WRITES % 500 == 0:
+                conn.execute(
+                    """
+                    DELETE FROM expansions WHERE rowid IN (
+                        SELECT rowid FROM expansions ORDER BY created_at
+                        LIMIT max(0, (SELECT COUNT(*) FROM expansions) - ?)
+                    )
+                    """,
+                    (LLM_EXPANSION_CACHE_MAX_ROWS,),
+                )
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            logger.debug("LLM expansion cache write failed: %s", e)
+
 
+@tracing.traced("http.llm_expansion")
+def _fetch_llm_expansion(query: str) -> list[str] | None:
+    """One completion request; returns the terms or None on failure."""
+    global _LLM_EXPANSION_CLIENT
     try:
         import httpx
     except ImportError:
         logger.debug("httpx not installed, skipping LLM expansion")
-        return []
-
+        return None
+    if _LLM_EXPANSION_CLIENT is None:
+        _LLM_EXPANSION_CLIENT = httpx.Client(
+            limits=httpx.Limits(max_connections=8, max_keepalive_connections=4),
+        )
     try:
-        with httpx.Client(timeout=LLM_EXPANSION_TIMEOUT) as client:
-            resp = client.post(
-                "https://api.anthropic.com/v1/messages",
-                headers={
-                    "x-api-key": ANTHROPIC_API_KEY,
-                    "anthropic-version": "2023-06-01",
-                    "content-type": "application/json",
-                },
-                json={
-                    "model": "claude-haiku-4-5-20251001",
-                    "max_tokens": 150,
-                    "system": EXPANSION_SYSTEM_PROMPT,
-                    "messages": [{"role": "user", "content": query}],
-                },
-            )
-            resp.raise_for_status()
-            text = resp.json()["content"][0]["text"]
-            terms = [t.strip() for t in text.strip().split("\n") if t.strip()]
-            terms = terms[:6]
-            _LLM_EXPANSION_CACHE[cache_key] = terms
-            logger.debug("LLM expansion for %r: %s", query, terms)
-            return terms
+        resp = _LLM_EXPANSION_CLIENT.post(
+            LLM_EXPANSION_URL,
+            headers={
+                "x-api-key": ANTHROPIC_API_KEY,
+                "anthropic-version": "2023-06-01",
+                "content-type": "application/json",
+            },
+            json={
+                "model": LLM_EXPANSION_MODEL,
+                "max_tokens": 150,
+                "system": EXPANSION_SYSTEM_PROMPT,
+                "messages": [{"role": "user", "content": query}],
+            },
+            timeout=LLM_EXPANSION_TIMEOUT,
+        )
+        resp.raise_for_status()
+        text = resp.json()["content"][0]["text"]
     except Exception as e:
         logger.debug("LLM expansion failed for %r: %s", query, e)
+        return None
+    terms = [t.strip() for t in text.strip().split("\n") if t.strip()][:6]
+    logger.debug("LLM expansion for %r: %s", query, terms)
+    return terms
+
+
+def _start_llm_expansion(query: str) -> Future | None:
+    """Future resolving to the expansion terms for *query* ([] on failure).
+
+    Cache hits return a completed future; concurrent calls for the same
+    normalized query share one in-flight request. None when disabled.
+    """
+    global _LLM_EXPANSION_EXECUTOR
+    if not LLM_EXPANSION_ENABLED or not ANTHROPIC_API_KEY:
+        return None
+    key = _llm_expansion_key(query)
+    if not key:
+        return None
+    cached = _llm_expansion_cache_get(key)
+    if cached is not None:
+        done: Future = Future()
+        done.set_result(cached)
+        return done
+
+    with _LLM_EXPANSION_LOCK:
+        future = _LLM_EXPANSION_INFLIGHT.get(key)
+        if future is not None:
+            return future
+        future = Future()
+        _LLM_EXPANSION_INFLIGHT[key] = future
+        if _LLM_EXPANSION_EXECUTOR is None:
+            from concurrent.futures import ThreadPoolExecutor
+            _LLM_EXPANSION_EXECUTOR = ThreadPoolExecutor(
+                max_workers=4, thread_name_prefix="llm-expansion",
+            )
+
+    def _run():
+        terms = None
+        try:
+            terms = _fetch_llm_expansion(query)
+            if terms is not None:
+                _llm_expansion_cache_put(key, terms)
+        finally:
+            with _LLM_EXPANSION_LOCK:
+                _LLM_EXPANSION_INFLIGHT.pop(key, None)
+            future.set_result(terms or [])
+
+    # Run in the caller's context so the request span is kept.
+    _LLM_EXPANSION_EXECUTOR.submit(contextvars.copy_context().run, _run)
+    return future
+
+
+def _await_llm_expansion(future: Future | None, deadline: float) -> list[str]:
+    """Terms of a started expansion if available by *deadline* (perf_counter), else []."""
+    if future is None:
+        return []
+    if not future.done():
+        with tracing.span("llm_expansion_wait"):
+            try:
+                return future.result(timeout=max(0.0, deadline - time.perf_counter()))
+            except Exception:
+                return []
+    return future.result()
+
+
+def _expand_query_with_llm(query: str) -> list[str]:
+    """Expand a search query using Claude Haiku for legal synonym/cross-lingual terms.
+
+    Returns additional search terms, or empty list on failure/timeout/disabled.
+    Blocks until the (cached, coalesced) expansion completes; search_fts5
+    uses _start_llm_expansion / _await_llm_expansion to bound the wait.
+    """
+    future = _start_llm_expansion(query)
+    if future is None:
+        return []
+    try:
+        return future.result(timeout=LLM_EXPANSION_TIMEOUT + 1.0)
+    except Exception:
         return []
 
 
@@ -606,14 +925,15 @@ def get_db() -> sqlite3.Connection:
     last_error = None
     for _ in range(3):
         try:
-            conn = sqlite3.connect(
-                f"file:{DB_PATH}?immutable=1",
-                uri=True,
-                check_same_thread=False,
-                timeout=1.0,
-            )
-            conn.row_factory = sqlite3.Row
-            conn.execute("PRAGMA query_only = ON")  # read-only for safety
+            with tracing.span("db_open"):
+                conn = sqlite3.connect(
+                    f"file:{DB_PATH}?immutable=1",
+                    uri=True,
+                    check_same_thread=False,
+                    timeout=1.0,
+                )
+                conn.row_factory = sqlite3.Row
+                conn.execute("PRAGMA query_only = ON")  # read-only for safety
             return conn
         except sqlite3.OperationalError as e:
             last_error = e
@@ -765,15 +1085,12 @@ def _search_fts5_inner(
 
     where = (" AND " + " AND ".join(filters)) if filters else ""
 
-    is_docket_query = _looks_like_docket_query(fts_query)
-    has_explicit_syntax = _has_explicit_fts_syntax(fts_query)
-    inline_docket_candidates = _extract_inline_docket_candidates(fts_query)
-    # Try collapsing space-separated queries into docket form
-    collapsed = _collapse_spaced_docket(fts_query)
-    if collapsed and collapsed not in inline_docket_candidates:
-        inline_docket_candidates.insert(0, collapsed)
+    analysis = _analyze_query(fts_query)
+    is_docket_query = analysis.is_docket_query
+    has_explicit_syntax = analysis.has_explicit_syntax
+    inline_docket_candidates = list(analysis.inline_docket_candidates)
     inline_docket_results: list[dict] = []
-    query_preferred_courts = _detect_query_preferred_courts(fts_query)
+    query_preferred_courts = set(analysis.preferred_courts)
 
     # Docket-style lookups should prioritize exact/near-exact docket matches.
     if is_docket_query:
@@ -834,16 +1151,20 @@ def _search_fts5_inner(
 
     had_success = False
     candidate_meta: dict[str, dict] = {}
-    strategies, llm_terms = _build_query_strategies(fts_query)
+    # LLM expansion runs in the background while the first strategies execute
+    llm_expansion = None if is_docket_query else _start_llm_expansion(fts_query)
+    llm_deadline = time.perf_counter() + LLM_EXPANSION_DEADLINE_MS / 1000.0
+    llm_result: dict = {}
+    strategies, _ = _build_query_strategies(fts_query, analysis=analysis, llm_terms=[])
     target_pool = _target_candidate_pool(
         limit=limit,
         offset=offset,
         is_docket=is_docket_query,
         has_explicit_syntax=has_explicit_syntax,
     )
-    query_has_expandable_terms = _query_has_expandable_terms(fts_query)
+    query_has_expandable_terms = analysis.has_expandable_terms
 
-    for idx, strategy in enumerate(strategies):
+    for idx, strategy in enumerate(_with_llm_strategy(strategies, llm_expansion, llm_deadline, llm_result)):
         match_query = strategy["query"]
         strategy_name = strategy.get("name", "")
         strategy_weight = float(strategy.get("weight", 1.0))
@@ -854,7 +1175,7 @@ def _search_fts5_inner(
             break
         if strategy_name == "nl_or_expanded" and not query_has_expandable_terms:
             continue
-        if expensive_strategy and _query_has_numeric_terms(fts_query):
+        if expensive_strategy and analysis.has_numeric_terms:
             continue
         try:
             candidate_limit = min(max(target_pool, effective_need * 2), MAX_RERANK_CANDIDATES)
@@ -863,10 +1184,11 @@ def _search_fts5_inner(
                     MAX_RERANK_CANDIDATES,
                     max(candidate_limit, target_pool * 4),
                 )
-            rows = conn.execute(
-                sql,
-                [match_query] + params + [candidate_limit],
-            ).fetchall()
+            with tracing.span(f"fts.{strategy_name or 'query'}"):
+                rows = conn.execute(
+                    sql,
+                    [match_query] + params + [candidate_limit],
+                ).fetchall()
             had_success = True
         except sqlite3.OperationalError as e:
             logger.debug(
@@ -908,17 +1230,22 @@ def _search_fts5_inner(
     vector_scores: dict[str, float] = {}
     sparse_scores: dict[str, float] = {}
     if not is_docket_query and not has_explicit_syntax:
+        llm_terms = llm_result.get("llm_terms")
+        if llm_terms is None:
+            llm_terms = _await_llm_expansion(llm_expansion, llm_deadline)
         vector_query = fts_query
         if llm_terms:
             vector_query = f"{fts_query} {' '.join(llm_terms)}"
         vector_scores = _search_vectors(
             query=vector_query,
             language=language,
+            court=court.lower() if court else None,
         )
         # Merge chunk-level vector results (if vec_chunks table exists)
         chunk_scores = _search_vectors_chunks(
             query=vector_query,
             language=language,
+            court=court.lower() if court else None,
         )
         if chunk_scores:
             for did, dist in chunk_scores.items():
@@ -928,32 +1255,30 @@ def _search_fts5_inner(
         # Sparse search (if sparse_terms table exists)
         sparse_scores = _search_sparse(query=fts_query)
 
+        search_filters = {
+            "court": court, "canton": canton, "language": language,
+            "date_from": date_from, "date_to": date_to,
+        }
+
         # Add vector-only candidates to the pool (only when VECTOR_WEIGHT > 0)
         if vector_scores:
             vec_only_ids = (
-                set(vector_scores.keys()) - set(candidate_meta.keys())
+                [
+                    did for did, _dist in sorted(vector_scores.items(), key=lambda x: x[1])
+                    if did not in candidate_meta
+                ]
                 if VECTOR_WEIGHT > 0
-                else set()
+                else []
             )
-            if vec_only_ids:
-                ph = ",".join("?" for _ in vec_only_ids)
-                vec_rows = conn.execute(
-                    f"""SELECT d.decision_id, d.court, d.canton, d.chamber,
-                           d.docket_number, d.decision_date, d.language,
-                           d.title, d.regeste, d.full_text AS full_text_raw,
-                           '' as snippet, d.source_url, d.pdf_url,
-                           0.0 as bm25_score
-                    FROM decisions d WHERE d.decision_id IN ({ph})""",
-                    list(vec_only_ids),
-                ).fetchall()
-                for row in vec_rows:
-                    did = row["decision_id"]
-                    candidate_meta[did] = {
-                        "row": row,
-                        "best_bm25": 0.0,
-                        "rrf_score": 0.0,
-                        "strategy_hits": 0,
-                    }
+            for row in _fetch_extra_candidate_rows(
+                conn, vec_only_ids, where=where, params=params, filters=search_filters,
+            ):
+                candidate_meta[row["decision_id"]] = {
+                    "row": row,
+                    "best_bm25": 0.0,
+                    "rrf_score": 0.0,
+                    "strategy_hits": 0,
+                }
             for rank, (did, _dist) in enumerate(
                 sorted(vector_scores.items(), key=lambda x: x[1]), start=1
             ):
@@ -966,26 +1291,19 @@ def _search_fts5_inner(
 
         # Add sparse-only candidates to the pool
         if sparse_scores:
-            sparse_only_ids = set(sparse_scores.keys()) - set(candidate_meta.keys())
-            if sparse_only_ids:
-                ph = ",".join("?" for _ in sparse_only_ids)
-                sp_rows = conn.execute(
-                    f"""SELECT d.decision_id, d.court, d.canton, d.chamber,
-                           d.docket_number, d.decision_date, d.language,
-                           d.title, d.regeste, d.full_text AS full_text_raw,
-                           '' as snippet, d.source_url, d.pdf_url,
-                           0.0 as bm25_score
-                    FROM decisions d WHERE d.decision_id IN ({ph})""",
-                    list(sparse_only_ids),
-                ).fetchall()
-                for row in sp_rows:
-                    did = row["decision_id"]
-                    candidate_meta[did] = {
-                        "row": row,
-                        "best_bm25": 0.0,
-                        "rrf_score": 0.0,
-                        "strategy_hits": 0,
-                    }
+            sparse_only_ids = [
+                did for did, _score in sorted(sparse_scores.items(), key=lambda x: -x[1])
+                if did not in candidate_meta
+            ]
+            for row in _fetch_extra_candidate_rows(
+                conn, sparse_only_ids, where=where, params=params, filters=search_filters,
+            ):
+                candidate_meta[row["decision_id"]] = {
+                    "row": row,
+                    "best_bm25": 0.0,
+                    "rrf_score": 0.0,
+                    "strategy_hits": 0,
+                }
             for rank, (did, _score) in enumerate(
                 sorted(sparse_scores.items(), key=lambda x: -x[1]), start=1
             ):
@@ -1018,6 +1336,7 @@ def _search_fts5_inner(
                 sparse_scores=sparse_scores,
                 offset=0,
                 sort=sort,
+                analysis=analysis,
             )
             merged = _merge_priority_results(
                 primary=inline_docket_results,
@@ -1038,6 +1357,7 @@ def _search_fts5_inner(
             sparse_scores=sparse_scores,
             offset=offset,
             sort=sort,
+            analysis=analysis,
         )
         reranked = _dedupe_results_by_decision_id(reranked)
         return reranked, total_candidates
@@ -1053,6 +1373,45 @@ def _search_fts5_inner(
     return [], 0
 
 
+def _fetch_extra_candidate_rows(
+    conn: sqlite3.Connection,
+    decision_ids: list[str],
+    *,
+    where: str,
+    params: list,
+    filters: dict,
+) -> list[sqlite3.Row]:
+    """Fetch rerank rows for vector/sparse-only candidates (best first).
+
+    The search filters apply here too. With the metadata store loaded, ids are
+    filtered and canonical-deduped in memory and fetched by rowid; otherwise
+    they are looked up by decision_id and filtered in SQL.
+    """
+    if not decision_ids:
+        return []
+    store = _get_metadata_store()
+    if store is not None:
+        kept = store.dedupe_ids(store.filter_ids(decision_ids, **filters))
+        keys = list(store.rowids(kept).values())
+        key_column = "d.rowid"
+    else:
+        keys = decision_ids
+        key_column = "d.decision_id"
+    if not keys:
+        return []
+    ph = ",".join("?" for _ in keys)
+    return conn.execute(
+        f"""SELECT d.decision_id, d.court, d.canton, d.chamber,
+               d.docket_number, d.decision_date, d.language,
+               d.title, d.regeste, d.full_text AS full_text_raw,
+               '' as snippet, d.source_url, d.pdf_url,
+               0.0 as bm25_score
+        FROM decisions d WHERE {key_column} IN ({ph}){where}""",
+        list(keys) + params,
+    ).fetchall()
+
+
+@tracing.traced("docket")
 def _search_by_docket(
     conn: sqlite3.Connection,
     raw_query: str,
@@ -1358,21 +1717,30 @@ def _dedupe_results_by_decision_id(rows: list[dict]) -> list[dict]:
     Computes a canonical key from court+docket+date to collapse formatting
     variants of the same case (first/highest-ranked wins).
     """
+    store = _get_metadata_store()
+    known = (
+        store.canonical_hashes([r.get("decision_id") for r in rows if r.get("decision_id")])
+        if store is not None
+        else {}
+    )
     out: list[dict] = []
     seen_ids: set[str] = set()
-    seen_canonical: set[str] = set()
+    seen_canonical: set[int] = set()
     for row in rows:
         did = row.get("decision_id")
         if not did or did in seen_ids:
             continue
-        ckey = _make_canonical_key(
-            row.get("court", ""), row.get("docket_number", ""), row.get("decision_date"),
-        )
-        # Skip canonical dedup for empty-docket keys (format: court||date)
-        if ckey and "||" not in ckey and ckey in seen_canonical:
+        ckey = known.get(did)
+        if ckey is None:
+            key = _make_canonical_key(
+                row.get("court", ""), row.get("docket_number", ""), row.get("decision_date"),
+            )
+            # Skip canonical dedup for empty-docket keys (format: court||date)
+            ckey = _key_hash(key) if "||" not in key else 0
+        if ckey and ckey in seen_canonical:
             continue
         seen_ids.add(did)
-        if ckey and "||" not in ckey:
+        if ckey:
             seen_canonical.add(ckey)
         out.append(row)
     return out
@@ -1461,6 +1829,31 @@ def _get_graph_conn() -> sqlite3.Connection | None:
         return None
 
 
+def _get_fts_graph_conn() -> sqlite3.Connection | None:
+    """Open the FTS5 DB with the reference graph attached as schema ``graph``.
+
+    Lets FTS hits be joined against citation authority in a single SQL plan.
+    Returns None if the graph DB is unavailable; raises FileNotFoundError
+    (via get_db) if the decisions DB hasn't been built.
+    """
+    global _graph_warned
+    if not GRAPH_DB_PATH.exists():
+        if not _graph_warned:
+            logger.warning("Reference graph DB not found at %s — citation features disabled", GRAPH_DB_PATH)
+            _graph_warned = True
+        return None
+    conn = get_db()
+    try:
+        conn.execute(
+            "ATTACH DATABASE ? AS graph", (f"file:{GRAPH_DB_PATH}?mode=ro",)
+        )
+        return conn
+    except sqlite3.Error as e:
+        logger.warning("Failed to attach graph DB: %s", e)
+        conn.close()
+        return None
+
+
 def _get_vec_conn() -> sqlite3.Connection | None:
     """Open a read-only connection to the vector DB, or None if unavailable."""
     global _vec_warned
@@ -1526,6 +1919,124 @@ def _get_ok_conn() -> sqlite3.Connection | None:
         return None
 
 
+_LOOKUP_LOCAL = threading.local()
+_STATUTE_CACHE: OrderedDict = OrderedDict()
+_STATUTE_CACHE_LOCK = threading.Lock()
+_STATUTE_CACHE_STATS = {"hits": 0, "misses": 0}
+
+
+def _get_lookup_conn(opener, db_path: Path):
+    """Per-thread read-only connection for statute / commentary lookups.
+
+    *opener* is _get_statutes_conn or _get_ok_conn. Returns (conn, identity,
+    columns) or None; the connection is reopened when the DB file is replaced
+    (identity = path, mtime, size), and *columns* maps each table to its
+    column names so callers can use build-time lookup columns when present.
+    Callers must not close the connection.
+    """
+    try:
+        st = db_path.stat()
+        identity = (str(db_path), st.st_mtime_ns, st.st_size)
+    except OSError:
+        identity = None
+    conns = getattr(_LOOKUP_LOCAL, "conns", None)
+    if conns is None:
+        conns = _LOOKUP_LOCAL.conns = {}
+    cached = conns.get(opener.__name__)
+    if cached is not None and identity is not None and cached[1] == identity:
+        return cached
+    if cached is not None:
+        del conns[opener.__name__]
+        cached[0].close()
+    conn = opener()
+    if conn is None or identity is None:
+        if conn is not None:
+            conn.close()
+        return None
+    try:
+        tables = [r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+        columns = {t: {r[1] for r in conn.execute(f'PRAGMA table_info("{t}")')} for t in tables}
+    except sqlite3.Error as e:
+        logger.warning("Failed to read schema of %s: %s", db_path, e)
+        conn.close()
+        return None
+    cached = conns[opener.__name__] = (conn, identity, columns)
+    return cached
+
+
+def _statute_cache_get(key: tuple) -> dict | None:
+    with _STATUTE_CACHE_LOCK:
+        value = _STATUTE_CACHE.get(key)
+        if value is None:
+            _STATUTE_CACHE_STATS["misses"] += 1
+            return None
+        _STATUTE_CACHE.move_to_end(key)
+        _STATUTE_CACHE_STATS["hits"] += 1
+    # Results hold nested lists/dicts; callers must not mutate the cached copy.
+    return copy.deepcopy(value)
+
+
+def _statute_cache_put(key: tuple, value: dict) -> None:
+    if STATUTE_CACHE_SIZE <= 0:
+        return
+    value = copy.deepcopy(value)
+    with _STATUTE_CACHE_LOCK:
+        _STATUTE_CACHE[key] = value
+        _STATUTE_CACHE.move_to_end(key)
+        while len(_STATUTE_CACHE) > STATUTE_CACHE_SIZE:
+            _STATUTE_CACHE.popitem(last=False)
+
+
+def _resolve_law_abbreviation(conn: sqlite3.Connection, columns: dict, abbreviation: str) -> str | None:
+    """SR number for a de/fr/it law abbreviation (case-insensitive), or None."""
+    abbr_upper = abbreviation.strip().upper()
+    if "law_aliases" in columns:
+        row = conn.execute(
+            "SELECT sr_number FROM law_aliases WHERE alias = ? LIMIT 1", (abbr_upper,)
+        ).fetchone()
+    else:
+        # statutes.db built before law_aliases existed
+        row = conn.execute(
+            """SELECT sr_number FROM laws
+               WHERE UPPER(abbr_de) = ? OR UPPER(abbr_fr) = ? OR UPPER(abbr_it) = ?
+               LIMIT 1""",
+            (abbr_upper, abbr_upper, abbr_upper),
+        ).fetchone()
+    return row["sr_number"] if row else None
+
+
+def _load_onnx_model(kind: str):
+    """ONNX Runtime query ("query") or cross-encoder ("cross"), or None.
+
+    Returns None when the backend is "torch" or the exported graph is
+    missing/unloadable (logged as a warning when "onnx" was requested).
+    """
+    if ENCODER_BACKEND == "torch":
+        return None
+    try:
+        from search_stack import onnx_encoder
+    except Exception as e:
+        logger.debug("ONNX encoder module unavailable: %s", e)
+        return None
+    if kind == "query":
+        model_dir, cls = ONNX_MODEL_DIR / onnx_encoder.QUERY_ENCODER_DIRNAME, onnx_encoder.OnnxQueryEncoder
+    else:
+        model_dir, cls = ONNX_MODEL_DIR / onnx_encoder.CROSS_ENCODER_DIRNAME, onnx_encoder.OnnxCrossEncoder
+    if not (model_dir / "model.onnx").exists():
+        if ENCODER_BACKEND == "onnx":
+            logger.warning("ONNX backend requested but %s has no model.onnx", model_dir)
+        return None
+    started = time.time()
+    try:
+        model = cls(model_dir, threads=ONNX_THREADS)
+    except Exception as e:
+        log = logger.warning if ENCODER_BACKEND == "onnx" else logger.debug
+        log("ONNX %s encoder load failed (%s): %s", kind, model_dir, e)
+        return None
+    logger.info("Loaded ONNX %s encoder from %s in %.1fs", kind, model_dir, time.time() - started)
+    return model
+
+
 def _get_vector_model():
     """Lazy-load embedding model for vector search. Returns None if unavailable."""
     global _VECTOR_MODEL, _VECTOR_MODEL_FAILED
@@ -1537,7 +2048,14 @@ def _get_vector_model():
         return None
     if not VECTOR_DB_PATH.exists():
         return None
-    model_id = "BAAI/bge-m3"
+    model_id = VECTOR_MODEL_ID
+    onnx_model = _load_onnx_model("query")
+    if onnx_model is not None:
+        _VECTOR_MODEL = onnx_model
+        return _VECTOR_MODEL
+    if ENCODER_BACKEND == "onnx":
+        _VECTOR_MODEL_FAILED = True
+        return None
     # Prefer FlagEmbedding — same library used to build the vectors DB
     try:
         from FlagEmbedding import BGEM3FlagModel  # type: ignore[import-untyped]
@@ -1558,12 +2076,12 @@ def _get_vector_model():
         return None
 
 
-def _encode_query(model, query: str) -> bytes | None:
-    """Encode a query string into packed float32 bytes for sqlite-vec.
+def _encode_queries(model, queries: list[str]) -> list[bytes | None]:
+    """Encode query strings into packed float32 bytes for sqlite-vec.
 
     Handles FlagEmbedding models (any version: BGEM3FlagModel / M3Embedder)
     and SentenceTransformer. Detects model type by output shape, not class name.
-    Returns None on encoding failure.
+    All queries go through one forward pass. Returns Nones on encoding failure.
     """
     import struct as _struct
 
@@ -1572,103 +2090,345 @@ def _encode_query(model, query: str) -> bytes | None:
     try:
         # FlagEmbedding API (v1 BGEM3FlagModel and v2 M3Embedder)
         output = model.encode(
-            [query],
-            batch_size=1,
+            list(queries),
+            batch_size=max(1, len(queries)),
             max_length=256,
             return_dense=True,
             return_sparse=False,
             return_colbert_vecs=False,
         )
         if isinstance(output, dict) and "dense_vecs" in output:
-            embedding = np.asarray(output["dense_vecs"][0], dtype=np.float32)
+            embeddings = np.asarray(output["dense_vecs"], dtype=np.float32)
         else:
             # SentenceTransformer returns ndarray directly
-            embedding = np.asarray(output[0], dtype=np.float32)
-        return _struct.pack(f"{len(embedding)}f", *embedding.tolist())
+            embeddings = np.asarray(output, dtype=np.float32)
+        embeddings = embeddings.reshape(len(queries), -1)
+        return [_struct.pack(f"{len(e)}f", *e.tolist()) for e in embeddings]
     except Exception as e:
         logger.debug("Query encoding failed: %s", e)
-        return None
+        return [None] * len(queries)
 
 
-def _search_vectors(
-    query: str,
-    language: str | None = None,
-    k: int | None = None,
-) -> dict[str, float]:
-    """Run vector KNN search. Returns {decision_id: cosine_distance} or empty dict."""
-    model = _get_vector_model()
-    if model is None:
-        return {}
-    vec_conn = _get_vec_conn()
-    if vec_conn is None:
-        return {}
-    k = k or VECTOR_K
-    try:
-        query_bytes = _encode_query(model, query)
-        if query_bytes is None:
-            return {}
+def _tokenize_query(model, query: str) -> list[int]:
+    """Token ids of *query* for sparse retrieval, minus special tokens."""
+    # Get tokenizer from model (SentenceTransformer or BGEM3FlagModel)
+    tokenizer = getattr(model, "tokenizer", None)
+    if tokenizer is None:
+        # SentenceTransformer: try model[0].tokenizer (Transformer module)
+        try:
+            tokenizer = model[0].tokenizer
+        except (IndexError, TypeError, AttributeError):
+            pass
+    if tokenizer is None:
+        logger.debug("Cannot access tokenizer for sparse search")
+        return []
 
-        if language:
-            rows = vec_conn.execute(
-                "SELECT decision_id, distance FROM vec_decisions "
-                "WHERE embedding MATCH ? AND k = ? AND language = ? "
-                "ORDER BY distance",
-                (query_bytes, k, language),
-            ).fetchall()
-        else:
-            rows = vec_conn.execute(
-                "SELECT decision_id, distance FROM vec_decisions "
-                "WHERE embedding MATCH ? AND k = ? "
-                "ORDER BY distance",
-                (query_bytes, k),
-            ).fetchall()
-        return {row[0]: row[1] for row in rows}
+    try:
+        tokens = tokenizer(query, return_tensors="pt")["input_ids"][0]
     except Exception as e:
-        logger.debug("Vector search failed: %s", e)
-        return {}
-    finally:
-        vec_conn.close()
+        logger.debug("Query tokenization failed: %s", e)
+        return []
+    # Skip special tokens (CLS=101, SEP=102, PAD=0)
+    return [int(t) for t in tokens if int(t) not in (0, 1, 2, 101, 102)]
 
 
-def _search_vectors_chunks(
-    query: str,
-    language: str | None = None,
-    k: int | None = None,
-) -> dict[str, float]:
-    """KNN search at chunk level, aggregated to decision level (min distance).
+@tracing.traced("encode")
+def _encode_query_batch(queries: list[str]):
+    """Dense vectors and sparse token ids for a batch of queries."""
+    from search_stack.query_encoder import QueryEncoding
 
-    Falls back silently to empty dict if vec_chunks table doesn't exist.
-    """
     model = _get_vector_model()
     if model is None:
-        return {}
-    vec_conn = _get_vec_conn()
-    if vec_conn is None:
-        return {}
-    k = k or VECTOR_K * 3  # more results since multiple chunks per decision
-
+        return [None] * len(queries)
+    dense = _encode_queries(model, queries)
+    # A failed dense encode keeps the token ids; sparse search still works.
+    return [
+        QueryEncoding(dense=vec, token_ids=tuple(_tokenize_query(model, q)))
+        for q, vec in zip(queries, dense)
+    ]
+
+
+def _get_query_encoder():
+    """Shared cached, micro-batching query encoder (created on first use)."""
+    global _QUERY_ENCODER
+    if _QUERY_ENCODER is not None:
+        return _QUERY_ENCODER
+    with _QUERY_ENCODER_LOCK:
+        if _QUERY_ENCODER is None:
+            from search_stack.query_encoder import MicroBatchEncoder, QueryEmbeddingCache
+
+            cache = QueryEmbeddingCache(
+                capacity=QUERY_EMBED_CACHE_SIZE,
+                namespace=f"{VECTOR_MODEL_ID}:{type(_get_vector_model()).__name__}",
+                disk_path=Path(QUERY_EMBED_CACHE_PATH) if QUERY_EMBED_CACHE_PATH else None,
+            )
+            _QUERY_ENCODER = MicroBatchEncoder(
+                _encode_query_batch,
+                cache,
+                max_batch=QUERY_ENCODE_MAX_BATCH,
+                max_wait=QUERY_ENCODE_MAX_WAIT_MS / 1000,
+            )
+    return _QUERY_ENCODER
+
+
+def _query_encoding(query: str):
+    """Cached :class:`QueryEncoding` for *query*, or None without a model."""
+    if _get_vector_model() is None:
+        return None
+    return _get_query_encoder().encode(query)
+
+
+def _query_encoder_stats() -> dict | None:
+    """Hit rate / batch / latency counters of the query encoder, if started."""
+    encoder = _QUERY_ENCODER
+    return encoder.stats() if encoder is not None else None
+
+
+def _collect_cache_metrics():
+    """Cache counters for /metrics (see tracing.register_collector)."""
+    stats = _query_encoder_stats()
+    if stats is not None:
+        yield ("query_embedding_cache_lookups_total", "counter", "Query embedding cache lookups.", {
+            (("result", "memory_hit"),): stats["memory_hits"],
+            (("result", "disk_hit"),): stats["disk_hits"],
+            (("result", "miss"),): stats["misses"],
+        })
+        yield ("query_encoder_coalesced_total", "counter",
+               "Queries that joined an in-flight encode.", {(): stats["coalesced"]})
+        yield ("query_encoder_batches_total", "counter",
+               "Batched query-encoder forward passes.", {(): stats["batches"]})
+    yield ("cross_encoder_cache_lookups_total", "counter", "Cross-encoder score cache lookups.", {
+        (("result", "hit"),): _CROSS_SCORE_STATS["hits"],
+        (("result", "miss"),): _CROSS_SCORE_STATS["misses"],
+    })
+    yield ("cross_encoder_cache_entries", "gauge", "Cached (query, decision) scores.",
+           {(): len(_CROSS_SCORE_CACHE)})
+    yield ("lexfind_cache_lookups_total", "counter", "LexFind cache lookups.", {
+        (("result", "memory_hit"),): _LEXFIND_STATS["memory_hits"],
+        (("result", "disk_hit"),): _LEXFIND_STATS["disk_hits"],
+        (("result", "miss"),): _LEXFIND_STATS["misses"],
+    })
+    yield ("lexfind_requests_total", "counter", "LexFind API calls.", {
+        (("result", "upstream"),): _LEXFIND_STATS["requests"],
+        (("result", "coalesced"),): _LEXFIND_STATS["coalesced"],
+    })
+    yield ("statute_cache_lookups_total", "counter", "get_law / get_commentary result cache lookups.", {
+        (("result", "hit"),): _STATUTE_CACHE_STATS["hits"],
+        (("result", "miss"),): _STATUTE_CACHE_STATS["misses"],
+    })
+    analysis = _analyze_query.cache_info()
+    yield ("query_analysis_cache_lookups_total", "counter", "Query analysis cache lookups.", {
+        (("result", "hit"),): analysis.hits,
+        (("result", "miss"),): analysis.misses,
+    })
+
+
+tracing.register_collector(_collect_cache_metrics)
+
+
+def _get_ann_index(name: str):
+    """Memory-mapped IVF index ``ANN_INDEX_DIR/<name>``, or None if absent.
+
+    Reloaded when the index directory is rebuilt (meta.json mtime changes).
+    """
+    if ANN_SEARCH_ENABLED in {"0", "false", "no"}:
+        return None
+    meta_path = ANN_INDEX_DIR / name / "meta.json"
     try:
-        if not _sqlite_has_table(vec_conn, "vec_chunks"):
-            return {}
+        mtime = meta_path.stat().st_mtime
+    except OSError:
+        return None
+    with _ANN_LOCK:
+        cached = _ANN_INDEXES.get(name)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        try:
+            from search_stack.ann_index import IVFIndex
+            index = IVFIndex(meta_path.parent)
+        except Exception as e:
+            if name not in _ANN_WARNED:
+                logger.warning("Failed to load ANN index %s: %s", meta_path.parent, e)
+                _ANN_WARNED.add(name)
+            return None
+        _ANN_INDEXES[name] = (mtime, index)
+        logger.info("Loaded ANN index %s (%d vectors)", meta_path.parent, len(index))
+        return index
+
+
+def _search_ann(
+    name: str,
+    query_bytes: bytes,
+    *,
+    k: int,
+    language: str | None,
+    court: str | None,
+) -> list[tuple[str, float]] | None:
+    """KNN through the IVF index, or None when no index is available."""
+    index = _get_ann_index(name)
+    if index is None:
+        return None
+    import numpy as np
+
+    return index.search(
+        np.frombuffer(query_bytes, dtype=np.float32),
+        k,
+        nprobe=ANN_NPROBE,
+        languages=[language] if language else None,
+        courts=[court] if court else None,
+    )
+
+
+# sqlite-vec has no court column: over-fetch by this factor, then filter.
+VECTOR_COURT_OVERSAMPLE = 8
+SQLITE_VEC_MAX_K = 4096
 
-        query_bytes = _encode_query(model, query)
-        if query_bytes is None:
-            return {}
 
+def _court_filter_ids(decision_ids: list[str], court: str) -> set[str]:
+    """The *decision_ids* whose decision belongs to *court* in decisions.db.
+
+    Same rule as the ANN court prefilter: a court that no decision carries
+    matches nothing.
+    """
+    if not decision_ids:
+        return set()
+    store = _get_metadata_store()
+    if store is not None:
+        return set(store.filter_ids(decision_ids, court=court))
+    try:
+        conn = get_db()
+    except FileNotFoundError:
+        return set()
+    try:
+        ph = ",".join("?" for _ in decision_ids)
+        return {
+            r[0] for r in conn.execute(
+                f"SELECT decision_id FROM decisions WHERE decision_id IN ({ph}) AND court = ?",
+                [*decision_ids, court.lower()],
+            )
+        }
+    except sqlite3.Error as e:
+        logger.debug("Court filter lookup failed: %s", e)
+        return set()
+    finally:
+        conn.close()
+
+
+def _sqlite_vec_k(k: int, court: str | None) -> int:
+    return min(SQLITE_VEC_MAX_K, k * VECTOR_COURT_OVERSAMPLE) if court else k
+
+
+@tracing.traced("vector")
+def _search_vectors(
+    query: str,
+    language: str | None = None,
+    k: int | None = None,
+    court: str | None = None,
+) -> dict[str, float]:
+    """Run vector KNN search. Returns {decision_id: cosine_distance} or empty dict.
+
+    Uses the IVF ANN index when built (court-prefiltered), else sqlite-vec
+    with the court filter applied to an over-fetched candidate set. On both
+    paths an unknown court yields no results.
+    """
+    encoding = _query_encoding(query)
+    if encoding is None or encoding.dense is None:
+        return {}
+    k = k or VECTOR_K
+    query_bytes = encoding.dense
+    try:
+        ann_rows = _search_ann(
+            "decisions", query_bytes, k=k, language=language, court=court,
+        )
+    except Exception as e:
+        logger.debug("ANN vector search failed, falling back to sqlite-vec: %s", e)
+        ann_rows = None
+    if ann_rows is not None:
+        return dict(ann_rows)
+
+    vec_conn = _get_vec_conn()
+    if vec_conn is None:
+        return {}
+    try:
+        fetch_k = _sqlite_vec_k(k, court)
         if language:
             rows = vec_conn.execute(
-                "SELECT chunk_id, distance FROM vec_chunks "
+                "SELECT decision_id, distance FROM vec_decisions "
                 "WHERE embedding MATCH ? AND k = ? AND language = ? "
                 "ORDER BY distance",
-                (query_bytes, k, language),
+                (query_bytes, fetch_k, language),
             ).fetchall()
         else:
             rows = vec_conn.execute(
-                "SELECT chunk_id, distance FROM vec_chunks "
+                "SELECT decision_id, distance FROM vec_decisions "
                 "WHERE embedding MATCH ? AND k = ? "
                 "ORDER BY distance",
-                (query_bytes, k),
+                (query_bytes, fetch_k),
             ).fetchall()
+        if court:
+            allowed = _court_filter_ids([row[0] for row in rows], court)
+            rows = [row for row in rows if row[0] in allowed][:k]
+        return {row[0]: row[1] for row in rows}
+    except Exception as e:
+        logger.debug("Vector search failed: %s", e)
+        return {}
+    finally:
+        vec_conn.close()
+
+
+@tracing.traced("vector_chunks")
+def _search_vectors_chunks(
+    query: str,
+    language: str | None = None,
+    k: int | None = None,
+    court: str | None = None,
+) -> dict[str, float]:
+    """KNN search at chunk level, aggregated to decision level (min distance).
+
+    Falls back silently to empty dict if vec_chunks table doesn't exist.
+    """
+    encoding = _query_encoding(query)
+    if encoding is None or encoding.dense is None:
+        return {}
+    k = k or VECTOR_K * 3  # more results since multiple chunks per decision
+    query_bytes = encoding.dense
+
+    rows: list[tuple[str, float]] | None = None
+    vec_conn = None
+    try:
+        try:
+            rows = _search_ann("chunks", query_bytes, k=k, language=language, court=court)
+        except Exception as e:
+            logger.debug("ANN chunk search failed, falling back to sqlite-vec: %s", e)
+
+        if rows is None:
+            vec_conn = _get_vec_conn()
+            if vec_conn is None:
+                return {}
+            if not _sqlite_has_table(vec_conn, "vec_chunks"):
+                return {}
+            fetch_k = _sqlite_vec_k(k, court)
+            if language:
+                rows = vec_conn.execute(
+                    "SELECT chunk_id, distance FROM vec_chunks "
+                    "WHERE embedding MATCH ? AND k = ? AND language = ? "
+                    "ORDER BY distance",
+                    (query_bytes, fetch_k, language),
+                ).fetchall()
+            else:
+                rows = vec_conn.execute(
+                    "SELECT chunk_id, distance FROM vec_chunks "
+                    "WHERE embedding MATCH ? AND k = ? "
+                    "ORDER BY distance",
+                    (query_bytes, fetch_k),
+                ).fetchall()
+            if court:
+                decision_ids = list(dict.fromkeys(
+                    chunk_id.rsplit("__chunk_", 1)[0] for chunk_id, _ in rows
+                ))
+                allowed = _court_filter_ids(decision_ids, court)
+                rows = [
+                    row for row in rows if row[0].rsplit("__chunk_", 1)[0] in allowed
+                ][:k]
 
         # Aggregate: best (min distance) chunk per decision
         decision_scores: dict[str, float] = {}
@@ -1682,9 +2442,44 @@ def _search_vectors_chunks(
         logger.debug("Chunk vector search failed: %s", e)
         return {}
     finally:
-        vec_conn.close()
+        if vec_conn is not None:
+            vec_conn.close()
 
 
+def _get_sparse_postings():
+    """Memory-mapped sparse postings at ``SPARSE_POSTINGS_DIR``, or None.
+
+    Reloaded when the postings directory is rebuilt (meta.json mtime changes).
+    """
+    global _SPARSE_POSTINGS, _SPARSE_POSTINGS_WARNED
+    meta_path = SPARSE_POSTINGS_DIR / "meta.json"
+    try:
+        mtime = meta_path.stat().st_mtime
+    except OSError:
+        return None
+    with _SPARSE_POSTINGS_LOCK:
+        if _SPARSE_POSTINGS is not None and _SPARSE_POSTINGS[0] == mtime:
+            return _SPARSE_POSTINGS[1]
+        try:
+            from search_stack.sparse_postings import SparsePostings
+            postings = SparsePostings(SPARSE_POSTINGS_DIR)
+        except Exception as e:
+            if not _SPARSE_POSTINGS_WARNED:
+                logger.warning("Failed to load sparse postings %s: %s", SPARSE_POSTINGS_DIR, e)
+                _SPARSE_POSTINGS_WARNED = True
+            return None
+        _SPARSE_POSTINGS = (mtime, postings)
+        logger.info("Loaded sparse postings %s (%d docs)", SPARSE_POSTINGS_DIR, len(postings))
+        return postings
+
+
+def _sparse_query_token_ids(query: str) -> list[int]:
+    """Token ids of *query* from the shared (cached) query encoder."""
+    encoding = _query_encoding(query)
+    return list(encoding.token_ids) if encoding is not None else []
+
+
+@tracing.traced("sparse")
 def _search_sparse(
     query: str,
     k: int | None = None,
@@ -1693,39 +2488,31 @@ def _search_sparse(
 
     Tokenizes the query, looks up the inverted index, and sums matching
     token weights per document. Returns {decision_id: score} or empty dict.
+    Uses the memory-mapped postings when built, else the sparse_terms table.
     """
     if SPARSE_SEARCH_ENABLED in {"0", "false", "no"}:
         return {}
+    k = k or SPARSE_K
+
+    postings = _get_sparse_postings()
+    if postings is not None:
+        try:
+            token_ids = _sparse_query_token_ids(query)
+            if not token_ids:
+                return {}
+            return dict(postings.search(token_ids, k))
+        except Exception as e:
+            logger.debug("Sparse postings search failed: %s", e)
+            return {}
+
     vec_conn = _get_vec_conn()
     if vec_conn is None:
         return {}
-    k = k or SPARSE_K
-
     try:
         if not _sqlite_has_table(vec_conn, "sparse_terms"):
             return {}
 
-        # Tokenize query using the model's tokenizer
-        model = _get_vector_model()
-        if model is None:
-            return {}
-
-        # Get tokenizer from model (SentenceTransformer or BGEM3FlagModel)
-        tokenizer = getattr(model, "tokenizer", None)
-        if tokenizer is None:
-            # SentenceTransformer: try model[0].tokenizer (Transformer module)
-            try:
-                tokenizer = model[0].tokenizer
-            except (IndexError, TypeError, AttributeError):
-                pass
-        if tokenizer is None:
-            logger.debug("Cannot access tokenizer for sparse search")
-            return {}
-
-        tokens = tokenizer(query, return_tensors="pt")["input_ids"][0]
-        # Skip special tokens (CLS=101, SEP=102, PAD=0)
-        token_ids = [int(t) for t in tokens if int(t) not in (0, 1, 2, 101, 102)]
-
+        token_ids = _sparse_query_token_ids(query)
         if not token_ids:
             return {}
 
@@ -1744,9 +2531,328 @@ def _search_sparse(
         vec_conn.close()
 
 
-def _sqlite_has_table(conn: sqlite3.Connection, table: str) -> bool:
+# ── In-memory metadata store ──────────────────────────────────
+
+
+def _key_hash(value: str) -> int:
+    """Stable signed 64-bit hash used for compact string keys (0 = none)."""
+    if not value:
+        return 0
+    digest = hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little", signed=True) or 1
+
+
+def _date_to_int(value: str | None) -> int:
+    """ISO date prefix as YYYYMMDD (missing month/day -> 00), 0 if unparseable."""
+    digits = re.sub(r"\D", "", (value or "")[:10])[:8]
+    if len(digits) < 4:
+        return 0
+    return int(digits.ljust(8, "0"))
+
+
+class _MetadataStore:
+    """Rowid-addressable metadata columns for every decision.
+
+    Court, canton and language are stored as small integer codes, the
+    decision date as YYYYMMDD, docket and canonical keys as 64-bit hashes
+    and citation authority as the rerank's confidence-weighted incoming
+    citation sum — roughly 50 bytes per decision. All
+    columns are sorted by decision_id hash, so lookups are a searchsorted
+    over one array and the search path can filter and dedupe vector/sparse
+    hits without an SQL round trip.
+    """
+
+    def __init__(
+        self,
+        *,
+        generation: tuple,
+        id_hash,
+        rowid,
+        court,
+        canton,
+        language,
+        date,
+        docket_hash,
+        canonical_hash,
+        authority,
+        vocab: dict[str, list[str]],
+        authority_loaded: bool = False,
+    ):
+        self.generation = generation
+        self.id_hash = id_hash
+        self.rowid = rowid
+        self.court = court
+        self.canton = canton
+        self.language = language
+        self.date = date
+        self.docket_hash = docket_hash
+        self.canonical_hash = canonical_hash
+        self.authority = authority
+        self.authority_loaded = authority_loaded
+        self.vocab = vocab
+
+    def __len__(self) -> int:
+        return len(self.id_hash)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            a.nbytes for a in (
+                self.id_hash, self.rowid, self.court, self.canton, self.language,
+                self.date, self.docket_hash, self.canonical_hash, self.authority,
+            )
+        )
+
+    def positions(self, decision_ids: list[str]) -> dict[str, int]:
+        """Map each known decision_id to its column position."""
+        import numpy as np
+
+        if not decision_ids or not len(self.id_hash):
+            return {}
+        hashes = np.array([_key_hash(did) for did in decision_ids], dtype=np.int64)
+        pos = np.searchsorted(self.id_hash, hashes)
+        pos = np.minimum(pos, len(self.id_hash) - 1)
+        found = self.id_hash[pos] == hashes
+        return {
+            did: int(p) for did, p, ok in zip(decision_ids, pos.tolist(), found.tolist()) if ok
+        }
+
+    def _code(self, column: str, value: str | None) -> int | None:
+        if value is None:
+            return None
+        try:
+            return self.vocab[column].index(value)
+        except ValueError:
+            return -1
+
+    def filter_ids(
+        self,
+        decision_ids: list[str],
+        *,
+        court: str | None = None,
+        canton: str | None = None,
+        language: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+    ) -> list[str]:
+        """Keep ids that pass the search filters (order preserved).
+
+        Ids unknown to the store are dropped — they are not in decisions.db.
+        """
+        pos_map = self.positions(decision_ids)
+        if not pos_map:
+            return []
+        import numpy as np
+
+        ids = list(pos_map)
+        pos = np.fromiter(pos_map.values(), dtype=np.int64, count=len(ids))
+        keep = np.ones(len(ids), dtype=bool)
+        for column, value in (
+            ("court", court.lower() if court else None),
+            ("canton", canton.upper() if canton else None),
+            ("language", language.lower() if language else None),
+        ):
+            code = self._code(column, value)
+            if code is not None:
+                keep &= getattr(self, column)[pos] == code
+        if date_from:
+            keep &= self.date[pos] >= _date_to_int(date_from)
+        if date_to:
+            # Date-only bound includes the whole day, like the SQL string compare
+            keep &= self.date[pos] <= _date_to_int(date_to)
+        return [did for did, ok in zip(ids, keep.tolist()) if ok]
+
+    def rowids(self, decision_ids: list[str]) -> dict[str, int]:
+        pos_map = self.positions(decision_ids)
+        return {did: int(self.rowid[p]) for did, p in pos_map.items()}
+
+    def canonical_hashes(self, decision_ids: list[str]) -> dict[str, int]:
+        pos_map = self.positions(decision_ids)
+        return {did: int(self.canonical_hash[p]) for did, p in pos_map.items()}
+
+    def authority_for(self, decision_ids: list[str]) -> dict[str, float]:
+        pos_map = self.positions(decision_ids)
+        return {did: float(self.authority[p]) for did, p in pos_map.items()}
+
+    def dedupe_ids(self, decision_ids: list[str]) -> list[str]:
+        """Drop ids whose canonical key was already seen (first wins)."""
+        hashes = self.canonical_hashes(decision_ids)
+        seen: set[int] = set()
+        out = []
+        for did in decision_ids:
+            h = hashes.get(did, 0)
+            if h and h in seen:
+                continue
+            if h:
+                seen.add(h)
+            out.append(did)
+        return out
+
+
+def _metadata_generation() -> tuple | None:
+    """Fingerprint of the DB files the store is built from (None if no DB)."""
+    try:
+        st = DB_PATH.stat()
+    except OSError:
+        return None
+    gen: tuple = (st.st_ino, st.st_size, st.st_mtime_ns)
+    try:
+        gst = GRAPH_DB_PATH.stat()
+        gen += (gst.st_ino, gst.st_size, gst.st_mtime_ns)
+    except OSError:
+        pass
+    return gen
+
+
+def _load_metadata_store() -> _MetadataStore | None:
+    """Build the metadata store from decisions.db (+ graph authority)."""
+    import numpy as np
+
+    generation = _metadata_generation()
+    if generation is None:
+        return None
+    t0 = time.monotonic()
+    vocab: dict[str, list[str]] = {"court": [], "canton": [], "language": []}
+    vocab_index: dict[str, dict[str, int]] = {k: {} for k in vocab}
+
+    def _code(column: str, value: str | None) -> int:
+        value = value or ""
+        idx = vocab_index[column].get(value)
+        if idx is None:
+            idx = vocab_index[column][value] = len(vocab[column])
+            vocab[column].append(value)
+        return idx
+
+    id_hash, rowid, court, canton, language = [], [], [], [], []
+    date, docket_hash, canonical_hash = [], [], []
+    ids: list[str] = []
+    conn = get_db()
+    try:
+        # Only columns stored ahead of full_text: reading later ones would
+        # walk every row's overflow pages.
+        cur = conn.execute(
+            "SELECT rowid, decision_id, court, canton, docket_number, "
+            "decision_date, language FROM decisions"
+        )
+        while True:
+            batch = cur.fetchmany(10000)
+            if not batch:
+                break
+            for r in batch:
+                did = r["decision_id"]
+                ids.append(did)
+                id_hash.append(_key_hash(did))
+                rowid.append(r["rowid"])
+                court.append(_code("court", r["court"]))
+                canton.append(_code("canton", r["canton"]))
+                language.append(_code("language", r["language"]))
+                date.append(_date_to_int(r["decision_date"]))
+                docket_hash.append(_key_hash(_normalize_docket(r["docket_number"] or "")))
+                ckey = _make_canonical_key(
+                    r["court"] or "", r["docket_number"] or "", r["decision_date"],
+                )
+                canonical_hash.append(_key_hash(ckey) if "||" not in ckey else 0)
+    finally:
+        conn.close()
+
+    # The same weighted sums _load_graph_signal_map computes per query
+    # (decision_authority holds unweighted counts, so it is not used here).
+    authority = np.zeros(len(ids), dtype=np.float64)
+    authority_loaded = False
+    graph = _get_graph_conn()
+    if graph is not None:
+        try:
+            sql = _incoming_citations_sql(graph)
+            if sql:
+                index = {did: i for i, did in enumerate(ids)}
+                for did, n in graph.execute(sql):
+                    i = index.get(did)
+                    if i is not None:
+                        authority[i] = n or 0.0
+                authority_loaded = True
+        except sqlite3.Error as e:
+            logger.debug("Metadata store authority load failed: %s", e)
+        finally:
+            graph.close()
+
+    id_arr = np.array(id_hash, dtype=np.int64)
+    order = np.argsort(id_arr, kind="stable")
+    store = _MetadataStore(
+        generation=generation,
+        id_hash=id_arr[order],
+        rowid=np.array(rowid, dtype=np.int64)[order],
+        court=np.array(court, dtype=np.int16)[order],
+        canton=np.array(canton, dtype=np.int16)[order],
+        language=np.array(language, dtype=np.int8)[order],
+        date=np.array(date, dtype=np.int32)[order],
+        docket_hash=np.array(docket_hash, dtype=np.int64)[order],
+        canonical_hash=np.array(canonical_hash, dtype=np.int64)[order],
+        authority=authority[order],
+        vocab=vocab,
+        authority_loaded=authority_loaded,
+    )
+    logger.info(
+        "Metadata store loaded: %d decisions, %.1f MB in %.1fs",
+        len(store), store.nbytes / 1024 / 1024, time.monotonic() - t0,
+    )
+    return store
+
+
+def _refresh_metadata_store() -> None:
+    global _METADATA_STORE, _METADATA_STORE_FAILURES, _METADATA_STORE_RETRY_AT
+    try:
+        _METADATA_STORE = _load_metadata_store()
+        _METADATA_STORE_FAILURES = 0
+        _METADATA_STORE_RETRY_AT = 0.0
+    except Exception as e:
+        _METADATA_STORE_FAILURES += 1
+        backoff = min(
+            METADATA_STORE_RETRY_MAX_SECONDS,
+            METADATA_STORE_RETRY_SECONDS * 2 ** (_METADATA_STORE_FAILURES - 1),
+        )
+        _METADATA_STORE_RETRY_AT = time.monotonic() + backoff
+        logger.warning("Metadata store load failed (retry in %.0fs): %s", backoff, e)
+    finally:
+        _METADATA_STORE_LOADING.clear()
+
+
+def _get_metadata_store(*, wait: bool = False) -> _MetadataStore | None:
+    """Return the metadata store if it is loaded and current, else None.
+
+    Loading happens in a background thread (kicked off at startup and again
+    whenever the DB files change), so searches never block on it unless
+    ``wait`` is set. A stale store is never returned: rowids change when
+    decisions.db is rebuilt. After a failed load, reloads are retried with
+    exponential backoff.
+    """
+    if not METADATA_STORE_ENABLED:
+        return None
+    store = _METADATA_STORE
+    generation = _metadata_generation()
+    if store is not None and store.generation == generation:
+        return store
+    if generation is None or time.monotonic() < _METADATA_STORE_RETRY_AT:
+        return None
+    with _METADATA_STORE_LOCK:
+        if not _METADATA_STORE_LOADING.is_set():
+            _METADATA_STORE_LOADING.set()
+            if wait:
+                _refresh_metadata_store()
+            else:
+                threading.Thread(
+                    target=_refresh_metadata_store, name="metadata-store", daemon=True,
+                ).start()
+    store = _METADATA_STORE
+    if store is not None and store.generation == generation:
+        return store
+    return None
+
+
+def _sqlite_has_table(
+    conn: sqlite3.Connection, table: str, *, schema: str = "main"
+) -> bool:
     row = conn.execute(
-        "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?",
+        f"SELECT 1 FROM {schema}.sqlite_master WHERE type='table' AND name=?",
         (table,),
     ).fetchone()
     return row is not None
@@ -1760,6 +2866,44 @@ def _sqlite_has_column(conn: sqlite3.Connection, table: str, column: str) -> boo
     return any(str(r[1]).lower() == column.lower() for r in rows)
 
 
+def _incoming_citations_sql(conn: sqlite3.Connection, placeholders: str | None = None) -> str | None:
+    """SQL for (decision_id, n) incoming-citation weights per cited decision.
+
+    ``n`` is the confidence-weighted mention sum where the graph has
+    resolution confidences, else the plain mention sum. With *placeholders*
+    the targets are restricted to ``IN (placeholders)``; None if the graph
+    has no resolved citation targets.
+    """
+    if _sqlite_has_table(conn, "citation_targets"):
+        weight = (
+            "dc.mention_count * COALESCE(ct.confidence_score, 1.0)"
+            if _sqlite_has_column(conn, "citation_targets", "confidence_score")
+            else "dc.mention_count"
+        )
+        where = f"WHERE ct.target_decision_id IN ({placeholders})" if placeholders else ""
+        return f"""
+            SELECT ct.target_decision_id AS decision_id, SUM({weight}) AS n
+            FROM citation_targets ct
+            JOIN decision_citations dc
+              ON dc.source_decision_id = ct.source_decision_id
+             AND dc.target_ref = ct.target_ref
+            {where}
+            GROUP BY ct.target_decision_id
+            """
+    if _sqlite_has_column(conn, "decision_citations", "target_decision_id"):
+        where = (
+            f"WHERE target_decision_id IN ({placeholders})" if placeholders
+            else "WHERE target_decision_id IS NOT NULL"
+        )
+        return f"""
+            SELECT target_decision_id AS decision_id, SUM(mention_count) AS n
+            FROM decision_citations
+            {where}
+            GROUP BY target_decision_id
+            """
+    return None
+
+
 def _load_graph_signal_map(
     decision_ids: list[str],
     *,
@@ -1786,15 +2930,6 @@ def _load_graph_signal_map(
     if conn is None:
         return {}
     try:
-        has_citation_targets = _sqlite_has_table(conn, "citation_targets")
-        has_legacy_target_column = _sqlite_has_column(
-            conn, "decision_citations", "target_decision_id"
-        )
-        has_confidence_score = (
-            has_citation_targets
-            and _sqlite_has_column(conn, "citation_targets", "confidence_score")
-        )
-
         placeholders = ",".join("?" for _ in unique_ids)
         if query_statutes:
             statute_refs = sorted(query_statutes)
@@ -1828,47 +2963,17 @@ def _load_graph_signal_map(
             for row in rows:
                 signal_map[row["decision_id"]]["query_citation_hits"] = float(row["n"] or 0.0)
 
-        if has_citation_targets:
-            if has_confidence_score:
-                rows = conn.execute(
-                    f"""
-                    SELECT
-                        ct.target_decision_id AS decision_id,
-                        SUM(dc.mention_count * COALESCE(ct.confidence_score, 1.0)) AS n
-                    FROM citation_targets ct
-                    JOIN decision_citations dc
-                      ON dc.source_decision_id = ct.source_decision_id
-                     AND dc.target_ref = ct.target_ref
-                    WHERE ct.target_decision_id IN ({placeholders})
-                    GROUP BY ct.target_decision_id
-                    """,
-                    tuple(unique_ids),
-                ).fetchall()
-            else:
-                rows = conn.execute(
-                    f"""
-                    SELECT ct.target_decision_id AS decision_id, SUM(dc.mention_count) AS n
-                    FROM citation_targets ct
-                    JOIN decision_citations dc
-                      ON dc.source_decision_id = ct.source_decision_id
-                     AND dc.target_ref = ct.target_ref
-                    WHERE ct.target_decision_id IN ({placeholders})
-                    GROUP BY ct.target_decision_id
-                    """,
-                    tuple(unique_ids),
-                ).fetchall()
-        elif has_legacy_target_column:
-            rows = conn.execute(
-                f"""
-                SELECT target_decision_id AS decision_id, SUM(mention_count) AS n
-                FROM decision_citations
-                WHERE target_decision_id IN ({placeholders})
-                GROUP BY target_decision_id
-                """,
-                tuple(unique_ids),
-            ).fetchall()
+        store = _get_metadata_store()
+        if store is not None and store.authority_loaded:
+            # Same weighted sums, materialized at store load: one array lookup
+            # instead of the citation_targets join.
+            rows = [
+                {"decision_id": did, "n": n}
+                for did, n in store.authority_for(unique_ids).items()
+            ]
         else:
-            rows = []
+            sql = _incoming_citations_sql(conn, placeholders)
+            rows = conn.execute(sql, tuple(unique_ids)).fetchall() if sql else []
         for row in rows:
             signal_map[row["decision_id"]]["incoming_citations"] = max(
                 0.0,
@@ -2073,11 +3178,8 @@ def _find_appeal_chain(
         return {"decision_id": decision_id, "error": "Reference graph not available."}
 
     try:
-        # Check if is_prior_instance column exists (backward compat)
-        cols = [
-            r[1] for r in conn.execute("PRAGMA table_info(decision_citations)").fetchall()
-        ]
-        if "is_prior_instance" not in cols:
+        schema = _graph_appeal_schema(conn)
+        if schema is None:
             return {
                 "decision_id": decision_id,
                 "error": "Appeal chain data not available. Rebuild reference graph to enable.",
@@ -2102,11 +3204,18 @@ def _find_appeal_chain(
         visited_down: set[str] = set()
         visited_up: set[str] = set()
 
-        # Walk DOWN: find prior instances (what this decision appealed)
-        _walk_chain(conn, decision_id, "down", result["chain"], min_confidence, visited=visited_down)
+        if schema == "appeal_edges":
+            # One recursive query fetches every edge reachable within the
+            # depth limit; the walk itself runs on the in-memory adjacency.
+            adjacency = _load_appeal_adjacency(conn, decision_id, min_confidence)
+            _walk_chain_adjacency(adjacency, decision_id, "down", result["chain"], visited_down)
+            _walk_chain_adjacency(adjacency, decision_id, "up", result["chain"], visited_up)
+        else:
+            # Walk DOWN: find prior instances (what this decision appealed)
+            _walk_chain(conn, decision_id, "down", result["chain"], min_confidence, visited=visited_down)
 
-        # Walk UP: find subsequent instances (decisions that appealed this one)
-        _walk_chain(conn, decision_id, "up", result["chain"], min_confidence, visited=visited_up)
+            # Walk UP: find subsequent instances (decisions that appealed this one)
+            _walk_chain(conn, decision_id, "up", result["chain"], min_confidence, visited=visited_up)
 
         # Sort chain by date
         result["chain"].sort(key=lambda x: x.get("decision_date") or "")
@@ -2119,6 +3228,129 @@ def _find_appeal_chain(
         conn.close()
 
 
+APPEAL_CHAIN_MAX_DEPTH = 5
+APPEAL_CHAIN_FANOUT = 5
+
+_GRAPH_APPEAL_SCHEMA: tuple[tuple[str, float], str | None] | None = None
+
+
+def _graph_appeal_schema(conn: sqlite3.Connection) -> str | None:
+    """Which appeal data the graph DB has: "appeal_edges", "legacy" or None.
+
+    Cached per graph DB file and mtime, so the schema is inspected once per
+    rebuild rather than on every call.
+    """
+    global _GRAPH_APPEAL_SCHEMA
+    try:
+        key = (str(GRAPH_DB_PATH), GRAPH_DB_PATH.stat().st_mtime)
+    except OSError:
+        key = (str(GRAPH_DB_PATH), 0.0)
+    cached = _GRAPH_APPEAL_SCHEMA
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    if _sqlite_has_table(conn, "appeal_edges"):
+        schema = "appeal_edges"
+    elif _sqlite_has_column(conn, "decision_citations", "is_prior_instance"):
+        schema = "legacy"
+    else:
+        schema = None
+    _GRAPH_APPEAL_SCHEMA = (key, schema)
+    return schema
+
+
+def _load_appeal_adjacency(
+    conn: sqlite3.Connection, decision_id: str, min_confidence: float,
+) -> dict[str, dict[str, list[dict]]]:
+    """Edges reachable from *decision_id* in both directions, one query.
+
+    Returns ``{"down": {node: [prior...]}, "up": {node: [appellate...]}}``
+    with each neighbour list in the order _walk_chain would visit it.
+    """
+    rows = conn.execute(
+        """
+        WITH RECURSIVE
+        down(node, depth) AS (
+            SELECT ?, 0
+            UNION
+            SELECT e.prior_decision_id, down.depth + 1
+            FROM appeal_edges e JOIN down ON e.appellate_decision_id = down.node
+            WHERE e.confidence_score >= ? AND down.depth < ?
+        ),
+        up(node, depth) AS (
+            SELECT ?, 0
+            UNION
+            SELECT e.appellate_decision_id, up.depth + 1
+            FROM appeal_edges e JOIN up ON e.prior_decision_id = up.node
+            WHERE e.confidence_score >= ? AND up.depth < ?
+        )
+        SELECT 'down' AS direction, e.appellate_decision_id AS node,
+               e.prior_decision_id AS neighbour, e.confidence_score,
+               d.docket_number, d.court, d.canton, d.decision_date
+        FROM appeal_edges e
+        JOIN decisions d ON d.decision_id = e.prior_decision_id
+        WHERE e.appellate_decision_id IN (SELECT node FROM down)
+          AND e.confidence_score >= ?
+        UNION ALL
+        SELECT 'up', e.prior_decision_id, e.appellate_decision_id, e.confidence_score,
+               d.docket_number, d.court, d.canton, d.decision_date
+        FROM appeal_edges e
+        JOIN decisions d ON d.decision_id = e.appellate_decision_id
+        WHERE e.prior_decision_id IN (SELECT node FROM up)
+          AND e.confidence_score >= ?
+        """,
+        (
+            decision_id, min_confidence, APPEAL_CHAIN_MAX_DEPTH,
+            decision_id, min_confidence, APPEAL_CHAIN_MAX_DEPTH,
+            min_confidence, min_confidence,
+        ),
+    ).fetchall()
+
+    adjacency: dict[str, dict[str, list[dict]]] = {"down": {}, "up": {}}
+    for row in rows:
+        adjacency[row["direction"]].setdefault(row["node"], []).append({
+            "decision_id": row["neighbour"],
+            "docket_number": row["docket_number"],
+            "court": row["court"],
+            "canton": row["canton"],
+            "decision_date": row["decision_date"],
+            "confidence": float(row["confidence_score"]),
+        })
+    for node, neighbours in adjacency["down"].items():
+        neighbours.sort(key=lambda n: (-n["confidence"], n["decision_id"]))
+        del neighbours[APPEAL_CHAIN_FANOUT:]
+    for node, neighbours in adjacency["up"].items():
+        neighbours.sort(key=lambda n: (n["decision_date"] or "", n["decision_id"]))
+        del neighbours[APPEAL_CHAIN_FANOUT:]
+    return adjacency
+
+
+def _walk_chain_adjacency(
+    adjacency: dict[str, dict[str, list[dict]]],
+    decision_id: str,
+    direction: str,
+    chain: list[dict],
+    visited: set[str],
+    depth: int = 0,
+) -> None:
+    """_walk_chain over an adjacency map from _load_appeal_adjacency."""
+    if depth > APPEAL_CHAIN_MAX_DEPTH or decision_id in visited:
+        return
+    visited.add(decision_id)
+    for neighbour in adjacency[direction].get(decision_id, ()):
+        target_id = neighbour["decision_id"]
+        if target_id in visited:
+            continue
+        entry = dict(neighbour, confidence=round(neighbour["confidence"], 3))
+        if direction == "down":
+            entry["relation"] = "prior_instance"
+            entry["appealed_by"] = decision_id
+        else:
+            entry["relation"] = "subsequent_instance"
+            entry["appeals"] = decision_id
+        chain.append(entry)
+        _walk_chain_adjacency(adjacency, target_id, direction, chain, visited, depth + 1)
+
+
 def _walk_chain(
     conn: sqlite3.Connection,
     decision_id: str,
@@ -2128,8 +3360,11 @@ def _walk_chain(
     visited: set[str],
     depth: int = 0,
 ) -> None:
-    """Recursively walk the appeal chain in one direction."""
-    if depth > 5:  # safety limit
+    """Recursively walk the appeal chain in one direction.
+
+    Fallback for graph DBs built before the appeal_edges table existed.
+    """
+    if depth > APPEAL_CHAIN_MAX_DEPTH:  # safety limit
         return
     if decision_id in visited:
         return
@@ -2261,6 +3496,7 @@ def _text_matches_any_citation_hint(text: str, citations: set[str]) -> bool:
     return False
 
 
+@tracing.traced("rerank")
 def _rerank_rows(
     rows: list[sqlite3.Row],
     raw_query: str,
@@ -2271,6 +3507,7 @@ def _rerank_rows(
     sparse_scores: dict[str, float] | None = None,
     offset: int = 0,
     sort: str | None = None,
+    analysis: QueryAnalysis | None = None,
 ) -> list[dict]:
     """
     Re-rank lexical FTS candidates with lightweight query-intent signals.
@@ -2282,20 +3519,18 @@ def _rerank_rows(
         return []
 
     fusion_scores = fusion_scores or {}
-    rank_terms = _extract_rank_terms(raw_query)
-    expanded_rank_terms = _expand_rank_terms_for_match(rank_terms)
-    all_rank_terms = set(rank_terms) | set(expanded_rank_terms)
-    query_has_asyl_signal = any(t in ASYL_QUERY_TERMS for t in rank_terms)
-    query_has_decision_intent = any(t in DECISION_INTENT_TERMS for t in rank_terms)
-    query_has_accelerated_signal = any(
-        t in ACCELERATED_PROCEDURE_TERMS or t.startswith("beschleunig")
-        for t in all_rank_terms
-    )
-    query_languages = set(_detect_query_languages(raw_query))
-    cleaned_phrase = _normalize_text_for_match(_clean_for_phrase(raw_query))
-    query_norm = _normalize_docket(raw_query)
-    query_statutes = _extract_query_statute_refs(raw_query)
-    query_citations = _extract_query_citation_refs(raw_query)
+    if analysis is None:
+        analysis = _analyze_query(raw_query)
+    rank_terms = analysis.rank_terms
+    expanded_rank_terms = analysis.expanded_rank_terms
+    query_has_asyl_signal = analysis.has_asyl_signal
+    query_has_decision_intent = analysis.has_decision_intent
+    query_has_accelerated_signal = analysis.has_accelerated_signal
+    query_languages = set(analysis.languages)
+    cleaned_phrase = analysis.cleaned_phrase
+    query_norm = analysis.docket_norm
+    query_statutes = set(analysis.statute_refs)
+    query_citations = set(analysis.citation_refs)
     graph_signals = _load_graph_signal_map(
         [r["decision_id"] for r in rows],
         query_statutes=query_statutes,
@@ -2451,6 +3686,7 @@ def _rerank_rows(
             phrase=cleaned_phrase,
             raw_query=raw_query,
             fallback=row["snippet"],
+            analysis=analysis,
         )
         results.append({
             "decision_id": row["decision_id"],
@@ -2470,7 +3706,12 @@ def _rerank_rows(
     return results
 
 
-def _build_query_strategies(raw_query: str) -> tuple[list[dict], list[str]]:
+def _build_query_strategies(
+    raw_query: str,
+    *,
+    analysis: QueryAnalysis | None = None,
+    llm_terms: list[str] | None = None,
+) -> tuple[list[dict], list[str]]:
     """
     Build parser-safe FTS query strategies.
 
@@ -2478,17 +3719,20 @@ def _build_query_strategies(raw_query: str) -> tuple[list[dict], list[str]]:
     For natural language, prefer tokenized OR query first for robustness.
 
     Returns (strategies, llm_terms) where llm_terms are the raw LLM expansion
-    terms (for use in vector search augmentation).
+    terms (for use in vector search augmentation). Pass ``llm_terms`` to
+    skip the (blocking) expansion call; ``[]`` leaves the LLM strategy out.
     """
     raw = raw_query.strip()
-    has_explicit_syntax = _has_explicit_fts_syntax(raw)
+    if analysis is None:
+        analysis = _analyze_query(raw)
+    has_explicit_syntax = analysis.has_explicit_syntax
     nl_and = _build_nl_and_query(raw)
     nl_or = _build_nl_or_query(raw, include_expansions=False)
     nl_or_expanded = _build_nl_or_query(raw, include_expansions=True)
     anchor_focus = _build_anchor_pair_strategies(raw)
     regeste_focus = _build_field_focus_query(raw, field="regeste")
     title_focus = _build_field_focus_query(raw, field="title")
-    detected_languages = _detect_query_languages(raw)
+    detected_languages = list(analysis.languages)
     language_focus = _build_language_focus_strategies(
         raw,
         detected_languages=detected_languages,
@@ -2522,29 +3766,12 @@ def _build_query_strategies(raw_query: str) -> tuple[list[dict], list[str]]:
         if _should_try_raw_fallback(raw):
             candidates.append({"name": "raw_fallback", "query": raw, "weight": 0.65})
 
-    # LLM expansion: fetch additional terms (runs in thread via asyncio.to_thread)
-    llm_terms = _expand_query_with_llm(raw)
-    if llm_terms:
-        llm_or_parts: list[str] = []
-        for term in llm_terms:
-            words = term.strip().split()
-            if len(words) == 1:
-                norm = _normalize_token_for_fts(term)
-                if norm:
-                    llm_or_parts.append(norm)
-            else:
-                # Multi-word: normalize each word, join as quoted phrase
-                normed = [
-                    _normalize_token_for_fts(w)
-                    for w in words if _normalize_token_for_fts(w)
-                ]
-                if len(normed) >= 2:
-                    llm_or_parts.append(f'"{" ".join(normed)}"')
-                elif normed:
-                    llm_or_parts.append(normed[0])
-        if llm_or_parts:
-            llm_or_query = " OR ".join(llm_or_parts)
-            candidates.append({"name": "llm_expanded", "query": llm_or_query, "weight": 0.9})
+    # LLM expansion: blocking here unless the caller already has the terms
+    if llm_terms is None:
+        llm_terms = _expand_query_with_llm(raw)
+    llm_strategy = _llm_expansion_strategy(llm_terms)
+    if llm_strategy:
+        candidates.append(llm_strategy)
 
     # Dedupe while preserving order
     seen: set[str] = set()
@@ -2561,6 +3788,42 @@ def _build_query_strategies(raw_query: str) -> tuple[list[dict], list[str]]:
     return strategies, llm_terms
 
 
+def _llm_expansion_strategy(llm_terms: list[str]) -> dict | None:
+    """OR query over normalized LLM expansion terms (multi-word terms as phrases)."""
+    llm_or_parts: list[str] = []
+    for term in llm_terms or []:
+        words = term.strip().split()
+        if len(words) == 1:
+            norm = _normalize_token_for_fts(term)
+            if norm:
+                llm_or_parts.append(norm)
+        else:
+            # Multi-word: normalize each word, join as quoted phrase
+            normed = [
+                _normalize_token_for_fts(w)
+                for w in words if _normalize_token_for_fts(w)
+            ]
+            if len(normed) >= 2:
+                llm_or_parts.append(f'"{" ".join(normed)}"')
+            elif normed:
+                llm_or_parts.append(normed[0])
+    if not llm_or_parts:
+        return None
+    return {"name": "llm_expanded", "query": " OR ".join(llm_or_parts), "weight": 0.9}
+
+
+def _with_llm_strategy(strategies: list[dict], expansion: Future | None, deadline: float, out: dict):
+    """Yield *strategies*, then the LLM strategy if its terms arrive by *deadline*.
+
+    The awaited terms are stored in ``out["llm_terms"]``.
+    """
+    yield from strategies
+    out["llm_terms"] = _await_llm_expansion(expansion, deadline)
+    extra = _llm_expansion_strategy(out["llm_terms"])
+    if extra and extra["query"] not in {s["query"] for s in strategies}:
+        yield extra
+
+
 def _has_explicit_fts_syntax(query: str) -> bool:
     """Detect advanced query syntax where raw execution should be prioritized."""
     if re.search(r"\b(AND|OR|NOT|NEAR)\b", query, re.IGNORECASE):
@@ -2990,6 +4253,73 @@ def _looks_like_docket_query(query: str) -> bool:
     return False
 
 
+@dataclass(frozen=True)
+class QueryAnalysis:
+    """Query-derived signals shared by retrieval, rerank and snippet stages.
+
+    Built once per distinct raw query by ``_analyze_query`` (LRU-cached), so
+    instances are shared between requests and must be treated as read-only.
+    LLM expansion is deliberately not part of it: it depends on remote state.
+    """
+    raw_query: str
+    is_docket_query: bool
+    has_explicit_syntax: bool
+    inline_docket_candidates: tuple[str, ...]
+    preferred_courts: frozenset[str]
+    has_expandable_terms: bool
+    has_numeric_terms: bool
+    rank_terms: tuple[str, ...]
+    expanded_rank_terms: tuple[str, ...]
+    has_asyl_signal: bool
+    has_decision_intent: bool
+    has_accelerated_signal: bool
+    languages: tuple[str, ...]
+    cleaned_phrase: str
+    docket_norm: str
+    statute_refs: frozenset[str]
+    citation_refs: frozenset[str]
+    highlight_patterns: tuple[re.Pattern, ...]
+    anchor_pattern: re.Pattern | None
+
+
+@functools.lru_cache(maxsize=QUERY_ANALYSIS_CACHE_SIZE)
+def _analyze_query(raw_query: str) -> QueryAnalysis:
+    query = (raw_query or "").strip()
+    inline_docket_candidates = _extract_inline_docket_candidates(query)
+    # Try collapsing space-separated queries into docket form
+    collapsed = _collapse_spaced_docket(query) if query else None
+    if collapsed and collapsed not in inline_docket_candidates:
+        inline_docket_candidates.insert(0, collapsed)
+
+    rank_terms = tuple(_extract_rank_terms(raw_query))
+    expanded_rank_terms = tuple(_expand_rank_terms_for_match(list(rank_terms)))
+    all_rank_terms = set(rank_terms) | set(expanded_rank_terms)
+    return QueryAnalysis(
+        raw_query=raw_query,
+        is_docket_query=_looks_like_docket_query(query),
+        has_explicit_syntax=_has_explicit_fts_syntax(query),
+        inline_docket_candidates=tuple(inline_docket_candidates),
+        preferred_courts=frozenset(_detect_query_preferred_courts(query)),
+        has_expandable_terms=_query_has_expandable_terms(query),
+        has_numeric_terms=_query_has_numeric_terms(query),
+        rank_terms=rank_terms,
+        expanded_rank_terms=expanded_rank_terms,
+        has_asyl_signal=any(t in ASYL_QUERY_TERMS for t in rank_terms),
+        has_decision_intent=any(t in DECISION_INTENT_TERMS for t in rank_terms),
+        has_accelerated_signal=any(
+            t in ACCELERATED_PROCEDURE_TERMS or t.startswith("beschleunig")
+            for t in all_rank_terms
+        ),
+        languages=tuple(_detect_query_languages(raw_query)),
+        cleaned_phrase=_normalize_text_for_match(_clean_for_phrase(raw_query)),
+        docket_norm=_normalize_docket(raw_query),
+        statute_refs=frozenset(_extract_query_statute_refs(raw_query)),
+        citation_refs=frozenset(_extract_query_citation_refs(raw_query)),
+        highlight_patterns=_compile_highlight_patterns(rank_terms, raw_query),
+        anchor_pattern=_compile_anchor_pattern(rank_terms),
+    )
+
+
 def _to_float(value) -> float:
     try:
         return float(value)
@@ -3017,6 +4347,88 @@ def _row_get(row: sqlite3.Row | dict, key: str, default=None):
         return default
 
 
+def _cross_doc_digest(document: str) -> bytes:
+    """Short content hash of a rerank document, part of the score cache key."""
+    return hashlib.blake2b(document.encode("utf-8"), digest_size=12).digest()
+
+
+def _cross_cache_get(query_key: str, digests: dict[str, bytes]) -> dict[str, float]:
+    """Cached scores for the decisions in *digests* (decision_id -> doc digest).
+
+    Keys carry the document digest, so a decision whose text changed after a
+    DB update is scored again instead of reusing its old score.
+    """
+    if not CROSS_ENCODER_CACHE_SIZE:
+        return {}
+    hits: dict[str, float] = {}
+    with _CROSS_SCORE_LOCK:
+        for did, digest in digests.items():
+            key = (query_key, did, digest)
+            score = _CROSS_SCORE_CACHE.get(key)
+            if score is not None:
+                _CROSS_SCORE_CACHE.move_to_end(key)
+                hits[did] = score
+        _CROSS_SCORE_STATS["hits"] += len(hits)
+        _CROSS_SCORE_STATS["misses"] += len(digests) - len(hits)
+    return hits
+
+
+def _cross_cache_put(query_key: str, scores: dict[str, float], digests: dict[str, bytes]) -> None:
+    if not CROSS_ENCODER_CACHE_SIZE:
+        return
+    with _CROSS_SCORE_LOCK:
+        for did, score in scores.items():
+            key = (query_key, did, digests[did])
+            _CROSS_SCORE_CACHE[key] = score
+            _CROSS_SCORE_CACHE.move_to_end(key)
+        while len(_CROSS_SCORE_CACHE) > CROSS_ENCODER_CACHE_SIZE:
+            _CROSS_SCORE_CACHE.popitem(last=False)
+
+
+def _length_bucketed_batches(pairs: list[tuple[str, str, str]]) -> list[list[tuple[str, str, str]]]:
+    """Group (decision_id, query, document) pairs into batches of similar length.
+
+    Padding cost is set by the longest passage in a batch, so passages are
+    sorted by length and short ones are packed more densely.
+    """
+    ordered = sorted(pairs, key=lambda p: len(p[2]))
+    batches: list[list[tuple[str, str, str]]] = []
+    current: list[tuple[str, str, str]] = []
+    for pair in ordered:
+        doc_len = len(pair[2])
+        if doc_len <= FULL_TEXT_RERANK_CHARS // 4:
+            limit = CROSS_ENCODER_BATCH_SIZE * 4
+        elif doc_len <= FULL_TEXT_RERANK_CHARS:
+            limit = CROSS_ENCODER_BATCH_SIZE * 2
+        else:
+            limit = CROSS_ENCODER_BATCH_SIZE
+        if current and len(current) >= limit:
+            batches.append(current)
+            current = []
+        current.append(pair)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _cross_top_k(
+    subset: list[tuple[float, float, int, sqlite3.Row]],
+    raw_by_id: dict[str, float],
+) -> list[tuple[float, str]]:
+    """(boosted score, decision_id) of the top-k cross-scored candidates."""
+    scored_rows = [item for item in subset if item[3]["decision_id"] in raw_by_id]
+    normalized = _normalize_score_list([raw_by_id[item[3]["decision_id"]] for item in scored_rows])
+    combined = sorted(
+        (
+            (score + CROSS_ENCODER_WEIGHT * ce, bm25, idx, row["decision_id"])
+            for ce, (score, bm25, idx, row) in zip(normalized, scored_rows)
+        ),
+        key=lambda x: (-x[0], x[1], x[2]),
+    )
+    return [(boosted, did) for boosted, _b, _i, did in combined[:CROSS_ENCODER_STABLE_K]]
+
+
+@tracing.traced("cross_encoder")
 def _apply_cross_encoder_boosts(
     scored: list[tuple[float, float, int, sqlite3.Row]],
     query: str,
@@ -3034,20 +4446,71 @@ def _apply_cross_encoder_boosts(
 
     pre_sorted = sorted(scored, key=lambda x: (-x[0], x[1], x[2]))
     rerank_subset = pre_sorted[:top_n]
-    pairs = [(query, _build_rerank_document(row)) for _s, _b, _i, row in rerank_subset]
-    if not pairs:
-        return scored
+    from search_stack.query_encoder import normalize_query
+
+    # The backend (torch vs ONNX) can score slightly differently.
+    query_key = f"{type(encoder).__name__}\x00{CROSS_ENCODER_MODEL}\x00{normalize_query(query)}"
+    documents = {row["decision_id"]: _build_rerank_document(row) for *_r, row in rerank_subset}
+    digests = {did: _cross_doc_digest(doc) for did, doc in documents.items()}
+    raw_by_id = _cross_cache_get(query_key, digests)
+
+    # Score in pre-rank order, one round at a time, within the time budget.
+    started = time.perf_counter()
+    budget = CROSS_ENCODER_BUDGET_MS / 1000.0
+    scored_pairs = 0
+    previous_top: list[str] = []
+    pending = [item for item in rerank_subset if item[3]["decision_id"] not in raw_by_id]
+    while pending:
+        elapsed = time.perf_counter() - started
+        if scored_pairs and budget > 0:
+            per_pair = elapsed / scored_pairs
+            if elapsed + per_pair * min(CROSS_ENCODER_BATCH_SIZE, len(pending)) > budget:
+                logger.debug(
+                    "Cross-encoder budget reached after %d pairs (%.0f ms); %d left unscored",
+                    scored_pairs, 1000 * elapsed, len(pending),
+                )
+                break
+        round_items, pending = pending[:CROSS_ENCODER_BATCH_SIZE], pending[CROSS_ENCODER_BATCH_SIZE:]
+        pairs = [
+            (row["decision_id"], query, documents[row["decision_id"]])
+            for _s, _b, _i, row in round_items
+        ]
+        fresh: dict[str, float] = {}
+        try:
+            for batch in _length_bucketed_batches(pairs):
+                raw = encoder.predict([(q, doc) for _did, q, doc in batch], batch_size=len(batch))
+                fresh.update((did, float(v)) for (did, _q, _d), v in zip(batch, raw))
+        except Exception as e:
+            logger.debug("Cross-encoder prediction failed: %s", e)
+            if not raw_by_id:
+                return scored
+            break
+        scored_pairs += len(pairs)
+        raw_by_id.update(fresh)
+        _cross_cache_put(query_key, fresh, digests)
+
+        # Early exit: the top-k order held for a round and even a maximal
+        # boost cannot lift the best unscored candidate into it.
+        if pending:
+            top = _cross_top_k(rerank_subset, raw_by_id)
+            top_ids = [did for _boosted, did in top]
+            if (
+                top_ids == previous_top
+                and len(top) >= CROSS_ENCODER_STABLE_K
+                and pending[0][0] + CROSS_ENCODER_WEIGHT < top[-1][0]
+            ):
+                logger.debug("Cross-encoder top-%d stable after %d pairs", len(top), scored_pairs)
+                break
+            previous_top = top_ids
 
-    try:
-        raw_scores = encoder.predict(pairs)
-    except Exception as e:
-        logger.debug("Cross-encoder prediction failed: %s", e)
+    if not raw_by_id:
         return scored
 
-    normalized = _normalize_score_list(raw_scores)
+    reranked = [item for item in rerank_subset if item[3]["decision_id"] in raw_by_id]
+    normalized = _normalize_score_list([raw_by_id[row["decision_id"]] for *_r, row in reranked])
     ce_by_id = {
         row["decision_id"]: score
-        for score, (_s, _b, _i, row) in zip(normalized, rerank_subset)
+        for score, (_s, _b, _i, row) in zip(normalized, reranked)
     }
 
     boosted: list[tuple[float, float, int, sqlite3.Row]] = []
@@ -3065,6 +4528,13 @@ def _get_cross_encoder():
         return _CROSS_ENCODER
     if _CROSS_ENCODER_FAILED:
         return None
+    onnx_model = _load_onnx_model("cross")
+    if onnx_model is not None:
+        _CROSS_ENCODER = onnx_model
+        return _CROSS_ENCODER
+    if ENCODER_BACKEND == "onnx":
+        _CROSS_ENCODER_FAILED = True
+        return None
     try:
         from sentence_transformers import CrossEncoder
     except Exception as e:
@@ -3104,18 +4574,111 @@ def _build_rerank_document(row: sqlite3.Row | dict) -> str:
     return " ".join(p for p in parts if p).strip()
 
 
+def _build_anchor_fold_table() -> dict[int, str]:
+    """Length-preserving map from accented Latin letters to their ASCII base."""
+    table: dict[int, str] = {}
+    for code in range(0xC0, 0x250):
+        base = unicodedata.normalize("NFKD", chr(code))[:1]
+        if base.isascii() and base.isalpha() and base.lower() != chr(code):
+            table[code] = base.lower()
+    return table
+
+
+_ANCHOR_FOLD_TABLE = _build_anchor_fold_table()
+
+
+@functools.lru_cache(maxsize=QUERY_ANALYSIS_CACHE_SIZE)
+def _compile_anchor_pattern(rank_terms: tuple[str, ...]) -> re.Pattern | None:
+    """Regex locating rank-term hits in accent-folded raw text.
+
+    Rank terms are match-normalized (umlaut digraphs collapsed, ß -> ss), so
+    each vowel tolerates a trailing "e" and "ss" also matches "ß". Matching is
+    substring-based like the ``term in normalized`` checks used for scoring.
+    """
+    alternatives: list[str] = []
+    for term in sorted(set(rank_terms), key=len, reverse=True):
+        parts: list[str] = []
+        i = 0
+        while i < len(term):
+            if term.startswith("ss", i):
+                parts.append("(?:ss|ß)")
+                i += 2
+                continue
+            ch = term[i]
+            parts.append(re.escape(ch) + ("e?" if ch in "aou" else ""))
+            i += 1
+        if parts:
+            alternatives.append("".join(parts))
+    if not alternatives:
+        return None
+    return re.compile("|".join(alternatives), re.IGNORECASE)
+
+
+def _anchor_windows(text: str, anchor: re.Pattern) -> list[str]:
+    """Cut passage-sized windows around anchor hits, densest first.
+
+    Only the first SNIPPET_SCAN_CHARS of the text are looked at; windows start
+    at the preceding paragraph/sentence boundary so snippets read like the
+    passages ``_split_passages`` produces.
+    """
+    scan = text[:SNIPPET_SCAN_CHARS]
+    folded = scan.translate(_ANCHOR_FOLD_TABLE)
+    span = MAX_SNIPPET_LEN + 100
+    windows: list[tuple[int, int]] = []  # (start, hits)
+    current_start = -1
+    for n, match in enumerate(anchor.finditer(folded)):
+        if n >= SNIPPET_MAX_ANCHORS:
+            break
+        hit = match.start()
+        if current_start >= 0 and hit < current_start + span - 40:
+            windows[-1] = (current_start, windows[-1][1] + 1)
+            continue
+        lead = max(0, hit - SNIPPET_LEAD_CHARS)
+        head = scan[lead:hit]
+        boundary = max(head.rfind("\n"), head.rfind(". "), head.rfind("; "))
+        if boundary >= 0:
+            current_start = lead + boundary + 1
+        elif lead == 0:
+            current_start = 0
+        else:
+            space = head.find(" ")
+            current_start = lead + space + 1 if space >= 0 else hit
+        windows.append((current_start, 1))
+    windows.sort(key=lambda w: -w[1])
+    return [scan[start:start + span] for start, _hits in windows[:SNIPPET_MAX_WINDOWS]]
+
+
+@tracing.traced("snippet")
 def _select_best_passage_snippet(
     full_text: str | None,
     *,
-    rank_terms: list[str],
+    rank_terms: list[str] | tuple[str, ...],
     phrase: str,
     raw_query: str = "",
     fallback: str | None,
+    analysis: QueryAnalysis | None = None,
 ) -> str | None:
+    """Pick and highlight the best-matching passage of a decision.
+
+    Windows are cut only around rank-term hits (bounded scan), instead of
+    splitting and normalizing the whole document. Queries without usable
+    rank terms fall back to scanning ``_split_passages`` for the phrase.
+    """
     if not full_text:
         return fallback
 
-    passages = _split_passages(full_text)
+    if analysis is not None:
+        anchor = analysis.anchor_pattern
+        highlight_patterns = analysis.highlight_patterns
+    else:
+        anchor = _compile_anchor_pattern(tuple(rank_terms))
+        highlight_patterns = None
+    if anchor is not None:
+        passages = _anchor_windows(full_text, anchor)
+    elif phrase:
+        passages = _split_passages(full_text[:SNIPPET_SCAN_CHARS])
+    else:
+        passages = []
     if not passages:
         return fallback
 
@@ -3138,7 +4701,9 @@ def _select_best_passage_snippet(
     if best_text and best_score > 0:
         compact = re.sub(r"\s+", " ", best_text).strip()
         truncated = _truncate(compact, MAX_SNIPPET_LEN)
-        return _highlight_terms(truncated, rank_terms, phrase, raw_query)
+        return _highlight_terms(
+            truncated, rank_terms, phrase, raw_query, patterns=highlight_patterns,
+        )
     return fallback
 
 
@@ -3175,20 +4740,12 @@ def _is_trivial_highlight(term: str) -> bool:
     return False
 
 
-def _highlight_terms(
-    text: str | None,
-    rank_terms: list[str],
-    phrase: str,
+@functools.lru_cache(maxsize=QUERY_ANALYSIS_CACHE_SIZE)
+def _compile_highlight_patterns(
+    rank_terms: tuple[str, ...],
     raw_query: str = "",
-) -> str | None:
-    """Wrap matched search terms in <mark> tags for frontend highlighting.
-
-    Tries full raw query phrase first, then individual terms for leftovers.
-    Skips trivial terms (BGE, years, etc.) that add visual noise.
-    """
-    if not text:
-        return text
-
+) -> tuple[re.Pattern, ...]:
+    """Compile the ordered <mark> patterns for a query (longest phrase first)."""
     # Build ordered list: raw query phrase (longest) first, then individual terms
     candidates: list[str] = []
 
@@ -3205,6 +4762,7 @@ def _highlight_terms(
         if t not in candidates and not _is_trivial_highlight(t):
             candidates.append(t)
 
+    patterns: list[re.Pattern] = []
     for term in candidates:
         # Allow flexible whitespace/punctuation between words for multi-word phrases
         if len(term.split()) > 1:
@@ -3212,20 +4770,48 @@ def _highlight_terms(
             pattern = r"\b" + r"[\s,;:.·/\-]+".join(re.escape(w) for w in words) + r"\b"
         else:
             pattern = rf"\b{re.escape(term)}\b"
+        patterns.append(re.compile(rf"({pattern})", re.IGNORECASE))
+    return tuple(patterns)
+
+
+def _highlight_terms(
+    text: str | None,
+    rank_terms: list[str] | tuple[str, ...],
+    phrase: str,
+    raw_query: str = "",
+    *,
+    patterns: tuple[re.Pattern, ...] | None = None,
+) -> str | None:
+    """Wrap matched search terms in <mark> tags for frontend highlighting.
+
+    Tries full raw query phrase first, then individual terms for leftovers.
+    Skips trivial terms (BGE, years, etc.) that add visual noise. Pass
+    ``patterns`` from a QueryAnalysis to skip recompiling per snippet.
+    """
+    if not text:
+        return text
+    if patterns is None:
+        patterns = _compile_highlight_patterns(tuple(rank_terms), raw_query)
+    for pattern in patterns:
         # Apply highlighting only to text outside existing <mark> tags
         text = _apply_highlight_outside_marks(text, pattern)
     return text
 
 
-def _apply_highlight_outside_marks(text: str, pattern: str) -> str:
+_MARK_SPLIT_RE = re.compile(r"(<mark>.*?</mark>)", re.IGNORECASE)
+
+
+def _apply_highlight_outside_marks(text: str, pattern: str | re.Pattern) -> str:
     """Apply a highlight pattern only to text segments not already inside <mark>."""
-    parts = re.split(r"(<mark>.*?</mark>)", text, flags=re.IGNORECASE)
+    if isinstance(pattern, str):
+        pattern = re.compile(rf"({pattern})", re.IGNORECASE)
+    if not pattern.search(text):
+        return text
+    parts = _MARK_SPLIT_RE.split(text)
     for i, part in enumerate(parts):
         if part.startswith("<mark>"):
             continue  # already highlighted
-        parts[i] = re.sub(
-            rf"({pattern})", r"<mark>\1</mark>", part, flags=re.IGNORECASE
-        )
+        parts[i] = pattern.sub(r"<mark>\1</mark>", part)
     return "".join(parts)
 
 
@@ -3322,6 +4908,91 @@ def find_citations(
     return result
 
 
+def _leading_cases_by_fts(
+    *,
+    query: str,
+    law_code: str | None,
+    article: str | None,
+    court: str | None,
+    date_from: str | None,
+    date_to: str | None,
+    limit: int,
+) -> list[dict] | dict:
+    """Rank FTS matches by incoming citations in one SQL plan.
+
+    The graph DB is attached to the FTS5 connection, so matches are joined
+    against authority (and the optional statute filter) inside SQLite and
+    only the top ``limit`` rows come back. Returns an error dict on failure.
+    """
+    conn = _get_fts_graph_conn()
+    if conn is None:
+        return {"error": "Reference graph not available."}
+
+    try:
+        if _sqlite_has_table(conn, "decision_authority", schema="graph"):
+            authority_join = "JOIN graph.decision_authority a ON a.decision_id = d.decision_id"
+            cite_expr = "a.cite_count"
+        else:
+            # Graph built before decision_authority existed: count per hit
+            # through the target_decision_id index rather than aggregating
+            # the whole edge table.
+            authority_join = ""
+            cite_expr = (
+                "(SELECT COUNT(*) FROM graph.citation_targets ct "
+                "WHERE ct.target_decision_id = d.decision_id)"
+            )
+
+        sql = f"""
+            SELECT d.decision_id, d.docket_number, d.decision_date, d.court,
+                   d.regeste, d.source_url, {cite_expr} AS cite_count
+            FROM decisions_fts f
+            JOIN decisions d ON d.rowid = f.rowid
+            {authority_join}
+            WHERE decisions_fts MATCH ?
+        """
+        params: list = [query]
+        if law_code and article:
+            sql += """
+                AND d.decision_id IN (
+                    SELECT ds.decision_id
+                    FROM graph.decision_statutes ds
+                    JOIN graph.statutes s ON s.statute_id = ds.statute_id
+                    WHERE s.law_code = ? AND s.article = ?
+                )
+            """
+            params.extend([law_code, article])
+        if court:
+            sql += " AND d.court = ?"
+            params.append(court)
+        if date_from:
+            sql += " AND d.decision_date >= ?"
+            params.append(date_from)
+        if date_to:
+            sql += " AND d.decision_date <= ?"
+            params.append(date_to)
+        sql = f"SELECT * FROM ({sql}) WHERE cite_count > 0 ORDER BY cite_count DESC LIMIT ?"
+        params.append(limit)
+        rows = conn.execute(sql, tuple(params)).fetchall()
+    except sqlite3.Error as e:
+        logger.debug("Leading cases FTS/graph query failed: %s", e)
+        return {"error": f"FTS query failed: {e}"}
+    finally:
+        conn.close()
+
+    return [
+        {
+            "decision_id": r["decision_id"],
+            "docket_number": r["docket_number"] or r["decision_id"],
+            "decision_date": r["decision_date"] or "",
+            "court": r["court"] or "",
+            "citation_count": int(r["cite_count"]),
+            "regeste": (r["regeste"] or "")[:300],
+            "source_url": r["source_url"] or "",
+        }
+        for r in rows
+    ]
+
+
 def _find_leading_cases(
     *,
     query: str | None = None,
@@ -3332,165 +5003,78 @@ def _find_leading_cases(
     date_to: str | None = None,
     limit: int = 20,
 ) -> dict:
-    """Find the most-cited decisions for a topic or statute."""
+    """Find the most-cited decisions for a topic or statute.
+
+    Shared engine behind find_leading_cases, get_doctrine and
+    generate_exam_question.
+    """
     limit = max(1, min(limit, 100))
-    original_query = query  # preserve for response metadata
 
-    # Determine path: statute (graph DB) or global/court-filtered
+    if query:
+        results = _leading_cases_by_fts(
+            query=query, law_code=law_code, article=article, court=court,
+            date_from=date_from, date_to=date_to, limit=limit,
+        )
+        if isinstance(results, dict):
+            return results
+        return {
+            "results": results,
+            "total": len(results),
+            "law_code": law_code,
+            "article": article,
+            "query": query,
+        }
+
     conn = _get_graph_conn()
     if conn is None:
         return {"error": "Reference graph not available."}
 
     try:
-        candidates: list[tuple[str, int]] = []  # (decision_id, citation_count)
-
+        if _sqlite_has_table(conn, "decision_authority"):
+            authority = "decision_authority"
+        else:
+            authority = (
+                "(SELECT target_decision_id AS decision_id, COUNT(*) AS cite_count "
+                "FROM citation_targets GROUP BY target_decision_id)"
+            )
+        sql = f"""
+            SELECT a.decision_id, a.cite_count
+            FROM {authority} a
+        """
+        params: list = []
+        conditions = []
+        if court or date_from or date_to:
+            sql += " JOIN decisions d ON d.decision_id = a.decision_id"
+            if court:
+                conditions.append("d.court = ?")
+                params.append(court)
+            if date_from:
+                conditions.append("d.decision_date >= ?")
+                params.append(date_from)
+            if date_to:
+                conditions.append("d.decision_date <= ?")
+                params.append(date_to)
         if law_code and article:
-            # Statute-filtered: find decisions citing this statute, ranked by incoming citations
-            overfetch = limit * 3 if query else limit
-            rows = conn.execute(
-                """
-                SELECT ct.target_decision_id AS decision_id, COUNT(*) AS cite_count
-                FROM citation_targets ct
-                JOIN decisions d ON d.decision_id = ct.target_decision_id
-                WHERE ct.target_decision_id IN (
+            conditions.append(
+                """a.decision_id IN (
                     SELECT ds.decision_id
                     FROM decision_statutes ds
                     JOIN statutes s ON s.statute_id = ds.statute_id
                     WHERE s.law_code = ? AND s.article = ?
-                )
-                """
-                + (" AND d.court = ?" if court else "")
-                + (" AND d.decision_date >= ?" if date_from else "")
-                + (" AND d.decision_date <= ?" if date_to else "")
-                + """
-                GROUP BY ct.target_decision_id
-                ORDER BY cite_count DESC
-                LIMIT ?
-                """,
-                tuple(
-                    v
-                    for v in (
-                        law_code, article,
-                        court if court else None,
-                        date_from if date_from else None,
-                        date_to if date_to else None,
-                        overfetch,
-                    )
-                    if v is not None
-                ),
-            ).fetchall()
-            candidates = [(r["decision_id"], int(r["cite_count"])) for r in rows]
-        elif query:
-            # Query-only: FTS-first approach — find matching decisions, then rank by citations
-            conn.close()
-            conn = None  # signal we closed it
-            try:
-                fts_conn = get_db()
-                fts_sql = """
-                    SELECT d.decision_id FROM decisions_fts f
-                    JOIN decisions d ON d.decision_id = f.decision_id
-                    WHERE decisions_fts MATCH ?
-                """
-                fts_params: list = [query]
-                if court:
-                    fts_sql += " AND d.court = ?"
-                    fts_params.append(court)
-                if date_from:
-                    fts_sql += " AND d.decision_date >= ?"
-                    fts_params.append(date_from)
-                if date_to:
-                    fts_sql += " AND d.decision_date <= ?"
-                    fts_params.append(date_to)
-                fts_sql += " LIMIT 5000"
-                fts_rows = fts_conn.execute(fts_sql, tuple(fts_params)).fetchall()
-                fts_conn.close()
-                fts_ids = [r["decision_id"] for r in fts_rows]
-            except sqlite3.Error as e:
-                logger.debug("FTS lookup for leading cases failed: %s", e)
-                return {"error": f"FTS query failed: {e}"}
-
-            if not fts_ids:
-                return {"results": [], "total": 0}
-
-            # Look up citation counts from graph for FTS matches
-            graph2 = _get_graph_conn()
-            if graph2 is not None:
-                try:
-                    placeholders = ",".join("?" for _ in fts_ids)
-                    rows = graph2.execute(
-                        f"""
-                        SELECT target_decision_id AS decision_id, COUNT(*) AS cite_count
-                        FROM citation_targets
-                        WHERE target_decision_id IN ({placeholders})
-                        GROUP BY target_decision_id
-                        ORDER BY cite_count DESC
-                        LIMIT ?
-                        """,
-                        (*fts_ids, limit),
-                    ).fetchall()
-                    candidates = [(r["decision_id"], int(r["cite_count"])) for r in rows]
-                except sqlite3.Error as e:
-                    logger.debug("Graph citation lookup failed: %s", e)
-                finally:
-                    graph2.close()
-            # Skip the post-hoc FTS filter since we already started from FTS
-            query = None  # prevent double-filtering below
-        else:
-            # Global most-cited (no query, no statute)
-            sql = """
-                SELECT ct.target_decision_id AS decision_id, COUNT(*) AS cite_count
-                FROM citation_targets ct
-            """
-            params: list = []
-            conditions = []
-            if court or date_from or date_to:
-                sql += " JOIN decisions d ON d.decision_id = ct.target_decision_id"
-                if court:
-                    conditions.append("d.court = ?")
-                    params.append(court)
-                if date_from:
-                    conditions.append("d.decision_date >= ?")
-                    params.append(date_from)
-                if date_to:
-                    conditions.append("d.decision_date <= ?")
-                    params.append(date_to)
-            if conditions:
-                sql += " WHERE " + " AND ".join(conditions)
-            sql += " GROUP BY ct.target_decision_id ORDER BY cite_count DESC LIMIT ?"
-            params.append(limit)
-            rows = conn.execute(sql, tuple(params)).fetchall()
-            candidates = [(r["decision_id"], int(r["cite_count"])) for r in rows]
+                )"""
+            )
+            params.extend([law_code, article])
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY a.cite_count DESC LIMIT ?"
+        params.append(limit)
+        rows = conn.execute(sql, tuple(params)).fetchall()
+        candidates = [(r["decision_id"], int(r["cite_count"])) for r in rows]
     except sqlite3.Error as e:
         logger.debug("Leading cases graph query failed: %s", e)
         return {"error": f"Graph query failed: {e}"}
     finally:
-        if conn is not None:
-            conn.close()
-
-    if not candidates:
-        return {"results": [], "total": 0}
-
-    # If query provided, filter via FTS5
-    if query:
-        candidate_ids = [c[0] for c in candidates]
-        try:
-            fts_conn = get_db()
-            placeholders = ",".join("?" for _ in candidate_ids)
-            matched = fts_conn.execute(
-                f"""
-                SELECT decision_id FROM decisions_fts
-                WHERE decisions_fts MATCH ? AND decision_id IN ({placeholders})
-                """,
-                (query, *candidate_ids),
-            ).fetchall()
-            fts_conn.close()
-            matched_ids = {r["decision_id"] for r in matched}
-            candidates = [(did, cnt) for did, cnt in candidates if did in matched_ids]
-        except sqlite3.Error as e:
-            logger.debug("FTS filter for leading cases failed: %s", e)
-
-    # Truncate to limit
-    candidates = candidates[:limit]
+        conn.close()
 
     if not candidates:
         return {"results": [], "total": 0}
@@ -3524,11 +5108,172 @@ def _find_leading_cases(
         "total": len(results),
         "law_code": law_code,
         "article": article,
-        "query": original_query,
+        "query": query,
     }
 
 
-def analyze_legal_trend(
+def _whole_year_bounds(
+    date_from: str | None, date_to: str | None
+) -> tuple[int | None, int | None] | None:
+    """Year bounds for a date filter, or None if it cuts through a year."""
+    lo = hi = None
+    if date_from:
+        if not re.fullmatch(r"\d{4}(?:-01-01)?", date_from):
+            return None
+        lo = int(date_from[:4])
+    if date_to:
+        if not re.fullmatch(r"\d{4}-12-31", date_to):
+            return None
+        hi = int(date_to[:4])
+    return lo, hi
+
+
+def _statute_year_counts(
+    conn: sqlite3.Connection,
+    *,
+    law_code: str,
+    article: str,
+    court: str | None,
+    date_from: str | None,
+    date_to: str | None,
+) -> dict[int, int]:
+    """Year histogram for a statute from the graph DB.
+
+    Reads the precomputed statute_year_counts table when the graph has it and
+    the date filter falls on year boundaries; otherwise counts via the join.
+    """
+    bounds = _whole_year_bounds(date_from, date_to)
+    if bounds is not None and _sqlite_has_table(conn, "statute_year_counts"):
+        sql = """
+            SELECT year, SUM(decision_count) AS cnt
+            FROM statute_year_counts
+            WHERE law_code = ? AND article = ?
+        """
+        params: list = [law_code, article]
+        if court:
+            sql += " AND court = ?"
+            params.append(court)
+        if bounds[0] is not None:
+            sql += " AND year >= ?"
+            params.append(bounds[0])
+        if bounds[1] is not None:
+            sql += " AND year <= ?"
+            params.append(bounds[1])
+        sql += " GROUP BY year ORDER BY year"
+    else:
+        sql = """
+            SELECT CAST(SUBSTR(d.decision_date, 1, 4) AS INTEGER) AS year,
+                   COUNT(DISTINCT ds.decision_id) AS cnt
+            FROM decision_statutes ds
+            JOIN statutes s ON s.statute_id = ds.statute_id
+            JOIN decisions d ON d.decision_id = ds.decision_id
+            WHERE s.law_code = ? AND s.article = ?
+              AND d.decision_date IS NOT NULL
+              AND CAST(SUBSTR(d.decision_date, 1, 4) AS INTEGER) > 1800
+              AND CAST(SUBSTR(d.decision_date, 1, 4) AS INTEGER) < 2100
+        """
+        params = [law_code, article]
+        if court:
+            sql += " AND d.court = ?"
+            params.append(court)
+        if date_from:
+            sql += " AND d.decision_date >= ?"
+            params.append(date_from)
+        if date_to:
+            sql += " AND d.decision_date <= ?"
+            params.append(date_to)
+        sql += " GROUP BY year ORDER BY year"
+    rows = conn.execute(sql, tuple(params)).fetchall()
+    return {int(r["year"]): int(r["cnt"]) for r in rows}
+
+
+def _trend_sample_every(
+    conn: sqlite3.Connection,
+    query: str,
+    *,
+    court: str | None = None,
+    date_from: str | None = None,
+    date_to: str | None = None,
+) -> int:
+    """1-in-N rowid sampling step for an FTS trend query (1 = exact).
+
+    The step is sized from the FTS doclist alone, which never touches the
+    decisions rows. Filtered queries are counted exactly: sizing their step
+    would need the same join as the histogram itself.
+    """
+    if TREND_SAMPLE_THRESHOLD <= 0 or court or date_from or date_to:
+        return 1
+    matches = conn.execute(
+        "SELECT COUNT(*) FROM decisions_fts WHERE decisions_fts MATCH ?", (query,)
+    ).fetchone()[0]
+    if matches <= TREND_SAMPLE_THRESHOLD:
+        return 1
+    return -(-matches // TREND_SAMPLE_THRESHOLD)
+
+
+def _iter_fts_year_counts(
+    conn: sqlite3.Connection,
+    *,
+    query: str,
+    court: str | None,
+    date_from: str | None,
+    date_to: str | None,
+    sample_every: int = 1,
+    window: int | None = None,
+):
+    """Yield (year_counts, progress) for FTS matches, cumulatively.
+
+    Without ``window`` a single final result is yielded. With ``window`` the
+    match set is walked in rowid slices of that size so callers can stream
+    partial histograms; progress runs from 0 to 1. With ``sample_every`` > 1
+    only rowids divisible by it are counted — callers scale the counts.
+    """
+    if _sqlite_has_column(conn, "decisions", "decision_year"):
+        year_expr = "d.decision_year"
+    else:
+        year_expr = "CAST(SUBSTR(d.decision_date, 1, 4) AS INTEGER)"
+    sql = f"""
+        SELECT {year_expr} AS year, COUNT(*) AS cnt
+        FROM decisions_fts f
+        JOIN decisions d ON d.rowid = f.rowid
+        WHERE decisions_fts MATCH ?
+          AND {year_expr} > 1800 AND {year_expr} < 2100
+    """
+    params: list = [query]
+    if sample_every > 1:
+        sql += " AND f.rowid % ? = 0"
+        params.append(sample_every)
+    if court:
+        sql += " AND d.court = ?"
+        params.append(court)
+    if date_from:
+        sql += " AND d.decision_date >= ?"
+        params.append(date_from)
+    if date_to:
+        sql += " AND d.decision_date <= ?"
+        params.append(date_to)
+
+    year_counts: dict[int, int] = {}
+    if not window:
+        for r in conn.execute(sql + " GROUP BY year", tuple(params)):
+            year_counts[int(r["year"])] = int(r["cnt"])
+        yield year_counts, 1.0
+        return
+
+    lo, hi = conn.execute("SELECT MIN(rowid), MAX(rowid) FROM decisions").fetchone()
+    if lo is None:
+        yield year_counts, 1.0
+        return
+    sql += " AND f.rowid >= ? AND f.rowid < ? GROUP BY year"
+    span = hi - lo + 1
+    for start in range(lo, hi + 1, window):
+        for r in conn.execute(sql, (*params, start, start + window)):
+            y = int(r["year"])
+            year_counts[y] = year_counts.get(y, 0) + int(r["cnt"])
+        yield dict(year_counts), min(1.0, (start + window - lo) / span)
+
+
+def iter_legal_trend(
     *,
     query: str | None = None,
     law_code: str | None = None,
@@ -3536,100 +5281,113 @@ def analyze_legal_trend(
     court: str | None = None,
     date_from: str | None = None,
     date_to: str | None = None,
-) -> dict:
-    """Year-by-year decision counts for a statute or topic."""
+    exact: bool = False,
+    window: int | None = None,
+):
+    """Yield analyze_legal_trend results, partial ones first when windowed.
+
+    Every yielded dict has the final result's shape plus ``partial`` and
+    ``progress``; the last one has ``partial`` False. Very common FTS terms
+    without court/date filters are counted on a rowid sample unless
+    ``exact`` is set (see TREND_SAMPLE_THRESHOLD); such results carry
+    ``estimated`` and ``sample_every``.
+    """
     if not query and not law_code:
-        return {"error": "At least one of 'query' or 'law_code' is required."}
+        yield {"error": "At least one of 'query' or 'law_code' is required."}
+        return
 
-    year_counts: dict[int, int] = {}
+    statute_counts: dict[int, int] = {}
 
     # Statute path: use graph DB
     if law_code and article:
         conn = _get_graph_conn()
         if conn is None:
-            return {"error": "Reference graph not available."}
+            yield {"error": "Reference graph not available."}
+            return
         try:
-            sql = """
-                SELECT CAST(SUBSTR(d.decision_date, 1, 4) AS INTEGER) AS year,
-                       COUNT(DISTINCT ds.decision_id) AS cnt
-                FROM decision_statutes ds
-                JOIN statutes s ON s.statute_id = ds.statute_id
-                JOIN decisions d ON d.decision_id = ds.decision_id
-                WHERE s.law_code = ? AND s.article = ?
-                  AND d.decision_date IS NOT NULL
-                  AND CAST(SUBSTR(d.decision_date, 1, 4) AS INTEGER) > 1800
-                  AND CAST(SUBSTR(d.decision_date, 1, 4) AS INTEGER) < 2100
-            """
-            params: list = [law_code, article]
-            if court:
-                sql += " AND d.court = ?"
-                params.append(court)
-            if date_from:
-                sql += " AND d.decision_date >= ?"
-                params.append(date_from)
-            if date_to:
-                sql += " AND d.decision_date <= ?"
-                params.append(date_to)
-            sql += " GROUP BY year ORDER BY year"
-            rows = conn.execute(sql, tuple(params)).fetchall()
-            for r in rows:
-                year_counts[int(r["year"])] = int(r["cnt"])
+            statute_counts = _statute_year_counts(
+                conn, law_code=law_code, article=article, court=court,
+                date_from=date_from, date_to=date_to,
+            )
         except sqlite3.Error as e:
             logger.debug("Trend statute query failed: %s", e)
-            return {"error": f"Statute trend query failed: {e}"}
+            yield {"error": f"Statute trend query failed: {e}"}
+            return
         finally:
             conn.close()
 
+    def _result(year_counts: dict[int, int], *, progress: float, sample_every: int = 1) -> dict:
+        merged = dict(statute_counts)
+        for y, cnt in year_counts.items():
+            cnt *= sample_every
+            # Both paths: take max (intersection would undercount)
+            merged[y] = max(merged.get(y, 0), cnt) if law_code and article else cnt
+        years_sorted = sorted(merged.items())
+        result = {
+            "years": [{"year": y, "count": c} for y, c in years_sorted],
+            "total": sum(merged.values()),
+            "law_code": law_code,
+            "article": article,
+            "query": query,
+            "partial": progress < 1.0,
+            "progress": round(progress, 3),
+        }
+        if sample_every > 1:
+            result["estimated"] = True
+            result["sample_every"] = sample_every
+            result["note"] = (
+                f"Counts are estimates scaled from a 1-in-{sample_every} sample of "
+                "matching decisions; pass exact=true for exact counts."
+            )
+            for entry in result["years"]:
+                entry["estimated"] = True
+        return result
+
+    if not query:
+        yield _result({}, progress=1.0)
+        return
+
     # FTS path: text query
-    if query:
-        try:
-            fts_conn = get_db()
-            sql = """
-                SELECT CAST(SUBSTR(d.decision_date, 1, 4) AS INTEGER) AS year,
-                       COUNT(*) AS cnt
-                FROM decisions_fts f
-                JOIN decisions d ON d.decision_id = f.decision_id
-                WHERE decisions_fts MATCH ?
-                  AND d.decision_date IS NOT NULL
-                  AND CAST(SUBSTR(d.decision_date, 1, 4) AS INTEGER) > 1800
-                  AND CAST(SUBSTR(d.decision_date, 1, 4) AS INTEGER) < 2100
-            """
-            params2: list = [query]
-            if court:
-                sql += " AND d.court = ?"
-                params2.append(court)
-            if date_from:
-                sql += " AND d.decision_date >= ?"
-                params2.append(date_from)
-            if date_to:
-                sql += " AND d.decision_date <= ?"
-                params2.append(date_to)
-            sql += " GROUP BY year ORDER BY year"
-            rows = fts_conn.execute(sql, tuple(params2)).fetchall()
-            fts_conn.close()
-            # Merge with statute counts (additive if both paths used)
-            for r in rows:
-                y = int(r["year"])
-                if law_code and article:
-                    # Both paths: take max (intersection would undercount)
-                    year_counts[y] = max(year_counts.get(y, 0), int(r["cnt"]))
-                else:
-                    year_counts[y] = int(r["cnt"])
-        except sqlite3.Error as e:
-            logger.debug("Trend FTS query failed: %s", e)
-            if not year_counts:
-                return {"error": f"FTS trend query failed: {e}"}
+    fts_conn = get_db()
+    try:
+        sample_every = 1 if exact else _trend_sample_every(
+            fts_conn, query, court=court, date_from=date_from, date_to=date_to,
+        )
+        for year_counts, progress in _iter_fts_year_counts(
+            fts_conn, query=query, court=court, date_from=date_from,
+            date_to=date_to, sample_every=sample_every, window=window,
+        ):
+            yield _result(year_counts, progress=progress, sample_every=sample_every)
+    except sqlite3.Error as e:
+        logger.debug("Trend FTS query failed: %s", e)
+        if statute_counts:
+            yield _result({}, progress=1.0)
+        else:
+            yield {"error": f"FTS trend query failed: {e}"}
+    finally:
+        fts_conn.close()
 
-    total = sum(year_counts.values())
-    years_sorted = sorted(year_counts.items())
 
-    return {
-        "years": [{"year": y, "count": c} for y, c in years_sorted],
-        "total": total,
-        "law_code": law_code,
-        "article": article,
-        "query": query,
-    }
+def analyze_legal_trend(
+    *,
+    query: str | None = None,
+    law_code: str | None = None,
+    article: str | None = None,
+    court: str | None = None,
+    date_from: str | None = None,
+    date_to: str | None = None,
+    exact: bool = False,
+) -> dict:
+    """Year-by-year decision counts for a statute or topic."""
+    result: dict = {}
+    for result in iter_legal_trend(
+        query=query, law_code=law_code, article=article, court=court,
+        date_from=date_from, date_to=date_to, exact=exact,
+    ):
+        pass
+    result.pop("partial", None)
+    result.pop("progress", None)
+    return result
 
 
 def draft_mock_decision(
@@ -4065,26 +5823,15 @@ def _resolve_statute_materials(
     if not statute_requests:
         return []
 
-    cache = _load_fedlex_cache()
     out: list[dict] = []
-    dirty_cache = False
     for st in statute_requests[:8]:
-        resolved = _resolve_fedlex_statute_article(
+        out.append(_resolve_fedlex_statute_article(
             law_code=st["law_code"],
             article=st["article"],
             paragraph=st.get("paragraph"),
             preferred_language=preferred_language,
             fedlex_urls=fedlex_urls,
-            cache=cache,
-        )
-        out.append(resolved)
-        if resolved.get("_cache_dirty"):
-            dirty_cache = True
-
-    if dirty_cache:
-        _save_fedlex_cache(cache)
-    for row in out:
-        row.pop("_cache_dirty", None)
+        ))
     return out
 
 
@@ -4095,7 +5842,6 @@ def _resolve_fedlex_statute_article(
     paragraph: str | None,
     preferred_language: str,
     fedlex_urls: list[str],
-    cache: dict,
 ) -> dict:
     result = {
         "law_code": law_code,
@@ -4105,7 +5851,6 @@ def _resolve_fedlex_statute_article(
         "fedlex_url": None,
         "text_excerpt": None,
         "status": "not_fetched",
-        "_cache_dirty": False,
     }
     candidates = _fedlex_candidate_urls(
         law_code=law_code,
@@ -4118,9 +5863,9 @@ def _resolve_fedlex_statute_article(
 
     for url in candidates:
         cache_key = f"{url}|{law_code}|{article}|{paragraph or ''}|{preferred_language}"
-        cached = cache.get(cache_key)
-        if isinstance(cached, dict) and cached.get("text_excerpt"):
-            result["fedlex_url"] = cached.get("fedlex_url") or url
+        cached = _fedlex_cache_get(cache_key)
+        if cached is not None:
+            result["fedlex_url"] = cached["fedlex_url"] or url
             result["text_excerpt"] = cached["text_excerpt"]
             result["status"] = "cache_hit"
             return result
@@ -4134,12 +5879,8 @@ def _resolve_fedlex_statute_article(
             result["fedlex_url"] = fetched.get("fedlex_url") or url
             result["text_excerpt"] = fetched.get("text_excerpt")
             result["status"] = "fetched"
-            cache[cache_key] = {
-                "fedlex_url": result["fedlex_url"],
-                "text_excerpt": result["text_excerpt"],
-                "fetched_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
-            }
-            result["_cache_dirty"] = True
+            if result["text_excerpt"]:
+                _fedlex_cache_put(cache_key, result["fedlex_url"], result["text_excerpt"])
             return result
 
     result["status"] = "fetch_failed"
@@ -4177,6 +5918,7 @@ def _fedlex_candidate_urls(
     return out[:8]
 
 
+@tracing.traced("http.fedlex")
 def _fetch_fedlex_article_text(*, url: str, article: str, paragraph: str | None) -> dict | None:
     try:
         import requests
@@ -4231,28 +5973,163 @@ def _extract_article_excerpt_from_html(*, html: str, article: str, paragraph: st
             # Keep the article block anyway; Fedlex formatting differs by language.
             pass
 
-    return _truncate(excerpt, 1200)
+    return _truncate(excerpt, 1200)
+
+
+_FEDLEX_DB: tuple[str, sqlite3.Connection] | None = None
+_FEDLEX_DB_LOCK = threading.Lock()
+_FEDLEX_WRITES = 0
+_FEDLEX_DB_FAILURES = 0
+_FEDLEX_DB_RETRY_AT = 0.0  # time.monotonic() before which no reopen is attempted
+
+
+def _get_fedlex_cache_conn() -> sqlite3.Connection | None:
+    """Shared connection to the Fedlex cache DB; callers hold ``_FEDLEX_DB_LOCK``.
+
+    Creates the schema and imports the legacy JSON cache on first open.
+    After a failed open (e.g. the DB is locked by another process during the
+    migration) returns None and retries with exponential backoff.
+    """
+    global _FEDLEX_DB, _FEDLEX_DB_FAILURES, _FEDLEX_DB_RETRY_AT
+    if time.monotonic() < _FEDLEX_DB_RETRY_AT:
+        return None
+    path = str(FEDLEX_CACHE_DB_PATH)
+    if _FEDLEX_DB is not None:
+        if _FEDLEX_DB[0] == path:
+            return _FEDLEX_DB[1]
+        _FEDLEX_DB[1].close()
+        _FEDLEX_DB = None
+    conn = None
+    try:
+        FEDLEX_CACHE_DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA busy_timeout = 5000")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS articles (
+                key TEXT PRIMARY KEY,
+                fedlex_url TEXT,
+                text_excerpt TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_articles_expires ON articles(expires_at);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        """)
+        _migrate_fedlex_json_cache(conn)
+    except Exception as e:
+        if conn is not None:
+            conn.close()
+        _FEDLEX_DB_FAILURES += 1
+        backoff = min(
+            METADATA_STORE_RETRY_MAX_SECONDS,
+            METADATA_STORE_RETRY_SECONDS * 2 ** (_FEDLEX_DB_FAILURES - 1),
+        )
+        _FEDLEX_DB_RETRY_AT = time.monotonic() + backoff
+        logger.warning("Fedlex cache DB unavailable (retry in %.0fs): %s", backoff, e)
+        return None
+    _FEDLEX_DB_FAILURES = 0
+    _FEDLEX_DB_RETRY_AT = 0.0
+    _FEDLEX_DB = (path, conn)
+    return conn
 
 
-def _load_fedlex_cache() -> dict:
-    if not FEDLEX_CACHE_PATH.exists():
-        return {}
+def _migrate_fedlex_json_cache(conn: sqlite3.Connection) -> None:
+    """One-time import of fedlex_cache.json (entries keep their fetch time)."""
+    conn.execute("BEGIN IMMEDIATE")
     try:
-        payload = json.loads(FEDLEX_CACHE_PATH.read_text(encoding="utf-8"))
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'json_migrated'").fetchone():
+            conn.rollback()
+            return
+        imported = 0
+        payload = {}
+        if FEDLEX_CACHE_PATH.exists():
+            try:
+                payload = json.loads(FEDLEX_CACHE_PATH.read_text(encoding="utf-8"))
+            except Exception as e:
+                logger.warning("Skipping unreadable Fedlex JSON cache %s: %s", FEDLEX_CACHE_PATH, e)
+        ttl = FEDLEX_CACHE_TTL_DAYS * 86400
+        for key, entry in (payload.items() if isinstance(payload, dict) else ()):
+            if not isinstance(entry, dict) or not entry.get("text_excerpt"):
+                continue
+            try:
+                fetched_at = datetime.fromisoformat(entry["fetched_at"]).timestamp()
+            except (KeyError, TypeError, ValueError):
+                fetched_at = time.time()
+            conn.execute(
+                "INSERT OR IGNORE INTO articles (key, fedlex_url, text_excerpt, fetched_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, entry.get("fedlex_url"), entry["text_excerpt"], fetched_at, fetched_at + ttl),
+            )
+            imported += 1
+        conn.execute("INSERT INTO meta (key, value) VALUES ('json_migrated', ?)", (str(imported),))
+        conn.commit()
     except Exception:
-        return {}
-    return payload if isinstance(payload, dict) else {}
+        conn.rollback()
+        raise
+    if imported:
+        logger.info("Imported %d Fedlex cache entries from %s", imported, FEDLEX_CACHE_PATH)
 
 
-def _save_fedlex_cache(cache: dict):
-    try:
-        FEDLEX_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
-        FEDLEX_CACHE_PATH.write_text(
-            json.dumps(cache, ensure_ascii=False, indent=2),
-            encoding="utf-8",
-        )
-    except Exception as e:
-        logger.debug("Failed to persist Fedlex cache: %s", e)
+def _fedlex_cache_get(key: str) -> dict | None:
+    """Cached {fedlex_url, text_excerpt} for *key*, or None on miss/expired/error."""
+    with _FEDLEX_DB_LOCK:
+        conn = _get_fedlex_cache_conn()
+        if conn is None:
+            return None
+        try:
+            row = conn.execute(
+                "SELECT fedlex_url, text_excerpt FROM articles WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.debug("Fedlex cache read error: %s", e)
+            return None
+    return {"fedlex_url": row[0], "text_excerpt": row[1]} if row else None
+
+
+def _fedlex_cache_put(key: str, fedlex_url: str | None, text_excerpt: str) -> None:
+    """Upsert one article excerpt (single-row write, safe across processes).
+
+    Every FEDLEX_CACHE_EVICT_EVERY writes, expired rows are dropped and the
+    table is trimmed to FEDLEX_CACHE_MAX_ROWS (soonest-expiring first).
+    """
+    global _FEDLEX_WRITES
+    now = time.time()
+    with _FEDLEX_DB_LOCK:
+        conn = _get_fedlex_cache_conn()
+        if conn is None:
+            return
+        try:
+            conn.execute(
+                """
+                INSERT INTO articles (key, fedlex_url, text_excerpt, fetched_at, expires_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    fedlex_url = excluded.fedlex_url,
+                    text_excerpt = excluded.text_excerpt,
+                    fetched_at = excluded.fetched_at,
+                    expires_at = excluded.expires_at
+                """,
+                (key, fedlex_url, text_excerpt, now, now + FEDLEX_CACHE_TTL_DAYS * 86400),
+            )
+            _FEDLEX_WRITES += 1
+            if _FEDLEX_WRITES % FEDLEX_CACHE_EVICT_EVERY == 0:
+                conn.execute("DELETE FROM articles WHERE expires_at <= ?", (now,))
+                conn.execute(
+                    """
+                    DELETE FROM articles WHERE key IN (
+                        SELECT key FROM articles ORDER BY expires_at
+                        LIMIT max(0, (SELECT COUNT(*) FROM articles) - ?)
+                    )
+                    """,
+                    (FEDLEX_CACHE_MAX_ROWS,),
+                )
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            logger.debug("Failed to persist Fedlex cache entry: %s", e)
 
 
 def _summarize_facts_text(text: str) -> str:
@@ -4621,7 +6498,16 @@ def _format_trend_response(result: dict) -> str:
 
     text = "# Legal Trend Analysis\n"
     text += f"**Filter:** {header}\n"
-    text += f"**Total:** {total:,} decisions\n\n"
+    if result.get("estimated"):
+        text += f"**Total:** ~{total:,} decisions (estimate)\n"
+    else:
+        text += f"**Total:** {total:,} decisions\n"
+    if result.get("estimated"):
+        text += (
+            f"**Note:** counts estimated from a 1-in-{result['sample_every']} "
+            "sample of matching decisions; request exact counts to disable sampling\n"
+        )
+    text += "\n"
 
     if not years:
         text += "No data found.\n"
@@ -4988,6 +6874,7 @@ def _build_db_from_parquet(reporter=None) -> dict:
 
     # Use canonical schema from db_schema.py
     conn.executescript(SCHEMA_SQL)
+    conn.executescript(MIGRATED_INDEX_SQL)
 
     # Import all Parquet files
     imported = 0
@@ -5021,6 +6908,7 @@ def _build_db_from_parquet(reporter=None) -> dict:
                                 row.get("court", ""), row.get("docket_number", ""),
                                 row.get("decision_date"),
                             ) if col == "canonical_key"
+                            else decision_year(row.get("decision_date")) if col == "decision_year"
                             else row.get(col)
                             for col in INSERT_COLUMNS
                         )
@@ -5354,6 +7242,7 @@ def _get_decision_statutes(decision_id: str, *, limit: int = 5) -> list[dict]:
         conn.close()
 
     statutes = []
+    lookup = _get_lookup_conn(_get_statutes_conn, STATUTES_DB_PATH)
     for row in rows:
         entry: dict = {
             "statute_id": row["statute_id"],
@@ -5363,27 +7252,19 @@ def _get_decision_statutes(decision_id: str, *, limit: int = 5) -> list[dict]:
             "text_excerpt": "",
         }
         # Try to fetch Fedlex article text (statutes.db uses article_num, lang, text columns)
-        stat_conn = _get_statutes_conn()
-        if stat_conn:
+        if lookup is not None:
+            stat_conn, _identity, columns = lookup
             try:
-                art_row = stat_conn.execute(
-                    """
-                    SELECT a.text FROM articles a
-                    JOIN laws l ON l.sr_number = a.sr_number
-                    WHERE (UPPER(l.abbr_de) = UPPER(?) OR UPPER(l.abbr_fr) = UPPER(?)
-                           OR UPPER(l.abbr_it) = UPPER(?))
-                      AND a.article_num = ?
-                      AND a.lang = 'de'
-                    LIMIT 1
-                    """,
-                    (row["law_code"], row["law_code"], row["law_code"], row["article"]),
-                ).fetchone()
-                if art_row:
-                    entry["text_excerpt"] = (art_row["text"] or "")[:300]
+                sr = _resolve_law_abbreviation(stat_conn, columns, row["law_code"] or "")
+                if sr:
+                    art_row = stat_conn.execute(
+                        "SELECT text FROM articles WHERE sr_number = ? AND article_num = ? AND lang = 'de' LIMIT 1",
+                        (sr, row["article"]),
+                    ).fetchone()
+                    if art_row:
+                        entry["text_excerpt"] = (art_row["text"] or "")[:300]
             except Exception:
                 pass
-            finally:
-                stat_conn.close()
         statutes.append(entry)
     return statutes
 
@@ -5485,19 +7366,15 @@ def _get_related_cases(decision_id: str, *, limit: int = 3) -> dict:
 
 def _fetch_statute_text(*, law_code: str, article: str) -> dict:
     """Fetch statute article text from statutes.db. Returns {} if unavailable."""
-    conn = _get_statutes_conn()
-    if conn is None:
+    lookup = _get_lookup_conn(_get_statutes_conn, STATUTES_DB_PATH)
+    if lookup is None:
         return {}
+    conn, _identity, columns = lookup
     try:
         # Find SR number for the law abbreviation
-        law_row = conn.execute(
-            "SELECT sr_number FROM laws WHERE UPPER(abbr_de) = UPPER(?) "
-            "OR UPPER(abbr_fr) = UPPER(?) OR UPPER(abbr_it) = UPPER(?) LIMIT 1",
-            (law_code, law_code, law_code),
-        ).fetchone()
-        if not law_row:
+        sr = _resolve_law_abbreviation(conn, columns, law_code)
+        if not sr:
             return {"law_code": law_code, "article": article}
-        sr = law_row["sr_number"]
 
         art_row = conn.execute(
             "SELECT article_num, text, lang FROM articles "
@@ -5515,8 +7392,6 @@ def _fetch_statute_text(*, law_code: str, article: str) -> dict:
         }
     except Exception:
         return {"law_code": law_code, "article": article}
-    finally:
-        conn.close()
 
 
 def _find_leading_cases_by_statute_fallback(
@@ -5709,30 +7584,28 @@ def _handle_get_doctrine(*, query: str) -> dict:
     commentary_info = None
     if statute_refs and article and law_code:
         try:
-            ok_conn = _get_ok_conn()
-            if ok_conn:
-                try:
-                    row = ok_conn.execute(
-                        """SELECT title, content_text, authors, html_link, suggested_citation
-                           FROM commentaries
-                           WHERE (abbr = ? OR sr_number = ?) AND article_num = ?
-                           ORDER BY CASE WHEN language = 'de' THEN 0
-                                         WHEN language = 'en' THEN 1
-                                         ELSE 2 END
-                           LIMIT 1""",
-                        (law_code, statute_info.get("sr_number", ""), article),
-                    ).fetchone()
-                    if row:
-                        commentary_info = {
-                            "title": row["title"],
-                            "excerpt": (row["content_text"] or "")[:800],
-                            "authors": json.loads(row["authors"]) if row["authors"] else [],
-                            "html_link": row["html_link"],
-                            "suggested_citation": row["suggested_citation"],
-                            "source": "OnlineKommentar.ch (CC-BY-4.0)",
-                        }
-                finally:
-                    ok_conn.close()
+            lookup = _get_lookup_conn(_get_ok_conn, OK_COMMENTARIES_DB_PATH)
+            if lookup is not None:
+                ok_conn = lookup[0]
+                row = ok_conn.execute(
+                    """SELECT title, content_text, authors, html_link, suggested_citation
+                       FROM commentaries
+                       WHERE (abbr = ? OR sr_number = ?) AND article_num = ?
+                       ORDER BY CASE WHEN language = 'de' THEN 0
+                                     WHEN language = 'en' THEN 1
+                                     ELSE 2 END
+                       LIMIT 1""",
+                    (law_code, statute_info.get("sr_number", ""), article),
+                ).fetchone()
+                if row:
+                    commentary_info = {
+                        "title": row["title"],
+                        "excerpt": (row["content_text"] or "")[:800],
+                        "authors": json.loads(row["authors"]) if row["authors"] else [],
+                        "html_link": row["html_link"],
+                        "suggested_citation": row["suggested_citation"],
+                        "source": "OnlineKommentar.ch (CC-BY-4.0)",
+                    }
         except Exception as e:
             logger.debug("OK commentary lookup failed: %s", e)
 
@@ -5765,9 +7638,24 @@ def get_commentary(
     language: str = "de",
 ) -> dict:
     """Fetch OnlineKommentar commentary for a statute article."""
-    conn = _get_ok_conn()
-    if conn is None:
+    lookup = _get_lookup_conn(_get_ok_conn, OK_COMMENTARIES_DB_PATH)
+    if lookup is None:
         return {"error": "OnlineKommentar commentaries database not available."}
+    conn, identity, columns = lookup
+
+    cache_key = ("commentary", identity, abbreviation, sr_number, article, language)
+    cached = _statute_cache_get(cache_key)
+    if cached is not None:
+        return cached
+
+    # Build-time columns; ok_commentaries.db built before they existed
+    # falls back to UPPER()/CAST() expressions.
+    commentary_columns = columns.get("commentaries", ())
+    abbr_expr = "abbr_norm" if "abbr_norm" in commentary_columns else "UPPER(abbr)"
+    if "sort_key" in commentary_columns:
+        sort_expr = "sort_key"
+    else:
+        sort_expr = "CAST(article_num AS INTEGER)"
 
     try:
         # Resolve abbreviation → sr_number
@@ -5776,7 +7664,7 @@ def get_commentary(
             if not sr_number:
                 # Try DB lookup
                 row = conn.execute(
-                    "SELECT sr_number FROM commentaries WHERE UPPER(abbr) = ? LIMIT 1",
+                    f"SELECT sr_number FROM commentaries WHERE {abbr_expr} = ? LIMIT 1",
                     (abbreviation.upper(),),
                 ).fetchone()
                 if row:
@@ -5794,12 +7682,12 @@ def get_commentary(
         if article:
             # Fetch specific article commentary with language fallback
             rows = conn.execute(
-                """SELECT * FROM commentaries
-                   WHERE (sr_number = ? OR UPPER(abbr) = ?) AND article_num = ?
-                   ORDER BY CASE WHEN language = ? THEN 0
-                                 WHEN language = 'de' THEN 1
-                                 ELSE 2 END
-                   LIMIT 1""",
+                f"""SELECT * FROM commentaries
+                    WHERE (sr_number = ? OR {abbr_expr} = ?) AND article_num = ?
+                    ORDER BY CASE WHEN language = ? THEN 0
+                                  WHEN language = 'de' THEN 1
+                                  ELSE 2 END
+                    LIMIT 1""",
                 (sr_filter, abbr_filter, article, language),
             ).fetchall()
 
@@ -5811,7 +7699,7 @@ def get_commentary(
                 }
 
             row = rows[0]
-            return {
+            result = {
                 "law": row["abbr"] or row["sr_number"],
                 "sr_number": row["sr_number"],
                 "article": row["article_num"],
@@ -5830,10 +7718,10 @@ def get_commentary(
         else:
             # List available articles for this law
             rows = conn.execute(
-                """SELECT DISTINCT article_num, title, language, authors
-                   FROM commentaries
-                   WHERE (sr_number = ? OR UPPER(abbr) = ?)
-                   ORDER BY CAST(article_num AS INTEGER), article_num""",
+                f"""SELECT DISTINCT {sort_expr} AS sort_key, article_num, title, language, authors
+                    FROM commentaries
+                    WHERE (sr_number = ? OR {abbr_expr} = ?)
+                    ORDER BY sort_key, article_num""",
                 (sr_filter, abbr_filter),
             ).fetchall()
 
@@ -5852,18 +7740,18 @@ def get_commentary(
                     "authors": json.loads(r["authors"]) if r["authors"] else [],
                 })
 
-            return {
+            result = {
                 "law": abbreviation or sr_number,
                 "sr_number": sr_filter,
                 "article_count": len(articles),
                 "articles": articles,
                 "source": "OnlineKommentar.ch (CC-BY-4.0)",
             }
+        _statute_cache_put(cache_key, result)
+        return result
     except sqlite3.Error as e:
         logger.error("OK commentary lookup error: %s", e)
         return {"error": f"Database error: {e}"}
-    finally:
-        conn.close()
 
 
 def search_commentaries(
@@ -5873,9 +7761,10 @@ def search_commentaries(
     limit: int = 10,
 ) -> dict:
     """Full-text search across OnlineKommentar commentaries."""
-    conn = _get_ok_conn()
-    if conn is None:
+    lookup = _get_lookup_conn(_get_ok_conn, OK_COMMENTARIES_DB_PATH)
+    if lookup is None:
         return {"error": "OnlineKommentar commentaries database not available."}
+    conn = lookup[0]
 
     limit = min(max(1, limit), 50)
 
@@ -5929,8 +7818,6 @@ def search_commentaries(
     except sqlite3.Error as e:
         logger.error("OK commentary search error: %s", e)
         return {"error": f"Database error: {e}"}
-    finally:
-        conn.close()
 
 
 def _format_get_commentary_response(result: dict) -> str:
@@ -6119,23 +8006,21 @@ def get_law(
     language: str = "de",
 ) -> dict:
     """Look up a law or specific article from the Fedlex statute database."""
-    conn = _get_statutes_conn()
-    if conn is None:
+    lookup = _get_lookup_conn(_get_statutes_conn, STATUTES_DB_PATH)
+    if lookup is None:
         return {"error": "Statutes database not available. Deploy statutes.db to enable statute lookup."}
+    conn, identity, columns = lookup
+
+    cache_key = ("law", identity, sr_number, (abbreviation or "").strip().upper(), article, language)
+    cached = _statute_cache_get(cache_key)
+    if cached is not None:
+        return cached
 
     try:
         # Resolve SR number from abbreviation if needed
         if not sr_number and abbreviation:
-            abbr_upper = abbreviation.upper()
-            row = conn.execute(
-                """SELECT sr_number FROM laws
-                   WHERE UPPER(abbr_de) = ? OR UPPER(abbr_fr) = ? OR UPPER(abbr_it) = ?
-                   LIMIT 1""",
-                (abbr_upper, abbr_upper, abbr_upper),
-            ).fetchone()
-            if row:
-                sr_number = row["sr_number"]
-            else:
+            sr_number = _resolve_law_abbreviation(conn, columns, abbreviation)
+            if not sr_number:
                 return {"error": f"No law found with abbreviation '{abbreviation}'."}
 
         if not sr_number:
@@ -6163,20 +8048,26 @@ def get_law(
                 (sr_number, article, language),
             ).fetchall()
             if not articles:
-                # Try matching with normalization (e.g., "41a" matches "41a")
+                # Prefix match (e.g., "41" also finds "41a"), as a NOCASE
+                # index range so "6a" still finds "6A" like the former LIKE
+                prefix = article.strip().lower()
                 articles = conn.execute(
                     """SELECT article_num, heading, text FROM articles
-                       WHERE sr_number = ? AND lang = ?
-                       AND (article_num = ? OR article_num LIKE ?)""",
-                    (sr_number, language, article, f"{article}%"),
+                       WHERE sr_number = ? AND article_num >= ? COLLATE NOCASE
+                       AND article_num < ? COLLATE NOCASE AND lang = ?""",
+                    (sr_number, prefix, prefix + "\U0010ffff", language),
                 ).fetchall()
             result["articles"] = [dict(a) for a in articles]
         else:
             # Return article list (no text to keep response compact)
+            if "sort_key" in columns.get("articles", ()):
+                order_by = "sort_key, article_num"
+            else:
+                order_by = "CAST(article_num AS INTEGER), article_num"
             articles = conn.execute(
-                """SELECT article_num, heading FROM articles
-                   WHERE sr_number = ? AND lang = ?
-                   ORDER BY CAST(article_num AS INTEGER), article_num""",
+                f"""SELECT article_num, heading FROM articles
+                    WHERE sr_number = ? AND lang = ?
+                    ORDER BY {order_by}""",
                 (sr_number, language),
             ).fetchall()
             result["article_count"] = len(articles)
@@ -6185,12 +8076,11 @@ def get_law(
                 for a in articles
             ]
 
+        _statute_cache_put(cache_key, result)
         return result
     except sqlite3.Error as e:
         logger.error("Statute lookup error: %s", e)
         return {"error": f"Database error: {e}"}
-    finally:
-        conn.close()
 
 
 def search_laws(
@@ -6200,9 +8090,10 @@ def search_laws(
     limit: int = 10,
 ) -> dict:
     """Full-text search across statute articles."""
-    conn = _get_statutes_conn()
-    if conn is None:
+    lookup = _get_lookup_conn(_get_statutes_conn, STATUTES_DB_PATH)
+    if lookup is None:
         return {"error": "Statutes database not available. Deploy statutes.db to enable statute search."}
+    conn = lookup[0]
 
     limit = min(max(1, limit), 50)
 
@@ -6250,8 +8141,6 @@ def search_laws(
     except sqlite3.Error as e:
         logger.error("Statute search error: %s", e)
         return {"error": f"Database error: {e}"}
-    finally:
-        conn.close()
 
 
 def _format_get_law_response(result: dict) -> str:
@@ -6317,14 +8206,39 @@ def _ttl_for_key(key: str) -> float:
     return 86400  # default 24h
 
 
+_LEXFIND_MEMORY: "OrderedDict[str, tuple[float, object]]" = OrderedDict()
+_LEXFIND_DB: tuple[str, sqlite3.Connection] | None = None
+_LEXFIND_DB_LOCK = threading.Lock()
+_LEXFIND_WRITES = 0
+_LEXFIND_EVICTING = threading.Event()
+_LEXFIND_SESSION = None
+_LEXFIND_SESSION_LOCK = threading.Lock()
+_LEXFIND_INFLIGHT: dict[tuple, Future] = {}
+_LEXFIND_INFLIGHT_LOCK = threading.Lock()
+_LEXFIND_STATS = {
+    "memory_hits": 0, "disk_hits": 0, "misses": 0, "requests": 0, "coalesced": 0, "evictions": 0,
+}
+
+
 def _get_lexfind_cache_conn() -> sqlite3.Connection | None:
-    """Open or create the LexFind cache DB. Returns None if broken."""
-    global _lexfind_cache_broken
+    """Shared connection to the LexFind cache DB (created on first use).
+
+    Callers must hold ``_LEXFIND_DB_LOCK``. Reopened when
+    LEXFIND_CACHE_DB_PATH changes; returns None once the DB proved broken.
+    """
+    global _lexfind_cache_broken, _LEXFIND_DB
     if _lexfind_cache_broken:
         return None
+    path = str(LEXFIND_CACHE_DB_PATH)
+    if _LEXFIND_DB is not None:
+        if _LEXFIND_DB[0] == path:
+            return _LEXFIND_DB[1]
+        _LEXFIND_DB[1].close()
+        _LEXFIND_DB = None
     try:
-        conn = sqlite3.connect(str(LEXFIND_CACHE_DB_PATH), timeout=3.0)
+        conn = sqlite3.connect(path, timeout=3.0, check_same_thread=False)
         conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
         conn.execute("PRAGMA busy_timeout = 3000")
         conn.execute("""
             CREATE TABLE IF NOT EXISTS cache (
@@ -6337,6 +8251,7 @@ def _get_lexfind_cache_conn() -> sqlite3.Connection | None:
             CREATE INDEX IF NOT EXISTS idx_cache_expires ON cache(expires_at)
         """)
         conn.commit()
+        _LEXFIND_DB = (path, conn)
         return conn
     except Exception as e:
         logger.warning("LexFind cache DB broken, disabling: %s", e)
@@ -6344,45 +8259,162 @@ def _get_lexfind_cache_conn() -> sqlite3.Connection | None:
         return None
 
 
+def _lexfind_memory_put(key: str, value: object, expires_at: float) -> None:
+    value = copy.deepcopy(value)
+    with _LEXFIND_DB_LOCK:
+        _LEXFIND_MEMORY[key] = (expires_at, value)
+        _LEXFIND_MEMORY.move_to_end(key)
+        while len(_LEXFIND_MEMORY) > LEXFIND_MEMORY_CACHE_SIZE:
+            _LEXFIND_MEMORY.popitem(last=False)
+
+
 def _lexfind_cache_get(key: str) -> object | None:
-    """Get a value from the persistent LexFind cache. Returns None on miss/expired/error."""
-    conn = _get_lexfind_cache_conn()
-    if conn is None:
-        return None
+    """Get a cached LexFind value: in-process LRU first, then lexfind_cache.db.
+
+    Returns None on miss/expired/error. Every caller gets its own copy, so
+    results can be mutated without touching the cache.
+    """
+    now = time.time()
+    with _LEXFIND_DB_LOCK:
+        hit = _LEXFIND_MEMORY.get(key)
+        if hit is not None and hit[0] <= now:
+            del _LEXFIND_MEMORY[key]
+            hit = None
+        if hit is not None:
+            _LEXFIND_MEMORY.move_to_end(key)
+            _LEXFIND_STATS["memory_hits"] += 1
+        else:
+            conn = _get_lexfind_cache_conn()
+            if conn is None:
+                _LEXFIND_STATS["misses"] += 1
+                return None
+            try:
+                row = conn.execute(
+                    "SELECT value, expires_at FROM cache WHERE key = ? AND expires_at > ?",
+                    (key, now),
+                ).fetchone()
+            except Exception as e:
+                logger.warning("LexFind cache read error: %s", e)
+                row = None
+            if row is None:
+                _LEXFIND_STATS["misses"] += 1
+                return None
+            _LEXFIND_STATS["disk_hits"] += 1
+    if hit is not None:
+        return copy.deepcopy(hit[1])
+    value = json.loads(row[0])
+    _lexfind_memory_put(key, value, row[1])
+    return value
+
+
+def _lexfind_cache_set(key: str, value: object) -> None:
+    """Write a value to both cache tiers with prefix-based TTL.
+
+    Size control of the DB runs in a background thread every
+    LEXFIND_CACHE_EVICT_EVERY writes instead of on each write.
+    """
+    global _LEXFIND_WRITES
+    expires_at = time.time() + _ttl_for_key(key)
+    _lexfind_memory_put(key, value, expires_at)
+    payload = json.dumps(value, ensure_ascii=False)
+    with _LEXFIND_DB_LOCK:
+        conn = _get_lexfind_cache_conn()
+        if conn is None:
+            return
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, payload, expires_at),
+            )
+            conn.commit()
+        except Exception as e:
+            logger.warning("LexFind cache write error: %s", e)
+            return
+        _LEXFIND_WRITES += 1
+        due = _LEXFIND_WRITES % LEXFIND_CACHE_EVICT_EVERY == 0
+    if due and not _LEXFIND_EVICTING.is_set():
+        _LEXFIND_EVICTING.set()
+        threading.Thread(
+            target=contextvars.copy_context().run, args=(_lexfind_cache_evict,),
+            name="lexfind-cache-evict", daemon=True,
+        ).start()
+
+
+def _lexfind_cache_evict() -> int:
+    """Drop expired rows, then the soonest-expiring rows above LEXFIND_CACHE_MAX_ROWS."""
     try:
-        row = conn.execute(
-            "SELECT value FROM cache WHERE key = ? AND expires_at > ?",
-            (key, time.time()),
-        ).fetchone()
-        return json.loads(row[0]) if row else None
-    except Exception as e:
-        logger.warning("LexFind cache read error: %s", e)
-        return None
+        with _LEXFIND_DB_LOCK:
+            conn = _get_lexfind_cache_conn()
+            if conn is None:
+                return 0
+            try:
+                deleted = conn.execute(
+                    "DELETE FROM cache WHERE expires_at <= ?", (time.time(),),
+                ).rowcount
+                deleted += conn.execute(
+                    """
+                    DELETE FROM cache WHERE key IN (
+                        SELECT key FROM cache ORDER BY expires_at
+                        LIMIT max(0, (SELECT COUNT(*) FROM cache) - ?)
+                    )
+                    """,
+                    (LEXFIND_CACHE_MAX_ROWS,),
+                ).rowcount
+                conn.commit()
+            except Exception as e:
+                logger.warning("LexFind cache eviction error: %s", e)
+                return 0
+            _LEXFIND_STATS["evictions"] += deleted
+            return deleted
     finally:
-        conn.close()
+        _LEXFIND_EVICTING.clear()
 
 
-def _lexfind_cache_set(key: str, value: object) -> None:
-    """Write a value to the persistent LexFind cache with prefix-based TTL."""
-    conn = _get_lexfind_cache_conn()
-    if conn is None:
-        return
+def _get_lexfind_session():
+    """Keep-alive ``requests.Session`` shared by all LexFind calls (None if unavailable)."""
+    global _LEXFIND_SESSION
+    if _LEXFIND_SESSION is not None:
+        return _LEXFIND_SESSION
+    with _LEXFIND_SESSION_LOCK:
+        if _LEXFIND_SESSION is None:
+            try:
+                import requests
+                from requests.adapters import HTTPAdapter
+            except ImportError:
+                logger.warning("requests library not available for LexFind API")
+                return None
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=LEXFIND_POOL_SIZE, pool_maxsize=LEXFIND_POOL_SIZE,
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers["Accept"] = "application/json"
+            _LEXFIND_SESSION = session
+    return _LEXFIND_SESSION
+
+
+def _lexfind_fetch(method: str, url: str, json_body: dict | None, timeout: float) -> dict | list | None:
+    session = _get_lexfind_session()
+    if session is None:
+        return None
+    with _LEXFIND_INFLIGHT_LOCK:
+        _LEXFIND_STATS["requests"] += 1
     try:
-        expires_at = time.time() + _ttl_for_key(key)
-        conn.execute(
-            "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
-            (key, json.dumps(value, ensure_ascii=False), expires_at),
-        )
-        count = conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
-        if count > 5000:
-            conn.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),))
-        conn.commit()
+        if method == "POST":
+            resp = session.post(url, json=json_body, timeout=timeout)
+        else:
+            resp = session.get(url, timeout=timeout)
+        if resp.status_code >= 400:
+            logger.warning(f"LexFind API {resp.status_code}: {url}")
+            return None
+        return resp.json()
     except Exception as e:
-        logger.warning("LexFind cache write error: %s", e)
-    finally:
-        conn.close()
+        logger.warning(f"LexFind API error: {e}")
+        return None
 
 
+@tracing.traced("http.lexfind")
 def _lexfind_request(
     method: str,
     path: str,
@@ -6390,27 +8422,38 @@ def _lexfind_request(
     json_body: dict | None = None,
     timeout: float | None = None,
 ) -> dict | list | None:
-    """Make a request to the LexFind API. Returns parsed JSON or None on failure."""
-    try:
-        import requests
-    except ImportError:
-        logger.warning("requests library not available for LexFind API")
-        return None
+    """Make a request to the LexFind API. Returns parsed JSON or None on failure.
 
+    Concurrent identical requests (same method, URL and body) share a single
+    upstream call; every waiting caller gets its own copy of the response.
+    """
+    method = method.upper()
     url = f"{LEXFIND_BASE_URL}/{language}/{path}"
     timeout = timeout or LEXFIND_LOOKUP_TIMEOUT
-    try:
-        if method.upper() == "POST":
-            resp = requests.post(url, json=json_body, timeout=timeout)
+    key = (method, url, json.dumps(json_body, sort_keys=True) if json_body is not None else None)
+    with _LEXFIND_INFLIGHT_LOCK:
+        future = _LEXFIND_INFLIGHT.get(key)
+        leader = future is None
+        if leader:
+            future = Future()
+            _LEXFIND_INFLIGHT[key] = future
         else:
-            resp = requests.get(url, timeout=timeout)
-        if resp.status_code >= 400:
-            logger.warning(f"LexFind API {resp.status_code}: {url}")
+            _LEXFIND_STATS["coalesced"] += 1
+    if not leader:
+        try:
+            return copy.deepcopy(future.result(timeout=timeout + 1.0))
+        except Exception as e:
+            logger.warning(f"LexFind API error (coalesced): {e}")
             return None
-        return resp.json()
-    except Exception as e:
-        logger.warning(f"LexFind API error: {e}")
-        return None
+
+    result = None
+    try:
+        result = _lexfind_fetch(method, url, json_body, timeout)
+        return result
+    finally:
+        with _LEXFIND_INFLIGHT_LOCK:
+            _LEXFIND_INFLIGHT.pop(key, None)
+        future.set_result(result)
 
 
 def _clean_lexfind_html(text: str | None) -> str:
@@ -6586,6 +8629,77 @@ def _get_legislation_local(
         conn.close()
 
 
+def _get_mirror_conn() -> sqlite3.Connection | None:
+    """Open a read-only connection to the legislation mirror, or None if absent."""
+    if not LEGISLATION_MIRROR_DB_PATH.exists():
+        return None
+    try:
+        conn = sqlite3.connect(str(LEGISLATION_MIRROR_DB_PATH), timeout=0.5)
+        conn.execute("PRAGMA query_only = ON")
+        return conn
+    except sqlite3.Error as e:
+        logger.warning("Failed to open legislation mirror: %s", e)
+        return None
+
+
+def _get_legislation_mirror(
+    *,
+    lexfind_id: int | None,
+    systematic_number: str | None,
+    canton: str | None,
+    language: str,
+) -> tuple[dict, bool] | None:
+    """Mirrored texts-of-law payload and whether it is still fresh, or None."""
+    if lexfind_id is None and not systematic_number:
+        return None
+    conn = _get_mirror_conn()
+    if conn is None:
+        return None
+    try:
+        if lexfind_id is not None:
+            row = conn.execute(
+                "SELECT payload, fetched_at FROM texts_of_law WHERE lexfind_id = ? AND language = ?",
+                (lexfind_id, language),
+            ).fetchone()
+        else:
+            row = conn.execute(
+                "SELECT payload, fetched_at FROM texts_of_law "
+                "WHERE entity = ? AND systematic_number = ? AND language = ? "
+                "ORDER BY fetched_at DESC LIMIT 1",
+                ((canton or "CH").upper(), systematic_number.strip(), language),
+            ).fetchone()
+    except sqlite3.Error as e:
+        logger.debug("Legislation mirror lookup failed: %s", e)
+        return None
+    finally:
+        conn.close()
+    if row is None:
+        return None
+    fresh = time.time() - row[1] < LEGISLATION_MIRROR_MAX_AGE_H * 3600
+    return json.loads(row[0]), fresh
+
+
+def _get_changes_mirror(entity: str, language: str) -> tuple[dict, bool] | None:
+    """Mirrored recent-changes feed and whether it is still fresh, or None."""
+    conn = _get_mirror_conn()
+    if conn is None:
+        return None
+    try:
+        row = conn.execute(
+            "SELECT payload, fetched_at FROM recent_changes WHERE entity = ? AND language = ?",
+            (entity, language),
+        ).fetchone()
+    except sqlite3.Error as e:
+        logger.debug("Legislation mirror lookup failed: %s", e)
+        return None
+    finally:
+        conn.close()
+    if row is None:
+        return None
+    fresh = time.time() - row[1] < LEGISLATION_CHANGES_MAX_AGE_H * 3600
+    return json.loads(row[0]), fresh
+
+
 def _get_legislation(
     *,
     lexfind_id: int | None = None,
@@ -6608,14 +8722,45 @@ def _get_legislation(
         if local is not None:
             return local
 
+    # Mirror-first: texts synced by search_stack.sync_legislation_mirror
+    mirrored = _get_legislation_mirror(
+        lexfind_id=lexfind_id, systematic_number=systematic_number, canton=canton, language=language,
+    )
+    if mirrored is not None and mirrored[1]:
+        return _legislation_from_lexfind(mirrored[0], language, include_versions)
+
     if not LEXFIND_ENABLED:
         # Still check local for federal laws even when LexFind is off
         if systematic_number and (canton is None or canton.upper() == "CH"):
             local = _get_legislation_local(systematic_number, language)
             if local is not None:
                 return local
+        if mirrored is not None:
+            return _legislation_from_lexfind(mirrored[0], language, include_versions)
         return {"error": "Legislation lookup is disabled (LEXFIND_ENABLED=false)."}
 
+    result = _get_legislation_live(
+        lexfind_id=lexfind_id,
+        systematic_number=systematic_number,
+        canton=canton,
+        include_versions=include_versions,
+        language=language,
+    )
+    if result.get("error") and mirrored is not None:
+        # A stale mirrored copy beats an upstream failure
+        return _legislation_from_lexfind(mirrored[0], language, include_versions)
+    return result
+
+
+def _get_legislation_live(
+    *,
+    lexfind_id: int | None,
+    systematic_number: str | None,
+    canton: str | None,
+    include_versions: bool,
+    language: str,
+) -> dict:
+    """Resolve and fetch legislation from the LexFind API (cached)."""
     # Path B: resolve systematic number to ID
     if lexfind_id is None:
         if not systematic_number:
@@ -6736,6 +8881,13 @@ def _get_legislation(
     if not data:
         return {"error": f"Failed to fetch legislation {lexfind_id} from LexFind."}
 
+    result = _legislation_from_lexfind(data, language, include_versions)
+    _lexfind_cache_set(cache_key, result)
+    return result
+
+
+def _legislation_from_lexfind(data: dict, language: str, include_versions: bool) -> dict:
+    """Shape a texts-of-law/{id}/with-version-groups response for the tools."""
     entity = data.get("entity", {})
 
     # Extract URLs
@@ -6782,8 +8934,6 @@ def _get_legislation(
     }
     if include_versions:
         result["versions"] = versions_list
-
-    _lexfind_cache_set(cache_key, result)
     return result
 
 
@@ -6793,15 +8943,19 @@ def _browse_legislation_changes(
     language: str = "de",
 ) -> dict:
     """Fetch recent legislation changes for a canton or federal level."""
-    if not LEXFIND_ENABLED:
-        return {"error": "Legislation browsing is disabled (LEXFIND_ENABLED=false)."}
-
     language = language if language in ("de", "fr", "it") else "de"
     entity_id = LEXFIND_ENTITY_IDS.get(canton.upper())
     if entity_id is None:
         valid = ", ".join(sorted(LEXFIND_ENTITY_IDS.keys()))
         return {"error": f"Unknown canton '{canton}'. Valid: {valid}"}
 
+    # Mirror-first: feeds synced by search_stack.sync_legislation_mirror
+    mirrored = _get_changes_mirror(canton.upper(), language)
+    if mirrored is not None and (mirrored[1] or not LEXFIND_ENABLED):
+        return _changes_from_lexfind(mirrored[0], canton, language)
+    if not LEXFIND_ENABLED:
+        return {"error": "Legislation browsing is disabled (LEXFIND_ENABLED=false)."}
+
     cache_key = f"changes:{language}:{canton}"
     cached = _lexfind_cache_get(cache_key)
     if cached is not None:
@@ -6812,8 +8966,17 @@ def _browse_legislation_changes(
         timeout=LEXFIND_LOOKUP_TIMEOUT,
     )
     if not data:
+        if mirrored is not None:
+            return _changes_from_lexfind(mirrored[0], canton, language)
         return {"error": f"Failed to fetch recent changes for {canton}."}
 
+    result = _changes_from_lexfind(data, canton, language)
+    _lexfind_cache_set(cache_key, result)
+    return result
+
+
+def _changes_from_lexfind(data: dict, canton: str, language: str) -> dict:
+    """Shape an entities/{id}/recent-changes response for the tools."""
     changes = []
     for ch in data.get("recent_changes", []):
         tol = ch.get("text_of_law", {})
@@ -6844,9 +9007,7 @@ def _browse_legislation_changes(
             "original_url": original_url,
         })
 
-    result = {"canton": canton.upper(), "changes": changes, "language": language}
-    _lexfind_cache_set(cache_key, result)
-    return result
+    return {"canton": canton.upper(), "changes": changes, "language": language}
 
 
 # ── LexFind response formatters ──────────────────────────────
@@ -7262,6 +9423,12 @@ def _list_tools() -> list[Tool]:
                         "type": "string",
                         "description": "Optional end date (YYYY-MM-DD)",
                     },
+                    "exact": {
+                        "type": "boolean",
+                        "description": "Count every match even for very common terms "
+                                       "(default: sample and estimate)",
+                        "default": False,
+                    },
                 },
             },
         ),
@@ -7704,8 +9871,39 @@ async def handle_list_tools() -> list[Tool]:
     return _list_tools()
 
 
+# Tool arguments recorded on spans and in the slow-query log. Free text the
+# user wrote (facts, questions, clarifications) is never recorded; search
+# queries are kept, truncated, since they are what the slow log is for.
+_TRACE_ARG_NAMES = frozenset({
+    "court", "canton", "language", "date_from", "date_to", "year", "limit",
+    "offset", "sort", "fields", "decision_id", "decision_type", "chamber",
+    "direction", "law_code", "article", "sr_number", "abbreviation",
+    "systematic_number", "lexfind_id", "exact", "search_in_content",
+    "active_only", "include_versions", "full_text", "min_confidence",
+})
+_TRACE_QUERY_CHARS = 120
+
+
+def _trace_attrs(arguments: dict) -> dict:
+    """Allowlisted scalar tool arguments (query, filters) for the slow-query log."""
+    attrs = {}
+    for key, value in (arguments or {}).items():
+        if not isinstance(value, (str, int, float, bool)):
+            continue
+        if key == "query" and isinstance(value, str):
+            attrs[key] = _truncate(value, _TRACE_QUERY_CHARS)
+        elif key in _TRACE_ARG_NAMES:
+            attrs[key] = _truncate(value, _TRACE_QUERY_CHARS) if isinstance(value, str) else value
+    return attrs
+
+
 @server.call_tool()
 async def handle_call_tool(name: str, arguments: dict) -> list[TextContent]:
+    with tracing.trace("tool", name, **_trace_attrs(arguments)):
+        return await _dispatch_tool_call(name, arguments)
+
+
+async def _dispatch_tool_call(name: str, arguments: dict) -> list[TextContent]:
     try:
         if REMOTE_MODE and name in ("update_database", "check_update_status"):
             return [TextContent(type="text", text="This tool is not available on the remote server.")]
@@ -7891,6 +10089,7 @@ async def handle_call_tool(name: str, arguments: dict) -> list[TextContent]:
                 court=arguments.get("court"),
                 date_from=arguments.get("date_from"),
                 date_to=arguments.get("date_to"),
+                exact=bool(arguments.get("exact", False)),
             )
             return [TextContent(type="text", text=_format_trend_response(result))]
 
@@ -8066,9 +10265,11 @@ async def handle_call_tool(name: str, arguments: dict) -> list[TextContent]:
             )]
 
         else:
+            tracing.mark_error("UnknownTool")
             return [TextContent(type="text", text=f"Unknown tool: {name}")]
 
     except FileNotFoundError as e:
+        tracing.mark_error(type(e).__name__)
         return [TextContent(
             type="text",
             text=(
@@ -8078,6 +10279,7 @@ async def handle_call_tool(name: str, arguments: dict) -> list[TextContent]:
         )]
     except Exception as e:
         logger.error(f"Tool error {name}: {e}", exc_info=True)
+        tracing.mark_error(type(e).__name__)
         return [TextContent(type="text", text=f"Error: {e}")]
 
 
@@ -8100,6 +10302,7 @@ def _log_startup():
 async def main_stdio():
     """Run the MCP server over stdio (default, local mode)."""
     _log_startup()
+    _get_metadata_store()  # starts the background load when enabled
     async with stdio_server() as (read_stream, write_stream):
         await server.run(
             read_stream,
@@ -8117,11 +10320,12 @@ def main_remote(host: str, port: int):
     from mcp.server.sse import SseServerTransport
     from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
     from starlette.applications import Starlette
-    from starlette.responses import JSONResponse, Response
+    from starlette.responses import JSONResponse, Response, StreamingResponse
     from starlette.routing import Mount, Route
     import uvicorn
 
     _log_startup()
+    _get_metadata_store()  # starts the background load when enabled
     logger.info(f"Remote SSE mode on {host}:{port}")
     if AUTH_TOKEN:
         logger.info("Bearer-token auth enabled")
@@ -8168,17 +10372,29 @@ def main_remote(host: str, port: int):
             )
 
     # ── Health / readiness endpoint (exempt from auth) ────────
+    # Readiness only: one indexed row probe, no COUNT(*) over the table.
+    # The decision count comes from the cached startup stats when present.
     async def handle_health(request):
         try:
             conn = get_db()
-            row = conn.execute("SELECT COUNT(*) FROM decisions").fetchone()
+            conn.execute("SELECT 1 FROM decisions LIMIT 1").fetchone()
             conn.close()
-            return JSONResponse({"status": "ok", "decisions": row[0]})
+            payload = {"status": "ok"}
+            stats = _cache_get(("get_db_stats",))
+            if stats and "total_decisions" in stats:
+                payload["decisions"] = stats["total_decisions"]
+            return JSONResponse(payload)
         except Exception as e:
             return JSONResponse(
                 {"status": "error", "detail": str(e)}, status_code=503,
             )
 
+    async def handle_metrics(request):
+        return Response(
+            tracing.render_prometheus(),
+            media_type="text/plain; version=0.0.4; charset=utf-8",
+        )
+
     # ── REST API (FastAPI sub-app at /api) ─────────────────────
     rest_api = FastAPI(
         title="OpenCaseLaw API",
@@ -8197,6 +10413,18 @@ def main_remote(host: str, port: int):
         allow_headers=["*"],
     )
 
+    @rest_api.middleware("http")
+    async def trace_rest_request(request, call_next):
+        with tracing.trace("api", request.url.path, **dict(request.query_params)) as record:
+            response = await call_next(request)
+            if response.status_code >= 500:
+                tracing.mark_error(f"HTTP {response.status_code}")
+            if record is not None:
+                # Label by route template, not raw path, to bound cardinality.
+                route = request.scope.get("route")
+                record.name = getattr(route, "path", None) or "unmatched"
+            return response
+
     # ── Case Law endpoints ─────────────────────────────────────
 
     @rest_api.get("/decisions", tags=["Case Law"],
@@ -8314,11 +10542,36 @@ def main_remote(host: str, port: int):
         court: str = Query(None, description="Court filter"),
         date_from: str = Query(None, description="Start date (YYYY-MM-DD)"),
         date_to: str = Query(None, description="End date (YYYY-MM-DD)"),
+        exact: bool = Query(False, description="Count every match instead of sampling very common terms"),
     ):
         return await asyncio.to_thread(
             analyze_legal_trend, query=query, law_code=law_code, article=article,
-            court=court, date_from=date_from, date_to=date_to,
+            court=court, date_from=date_from, date_to=date_to, exact=exact,
+        )
+
+    @rest_api.get("/trends/stream", tags=["Analysis"],
+                  summary="Stream legal trend",
+                  description="Like /trends, but streams cumulative partial histograms "
+                              "as newline-delimited JSON while the match set is counted.")
+    async def api_stream_legal_trend(
+        query: str = Query(None, description="Text query"),
+        law_code: str = Query(None, description="Law code (e.g., BV, OR). Requires article."),
+        article: str = Query(None, description="Article number (requires law_code)"),
+        court: str = Query(None, description="Court filter"),
+        date_from: str = Query(None, description="Start date (YYYY-MM-DD)"),
+        date_to: str = Query(None, description="End date (YYYY-MM-DD)"),
+        exact: bool = Query(False, description="Count every match instead of sampling very common terms"),
+    ):
+        # Sync generator: Starlette iterates it in the thread pool.
+        lines = (
+            json.dumps(r, ensure_ascii=False) + "\n"
+            for r in iter_legal_trend(
+                query=query, law_code=law_code, article=article, court=court,
+                date_from=date_from, date_to=date_to, exact=exact,
+                window=TREND_STREAM_WINDOW,
+            )
         )
+        return StreamingResponse(lines, media_type="application/x-ndjson")
 
     @rest_api.post("/mock-decision", tags=["Analysis"],
                    summary="Draft a mock decision",
@@ -8478,6 +10731,7 @@ def main_remote(host: str, port: int):
     app = Starlette(
         routes=[
             Route("/health", endpoint=handle_health),
+            *([Route("/metrics", endpoint=handle_metrics)] if METRICS_ENABLED else []),
             Route("/sse", endpoint=handle_sse),
             Route("/", endpoint=handle_mcp_root, methods=["GET", "POST", "DELETE"]),
             Mount("/messages/", app=sse.handle_post_message),
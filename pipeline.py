@@ -8,7 +8,7 @@ and optionally imports into SQLite FTS5 for full-text search.
 Architecture:
 - Each scraper produces a list of Decision objects
 - Decisions are written as daily Parquet shards: data/daily/YYYY-MM-DD_{court}.parquet
-- HuggingFace upload: incremental (only new shards)
+- HuggingFace upload: incremental (only shards whose content changed, one commit)
 - Monthly consolidation: merge daily shards into monthly files
 - Optional: SQLite FTS5 import for local/VPS search
 
@@ -137,64 +137,61 @@ def upload_to_huggingface(
     output_dir: Path,
     repo_id: str,
     token: str | None = None,
-) -> None:
+    dry_run: bool = False,
+) -> dict | None:
     """
-    Upload new Parquet shards to HuggingFace.
+    Upload changed daily Parquet shards to HuggingFace.
 
-    Uses the HuggingFace Hub API for incremental uploads.
-    Only uploads files that don't already exist in the repo.
+    Shards are compared by content hash against the manifest of the last
+    push (output_dir/hf_manifest_daily.json, see hf_sync.py); new or
+    appended-to shards go up in a single commit, unchanged ones are skipped.
+    With dry_run, only the planned transfer is reported. Returns the plan.
     """
     try:
-        from huggingface_hub import HfApi
+        from hf_sync import HubRemote, sync
     except ImportError:
         logger.error("huggingface_hub not installed. Run: pip install huggingface_hub")
-        return
+        return None
 
     token = token or os.environ.get("HF_TOKEN")
-    if not token:
+    if not token and not dry_run:
         logger.error("No HuggingFace token. Set HF_TOKEN env var.")
-        return
-
-    api = HfApi()
+        return None
 
     daily_dir = output_dir / "data" / "daily"
     if not daily_dir.exists():
         logger.info("No daily shards to upload.")
-        return
+        return None
 
-    # List existing files in repo
     try:
-        existing = set()
-        for f in api.list_repo_files(repo_id, repo_type="dataset", token=token):
-            existing.add(f)
-    except Exception:
-        # Repo might not exist yet
-        existing = set()
-        try:
-            api.create_repo(repo_id, repo_type="dataset", token=token, private=False)
-            logger.info(f"Created HuggingFace dataset repo: {repo_id}")
-        except Exception as e:
-            logger.error(f"Failed to create repo: {e}")
-            return
+        remote = HubRemote(repo_id, token=token)
+        if not dry_run:
+            remote.api.create_repo(repo_id, repo_type="dataset", private=False, exist_ok=True)
+    except ImportError:
+        logger.error("huggingface_hub not installed. Run: pip install huggingface_hub")
+        return None
+    except Exception as e:
+        logger.error(f"Failed to create repo: {e}")
+        return None
 
-    # Upload all shards (always upload — shards may have been appended to since last upload)
-    uploaded = 0
-    for parquet_file in sorted(daily_dir.glob("*.parquet")):
-        remote_path = f"data/daily/{parquet_file.name}"
-        try:
-            api.upload_file(
-                path_or_fileobj=str(parquet_file),
-                path_in_repo=remote_path,
-                repo_id=repo_id,
-                repo_type="dataset",
-                token=token,
-            )
-            uploaded += 1
-            logger.info(f"Uploaded: {remote_path}")
-        except Exception as e:
-            logger.error(f"Failed to upload {parquet_file.name}: {e}")
+    try:
+        plan = sync(
+            daily_dir,
+            remote,
+            manifest_path=output_dir / "hf_manifest_daily.json",
+            prefix="data/daily",
+            dry_run=dry_run,
+        )
+    except Exception as e:
+        logger.error(f"HuggingFace upload failed: {e}")
+        return None
 
-    logger.info(f"HuggingFace upload complete. {uploaded} files.")
+    logger.info(
+        f"HuggingFace upload {'planned' if dry_run else 'complete'}. "
+        f"{len(plan['upload'])} files ({plan['upload_bytes'] / 1e6:.1f} MB), "
+        f"{plan['unchanged']} unchanged."
+    )
+    return plan
 
 
 # ============================================================
@@ -269,13 +266,17 @@ def import_to_fts5(output_dir: Path, db_path: Path | None = None) -> None:
         logger.error("pyarrow not installed.")
         return
 
-    from db_schema import SCHEMA_SQL, INSERT_OR_IGNORE_SQL, INSERT_COLUMNS
+    from db_schema import (
+        SCHEMA_SQL, INSERT_OR_IGNORE_SQL, INSERT_COLUMNS,
+        decision_year, migrate_decisions_schema,
+    )
 
     db_path = db_path or output_dir / "decisions.db"
 
     conn = sqlite3.connect(str(db_path))
     conn.execute("PRAGMA journal_mode=WAL")
     conn.executescript(SCHEMA_SQL)
+    migrate_decisions_schema(conn)
 
     # Import from daily shards
     daily_dir = output_dir / "data" / "daily"
@@ -292,6 +293,7 @@ def import_to_fts5(output_dir: Path, db_path: Path | None = None) -> None:
                     try:
                         values = tuple(
                             json.dumps(row, default=str) if col == "json_data"
+                            else decision_year(row.get("decision_date")) if col == "decision_year"
                             else row.get(col)
                             for col in INSERT_COLUMNS
                         )
@@ -327,6 +329,7 @@ def run_pipeline(
     output_dir: Path = Path("output"),
     state_dir: Path = Path("state"),
     do_upload: bool = False,
+    upload_dry_run: bool = False,
     hf_repo: str = "voilaj/swiss-caselaw",
     do_fts5: bool = False,
     do_consolidate: bool = False,
@@ -403,7 +406,7 @@ def run_pipeline(
 
     # Upload to HuggingFace
     if do_upload:
-        upload_to_huggingface(output_dir, hf_repo)
+        upload_to_huggingface(output_dir, hf_repo, dry_run=upload_dry_run)
 
     # Consolidate monthly
     if do_consolidate:
@@ -456,6 +459,11 @@ Available courts: see run_scraper.py SCRAPERS registry
     parser.add_argument("--since", type=str, help="Only scrape since this date")
     parser.add_argument("--max", type=int, help="Max decisions per court")
     parser.add_argument("--upload", action="store_true", help="Upload to HuggingFace")
+    parser.add_argument(
+        "--upload-dry-run",
+        action="store_true",
+        help="With --upload: only report which shards would be uploaded and the transfer size",
+    )
     parser.add_argument(
         "--hf-repo",
         type=str,
@@ -504,6 +512,7 @@ Available courts: see run_scraper.py SCRAPERS registry
                 output_dir=output_dir,
                 state_dir=state_dir,
                 do_upload=args.upload,
+                upload_dry_run=args.upload_dry_run,
                 hf_repo=args.hf_repo,
                 do_fts5=args.fts5,
                 do_consolidate=args.consolidate,
@@ -518,7 +527,7 @@ Available courts: see run_scraper.py SCRAPERS registry
         if args.fts5:
             import_to_fts5(output_dir)
         if args.upload:
-            upload_to_huggingface(output_dir, args.hf_repo)
+            upload_to_huggingface(output_dir, args.hf_repo, dry_run=args.upload_dry_run)
 
 
 if __name__ == "__main__":
@@ -10,7 +10,7 @@ Orchestration script for VPS cron job. Runs the full pipeline:
   2c. Build reference graph (citations + statutes, ~78 min)
   2d. Quality enrichment (titles, regeste, dates, hashes, dedup)
   3.  Export JSONL → Parquet
-  4.  Upload Parquet + dataset card to HuggingFace
+  4.  Upload changed Parquet shards + dataset card to HuggingFace
   5.  Generate stats.json
   6.  Git commit + push docs/stats.json
 
@@ -18,6 +18,14 @@ Most steps are wrapped in try/except — failures are logged. Critical steps
 (FTS5, Parquet) will skip subsequent guarded steps (HF upload, git push) to
 avoid publishing an incomplete dataset.
 
+Steps declare their ordering, inputs and outputs in STEP_SPECS and run as a
+DAG: independent steps (quality report next to the reference graph, stats
+and git push next to the Parquet export and upload) run concurrently within
+--max-cpus / --max-memory-gb. On non-rebuild days a step
+is skipped when its inputs (and the step script) are unchanged since its last
+successful run and its outputs still exist (state in output/publish_state.json).
+Per-step timings and the critical path go to output/publish_report.json.
+
 Cron:
     15 3 * * * cd /opt/caselaw/repo && python3 publish.py >> logs/publish.log 2>&1
 
@@ -25,15 +33,21 @@ Usage:
     python3 publish.py              # run full pipeline
     python3 publish.py --step 3     # run only step 3 (export)
     python3 publish.py --dry-run    # log what would happen
+    python3 publish.py --force      # rerun steps even if their inputs are unchanged
 """
 from __future__ import annotations
 
 import argparse
+import hashlib
+import json
 import logging
+import os
 import subprocess
 import sys
 import threading
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
 
@@ -44,8 +58,12 @@ OUTPUT_DIR = REPO_DIR / "output"
 DATASET_DIR = OUTPUT_DIR / "dataset"
 DOCS_DIR = REPO_DIR / "docs"
 DB_PATH = OUTPUT_DIR / "decisions.db"
+STATE_PATH = OUTPUT_DIR / "publish_state.json"
+REPORT_PATH = OUTPUT_DIR / "publish_report.json"
 
 HF_REPO_ID = "voilaj/swiss-caselaw"
+# Hashes / row counts of the shards last pushed to HF_REPO_ID (hf_sync.py)
+HF_MANIFEST_PATH = OUTPUT_DIR / "hf_manifest.json"
 
 
 def run_cmd(cmd: list[str], description: str, dry_run: bool = False, timeout: int = 3600) -> bool:
@@ -99,6 +117,11 @@ def run_cmd(cmd: list[str], description: str, dry_run: bool = False, timeout: in
         return False
 
 
+def _is_rebuild_day(full_rebuild: bool = False) -> bool:
+    """Sunday (UTC) or --full-rebuild: weekly steps run, nothing is skipped."""
+    return full_rebuild or datetime.now(timezone.utc).weekday() == 6
+
+
 def step_1_ingest(dry_run: bool = False) -> bool:
     """Step 1: Ingest new entscheidsuche.ch downloads."""
     logger.info("Step 1: Ingest entscheidsuche downloads")
@@ -130,7 +153,7 @@ def step_2_build_fts5(dry_run: bool = False, full_rebuild: bool = False) -> bool
         return False
 
     # Sunday (weekday 6) = full rebuild, other days = incremental
-    is_rebuild_day = full_rebuild or datetime.now(timezone.utc).weekday() == 6
+    is_rebuild_day = _is_rebuild_day(full_rebuild)
 
     cmd = [sys.executable, str(script), "--output", str(OUTPUT_DIR)]
 
@@ -148,7 +171,7 @@ def step_2_build_fts5(dry_run: bool = False, full_rebuild: bool = False) -> bool
 
 def step_2b_quality_report(dry_run: bool = False, full_rebuild: bool = False) -> bool:
     """Step 2b: Generate quality report and check gates (weekly)."""
-    is_rebuild_day = full_rebuild or datetime.now(timezone.utc).weekday() == 6
+    is_rebuild_day = _is_rebuild_day(full_rebuild)
 
     if not is_rebuild_day:
         logger.info("Step 2b: Quality report — skipped (runs on Sundays)")
@@ -178,7 +201,7 @@ def step_2b_quality_report(dry_run: bool = False, full_rebuild: bool = False) ->
 
 def step_2c_build_reference_graph(dry_run: bool = False, full_rebuild: bool = False) -> bool:
     """Step 2c: Build reference graph (citations + statutes, weekly)."""
-    is_rebuild_day = full_rebuild or datetime.now(timezone.utc).weekday() == 6
+    is_rebuild_day = _is_rebuild_day(full_rebuild)
 
     if not is_rebuild_day:
         logger.info("Step 2c: Reference graph — skipped (runs on Sundays)")
@@ -212,7 +235,7 @@ def step_2d_enrich_quality(dry_run: bool = False, full_rebuild: bool = False) ->
     Only runs on Sunday (or --full-rebuild). Uses checkpoint internally so
     even a full run is fast when no new decisions exist.
     """
-    is_enrichment_day = full_rebuild or datetime.now(timezone.utc).weekday() == 6
+    is_enrichment_day = _is_rebuild_day(full_rebuild)
 
     if not is_enrichment_day:
         logger.info("Step 2d: Quality enrichment — skipped (runs weekly on Sunday)")
@@ -259,20 +282,18 @@ def step_3_export_parquet(dry_run: bool = False) -> bool:
 
 
 def step_4_upload_hf(dry_run: bool = False) -> bool:
-    """Step 4: Upload Parquet + dataset card to HuggingFace."""
-    logger.info("Step 4: Upload to HuggingFace")
-
-    if dry_run:
-        logger.info("  [dry-run] would upload to HuggingFace")
-        return True
+    """Step 4: Upload changed Parquet shards + dataset card to HuggingFace.
 
-    try:
-        from huggingface_hub import HfApi
-    except ImportError:
-        logger.error("  huggingface_hub not installed. Run: pip install huggingface_hub")
-        return False
+    Delta upload via hf_sync: shards whose content hash matches the last
+    push (HF_MANIFEST_PATH) are skipped, the rest go up in one commit, and
+    remote data/*.parquet files no longer present locally are deleted.
+    """
+    logger.info("Step 4: Upload to HuggingFace")
 
     if not DATASET_DIR.exists():
+        if dry_run:
+            logger.info("  [dry-run] would upload to HuggingFace")
+            return True
         logger.error(f"  Dataset directory not found: {DATASET_DIR}")
         return False
 
@@ -282,31 +303,38 @@ def step_4_upload_hf(dry_run: bool = False) -> bool:
         return False
 
     try:
-        api = HfApi()
-
-        # Upload dataset card
-        card_path = REPO_DIR / "dataset_card.md"
-        if card_path.exists():
-            api.upload_file(
-                path_or_fileobj=str(card_path),
-                path_in_repo="README.md",
-                repo_id=HF_REPO_ID,
-                repo_type="dataset",
-            )
-            logger.info("  Uploaded dataset card")
-
-        # Upload Parquet files to data/ directory (batch upload)
-        logger.info(f"  Uploading {len(parquet_files)} Parquet files to data/...")
-        api.upload_folder(
-            folder_path=str(DATASET_DIR),
-            path_in_repo="data",
-            repo_id=HF_REPO_ID,
-            repo_type="dataset",
-            allow_patterns="*.parquet",
-            delete_patterns="*.parquet",  # prune remote parquet not in local folder
-        )
+        from hf_sync import HubRemote, sync
+        remote = HubRemote(HF_REPO_ID)
+    except ImportError:
+        if dry_run:
+            logger.info("  [dry-run] would upload to HuggingFace")
+            return True
+        logger.error("  huggingface_hub not installed. Run: pip install huggingface_hub")
+        return False
 
-        logger.info(f"  Uploaded {len(parquet_files)} files to {HF_REPO_ID}")
+    try:
+        today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+        plan = sync(
+            DATASET_DIR,
+            remote,
+            manifest_path=HF_MANIFEST_PATH,
+            prefix="data",
+            pattern="*.parquet",
+            extra_files=[(REPO_DIR / "dataset_card.md", "README.md")],
+            prune=True,  # prune remote parquet not in local folder
+            dry_run=dry_run,
+            message=f"Update dataset ({today})",
+        )
+        if dry_run:
+            logger.info(
+                f"  [dry-run] would upload {len(plan['upload'])} files "
+                f"({plan['upload_bytes'] / 1e6:.1f} MB), delete {len(plan['delete'])}"
+            )
+        else:
+            logger.info(
+                f"  Uploaded {len(plan['upload'])} files ({plan['upload_bytes'] / 1e6:.1f} MB), "
+                f"deleted {len(plan['delete'])}, {plan['unchanged']} unchanged — {HF_REPO_ID}"
+            )
         return True
 
     except Exception as e:
@@ -384,6 +412,215 @@ STEPS = [
 ]
 
 
+@dataclass(frozen=True)
+class StepSpec:
+    """Scheduling metadata for a step.
+
+    after:   steps that must have finished first (data or DB-write ordering)
+    inputs:  files/directories whose change makes the step rerun; steps
+             without inputs always run
+    outputs: must exist for an unchanged step to be skipped
+    cpus / memory_gb: share of the --max-cpus / --max-memory-gb budget
+    """
+    after: tuple = ()
+    inputs: tuple[Path, ...] = ()
+    outputs: tuple[Path, ...] = ()
+    cpus: int = 1
+    memory_gb: float = 1.0
+
+
+# 2b/2c only read decisions.db and run side by side; enrichment (2d) writes
+# it and therefore waits for both. Export reads the enriched DB (JSONL only
+# as a fallback), after which the upload overlaps stats + git push.
+STEP_SPECS: dict = {
+    1: StepSpec(outputs=(OUTPUT_DIR / "decisions",)),
+    2: StepSpec(
+        after=(1,),
+        inputs=(OUTPUT_DIR / "decisions", REPO_DIR / "build_fts5.py"),
+        outputs=(DB_PATH,),
+        memory_gb=4.0,
+    ),
+    "2b": StepSpec(
+        after=(2,),
+        inputs=(DB_PATH, REPO_DIR / "quality_report.py"),
+        outputs=(OUTPUT_DIR / "quality_report.json",),
+        memory_gb=2.0,
+    ),
+    "2c": StepSpec(
+        after=(2,),
+        inputs=(DB_PATH, REPO_DIR / "search_stack" / "build_reference_graph.py"),
+        outputs=(OUTPUT_DIR / "reference_graph.db",),
+        memory_gb=6.0,
+    ),
+    "2d": StepSpec(
+        after=("2b", "2c"),
+        inputs=(DB_PATH, REPO_DIR / "scripts" / "enrich_quality.py"),
+        outputs=(DB_PATH,),
+        memory_gb=2.0,
+    ),
+    3: StepSpec(
+        after=("2d",),
+        inputs=(DB_PATH, OUTPUT_DIR / "decisions", REPO_DIR / "export_parquet.py"),
+        outputs=(DATASET_DIR,),
+        memory_gb=4.0,
+    ),
+    4: StepSpec(after=(3,), inputs=(DATASET_DIR, REPO_DIR / "dataset_card.md", REPO_DIR / "hf_sync.py")),
+    5: StepSpec(
+        after=("2d",),
+        inputs=(DB_PATH, REPO_DIR / "generate_stats.py"),
+        outputs=(DOCS_DIR / "stats.json",),
+    ),
+    6: StepSpec(after=(5,)),
+}
+
+# Steps 4 (HF upload) and 6 (git push) must not run if critical steps failed,
+# because step 4 prunes remote parquet based on local state.
+CRITICAL_STEPS = {2, 3}
+GUARDED_STEPS = {4, 6}
+
+
+def _fingerprint(paths) -> str:
+    """Hash of size + mtime of every file under *paths* (stat only, no reads)."""
+    digest = hashlib.sha256()
+    for path in paths:
+        path = Path(path)
+        digest.update(str(path).encode())
+        if path.is_dir():
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    full = os.path.join(root, name)
+                    try:
+                        st = os.stat(full)
+                    except OSError:
+                        continue
+                    digest.update(f"{os.path.relpath(full, path)}:{st.st_size}:{st.st_mtime_ns};".encode())
+        elif path.exists():
+            st = path.stat()
+            digest.update(f":{st.st_size}:{st.st_mtime_ns};".encode())
+        else:
+            digest.update(b":missing;")
+    return digest.hexdigest()
+
+
+def _load_state() -> dict:
+    try:
+        return json.loads(STATE_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_state(state: dict) -> None:
+    STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = STATE_PATH.with_suffix(".tmp")
+    tmp.write_text(json.dumps(state, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, STATE_PATH)
+
+
+def _step_dependencies(selected: list) -> dict:
+    """Selected step → selected steps it must wait for.
+
+    Ordering is transitive through steps that are not selected, so running
+    e.g. 2 and 2d without 2b/2c still orders 2d after 2.
+    """
+    def ancestors(num, seen):
+        for dep in STEP_SPECS.get(num, StepSpec()).after:
+            if dep not in seen:
+                seen.add(dep)
+                ancestors(dep, seen)
+        return seen
+
+    chosen = set(selected)
+    return {num: ancestors(num, set()) & chosen for num in selected}
+
+
+def _total_memory_gb() -> float:
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 1e9
+    except (ValueError, OSError, AttributeError):
+        return 8.0
+
+
+def run_dag(steps: list, deps: dict, run_step, *, max_cpus: int, max_memory_gb: float) -> dict:
+    """Run *steps* ([(num, name, func)]) as a DAG, return per-step timings.
+
+    A step starts once everything in deps[num] has finished and its
+    StepSpec cpus/memory fit the remaining budget; a step larger than the
+    whole budget still runs, alone. run_step(num, name, func) returns a
+    status string ("ok", "failed", "unchanged", "skipped").
+    """
+    pending = list(steps)
+    finished: set = set()
+    running: dict = {}
+    timings: dict = {}
+    cpus_used = 0
+    memory_used = 0.0
+    t0 = time.time()
+
+    def _call(num, name, func):
+        threading.current_thread().name = f"step-{num}"
+        start = time.time()
+        status = run_step(num, name, func)
+        return status, start, time.time()
+
+    with ThreadPoolExecutor(max_workers=max(1, len(steps)), thread_name_prefix="publish") as pool:
+        while pending or running:
+            for entry in list(pending):
+                num = entry[0]
+                if deps.get(num, set()) - finished:
+                    continue
+                spec = STEP_SPECS.get(num, StepSpec())
+                fits = (cpus_used + spec.cpus <= max_cpus
+                        and memory_used + spec.memory_gb <= max_memory_gb)
+                if running and not fits:
+                    continue
+                pending.remove(entry)
+                cpus_used += spec.cpus
+                memory_used += spec.memory_gb
+                running[pool.submit(_call, *entry)] = num
+            if not running:
+                # Only reachable with a dependency cycle
+                raise RuntimeError(f"Unschedulable steps: {[e[0] for e in pending]}")
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                num = running.pop(future)
+                spec = STEP_SPECS.get(num, StepSpec())
+                cpus_used -= spec.cpus
+                memory_used -= spec.memory_gb
+                status, start, end = future.result()
+                timings[num] = {
+                    "status": status,
+                    "start_s": round(start - t0, 3),
+                    "seconds": round(end - start, 3),
+                }
+                finished.add(num)
+    return timings
+
+
+def critical_path(timings: dict, deps: dict) -> tuple[list, float]:
+    """Longest chain of step durations through the dependency graph."""
+    best: dict = {}
+    finish_order = list(timings)  # run_dag records steps as they finish
+    for num in finish_order:
+        prev = max(
+            (d for d in deps.get(num, ()) if d in best),
+            key=lambda d: (best[d][0], finish_order.index(d)),
+            default=None,
+        )
+        base = best[prev][0] if prev is not None else 0.0
+        best[num] = (base + timings[num]["seconds"], prev)
+    if not best:
+        return [], 0.0
+    # Ties (e.g. a near-instant final step) resolve to the later step
+    num = max(best, key=lambda n: (best[n][0], finish_order.index(n)))
+    total = best[num][0]
+    path = []
+    while num is not None:
+        path.append(num)
+        num = best[num][1]
+    return path[::-1], round(total, 3)
+
+
 def main():
     parser = argparse.ArgumentParser(description="Swiss Case Law publishing pipeline")
     parser.add_argument(
@@ -399,12 +636,24 @@ def main():
         "--ingest", action="store_true",
         help="Run entscheidsuche ingest (step 1); skipped by default"
     )
+    parser.add_argument(
+        "--force", action="store_true",
+        help="Run steps even if their inputs are unchanged since the last successful run",
+    )
+    parser.add_argument(
+        "--max-cpus", type=int, default=os.cpu_count() or 1,
+        help="CPU budget shared by concurrently running steps (default: CPU count)",
+    )
+    parser.add_argument(
+        "--max-memory-gb", type=float, default=None,
+        help="Memory budget shared by concurrently running steps (default: 80%% of RAM)",
+    )
     parser.add_argument("-v", "--verbose", action="store_true")
     args = parser.parse_args()
 
     logging.basicConfig(
         level=logging.DEBUG if args.verbose else logging.INFO,
-        format="%(asctime)s %(name)s %(levelname)s %(message)s",
+        format="%(asctime)s %(name)s [%(threadName)s] %(levelname)s %(message)s",
     )
 
     logger.info(f"=== Swiss Case Law publish pipeline — {datetime.now(timezone.utc).isoformat()} ===")
@@ -415,20 +664,30 @@ def main():
     results = {}
     start = time.time()
     manual_step_mode = args.step is not None
+    # Skipping unchanged steps only on nightly incremental runs: weekly
+    # rebuilds and explicit single-step runs always execute.
+    skip_unchanged = not (
+        args.force or args.dry_run or manual_step_mode or _is_rebuild_day(args.full_rebuild)
+    )
+    state = _load_state() if skip_unchanged else {}
+    state_lock = threading.Lock()
 
-    # Steps 4 (HF upload) and 6 (git push) must not run if critical steps failed,
-    # because step 4 prunes remote parquet based on local state.
-    CRITICAL_STEPS = {2, 3}
-    GUARDED_STEPS = {4, 6}
+    selected = [
+        (num, name, func) for num, name, func in STEPS
+        if args.step is None or str(args.step) == str(num)
+    ]
+    deps = _step_dependencies([num for num, _, _ in selected])
+    if not manual_step_mode:
+        selected_nums = {num for num, _, _ in selected}
+        for num in GUARDED_STEPS & selected_nums:
+            deps[num] |= CRITICAL_STEPS & selected_nums
 
-    for num, name, func in STEPS:
-        if args.step is not None and str(args.step) != str(num):
-            continue
+    def run_step(num, name, func) -> str:
         # Step 1 (ingest) is opt-in: skip unless --ingest or --step 1
         if num == 1 and not args.ingest and not manual_step_mode:
             logger.info(f"  Step {num} ({name}): SKIPPED (use --ingest to enable)")
             results[num] = True
-            continue
+            return "skipped"
         # Skip guarded steps if a critical step failed (unless running single step)
         if not manual_step_mode and num in GUARDED_STEPS:
             critical_failed = any(
@@ -439,7 +698,19 @@ def main():
                 logger.warning(
                     f"  Step {num} ({name}): SKIPPED — critical earlier step failed\n"
                 )
-                continue
+                return "skipped"
+        spec = STEP_SPECS.get(num, StepSpec())
+        key = str(num)
+        if skip_unchanged and spec.inputs:
+            previous = state.get(key)
+            if (
+                previous is not None
+                and previous.get("inputs") == _fingerprint(spec.inputs)
+                and all(Path(p).exists() for p in spec.outputs)
+            ):
+                logger.info(f"  Step {num} ({name}): SKIPPED — inputs unchanged since {previous.get('finished_at')}")
+                results[num] = True
+                return "unchanged"
         step_start = time.time()
         try:
             if num == 2:
@@ -454,20 +725,52 @@ def main():
             results[num] = ok
             elapsed = time.time() - step_start
             status = "OK" if ok else "FAILED"
-            logger.info(f"  → {status} ({elapsed:.1f}s)\n")
+            logger.info(f"  → Step {num} {status} ({elapsed:.1f}s)\n")
         except Exception as e:
             results[num] = False
-            logger.error(f"  → EXCEPTION: {e}\n", exc_info=True)
+            logger.error(f"  → Step {num} EXCEPTION: {e}\n", exc_info=True)
+            return "failed"
+        if ok and spec.inputs and not args.dry_run:
+            # Fingerprint after the run: steps that rewrite their own input
+            # (enrichment updates decisions.db) stay skippable next time.
+            with state_lock:
+                recorded = _load_state()
+                recorded[key] = {
+                    "inputs": _fingerprint(spec.inputs),
+                    "finished_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                }
+                _save_state(recorded)
+        return "ok" if ok else "failed"
+
+    max_memory_gb = args.max_memory_gb if args.max_memory_gb is not None else 0.8 * _total_memory_gb()
+    timings = run_dag(selected, deps, run_step, max_cpus=args.max_cpus, max_memory_gb=max_memory_gb)
 
     # Summary
     total_elapsed = time.time() - start
+    path, path_seconds = critical_path(timings, deps)
     logger.info("=== Summary ===")
     for num, name, _ in STEPS:
-        if num in results:
-            status = "OK" if results[num] else "FAILED"
-            logger.info(f"  Step {num} ({name}): {status}")
+        if num in timings:
+            t = timings[num]
+            status = "OK" if results.get(num) else "FAILED"
+            if t["status"] in ("skipped", "unchanged"):
+                status += f" ({t['status']})"
+            logger.info(
+                f"  Step {num} ({name}): {status}  start +{t['start_s']:.1f}s, {t['seconds']:.1f}s"
+            )
+    logger.info(f"  Critical path: {' → '.join(str(n) for n in path)} ({path_seconds:.1f}s)")
     logger.info(f"  Total time: {total_elapsed:.1f}s")
 
+    if not args.dry_run:
+        REPORT_PATH.parent.mkdir(parents=True, exist_ok=True)
+        REPORT_PATH.write_text(json.dumps({
+            "started_at": datetime.fromtimestamp(start, timezone.utc).isoformat(timespec="seconds"),
+            "wall_seconds": round(total_elapsed, 3),
+            "critical_path": [str(n) for n in path],
+            "critical_path_seconds": path_seconds,
+            "steps": {str(num): {**t, "after": sorted(str(d) for d in deps[num])} for num, t in timings.items()},
+        }, indent=2), encoding="utf-8")
+
     # Exit with error if any step failed
     if any(not v for v in results.values()):
         sys.exit(1)
@@ -0,0 +1,425 @@
+"""Approximate nearest-neighbour (IVF + int8) index for dense vectors.
+
+sqlite-vec answers KNN queries by scanning every float32 vector in
+``vec_decisions`` / ``vec_chunks``. This module builds a compact inverted-file
+index next to the vector DB that the MCP server memory-maps instead:
+
+- spherical k-means centroids partition the vectors into ``nlist`` lists
+- each vector is stored as int8 codes (per-dimension symmetric scale), grouped
+  by list so a probe reads one contiguous slice
+- per-vector language and court codes allow prefiltering inside a probe
+
+A query scores only the ``nprobe`` lists whose centroids are closest; nprobe
+is the recall/latency knob (``nprobe == nlist`` is an exhaustive int8 scan).
+Distances are cosine distances like sqlite-vec's ``distance_metric=cosine``.
+
+On-disk layout (one directory per index, written atomically)::
+
+    meta.json       dim, nlist, count, languages, courts, format version
+    centroids.npy   float32 (nlist, dim), L2-normalized
+    offsets.npy     int64 (nlist + 1), list i is rows offsets[i]:offsets[i+1]
+    codes.npy       int8 (count, dim)
+    scales.npy      float32 (dim,)
+    ids.npy         bytes (count,) decision_id or chunk_id, UTF-8
+    language.npy    uint8 (count,) index into meta["languages"]
+    court.npy       uint16 (count,) index into meta["courts"]
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Constants
+# ---------------------------------------------------------------------------
+
+ANN_FORMAT_VERSION = 1
+"""Bumped when the on-disk layout changes; older indexes are ignored."""
+
+DEFAULT_NPROBE = 16
+"""Lists probed per query when the caller does not specify nprobe."""
+
+KMEANS_ITERATIONS = 12
+"""Lloyd iterations for centroid training."""
+
+KMEANS_SAMPLE_SIZE = 100_000
+"""Maximum number of vectors used to train centroids."""
+
+ASSIGN_BATCH_SIZE = 8192
+"""Vectors assigned to lists per matrix multiplication."""
+
+UNKNOWN_COURT = ""
+"""Court label used when a vector's court is not known at build time."""
+
+Batch = tuple[list[str], list[str], np.ndarray]
+"""(ids, languages, float32 vectors of shape (n, dim)) as yielded to builders."""
+
+
+# ---------------------------------------------------------------------------
+# Training helpers
+# ---------------------------------------------------------------------------
+
+
+def default_nlist(count: int) -> int:
+    """Number of lists for *count* vectors (~4·sqrt(N), at least 1)."""
+    if count <= 0:
+        return 1
+    return max(1, min(count, int(4 * math.sqrt(count))))
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def train_centroids(
+    sample: np.ndarray,
+    nlist: int,
+    *,
+    iterations: int = KMEANS_ITERATIONS,
+    seed: int = 0,
+) -> np.ndarray:
+    """Spherical k-means over *sample*; returns L2-normalized centroids.
+
+    Args:
+        sample: float32 array of shape (n, dim).
+        nlist: Number of centroids (clipped to the sample size).
+        iterations: Lloyd iterations.
+        seed: RNG seed for the initial centroid choice.
+
+    Returns:
+        float32 array of shape (nlist, dim).
+    """
+    sample = _normalize_rows(np.asarray(sample, dtype=np.float32))
+    nlist = max(1, min(nlist, len(sample)))
+    rng = np.random.default_rng(seed)
+    centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assign = assign_lists(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, sample)
+        counts = np.bincount(assign, minlength=nlist)
+        empty = counts == 0
+        if empty.any():
+            # Re-seed empty lists with random sample points
+            sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()))]
+        centroids = _normalize_rows(sums)
+    return centroids.astype(np.float32)
+
+
+def assign_lists(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the closest (max inner product) centroid for each vector."""
+    out = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), ASSIGN_BATCH_SIZE):
+        block = vectors[start:start + ASSIGN_BATCH_SIZE]
+        out[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return out
+
+
+def quantize(vectors: np.ndarray, scales: np.ndarray) -> np.ndarray:
+    """Symmetric per-dimension int8 quantization."""
+    return np.clip(np.rint(vectors / scales), -127, 127).astype(np.int8)
+
+
+# ---------------------------------------------------------------------------
+# Build
+# ---------------------------------------------------------------------------
+
+
+def _chunk_decision_id(vector_id: str) -> str:
+    return vector_id.rsplit("__chunk_", 1)[0]
+
+
+def build_ivf_index(
+    batches: Callable[[], Iterable[Batch]],
+    out_dir: Path,
+    *,
+    courts: dict[str, str] | None = None,
+    nlist: int | None = None,
+    sample_size: int = KMEANS_SAMPLE_SIZE,
+    iterations: int = KMEANS_ITERATIONS,
+    seed: int = 0,
+) -> dict:
+    """Build an IVF-int8 index from a re-iterable source of vector batches.
+
+    The source is streamed three times (count, training sample, encoding), so
+    memory stays at the training sample; int8 codes are spilled to disk.
+
+    Args:
+        batches: Zero-argument callable returning an iterable of
+            ``(ids, languages, vectors)`` batches in a stable order.
+        out_dir: Target index directory (replaced atomically).
+        courts: Optional decision_id -> court map for court prefiltering;
+            chunk ids (``<decision_id>__chunk_<n>``) resolve to their decision.
+        nlist: Number of lists (default: ``default_nlist(count)``).
+        sample_size: Maximum vectors used to train centroids.
+        iterations: k-means iterations.
+        seed: RNG seed.
+
+    Returns:
+        Stats dict with ``count``, ``nlist``, ``dim``, ``bytes`` and
+        ``elapsed_seconds``.
+    """
+    t0 = time.time()
+    out_dir = Path(out_dir)
+    courts = courts or {}
+
+    # Pass 1: count and take an evenly spaced training sample.
+    count = 0
+    dim = 0
+    for _ids, _langs, vecs in batches():
+        count += len(vecs)
+        dim = dim or int(np.asarray(vecs).shape[1])
+    if count == 0:
+        raise ValueError("No vectors to index")
+    step = max(1, count // max(1, sample_size))
+    sample_parts: list[np.ndarray] = []
+    seen = 0
+    for _ids, _langs, vecs in batches():
+        vecs = np.asarray(vecs, dtype=np.float32)
+        picks = np.arange((-seen) % step, len(vecs), step)
+        if len(picks):
+            sample_parts.append(vecs[picks])
+        seen += len(vecs)
+    sample = _normalize_rows(np.concatenate(sample_parts))
+
+    nlist = max(1, min(nlist or default_nlist(count), len(sample)))
+    logger.info("Training %d centroids on %d of %d vectors", nlist, len(sample), count)
+    centroids = train_centroids(sample, nlist, iterations=iterations, seed=seed)
+    # Per-dimension scale from the sample; outliers beyond it are clipped.
+    scales = (np.abs(sample).max(axis=0) / 127.0).astype(np.float32)
+    scales[scales == 0] = 1.0 / 127.0
+
+    out_dir.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(prefix=f".{out_dir.name}.", dir=out_dir.parent))
+    try:
+        # Pass 2: assign, quantize in stream order, then permute by list.
+        stream_codes = np.lib.format.open_memmap(
+            tmp_dir / "stream_codes.npy", mode="w+", dtype=np.int8, shape=(count, dim),
+        )
+        assign = np.empty(count, dtype=np.int32)
+        ids: list[bytes] = []
+        languages: dict[str, int] = {}
+        court_codes: dict[str, int] = {UNKNOWN_COURT: 0}
+        lang_arr = np.empty(count, dtype=np.uint8)
+        court_arr = np.empty(count, dtype=np.uint16)
+        pos = 0
+        for batch_ids, batch_langs, vecs in batches():
+            vecs = _normalize_rows(np.asarray(vecs, dtype=np.float32))
+            n = len(vecs)
+            assign[pos:pos + n] = assign_lists(vecs, centroids)
+            stream_codes[pos:pos + n] = quantize(vecs, scales)
+            for i, vid in enumerate(batch_ids):
+                ids.append(vid.encode("utf-8"))
+                lang = (batch_langs[i] or "").lower()
+                lang_arr[pos + i] = languages.setdefault(lang, len(languages))
+                court = (courts.get(vid) or courts.get(_chunk_decision_id(vid)) or "").lower()
+                court_arr[pos + i] = court_codes.setdefault(court, len(court_codes))
+            pos += n
+        if len(languages) > 255 or len(court_codes) > 65535:
+            raise ValueError("Too many distinct languages/courts for the index format")
+
+        order = np.argsort(assign, kind="stable")
+        offsets = np.zeros(nlist + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assign, minlength=nlist), out=offsets[1:])
+        codes = np.lib.format.open_memmap(
+            tmp_dir / "codes.npy", mode="w+", dtype=np.int8, shape=(count, dim),
+        )
+        for start in range(0, count, ASSIGN_BATCH_SIZE):
+            codes[start:start + ASSIGN_BATCH_SIZE] = stream_codes[order[start:start + ASSIGN_BATCH_SIZE]]
+        codes.flush()
+        del codes, stream_codes
+        (tmp_dir / "stream_codes.npy").unlink()
+
+        id_arr = np.array(ids, dtype=f"S{max(1, max(len(i) for i in ids))}")
+        np.save(tmp_dir / "ids.npy", id_arr[order])
+        np.save(tmp_dir / "language.npy", lang_arr[order])
+        np.save(tmp_dir / "court.npy", court_arr[order])
+        np.save(tmp_dir / "centroids.npy", centroids)
+        np.save(tmp_dir / "offsets.npy", offsets)
+        np.save(tmp_dir / "scales.npy", scales)
+        meta = {
+            "format_version": ANN_FORMAT_VERSION,
+            "dim": dim,
+            "nlist": nlist,
+            "count": count,
+            "languages": sorted(languages, key=languages.get),
+            "courts": sorted(court_codes, key=court_codes.get),
+            "built_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        }
+        (tmp_dir / "meta.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+
+        if out_dir.exists():
+            old = out_dir.with_name(f".{out_dir.name}.old")
+            shutil.rmtree(old, ignore_errors=True)
+            os.replace(out_dir, old)
+            os.replace(tmp_dir, out_dir)
+            shutil.rmtree(old, ignore_errors=True)
+        else:
+            os.replace(tmp_dir, out_dir)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    size = sum(p.stat().st_size for p in out_dir.iterdir())
+    elapsed = time.time() - t0
+    logger.info(
+        "Built IVF index %s: %d vectors, %d lists, %.1f MB in %.1fs",
+        out_dir, count, nlist, size / 1e6, elapsed,
+    )
+    return {
+        "index_dir": str(out_dir),
+        "count": count,
+        "nlist": nlist,
+        "dim": dim,
+        "bytes": size,
+        "elapsed_seconds": round(elapsed, 2),
+    }
+
+
+def iter_vec_table(
+    conn: sqlite3.Connection,
+    table: str = "vec_decisions",
+    *,
+    batch_size: int = 4096,
+) -> Iterator[Batch]:
+    """Stream ``(ids, languages, vectors)`` batches out of a sqlite-vec table."""
+    id_col = "chunk_id" if table == "vec_chunks" else "decision_id"
+    cur = conn.execute(f"SELECT {id_col}, embedding, language FROM {table}")
+    while True:
+        rows = cur.fetchmany(batch_size)
+        if not rows:
+            break
+        vecs = np.stack([np.frombuffer(r[1], dtype=np.float32) for r in rows])
+        yield [r[0] for r in rows], [r[2] or "" for r in rows], vecs
+
+
+def build_ann_from_vec_db(
+    conn: sqlite3.Connection,
+    out_dir: Path,
+    *,
+    table: str = "vec_decisions",
+    courts: dict[str, str] | None = None,
+    nlist: int | None = None,
+) -> dict:
+    """Build an IVF-int8 index from a sqlite-vec table (sqlite-vec must be loaded)."""
+    return build_ivf_index(
+        lambda: iter_vec_table(conn, table),
+        out_dir,
+        courts=courts,
+        nlist=nlist,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Search
+# ---------------------------------------------------------------------------
+
+
+class IVFIndex:
+    """Memory-mapped IVF-int8 index (see module docstring for the layout)."""
+
+    def __init__(self, index_dir: Path):
+        index_dir = Path(index_dir)
+        meta = json.loads((index_dir / "meta.json").read_text(encoding="utf-8"))
+        if meta.get("format_version") != ANN_FORMAT_VERSION:
+            raise ValueError(f"Unsupported ANN index format: {meta.get('format_version')}")
+        self.index_dir = index_dir
+        self.meta = meta
+        self.dim = int(meta["dim"])
+        self.nlist = int(meta["nlist"])
+        self.centroids = np.load(index_dir / "centroids.npy")
+        self.offsets = np.load(index_dir / "offsets.npy")
+        self.scales = np.load(index_dir / "scales.npy")
+        self.codes = np.load(index_dir / "codes.npy", mmap_mode="r")
+        self.ids = np.load(index_dir / "ids.npy", mmap_mode="r")
+        self.language = np.load(index_dir / "language.npy", mmap_mode="r")
+        self.court = np.load(index_dir / "court.npy", mmap_mode="r")
+        self._language_codes = {lang: i for i, lang in enumerate(meta["languages"])}
+        self._court_codes = {court: i for i, court in enumerate(meta["courts"])}
+
+    def __len__(self) -> int:
+        return int(self.meta["count"])
+
+    def _code_filter(self, values: Iterable[str] | None, codes: dict[str, int]) -> np.ndarray | None:
+        if values is None:
+            return None
+        return np.array(
+            sorted({codes[v.lower()] for v in values if v and v.lower() in codes}),
+            dtype=np.int64,
+        )
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int,
+        *,
+        nprobe: int = DEFAULT_NPROBE,
+        languages: Iterable[str] | None = None,
+        courts: Iterable[str] | None = None,
+    ) -> list[tuple[str, float]]:
+        """Approximate top-*k* by cosine distance, nearest first.
+
+        Lists are probed in centroid order; with prefilters, probing continues
+        past *nprobe* until at least *k* matching vectors were scored.
+        """
+        if k <= 0 or len(self) == 0:
+            return []
+        q = np.array(query, dtype=np.float32).reshape(-1)
+        norm = float(np.linalg.norm(q))
+        if q.shape[0] != self.dim or norm == 0:
+            return []
+        q /= norm
+        lang_filter = self._code_filter(languages, self._language_codes)
+        court_filter = self._code_filter(courts, self._court_codes)
+        if (lang_filter is not None and not len(lang_filter)) or (
+            court_filter is not None and not len(court_filter)
+        ):
+            return []
+
+        qs = q * self.scales  # fold dequantization into the query
+        probe_order = np.argsort(-(self.centroids @ q))
+        nprobe = max(1, min(nprobe, self.nlist))
+        scores: list[np.ndarray] = []
+        rows: list[np.ndarray] = []
+        scored = 0
+        for probed, lst in enumerate(probe_order, start=1):
+            start, end = int(self.offsets[lst]), int(self.offsets[lst + 1])
+            if end > start:
+                idx = np.arange(start, end)
+                if lang_filter is not None:
+                    idx = idx[np.isin(self.language[start:end], lang_filter)]
+                if court_filter is not None and len(idx):
+                    idx = idx[np.isin(self.court[idx], court_filter)]
+                if len(idx):
+                    block = self.codes[start:end] if len(idx) == end - start else self.codes[idx]
+                    scores.append(block.astype(np.float32) @ qs)
+                    rows.append(idx)
+                    scored += len(idx)
+            if probed >= nprobe and scored >= k:
+                break
+        if not scores:
+            return []
+        all_scores = np.concatenate(scores)
+        all_rows = np.concatenate(rows)
+        top = min(k, len(all_scores))
+        best = np.argpartition(-all_scores, top - 1)[:top]
+        best = best[np.argsort(-all_scores[best])]
+        return [
+            (self.ids[all_rows[i]].decode("utf-8"), float(1.0 - all_scores[i]))
+            for i in best
+        ]
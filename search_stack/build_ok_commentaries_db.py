@@ -7,6 +7,10 @@ SQLite DB with FTS5 for commentary text.
 
 Output: output/ok_commentaries.db
 
+Besides the raw fields, each commentary stores abbr_norm (upper-cased
+abbreviation) and sort_key (numeric part of article_num) so the commentary
+tools can resolve and list articles from indexes.
+
 Usage:
     python -m search_stack.build_ok_commentaries_db
     python -m search_stack.build_ok_commentaries_db --input output/onlinekommentar/commentaries.json
@@ -59,6 +63,8 @@ def create_schema(conn: sqlite3.Connection):
             content_html TEXT,
             content_text TEXT NOT NULL,
             legal_text TEXT,
+            abbr_norm TEXT,
+            sort_key INTEGER,
             FOREIGN KEY (legislative_act_uuid) REFERENCES legislative_acts(ok_uuid)
         );
 
@@ -68,6 +74,12 @@ def create_schema(conn: sqlite3.Connection):
             ON commentaries(sr_number, article_num, language);
         CREATE INDEX IF NOT EXISTS idx_commentaries_abbr
             ON commentaries(abbr);
+        CREATE INDEX IF NOT EXISTS idx_commentaries_abbr_norm_art
+            ON commentaries(abbr_norm, article_num, language);
+        CREATE INDEX IF NOT EXISTS idx_commentaries_sr_sort
+            ON commentaries(sr_number, sort_key, article_num);
+        CREATE INDEX IF NOT EXISTS idx_commentaries_abbr_norm_sort
+            ON commentaries(abbr_norm, sort_key, article_num);
 
         CREATE VIRTUAL TABLE IF NOT EXISTS commentaries_fts USING fts5(
             sr_number, abbr, article_num, title, content_text, language,
@@ -116,8 +128,8 @@ def build_db():
             """INSERT INTO commentaries
                (ok_uuid, legislative_act_uuid, sr_number, abbr, article_num,
                 title, language, date, authors, editors, suggested_citation,
-                html_link, pdf_link, content_html, content_text, legal_text)
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                html_link, pdf_link, content_html, content_text, legal_text, abbr_norm)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
             (
                 c.get("ok_uuid", ""),
                 c.get("legislative_act_uuid", ""),
@@ -135,9 +147,12 @@ def build_db():
                 c.get("content_html", ""),
                 c.get("content_text", ""),
                 c.get("legal_text", ""),
+                (c.get("abbr") or "").strip().upper(),
             ),
         )
 
+    # Same ordering as the former ORDER BY CAST(article_num AS INTEGER)
+    conn.execute("UPDATE commentaries SET sort_key = CAST(article_num AS INTEGER)")
     conn.commit()
 
     # Populate FTS5 index
@@ -91,6 +91,40 @@ CREATE TABLE IF NOT EXISTS citation_targets (
 
 CREATE INDEX IF NOT EXISTS idx_citation_targets_target_decision_id
     ON citation_targets(target_decision_id);
+
+-- Precomputed incoming-citation counts (one row per cited decision), so
+-- leading-case ranking can join authority instead of aggregating edges.
+CREATE TABLE IF NOT EXISTS decision_authority (
+    decision_id TEXT PRIMARY KEY,
+    cite_count INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_decision_authority_cite_count
+    ON decision_authority(cite_count DESC);
+
+-- Resolved prior-instance links (appellate decision -> the decision it
+-- appealed), one row per pair at its best resolution confidence, so an
+-- appeal chain is one recursive query instead of a join per visited node.
+CREATE TABLE IF NOT EXISTS appeal_edges (
+    appellate_decision_id TEXT NOT NULL,
+    prior_decision_id TEXT NOT NULL,
+    confidence_score REAL NOT NULL,
+    PRIMARY KEY (appellate_decision_id, prior_decision_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_appeal_edges_prior
+    ON appeal_edges(prior_decision_id, appellate_decision_id);
+
+-- Per-statute decision counts by year and court (article level, paragraphs
+-- folded together), so trend queries read a histogram instead of joining.
+CREATE TABLE IF NOT EXISTS statute_year_counts (
+    law_code TEXT NOT NULL,
+    article TEXT NOT NULL,
+    court TEXT NOT NULL DEFAULT '',
+    year INTEGER NOT NULL,
+    decision_count INTEGER NOT NULL,
+    PRIMARY KEY (law_code, article, court, year)
+) WITHOUT ROWID;
 """
 
 
@@ -354,6 +388,57 @@ def _resolve_citation_targets(conn: sqlite3.Connection) -> None:
         conn.executemany(insert_sql, payload)
 
 
+def _build_decision_authority(conn: sqlite3.Connection) -> None:
+    """Materialize incoming-citation counts per resolved target decision."""
+    conn.execute("DELETE FROM decision_authority")
+    conn.execute(
+        """
+        INSERT INTO decision_authority(decision_id, cite_count)
+        SELECT target_decision_id, COUNT(*)
+        FROM citation_targets
+        GROUP BY target_decision_id
+        """
+    )
+
+
+def _build_appeal_edges(conn: sqlite3.Connection) -> None:
+    """Materialize resolved prior-instance pairs with their best confidence."""
+    conn.execute("DELETE FROM appeal_edges")
+    conn.execute(
+        """
+        INSERT INTO appeal_edges(appellate_decision_id, prior_decision_id, confidence_score)
+        SELECT dc.source_decision_id, ct.target_decision_id, MAX(ct.confidence_score)
+        FROM decision_citations dc
+        JOIN citation_targets ct
+          ON ct.source_decision_id = dc.source_decision_id
+         AND ct.target_ref = dc.target_ref
+        WHERE dc.is_prior_instance = 1
+          AND ct.target_decision_id != dc.source_decision_id
+        GROUP BY dc.source_decision_id, ct.target_decision_id
+        """
+    )
+
+
+def _build_statute_year_counts(conn: sqlite3.Connection) -> None:
+    """Materialize per-statute year histograms (distinct decisions per year)."""
+    conn.execute("DELETE FROM statute_year_counts")
+    conn.execute(
+        """
+        INSERT INTO statute_year_counts(law_code, article, court, year, decision_count)
+        SELECT s.law_code, s.article, COALESCE(d.court, ''),
+               CAST(SUBSTR(d.decision_date, 1, 4) AS INTEGER) AS year,
+               COUNT(DISTINCT ds.decision_id)
+        FROM decision_statutes ds
+        JOIN statutes s ON s.statute_id = ds.statute_id
+        JOIN decisions d ON d.decision_id = ds.decision_id
+        WHERE d.decision_date IS NOT NULL
+          AND CAST(SUBSTR(d.decision_date, 1, 4) AS INTEGER) > 1800
+          AND CAST(SUBSTR(d.decision_date, 1, 4) AS INTEGER) < 2100
+        GROUP BY s.law_code, s.article, COALESCE(d.court, ''), year
+        """
+    )
+
+
 def build_graph(
     *,
     input_dir: Path,
@@ -492,6 +577,12 @@ def build_graph(
         conn.commit()
         _resolve_citation_targets(conn)
         conn.commit()
+        _build_decision_authority(conn)
+        conn.commit()
+        _build_appeal_edges(conn)
+        conn.commit()
+        _build_statute_year_counts(conn)
+        conn.commit()
 
         total_decisions = conn.execute("SELECT COUNT(*) FROM decisions").fetchone()[0]
         total_statutes = conn.execute("SELECT COUNT(*) FROM statutes").fetchone()[0]
@@ -505,6 +596,15 @@ def build_graph(
         prior_instance_count = conn.execute(
             "SELECT COUNT(*) FROM decision_citations WHERE is_prior_instance = 1"
         ).fetchone()[0]
+        authority_rows = conn.execute(
+            "SELECT COUNT(*) FROM decision_authority"
+        ).fetchone()[0]
+        appeal_edge_rows = conn.execute(
+            "SELECT COUNT(*) FROM appeal_edges"
+        ).fetchone()[0]
+        histogram_rows = conn.execute(
+            "SELECT COUNT(*) FROM statute_year_counts"
+        ).fetchone()[0]
     except Exception:
         if conn is not None:
             conn.close()
@@ -528,6 +628,9 @@ def build_graph(
         "citations_resolved": resolved_refs,
         "citation_target_links": resolved_links,
         "prior_instance_links": prior_instance_count,
+        "authority_decisions": authority_rows,
+        "appeal_edges": appeal_edge_rows,
+        "statute_year_buckets": histogram_rows,
     }
 
 
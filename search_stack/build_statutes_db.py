@@ -5,19 +5,30 @@ Build statutes SQLite database from Fedlex Akoma Ntoso XML files.
 Reads downloaded XML from output/fedlex/xml/{sr_number}/{lang}.xml,
 parses article-level text, and builds a searchable SQLite DB with FTS5.
 
+Laws are parsed in a process pool with streaming (iterparse) extraction.
+Rebuilds start from the previous DB and skip laws whose consolidation date
+and XML hash are unchanged; the FTS index is filled once at the end for the
+new rows. Per-stage timings and throughput are logged and returned.
+
 Output: output/statutes.db
 
 Schema:
     laws        — one row per law (SR number, titles, abbreviations)
-    articles    — one row per article per language
+    articles    — one row per article per language (sort_key = numeric part
+                  of article_num, for index-ordered listings)
     articles_fts — FTS5 virtual table over article text
+    law_aliases — upper-cased de/fr/it abbreviations → SR number
+    law_sources — consolidation date and XML hash each law was built from
 
 Usage:
     python -m search_stack.build_statutes_db
     python -m search_stack.build_statutes_db --fedlex-dir output/fedlex
+    python -m search_stack.build_statutes_db --full --workers 8
 """
 
 import argparse
+import hashlib
+import itertools
 import json
 import logging
 import os
@@ -25,6 +36,7 @@ import re
 import sqlite3
 import time
 import xml.etree.ElementTree as ET
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from pathlib import Path
 
 logging.basicConfig(
@@ -40,6 +52,7 @@ OUTPUT_DB = Path(os.environ.get("STATUTES_DB", "output/statutes.db"))
 # Akoma Ntoso namespace
 AKN_NS = "http://docs.oasis-open.org/legaldocml/ns/akn/3.0"
 NS = {"akn": AKN_NS}
+LANGUAGES = ("de", "fr", "it")
 
 
 def create_schema(conn: sqlite3.Connection):
@@ -64,13 +77,23 @@ def create_schema(conn: sqlite3.Connection):
             heading TEXT,
             text TEXT NOT NULL,
             lang TEXT NOT NULL,
+            sort_key INTEGER,
             FOREIGN KEY (sr_number) REFERENCES laws(sr_number)
         );
 
-        CREATE INDEX IF NOT EXISTS idx_articles_sr_art
-            ON articles(sr_number, article_num);
-        CREATE INDEX IF NOT EXISTS idx_articles_sr_lang
-            ON articles(sr_number, lang);
+        -- Abbreviation lookups without UPPER() scans over laws
+        CREATE TABLE IF NOT EXISTS law_aliases (
+            alias TEXT NOT NULL,
+            sr_number TEXT NOT NULL,
+            PRIMARY KEY (alias, sr_number)
+        ) WITHOUT ROWID;
+
+        -- What each law was built from, for incremental rebuilds
+        CREATE TABLE IF NOT EXISTS law_sources (
+            sr_number TEXT PRIMARY KEY,
+            consolidation_date TEXT,
+            xml_hash TEXT NOT NULL
+        );
 
         CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
             sr_number,
@@ -83,6 +106,40 @@ def create_schema(conn: sqlite3.Connection):
             tokenize='unicode61 remove_diacritics 2'
         );
     """)
+    # Databases copied from a build that predates sort_key
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(articles)")}
+    if "sort_key" not in columns:
+        conn.execute("ALTER TABLE articles ADD COLUMN sort_key INTEGER")
+    conn.executescript("""
+        CREATE INDEX IF NOT EXISTS idx_articles_sr_art
+            ON articles(sr_number, article_num);
+        -- Case-insensitive article prefix ranges ("6a" also finds "6A")
+        CREATE INDEX IF NOT EXISTS idx_articles_sr_art_nocase
+            ON articles(sr_number, article_num COLLATE NOCASE);
+        CREATE INDEX IF NOT EXISTS idx_articles_sr_lang
+            ON articles(sr_number, lang);
+        CREATE INDEX IF NOT EXISTS idx_articles_sr_lang_sort
+            ON articles(sr_number, lang, sort_key, article_num);
+    """)
+
+
+def build_lookup_tables(conn: sqlite3.Connection) -> None:
+    """Fill articles.sort_key for new rows and rebuild law_aliases.
+
+    sort_key uses SQLite's own CAST so index order matches the former
+    ORDER BY CAST(article_num AS INTEGER). Aliases are upper-cased in Python,
+    which (unlike SQLite's ASCII-only UPPER) also folds accented letters.
+    """
+    conn.execute("UPDATE articles SET sort_key = CAST(article_num AS INTEGER) WHERE sort_key IS NULL")
+    conn.execute("DELETE FROM law_aliases")
+    aliases = {
+        (abbr.strip().upper(), sr_number)
+        for sr_number, *abbrs in conn.execute("SELECT sr_number, abbr_de, abbr_fr, abbr_it FROM laws")
+        for abbr in abbrs
+        if abbr and abbr.strip()
+    }
+    conn.executemany("INSERT INTO law_aliases (alias, sr_number) VALUES (?, ?)", sorted(aliases))
+    conn.commit()
 
 
 def extract_text(element, skip_tags: set[str] | None = None) -> str:
@@ -171,44 +228,114 @@ def parse_article(article_elem) -> tuple[str, str | None, str]:
     return article_num, heading, full_text
 
 
+def iter_articles(xml_path: Path):
+    """Stream articles from an Akoma Ntoso XML file (iterparse, bounded memory).
+
+    Each article subtree is parsed when its end tag is read and then dropped,
+    so memory stays proportional to the largest article, not the whole law.
+    Raises ET.ParseError on malformed XML.
+    """
+    root = None
+    open_articles = 0
+    for event, elem in ET.iterparse(str(xml_path), events=("start", "end")):
+        tag = elem.tag.split("}")[-1] if "}" in elem.tag else elem.tag
+        if event == "start":
+            if root is None:
+                root = elem
+            if tag == "article":
+                open_articles += 1
+            continue
+        if tag != "article":
+            continue
+        open_articles -= 1
+        article_num, heading, text = parse_article(elem)
+        if article_num and text:
+            yield {"article_num": article_num, "heading": heading, "text": text}
+        if open_articles == 0:
+            # Drop finished subtrees; articles quoted inside another article
+            # stay intact until the enclosing one has been parsed.
+            elem.clear()
+            root.clear()
+
+
 def parse_xml(xml_path: Path) -> list[dict]:
     """Parse an Akoma Ntoso XML file and extract all articles."""
     try:
-        tree = ET.parse(xml_path)
+        return list(iter_articles(xml_path))
     except ET.ParseError as e:
         log.warning("XML parse error in %s: %s", xml_path, e)
         return []
 
-    root = tree.getroot()
-    articles = []
-
-    # Find all article elements (try both namespaced and non-namespaced)
-    article_elems = root.findall(f".//{{{AKN_NS}}}article")
-    if not article_elems:
-        article_elems = root.findall(".//article")
 
-    for art_elem in article_elems:
-        article_num, heading, text = parse_article(art_elem)
-        if not article_num or not text:
+def hash_law_dir(sr_dir: Path) -> str:
+    """SHA-256 over the language XML files of one law directory."""
+    digest = hashlib.sha256()
+    for lang in LANGUAGES:
+        xml_path = sr_dir / f"{lang}.xml"
+        if not xml_path.exists():
             continue
+        digest.update(lang.encode())
+        with open(xml_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def process_law(sr_dir: str, known: tuple[str | None, str] | None, consolidation_date: str | None) -> dict:
+    """Worker: hash a law directory and parse it unless unchanged.
+
+    *known* is the (consolidation_date, xml_hash) stored by the previous
+    build. Returns {"sr_dir", "xml_hash", "skipped", "articles": {lang: [...]},
+    "bytes", "parse_seconds"}.
+    """
+    path = Path(sr_dir)
+    xml_hash = hash_law_dir(path)
+    out = {"sr_dir": sr_dir, "xml_hash": xml_hash, "skipped": False, "articles": {},
+           "bytes": 0, "parse_seconds": 0.0}
+    if known is not None and known == (consolidation_date, xml_hash):
+        out["skipped"] = True
+        return out
+    t0 = time.perf_counter()
+    for lang in LANGUAGES:
+        xml_path = path / f"{lang}.xml"
+        if not xml_path.exists():
+            continue
+        out["bytes"] += xml_path.stat().st_size
+        out["articles"][lang] = parse_xml(xml_path)
+    out["parse_seconds"] = time.perf_counter() - t0
+    return out
+
 
-        articles.append({
-            "article_num": article_num,
-            "heading": heading,
-            "text": text,
-        })
+def _previous_sources(db_path: Path) -> dict[str, tuple[str | None, str]] | None:
+    """(consolidation_date, xml_hash) per law from an earlier build, or None."""
+    if not db_path.exists():
+        return None
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute("SELECT sr_number, consolidation_date, xml_hash FROM law_sources").fetchall()
+    except sqlite3.Error:
+        return None  # built before law_sources existed: rebuild from scratch
+    finally:
+        conn.close()
+    return {sr: (date, xml_hash) for sr, date, xml_hash in rows}
+
+
+def _throughput(count: float, seconds: float) -> float:
+    return round(count / seconds, 1) if seconds > 0 else 0.0
 
-    return articles
 
+def build_db(*, workers: int | None = None, full: bool = False) -> dict:
+    """Main build pipeline; returns per-stage counts, timings and throughput.
 
-def build_db():
-    """Main build pipeline."""
+    Unless *full*, the previous OUTPUT_DB is the starting point and laws
+    whose consolidation date and XML hash are unchanged are not reparsed.
+    """
     xml_dir = FEDLEX_DIR / "xml"
     laws_index_path = FEDLEX_DIR / "laws.json"
 
     if not xml_dir.exists():
         log.error("XML directory not found: %s — run scrapers/fedlex.py first", xml_dir)
-        return
+        return {}
 
     # Load law index
     law_index = {}
@@ -222,84 +349,100 @@ def build_db():
     tmp_db = resolved_db.with_suffix(".tmp")
     tmp_db.unlink(missing_ok=True)
 
+    previous = None if full else _previous_sources(resolved_db)
     conn = sqlite3.connect(str(tmp_db))
+    if previous is not None:
+        src = sqlite3.connect(str(resolved_db))
+        src.backup(conn)
+        src.close()
+        log.info("Incremental build from %s (%d laws known)", resolved_db, len(previous))
+    else:
+        previous = {}
     conn.execute("PRAGMA journal_mode = WAL")
     conn.execute("PRAGMA synchronous = NORMAL")
     conn.execute("PRAGMA cache_size = -256000")  # 256MB
     create_schema(conn)
+    first_new_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM articles").fetchone()[0]
 
-    total_laws = 0
-    total_articles = 0
+    stats = {"laws_seen": 0, "laws_parsed": 0, "laws_skipped": 0, "laws_removed": 0,
+             "articles_inserted": 0, "xml_bytes": 0, "parse_cpu_seconds": 0.0}
+    timings: dict[str, float] = {}
 
     # Iterate over downloaded XML directories
-    sr_dirs = sorted(xml_dir.iterdir()) if xml_dir.exists() else []
-    log.info("Processing %d law directories...", len(sr_dirs))
-
-    for sr_dir in sr_dirs:
-        if not sr_dir.is_dir():
-            continue
+    sr_dirs = [d for d in sorted(xml_dir.iterdir()) if d.is_dir()]
+    workers = workers or os.cpu_count() or 1
+    log.info("Processing %d law directories with %d workers...", len(sr_dirs), workers)
 
+    def _sr(sr_dir: Path) -> str:
         # Reconstruct SR number from directory name
-        sr_number = sr_dir.name.replace("_", ".")
-        meta = law_index.get(sr_number, {})
-
-        # Insert law metadata
-        conn.execute(
-            """INSERT OR REPLACE INTO laws
-               (sr_number, title_de, title_fr, title_it,
-                abbr_de, abbr_fr, abbr_it, consolidation_date, work_uri)
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-            (
-                sr_number,
-                meta.get("title_de"),
-                meta.get("title_fr"),
-                meta.get("title_it"),
-                meta.get("abbr_de"),
-                meta.get("abbr_fr"),
-                meta.get("abbr_it"),
-                meta.get("consolidation_date"),
-                meta.get("work_uri"),
-            ),
-        )
-
-        # Parse articles for each language
-        law_article_count = 0
-        for lang in ["de", "fr", "it"]:
-            xml_path = sr_dir / f"{lang}.xml"
-            if not xml_path.exists():
-                continue
-
-            articles = parse_xml(xml_path)
-            for art in articles:
-                conn.execute(
-                    """INSERT INTO articles (sr_number, article_num, heading, text, lang)
-                       VALUES (?, ?, ?, ?, ?)""",
-                    (sr_number, art["article_num"], art["heading"], art["text"], lang),
-                )
-                law_article_count += 1
-
-        if law_article_count > 0:
-            total_laws += 1
-            total_articles += law_article_count
-
-        if total_laws % 100 == 0 and total_laws > 0:
-            conn.commit()
-            log.info("Progress: %d laws, %d articles", total_laws, total_articles)
-
+        return sr_dir.name.replace("_", ".")
+
+    t_stage = time.perf_counter()
+    insert_seconds = 0.0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Bounded window of in-flight laws keeps parsed articles from piling up
+        pending = set()
+        queue = iter(sr_dirs)
+        for sr_dir in itertools.islice(queue, workers * 4):
+            sr = _sr(sr_dir)
+            pending.add(pool.submit(
+                process_law, str(sr_dir), previous.get(sr),
+                law_index.get(sr, {}).get("consolidation_date"),
+            ))
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                t_insert = time.perf_counter()
+                _store_law(conn, result, law_index, stats)
+                insert_seconds += time.perf_counter() - t_insert
+                nxt = next(queue, None)
+                if nxt is not None:
+                    sr = _sr(nxt)
+                    pending.add(pool.submit(
+                        process_law, str(nxt), previous.get(sr),
+                        law_index.get(sr, {}).get("consolidation_date"),
+                    ))
+                if stats["laws_seen"] % 100 == 0:
+                    conn.commit()
+                    log.info(
+                        "Progress: %d/%d laws (%d parsed, %d unchanged), %d articles",
+                        stats["laws_seen"], len(sr_dirs), stats["laws_parsed"],
+                        stats["laws_skipped"], stats["articles_inserted"],
+                    )
+
+    # Laws whose XML directory disappeared
+    present = {_sr(d) for d in sr_dirs}
+    for sr in sorted(set(previous) - present):
+        _delete_law_articles(conn, sr)
+        conn.execute("DELETE FROM laws WHERE sr_number = ?", (sr,))
+        conn.execute("DELETE FROM law_sources WHERE sr_number = ?", (sr,))
+        stats["laws_removed"] += 1
     conn.commit()
+    timings["parse_and_insert"] = time.perf_counter() - t_stage
+    timings["insert"] = insert_seconds
 
-    # Populate FTS5 index
+    # Populate FTS5 once, for the rows added by this build
     log.info("Building FTS5 index...")
+    t_stage = time.perf_counter()
     conn.execute("""
         INSERT INTO articles_fts(rowid, sr_number, article_num, heading, text, lang)
-        SELECT id, sr_number, article_num, heading, text, lang FROM articles
-    """)
+        SELECT id, sr_number, article_num, heading, text, lang FROM articles WHERE id > ?
+    """, (first_new_id,))
     conn.commit()
+    timings["fts"] = time.perf_counter() - t_stage
+
+    t_stage = time.perf_counter()
+    build_lookup_tables(conn)
+    timings["lookup_tables"] = time.perf_counter() - t_stage
 
     # Optimize
-    log.info("Optimizing FTS5...")
-    conn.execute("INSERT INTO articles_fts(articles_fts) VALUES('optimize')")
-    conn.commit()
+    t_stage = time.perf_counter()
+    if stats["laws_parsed"] or stats["laws_removed"]:
+        log.info("Optimizing FTS5...")
+        conn.execute("INSERT INTO articles_fts(articles_fts) VALUES('optimize')")
+        conn.commit()
+    timings["optimize"] = time.perf_counter() - t_stage
 
     # Stats
     law_count = conn.execute("SELECT COUNT(*) FROM laws").fetchone()[0]
@@ -326,6 +469,79 @@ def build_db():
     os.replace(str(tmp_db), str(resolved_db))
     log.info("Saved to %s (%.1f MB)", resolved_db, resolved_db.stat().st_size / 1e6)
 
+    stats["laws"] = law_count
+    stats["articles"] = art_count
+    stats["seconds"] = {k: round(v, 3) for k, v in timings.items()}
+    stats["throughput"] = {
+        "laws_per_s": _throughput(stats["laws_seen"], timings["parse_and_insert"]),
+        "parse_mb_per_cpu_s": _throughput(stats["xml_bytes"] / 1e6, stats["parse_cpu_seconds"]),
+        "insert_articles_per_s": _throughput(stats["articles_inserted"], timings["insert"]),
+        "fts_articles_per_s": _throughput(stats["articles_inserted"], timings["fts"]),
+    }
+    stats["parse_cpu_seconds"] = round(stats["parse_cpu_seconds"], 3)
+    for stage, seconds in stats["seconds"].items():
+        log.info("Stage %-16s %8.2fs", stage, seconds)
+    log.info("Throughput: %s", stats["throughput"])
+    return stats
+
+
+def _delete_law_articles(conn: sqlite3.Connection, sr_number: str) -> None:
+    """Remove a law's articles and their (external-content) FTS entries."""
+    conn.execute("""
+        INSERT INTO articles_fts(articles_fts, rowid, sr_number, article_num, heading, text, lang)
+        SELECT 'delete', id, sr_number, article_num, heading, text, lang
+        FROM articles WHERE sr_number = ?
+    """, (sr_number,))
+    conn.execute("DELETE FROM articles WHERE sr_number = ?", (sr_number,))
+
+
+def _store_law(conn: sqlite3.Connection, result: dict, law_index: dict, stats: dict) -> None:
+    sr_number = Path(result["sr_dir"]).name.replace("_", ".")
+    meta = law_index.get(sr_number, {})
+    stats["laws_seen"] += 1
+
+    # Insert law metadata
+    conn.execute(
+        """INSERT OR REPLACE INTO laws
+           (sr_number, title_de, title_fr, title_it,
+            abbr_de, abbr_fr, abbr_it, consolidation_date, work_uri)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        (
+            sr_number,
+            meta.get("title_de"),
+            meta.get("title_fr"),
+            meta.get("title_it"),
+            meta.get("abbr_de"),
+            meta.get("abbr_fr"),
+            meta.get("abbr_it"),
+            meta.get("consolidation_date"),
+            meta.get("work_uri"),
+        ),
+    )
+    if result["skipped"]:
+        stats["laws_skipped"] += 1
+        return
+
+    stats["laws_parsed"] += 1
+    stats["xml_bytes"] += result["bytes"]
+    stats["parse_cpu_seconds"] += result["parse_seconds"]
+    _delete_law_articles(conn, sr_number)
+    rows = [
+        (sr_number, art["article_num"], art["heading"], art["text"], lang)
+        for lang, articles in result["articles"].items()
+        for art in articles
+    ]
+    conn.executemany(
+        """INSERT INTO articles (sr_number, article_num, heading, text, lang)
+           VALUES (?, ?, ?, ?, ?)""",
+        rows,
+    )
+    conn.execute(
+        "INSERT OR REPLACE INTO law_sources (sr_number, consolidation_date, xml_hash) VALUES (?, ?, ?)",
+        (sr_number, meta.get("consolidation_date"), result["xml_hash"]),
+    )
+    stats["articles_inserted"] += len(rows)
+
 
 def main():
     global FEDLEX_DIR, OUTPUT_DB
@@ -333,6 +549,8 @@ def main():
     parser = argparse.ArgumentParser(description="Build statutes DB from Fedlex XML")
     parser.add_argument("--fedlex-dir", type=Path, default=FEDLEX_DIR)
     parser.add_argument("--output", type=Path, default=OUTPUT_DB)
+    parser.add_argument("--workers", type=int, default=None, help="Parser processes (default: CPU count)")
+    parser.add_argument("--full", action="store_true", help="Ignore the previous DB and reparse every law")
     parser.add_argument("-v", "--verbose", action="store_true")
     args = parser.parse_args()
 
@@ -343,7 +561,7 @@ def main():
     OUTPUT_DB = args.output
 
     t0 = time.time()
-    build_db()
+    build_db(workers=args.workers, full=args.full)
     log.info("Total time: %.1f seconds", time.time() - t0)
 
 
@@ -7,7 +7,11 @@ This module provides:
 - BGE-M3 model loading with ONNX/PyTorch fallback (SentenceTransformer)
 - Optional FlagEmbedding backend for BGE-M3 sparse (lexical) weights
 - Optional chunk-level indexing for long-document recall
-- Full build pipeline: JSONL -> embeddings -> sqlite-vec DB
+- Full build pipeline: JSONL -> embeddings -> sqlite-vec DB, with
+  per-batch checkpoints, resume and incremental (changed-text-only) rebuilds
+- Multi-process sharded builds merged into one DB
+- Optional IVF-int8 ANN indexes next to the DB (see ``ann_index``)
+- Optional memory-mapped sparse postings next to the DB (see ``sparse_postings``)
 - CLI entry point for batch embedding generation
 """
 
@@ -18,9 +22,12 @@ import hashlib
 import json
 import logging
 import os
+import shutil
 import sqlite3
 import struct
+import subprocess
 import sys
+import tempfile
 import time
 from pathlib import Path
 from typing import Iterator
@@ -88,6 +95,14 @@ CREATE INDEX IF NOT EXISTS idx_chunk_meta_decision ON chunk_meta (decision_id);
 """.strip()
 """DDL for the chunk metadata table."""
 
+EMBED_STATE_SQL = """
+CREATE TABLE IF NOT EXISTS embed_state (
+    decision_id TEXT PRIMARY KEY,
+    text_hash TEXT NOT NULL
+)
+""".strip()
+"""DDL for per-decision text hashes (checkpoints for resumed/incremental builds)."""
+
 
 # ---------------------------------------------------------------------------
 # Text selection helper
@@ -189,6 +204,7 @@ def create_vec_db(
 
     # Always create the decision-level vec table
     conn.execute(VEC_TABLE_SQL)
+    conn.execute(EMBED_STATE_SQL)
 
     if enable_sparse:
         for stmt in SPARSE_TABLES_SQL.split(";"):
@@ -220,6 +236,7 @@ def load_model(
     *,
     use_flagembedding: bool = False,
     use_int8: bool = False,
+    num_threads: int | None = None,
 ):
     """Load an embedding model.
 
@@ -231,16 +248,18 @@ def load_model(
         model_id: HuggingFace model identifier.
         use_flagembedding: Use FlagEmbedding library for sparse support.
         use_int8: Apply int8 dynamic quantization for faster CPU inference.
+        num_threads: PyTorch intra-op threads (default: all CPU cores).
 
     Returns:
         A model instance (BGEM3FlagModel or SentenceTransformer).
     """
     import torch
 
-    # Use all available CPU cores for PyTorch inference
-    cpu_count = os.cpu_count() or 8
-    torch.set_num_threads(cpu_count)
-    logger.info("Set PyTorch threads to %d", cpu_count)
+    # Use all available CPU cores for PyTorch inference unless a shard
+    # budget was given
+    num_threads = num_threads or os.cpu_count() or 8
+    torch.set_num_threads(num_threads)
+    logger.info("Set PyTorch threads to %d", num_threads)
 
     if use_flagembedding:
         from FlagEmbedding import BGEM3FlagModel  # type: ignore[import-untyped]
@@ -443,17 +462,257 @@ def _insert_chunk_batch(
     dense_vecs: np.ndarray,
 ) -> None:
     """Insert chunk embeddings and metadata."""
-    for i in range(len(chunk_ids)):
-        conn.execute(
-            "INSERT INTO vec_chunks (chunk_id, embedding, language) "
-            "VALUES (?, ?, ?)",
-            (chunk_ids[i], serialize_f32(dense_vecs[i].tolist()), chunk_langs[i]),
-        )
-        conn.execute(
-            "INSERT INTO chunk_meta (chunk_id, decision_id, chunk_index) "
-            "VALUES (?, ?, ?)",
-            (chunk_ids[i], decision_ids[i], chunk_indices[i]),
+    conn.executemany(
+        "INSERT INTO vec_chunks (chunk_id, embedding, language) "
+        "VALUES (?, ?, ?)",
+        [
+            (chunk_ids[i], serialize_f32(dense_vecs[i].tolist()), chunk_langs[i])
+            for i in range(len(chunk_ids))
+        ],
+    )
+    conn.executemany(
+        "INSERT INTO chunk_meta (chunk_id, decision_id, chunk_index) "
+        "VALUES (?, ?, ?)",
+        [(chunk_ids[i], decision_ids[i], chunk_indices[i]) for i in range(len(chunk_ids))],
+    )
+
+
+def _insert_embed_state(
+    conn: sqlite3.Connection,
+    decision_ids: list[str],
+    text_hashes: list[str],
+) -> None:
+    """Record the text hash of each embedded decision (the batch checkpoint)."""
+    conn.executemany(
+        "INSERT OR REPLACE INTO embed_state (decision_id, text_hash) VALUES (?, ?)",
+        list(zip(decision_ids, text_hashes)),
+    )
+
+
+def _delete_decisions(conn: sqlite3.Connection, decision_ids: list[str]) -> None:
+    """Remove all vectors, sparse terms, chunks and state for *decision_ids*."""
+    if not decision_ids:
+        return
+    tables = {
+        r[0] for r in conn.execute(
+            "SELECT name FROM sqlite_master WHERE name IN "
+            "('sparse_terms', 'vec_chunks', 'chunk_meta')"
         )
+    }
+    params = [(did,) for did in decision_ids]
+    conn.executemany("DELETE FROM vec_decisions WHERE decision_id = ?", params)
+    if "sparse_terms" in tables:
+        conn.executemany("DELETE FROM sparse_terms WHERE decision_id = ?", params)
+    if "chunk_meta" in tables:
+        if "vec_chunks" in tables:
+            conn.executemany(
+                "DELETE FROM vec_chunks WHERE chunk_id IN "
+                "(SELECT chunk_id FROM chunk_meta WHERE decision_id = ?)",
+                params,
+            )
+        conn.executemany("DELETE FROM chunk_meta WHERE decision_id = ?", params)
+    conn.executemany("DELETE FROM embed_state WHERE decision_id = ?", params)
+
+
+# ---------------------------------------------------------------------------
+# Sharding and change detection
+# ---------------------------------------------------------------------------
+
+
+def _shard_of(decision_id: str, num_shards: int) -> int:
+    """Shard assignment by MD5 of the decision id.
+
+    MD5 is deterministic, unlike hash() which is randomized by
+    PYTHONHASHSEED across processes.
+    """
+    return int(hashlib.md5(decision_id.encode()).hexdigest(), 16) % num_shards
+
+
+def _embed_hash(model_id: str, text: str, chunk_texts: list[str]) -> str:
+    """Hash of everything that determines a decision's embeddings."""
+    h = hashlib.sha1(model_id.encode("utf-8"))
+    for part in (text, *chunk_texts):
+        h.update(b"\x1f")
+        h.update(part.encode("utf-8"))
+    return h.hexdigest()
+
+
+def _chunk_texts_for_row(row: dict, chunk_fn) -> list[str]:
+    """Regeste (chunk 0) plus up to two full_text sections, at most 3 chunks."""
+    regeste = row.get("regeste") or ""
+    full_text = row.get("full_text") or ""
+
+    chunk_texts: list[str] = []
+    # Chunk 0: regeste if available
+    if len(regeste) >= 20:
+        chunk_texts.append(regeste)
+    # Chunks 1-2: from full_text sections
+    if full_text:
+        chunk_texts.extend(chunk_fn(full_text, max_chunks=2, max_chunk_chars=500))
+    return chunk_texts[:3]
+
+
+def _split_jsonl_by_shard(input_dir: Path, out_dir: Path, num_shards: int) -> list[Path]:
+    """Write each shard's JSONL lines to ``out_dir/shard_<i>/`` in one pass.
+
+    Lines keep their input order, so first-occurrence deduplication within
+    a shard is unchanged; each shard process then parses only its own slice
+    instead of the whole corpus.
+
+    Returns:
+        The per-shard input directories, indexed by shard.
+    """
+    dirs = [out_dir / f"shard_{i}" for i in range(num_shards)]
+    for d in dirs:
+        d.mkdir(parents=True, exist_ok=True)
+    outs = [open(d / "decisions.jsonl", "w", encoding="utf-8") for d in dirs]
+    try:
+        for jsonl_path in sorted(input_dir.glob("*.jsonl")):
+            with open(jsonl_path, encoding="utf-8") as f:
+                for line_no, line in enumerate(f, 1):
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        decision_id = json.loads(line).get("decision_id")
+                    except (json.JSONDecodeError, AttributeError):
+                        print(
+                            f"  WARNING: Skipping bad JSON at {jsonl_path.name}:{line_no}",
+                            file=sys.stderr,
+                        )
+                        continue
+                    if decision_id:
+                        outs[_shard_of(decision_id, num_shards)].write(line + "\n")
+    finally:
+        for out in outs:
+            out.close()
+    return dirs
+
+
+def _sparse_terms_dropped(db_path: Path) -> bool:
+    """True if *db_path* has embedded decisions but no ``sparse_terms`` table."""
+    conn = sqlite3.connect(str(db_path))
+    try:
+        names = {r[0] for r in conn.execute("SELECT name FROM sqlite_master")}
+        if "sparse_terms" in names or "embed_state" not in names:
+            return False
+        return conn.execute("SELECT 1 FROM embed_state LIMIT 1").fetchone() is not None
+    finally:
+        conn.close()
+
+
+def shard_db_path(db_path: Path, shard_index: int) -> Path:
+    """Per-shard DB path (``vectors_shard_<i>.db``) next to *db_path*."""
+    db_path = Path(db_path)
+    return db_path.parent / f"{db_path.stem}_shard_{shard_index}{db_path.suffix}"
+
+
+# ---------------------------------------------------------------------------
+# ANN index
+# ---------------------------------------------------------------------------
+
+
+def ann_index_dir(db_path: Path) -> Path:
+    """Directory holding the ANN indexes for a vector DB (``vectors_ann/``)."""
+    db_path = Path(db_path)
+    return db_path.parent / f"{db_path.stem}_ann"
+
+
+def _courts_from_jsonl(input_dir: Path) -> dict[str, str]:
+    """decision_id -> court map used for ANN court prefiltering."""
+    courts: dict[str, str] = {}
+    for row in _iter_rows_from_jsonl(input_dir):
+        decision_id = row.get("decision_id")
+        if decision_id and row.get("court"):
+            courts[decision_id] = row["court"]
+    return courts
+
+
+def build_ann_indexes(
+    db_path: Path,
+    *,
+    courts: dict[str, str] | None = None,
+    nlist: int | None = None,
+) -> dict:
+    """Build IVF-int8 ANN indexes for vec_decisions (and vec_chunks if present).
+
+    Args:
+        db_path: Existing sqlite-vec database built by :func:`build_vectors`.
+        courts: decision_id -> court map for court prefiltering.
+        nlist: Number of IVF lists (default scales with sqrt(N)).
+
+    Returns:
+        Stats dict keyed by table name.
+    """
+    from search_stack.ann_index import build_ann_from_vec_db
+
+    db_path = Path(db_path)
+    out_root = ann_index_dir(db_path)
+    conn = create_vec_db(str(db_path))
+    try:
+        stats: dict = {}
+        tables = {
+            r[0] for r in conn.execute(
+                "SELECT name FROM sqlite_master WHERE name IN ('vec_decisions', 'vec_chunks')"
+            )
+        }
+        for table, name in (("vec_decisions", "decisions"), ("vec_chunks", "chunks")):
+            if table not in tables:
+                continue
+            if not conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone():
+                continue
+            logger.info("Building ANN index for %s", table)
+            stats[table] = build_ann_from_vec_db(
+                conn, out_root / name, table=table, courts=courts, nlist=nlist,
+            )
+        return stats
+    finally:
+        conn.close()
+
+
+# ---------------------------------------------------------------------------
+# Sparse postings
+# ---------------------------------------------------------------------------
+
+
+def sparse_postings_dir(db_path: Path) -> Path:
+    """Directory holding the sparse postings for a vector DB (``vectors_sparse/``)."""
+    db_path = Path(db_path)
+    return db_path.parent / f"{db_path.stem}_sparse"
+
+
+def build_sparse_postings_for_db(db_path: Path, *, drop_table: bool = False) -> dict:
+    """Build the memory-mapped sparse postings from a DB's ``sparse_terms``.
+
+    Args:
+        db_path: Existing vector DB built with ``enable_sparse``.
+        drop_table: Drop ``sparse_terms`` afterwards and VACUUM, so the
+            postings file is the only copy of the sparse index.
+
+    Returns:
+        Stats dict from :func:`search_stack.sparse_postings.build_sparse_postings`,
+        or an empty dict when the DB has no sparse terms.
+    """
+    from search_stack.sparse_postings import build_sparse_postings
+
+    db_path = Path(db_path)
+    conn = sqlite3.connect(str(db_path))
+    try:
+        has_table = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sparse_terms'"
+        ).fetchone()
+        if not has_table or not conn.execute("SELECT 1 FROM sparse_terms LIMIT 1").fetchone():
+            logger.warning("No sparse_terms in %s; skipping sparse postings", db_path)
+            return {}
+        stats = build_sparse_postings(conn, sparse_postings_dir(db_path))
+        if drop_table:
+            conn.execute("DROP TABLE sparse_terms")
+            conn.commit()
+            conn.execute("VACUUM")
+            stats["sparse_terms_dropped"] = True
+        return stats
+    finally:
+        conn.close()
 
 
 # ---------------------------------------------------------------------------
@@ -473,14 +732,22 @@ def build_vectors(
     shard_index: int | None = None,
     num_shards: int | None = None,
     use_int8: bool = False,
+    build_ann: bool = False,
+    ann_nlist: int | None = None,
+    build_postings: bool = False,
+    drop_sparse_table: bool = False,
+    incremental: bool = False,
 ) -> dict:
     """Build a sqlite-vec database of decision embeddings from JSONL files.
 
     Steps:
     1. Load the embedding model.
     2. Create the vec DB at a temporary path (``<db_path>.tmp``).
-    3. Iterate JSONL rows, select text, batch-encode, and insert.
-    4. Atomic rename on success; cleanup temp file on error.
+    3. Iterate JSONL rows, select text, batch-encode, and insert. Each
+       batch (decisions, chunks and their ``embed_state`` hashes) is
+       committed together as a checkpoint.
+    4. Atomic rename on success. On error the partial temp DB is kept so
+       an ``incremental`` rerun resumes from the last checkpoint.
 
     Args:
         input_dir: Directory containing ``*.jsonl`` decision files.
@@ -493,42 +760,85 @@ def build_vectors(
         enable_chunks: Enable chunk-level indexing. Splits full_text
             into sections and embeds each chunk separately.
         shard_index: If set, only process decisions where
-            hash(decision_id) % num_shards == shard_index.
+            md5(decision_id) % num_shards == shard_index.
         num_shards: Total number of shards for parallel builds.
+        build_ann: After the DB is built, also build IVF-int8 ANN indexes
+            in ``<db stem>_ann/`` (see :func:`build_ann_indexes`).
+        ann_nlist: Number of IVF lists for the ANN indexes.
+        build_postings: With ``enable_sparse``, also write memory-mapped
+            sparse postings to ``<db stem>_sparse/``.
+        drop_sparse_table: Drop ``sparse_terms`` from the DB once the
+            postings are written. Not allowed with ``incremental``, since
+            the postings are rebuilt from the full table.
+        incremental: Resume an interrupted build from ``<db_path>.tmp``, or
+            start from the existing ``db_path``; only decisions whose text
+            hash changed (or that are new) are re-embedded, and decisions
+            no longer in the input (or whose text is now empty) are removed.
 
     Returns:
         Stats dict with keys: ``db_path``, ``embedded``, ``skipped_no_text``,
-        ``skipped_dupe``, ``elapsed_seconds``, and optionally ``chunks_embedded``,
+        ``skipped_dupe``, ``skipped_unchanged``, ``removed``,
+        ``elapsed_seconds``, and optionally ``chunks_embedded``,
         ``sparse_terms_inserted``.
+
+    Raises:
+        ValueError: If ``incremental`` is combined with ``drop_sparse_table``,
+            or would start from a DB whose ``sparse_terms`` were dropped.
     """
     t0 = time.time()
     input_dir = Path(input_dir)
     db_path = Path(db_path).resolve()  # resolve symlinks for atomic rename
     tmp_path = db_path.parent / f".{db_path.name}.tmp"
 
+    if incremental and drop_sparse_table:
+        raise ValueError(
+            "drop_sparse_table cannot be combined with incremental: the sparse "
+            "postings of later incremental builds are rebuilt from sparse_terms"
+        )
+    source_path = tmp_path if tmp_path.exists() else db_path
+    if incremental and enable_sparse and source_path.exists() and _sparse_terms_dropped(source_path):
+        raise ValueError(
+            f"{source_path} has no sparse_terms (dropped after building postings); "
+            "rebuild it without incremental"
+        )
+
     use_flagembedding = enable_sparse
 
     # Sharding: limit torch threads when running multiple workers
+    threads_per_shard = None
     if num_shards and num_shards > 1:
-        import torch
         cpu_count = os.cpu_count() or 16
         threads_per_shard = max(1, cpu_count // num_shards)
-        torch.set_num_threads(threads_per_shard)
         logger.info(
             "Shard %d/%d: using %d PyTorch threads",
             shard_index, num_shards, threads_per_shard,
         )
 
     logger.info("Loading model %s (flagembedding=%s, int8=%s) ...", model_id, use_flagembedding, use_int8)
-    model = load_model(model_id, use_flagembedding=use_flagembedding, use_int8=use_int8)
+    model = load_model(
+        model_id, use_flagembedding=use_flagembedding, use_int8=use_int8,
+        num_threads=threads_per_shard,
+    )
+
+    if incremental and tmp_path.exists():
+        logger.info("Resuming interrupted build from %s", tmp_path)
+    elif incremental and db_path.exists():
+        logger.info("Incremental build starting from %s", db_path)
+        shutil.copy2(db_path, tmp_path)
+    elif tmp_path.exists():
+        tmp_path.unlink()
 
-    logger.info("Creating vec DB at %s", tmp_path)
+    logger.info("Opening vec DB at %s", tmp_path)
     conn = create_vec_db(
         str(tmp_path),
         enable_sparse=enable_sparse,
         enable_chunks=enable_chunks,
     )
 
+    # Ids seen in this pass go to a temp table rather than a Python set, so
+    # memory does not grow with the corpus.
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS seen_ids (decision_id TEXT PRIMARY KEY)")
+
     # Import chunker if chunks enabled
     chunk_fn = None
     if enable_chunks:
@@ -538,14 +848,18 @@ def build_vectors(
     embedded = 0
     skipped_no_text = 0
     skipped_dupe = 0
+    skipped_unchanged = 0
+    removed = 0
     chunks_embedded = 0
     sparse_terms_inserted = 0
-    seen_ids: set[str] = set()
+    courts: dict[str, str] = {}
 
     # Accumulate batch for decision-level embeddings
     batch_ids: list[str] = []
     batch_texts: list[str] = []
     batch_langs: list[str] = []
+    batch_hashes: list[str] = []
+    batch_replaced: list[str] = []
 
     # Accumulate batch for chunk-level embeddings
     chunk_batch_ids: list[str] = []
@@ -559,6 +873,9 @@ def build_vectors(
         if not batch_ids:
             return 0
 
+        # Changed decisions: drop their old rows (incl. chunks) first
+        _delete_decisions(conn, batch_replaced)
+
         if use_flagembedding:
             dense, sparse = encode_texts_flag(
                 model, batch_texts, batch_size=batch_size,
@@ -574,13 +891,15 @@ def build_vectors(
         else:
             vecs = encode_texts(model, batch_texts, batch_size=batch_size)
             _insert_dense_batch(conn, batch_ids, batch_langs, vecs)
+        _insert_embed_state(conn, batch_ids, batch_hashes)
 
         count = len(batch_ids)
         embedded += count
-        conn.commit()
         batch_ids.clear()
         batch_texts.clear()
         batch_langs.clear()
+        batch_hashes.clear()
+        batch_replaced.clear()
         return count
 
     def _flush_chunk_batch() -> int:
@@ -607,7 +926,6 @@ def build_vectors(
         )
         count = len(chunk_batch_ids)
         chunks_embedded += count
-        conn.commit()
         chunk_batch_ids.clear()
         chunk_batch_decision_ids.clear()
         chunk_batch_indices.clear()
@@ -615,6 +933,13 @@ def build_vectors(
         chunk_batch_langs.clear()
         return count
 
+    def _checkpoint() -> None:
+        # Decisions, their chunks and their state rows commit together, so
+        # a resumed build never sees a decision without its chunks.
+        _flush_decision_batch()
+        _flush_chunk_batch()
+        conn.commit()
+
     try:
         for row in _iter_rows_from_jsonl(input_dir):
             if limit is not None and embedded + len(batch_ids) >= limit:
@@ -625,54 +950,60 @@ def build_vectors(
                 continue
 
             # Shard filter: skip decisions not assigned to this shard.
-            # Use MD5 (deterministic) instead of hash() which is randomized
-            # by PYTHONHASHSEED across processes.
             if num_shards and num_shards > 1 and shard_index is not None:
-                h = int(hashlib.md5(decision_id.encode()).hexdigest(), 16)
-                if h % num_shards != shard_index:
+                if _shard_of(decision_id, num_shards) != shard_index:
                     continue
 
-            if decision_id in seen_ids:
+            if not conn.execute(
+                "INSERT OR IGNORE INTO temp.seen_ids VALUES (?)", (decision_id,)
+            ).rowcount:
                 skipped_dupe += 1
                 continue
-            seen_ids.add(decision_id)
 
             text = _select_text(row)
             if text is None:
                 skipped_no_text += 1
+                if incremental and conn.execute(
+                    "SELECT 1 FROM embed_state WHERE decision_id = ?", (decision_id,)
+                ).fetchone():
+                    # Text emptied since the last build: drop the old vectors
+                    _delete_decisions(conn, [decision_id])
+                    removed += 1
                 continue
 
             language = row.get("language") or "de"
+            if build_ann and row.get("court"):
+                courts[decision_id] = row["court"]
+
+            # Chunk-level: embed sections of full_text
+            chunk_texts = _chunk_texts_for_row(row, chunk_fn) if chunk_fn is not None else []
+            text_hash = _embed_hash(model_id, text, chunk_texts)
+            if incremental:
+                prev = conn.execute(
+                    "SELECT text_hash FROM embed_state WHERE decision_id = ?",
+                    (decision_id,),
+                ).fetchone()
+                if prev is not None:
+                    if prev[0] == text_hash:
+                        skipped_unchanged += 1
+                        continue
+                    batch_replaced.append(decision_id)
+
             batch_ids.append(decision_id)
             batch_texts.append(text)
             batch_langs.append(language)
+            batch_hashes.append(text_hash)
 
-            # Chunk-level: embed sections of full_text
-            if chunk_fn is not None:
-                regeste = row.get("regeste") or ""
-                full_text = row.get("full_text") or ""
-
-                chunk_texts: list[str] = []
-                # Chunk 0: regeste if available
-                if len(regeste) >= 20:
-                    chunk_texts.append(regeste)
-                # Chunks 1-2: from full_text sections
-                if full_text:
-                    ft_chunks = chunk_fn(full_text, max_chunks=2, max_chunk_chars=500)
-                    chunk_texts.extend(ft_chunks)
-
-                for ci, ct in enumerate(chunk_texts[:3]):
-                    chunk_id = f"{decision_id}__chunk_{ci}"
-                    chunk_batch_ids.append(chunk_id)
-                    chunk_batch_decision_ids.append(decision_id)
-                    chunk_batch_indices.append(ci)
-                    chunk_batch_texts.append(ct)
-                    chunk_batch_langs.append(language)
+            for ci, ct in enumerate(chunk_texts):
+                chunk_id = f"{decision_id}__chunk_{ci}"
+                chunk_batch_ids.append(chunk_id)
+                chunk_batch_decision_ids.append(decision_id)
+                chunk_batch_indices.append(ci)
+                chunk_batch_texts.append(ct)
+                chunk_batch_langs.append(language)
 
             if len(batch_ids) >= batch_size:
-                _flush_decision_batch()
-                # Flush accumulated chunks right after decisions
-                _flush_chunk_batch()
+                _checkpoint()
 
                 if embedded % 10000 == 0:
                     logger.info(
@@ -681,46 +1012,62 @@ def build_vectors(
                     )
 
         # Flush remaining batches
-        if batch_ids:
-            if limit is not None:
-                remaining = limit - embedded
-                kept_ids = set(batch_ids[:remaining])
-                batch_ids[:] = batch_ids[:remaining]
-                batch_texts[:] = batch_texts[:remaining]
-                batch_langs[:] = batch_langs[:remaining]
-
-                # Trim chunk batch to only kept decisions (avoid orphaned chunks)
-                if chunk_batch_ids and kept_ids:
-                    keep = [
-                        i for i, did in enumerate(chunk_batch_decision_ids)
-                        if did in kept_ids
-                    ]
-                    chunk_batch_ids[:] = [chunk_batch_ids[i] for i in keep]
-                    chunk_batch_decision_ids[:] = [chunk_batch_decision_ids[i] for i in keep]
-                    chunk_batch_indices[:] = [chunk_batch_indices[i] for i in keep]
-                    chunk_batch_texts[:] = [chunk_batch_texts[i] for i in keep]
-                    chunk_batch_langs[:] = [chunk_batch_langs[i] for i in keep]
-
-            _flush_decision_batch()
-
-        _flush_chunk_batch()
+        if batch_ids and limit is not None:
+            remaining = limit - embedded
+            kept_ids = set(batch_ids[:remaining])
+            batch_ids[:] = batch_ids[:remaining]
+            batch_texts[:] = batch_texts[:remaining]
+            batch_langs[:] = batch_langs[:remaining]
+            batch_hashes[:] = batch_hashes[:remaining]
+            batch_replaced[:] = [did for did in batch_replaced if did in kept_ids]
+
+            # Trim chunk batch to only kept decisions (avoid orphaned chunks)
+            if chunk_batch_ids:
+                keep = [
+                    i for i, did in enumerate(chunk_batch_decision_ids)
+                    if did in kept_ids
+                ]
+                chunk_batch_ids[:] = [chunk_batch_ids[i] for i in keep]
+                chunk_batch_decision_ids[:] = [chunk_batch_decision_ids[i] for i in keep]
+                chunk_batch_indices[:] = [chunk_batch_indices[i] for i in keep]
+                chunk_batch_texts[:] = [chunk_batch_texts[i] for i in keep]
+                chunk_batch_langs[:] = [chunk_batch_langs[i] for i in keep]
+
+        _checkpoint()
+
+        # Decisions that disappeared from the input (only knowable on a full pass)
+        if incremental and limit is None:
+            stale = [r[0] for r in conn.execute(
+                "SELECT decision_id FROM embed_state "
+                "WHERE decision_id NOT IN (SELECT decision_id FROM temp.seen_ids)"
+            )]
+            _delete_decisions(conn, stale)
+            conn.commit()
+            removed += len(stale)
 
         conn.close()
         os.replace(str(tmp_path), str(db_path))
         elapsed = time.time() - t0
         logger.info(
-            "Done: %d embedded, %d chunks, %d skipped (no text), %d skipped (dupe) in %.1fs",
+            "Done: %d embedded, %d chunks, %d unchanged, %d removed, "
+            "%d skipped (no text), %d skipped (dupe) in %.1fs",
             embedded,
             chunks_embedded,
+            skipped_unchanged,
+            removed,
             skipped_no_text,
             skipped_dupe,
             elapsed,
         )
 
-    except Exception:
+    except BaseException:
         conn.close()
         if tmp_path.exists():
-            tmp_path.unlink()
+            logger.warning(
+                "Build interrupted after %d decisions; partial DB kept at %s "
+                "(rerun with --incremental to resume)",
+                embedded, tmp_path,
+            )
         raise
 
     stats: dict = {
@@ -728,12 +1075,132 @@ def build_vectors(
         "embedded": embedded,
         "skipped_no_text": skipped_no_text,
         "skipped_dupe": skipped_dupe,
+        "skipped_unchanged": skipped_unchanged,
+        "removed": removed,
         "elapsed_seconds": round(elapsed, 2),
     }
     if enable_chunks:
         stats["chunks_embedded"] = chunks_embedded
     if enable_sparse:
         stats["sparse_terms_inserted"] = sparse_terms_inserted
+    if build_ann:
+        stats["ann"] = build_ann_indexes(db_path, courts=courts, nlist=ann_nlist)
+    if enable_sparse and build_postings:
+        stats["sparse_postings"] = build_sparse_postings_for_db(
+            db_path, drop_table=drop_sparse_table,
+        )
+    return stats
+
+
+def build_vectors_sharded(
+    *,
+    input_dir: Path,
+    db_path: Path,
+    workers: int,
+    model_id: str = BGE_M3_MODEL_ID,
+    batch_size: int = ENCODE_BATCH_SIZE,
+    enable_sparse: bool = False,
+    enable_chunks: bool = False,
+    use_int8: bool = False,
+    incremental: bool = False,
+    build_ann: bool = False,
+    ann_nlist: int | None = None,
+    build_postings: bool = False,
+    drop_sparse_table: bool = False,
+) -> dict:
+    """Run one :func:`build_vectors` process per MD5 shard, then merge.
+
+    Each worker builds ``<db stem>_shard_<i>.db`` with ``cpu_count // workers``
+    threads. Shard DBs are kept between runs, so with ``incremental`` a
+    nightly rebuild only encodes new or changed decisions, and a crashed
+    shard resumes from its last checkpoint. The shards are then merged into
+    ``db_path`` and the optional ANN indexes / sparse postings are rebuilt.
+
+    The input is split into per-shard JSONL files once up front, so each
+    worker only parses its own slice. ``drop_sparse_table`` only affects the
+    merged DB; the shards keep their ``sparse_terms``, and an incremental
+    merge reloads the dropped table from them.
+
+    Returns:
+        Stats dict with per-shard stats under ``shards`` and the merge stats
+        under ``merge``.
+
+    Raises:
+        RuntimeError: If any shard process fails (its partial DB is kept).
+    """
+    from search_stack.merge_shards import merge_shards
+
+    t0 = time.time()
+    db_path = Path(db_path).resolve()
+    threads = max(1, (os.cpu_count() or 16) // workers)
+    env = dict(os.environ, OMP_NUM_THREADS=str(threads), MKL_NUM_THREADS=str(threads))
+
+    split_dir = Path(tempfile.mkdtemp(prefix=f".{db_path.stem}_split.", dir=db_path.parent))
+    try:
+        shard_inputs = _split_jsonl_by_shard(Path(input_dir), split_dir, workers)
+        procs: list[tuple[int, subprocess.Popen]] = []
+        for i in range(workers):
+            # The slice is already this shard's; the shard flags set the thread count.
+            cmd = [
+                sys.executable, "-m", "search_stack.build_vectors",
+                "--input", str(shard_inputs[i]),
+                "--output", str(shard_db_path(db_path, i)),
+                "--model", model_id,
+                "--batch-size", str(batch_size),
+                "--shard-index", str(i),
+                "--num-shards", str(workers),
+            ]
+            if enable_sparse:
+                cmd.append("--enable-sparse")
+            if enable_chunks:
+                cmd.append("--enable-chunks")
+            if use_int8:
+                cmd.append("--int8")
+            if incremental:
+                cmd.append("--incremental")
+            logger.info("Starting shard %d/%d", i, workers)
+            procs.append((i, subprocess.Popen(cmd, env=env, stdout=subprocess.PIPE, text=True)))
+
+        shard_stats: list[dict] = []
+        failed: list[int] = []
+        for i, proc in procs:
+            out, _ = proc.communicate()
+            if proc.returncode != 0:
+                failed.append(i)
+                continue
+            try:
+                shard_stats.append(json.loads(out))
+            except json.JSONDecodeError:
+                shard_stats.append({"shard": i})
+    finally:
+        shutil.rmtree(split_dir, ignore_errors=True)
+    if failed:
+        raise RuntimeError(
+            f"Shards {failed} failed; rerun with --incremental to resume them"
+        )
+
+    stats: dict = {
+        "db_path": str(db_path),
+        "workers": workers,
+        "embedded": sum(s.get("embedded", 0) for s in shard_stats),
+        "skipped_unchanged": sum(s.get("skipped_unchanged", 0) for s in shard_stats),
+        "shards": shard_stats,
+    }
+    stats["merge"] = merge_shards(
+        [shard_db_path(db_path, i) for i in range(workers)],
+        db_path,
+        enable_sparse=enable_sparse,
+        incremental=incremental,
+    )
+    if build_ann:
+        stats["ann"] = build_ann_indexes(
+            db_path, courts=_courts_from_jsonl(Path(input_dir)), nlist=ann_nlist,
+        )
+    if enable_sparse and build_postings:
+        stats["sparse_postings"] = build_sparse_postings_for_db(
+            db_path, drop_table=drop_sparse_table,
+        )
+    stats["elapsed_seconds"] = round(time.time() - t0, 2)
     return stats
 
 
@@ -804,6 +1271,49 @@ def main() -> None:
         default=None,
         help="Total number of shards for parallel builds",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Run this many shard processes in parallel and merge their DBs",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Resume an interrupted build or update the existing --output DB, "
+        "re-embedding only new or changed decisions",
+    )
+    parser.add_argument(
+        "--ann-index",
+        action="store_true",
+        help="Also build IVF-int8 ANN indexes next to the output DB",
+    )
+    parser.add_argument(
+        "--ann-only",
+        action="store_true",
+        help="Only (re)build the ANN indexes for an existing --output DB",
+    )
+    parser.add_argument(
+        "--ann-nlist",
+        type=int,
+        default=None,
+        help="Number of IVF lists (default: ~4*sqrt(vectors))",
+    )
+    parser.add_argument(
+        "--sparse-postings",
+        action="store_true",
+        help="With --enable-sparse, also write memory-mapped sparse postings",
+    )
+    parser.add_argument(
+        "--sparse-postings-only",
+        action="store_true",
+        help="Only (re)build the sparse postings for an existing --output DB",
+    )
+    parser.add_argument(
+        "--drop-sparse-terms",
+        action="store_true",
+        help="Drop the sparse_terms table once the postings are written",
+    )
     parser.add_argument(
         "-v",
         "--verbose",
@@ -817,6 +1327,45 @@ def main() -> None:
         format="%(asctime)s %(levelname)s %(message)s",
     )
 
+    if args.ann_only:
+        stats = build_ann_indexes(
+            args.output,
+            courts=_courts_from_jsonl(args.input),
+            nlist=args.ann_nlist,
+        )
+        print(json.dumps(stats, indent=2, ensure_ascii=False))
+        return
+
+    if args.sparse_postings_only:
+        stats = build_sparse_postings_for_db(args.output, drop_table=args.drop_sparse_terms)
+        print(json.dumps(stats, indent=2, ensure_ascii=False))
+        return
+
+    if args.incremental and args.drop_sparse_terms and not (args.workers and args.workers > 1):
+        parser.error(
+            "--drop-sparse-terms cannot be combined with --incremental "
+            "(the postings are rebuilt from sparse_terms); use --workers or a full build"
+        )
+
+    if args.workers and args.workers > 1:
+        stats = build_vectors_sharded(
+            input_dir=args.input,
+            db_path=args.output,
+            workers=args.workers,
+            model_id=args.model,
+            batch_size=args.batch_size,
+            enable_sparse=args.enable_sparse,
+            enable_chunks=args.enable_chunks,
+            use_int8=args.int8,
+            incremental=args.incremental,
+            build_ann=args.ann_index,
+            ann_nlist=args.ann_nlist,
+            build_postings=args.sparse_postings,
+            drop_sparse_table=args.drop_sparse_terms,
+        )
+        print(json.dumps(stats, indent=2, ensure_ascii=False))
+        return
+
     stats = build_vectors(
         input_dir=args.input,
         db_path=args.output,
@@ -828,6 +1377,11 @@ def main() -> None:
         shard_index=args.shard_index,
         num_shards=args.num_shards,
         use_int8=args.int8,
+        build_ann=args.ann_index,
+        ann_nlist=args.ann_nlist,
+        build_postings=args.sparse_postings,
+        drop_sparse_table=args.drop_sparse_terms,
+        incremental=args.incremental,
     )
     print(json.dumps(stats, indent=2, ensure_ascii=False))
 
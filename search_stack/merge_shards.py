@@ -1,10 +1,23 @@
 """Merge sharded vector DBs into a single vectors.db.
 
+Each shard is ATTACHed to the output DB and copied with set-based
+``INSERT ... SELECT`` statements (vec_decisions, sparse_terms, chunk_meta,
+vec_chunks, embed_state), so rows never pass through Python. Secondary
+indexes are dropped during the load and rebuilt once at the end, and the
+copied row counts are verified per shard.
+
+With ``--incremental`` the existing output DB is the starting point and only
+decisions whose ``embed_state`` text hash differs from the output (new or
+changed) are replaced; decisions no longer present in any shard are removed.
+If the output's ``sparse_terms`` table was dropped after its postings were
+built, it is reloaded in full from the shards rather than only for the
+changed decisions.
+
 Usage:
     python3 -m search_stack.merge_shards \
         --shards output/vectors_shard_0.db output/vectors_shard_1.db ... \
         --output output/vectors.db \
-        --enable-sparse
+        --enable-sparse [--incremental]
 """
 
 from __future__ import annotations
@@ -12,125 +25,297 @@ from __future__ import annotations
 import argparse
 import logging
 import os
+import shutil
 import sqlite3
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+DEFERRED_INDEXES = {
+    "idx_sparse_token": ("sparse_terms", "token_id"),
+    "idx_chunk_meta_decision": ("chunk_meta", "decision_id"),
+}
+"""Secondary indexes dropped during the bulk load and rebuilt afterwards."""
+
+
+def _open_shard(path: Path) -> sqlite3.Connection:
+    """Read-only shard connection with sqlite-vec loaded."""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    conn.enable_load_extension(True)
+    import sqlite_vec
+
+    sqlite_vec.load(conn)
+    conn.enable_load_extension(False)
+    return conn
+
+
+def _inspect_shard(path: Path) -> dict:
+    """Tables and row counts of one shard (run in parallel across shards)."""
+    conn = _open_shard(path)
+    try:
+        tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master")}
+        info = {"path": str(path), "tables": tables}
+        for table in ("vec_decisions", "sparse_terms", "chunk_meta", "embed_state"):
+            if table in tables:
+                info[table] = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        return info
+    finally:
+        conn.close()
+
+
+def _merge_one(
+    conn: sqlite3.Connection,
+    info: dict,
+    *,
+    enable_sparse: bool,
+    enable_chunks: bool,
+    refill_sparse: bool = False,
+) -> dict:
+    """Copy one attached shard (schema ``shard``) into the main DB.
+
+    With *refill_sparse* every ``sparse_terms`` row of the shard is copied,
+    not just those of new or changed decisions.
+    """
+    tables = info["tables"]
+    conn.execute("DROP TABLE IF EXISTS temp.merge_ids")
+    conn.execute("CREATE TEMP TABLE merge_ids (decision_id TEXT PRIMARY KEY)")
+    if "embed_state" in tables:
+        # New or changed decisions only; unchanged rows stay as they are.
+        conn.execute(
+            "INSERT INTO temp.merge_ids SELECT s.decision_id FROM shard.embed_state s "
+            "LEFT JOIN main.embed_state m ON m.decision_id = s.decision_id "
+            "WHERE m.text_hash IS NULL OR m.text_hash != s.text_hash"
+        )
+    else:
+        conn.execute(
+            "INSERT OR IGNORE INTO temp.merge_ids SELECT decision_id FROM shard.vec_decisions"
+        )
+    pending = conn.execute("SELECT COUNT(*) FROM temp.merge_ids").fetchone()[0]
+    stats = {"shard": Path(info["path"]).name, "decisions": pending, "dense": 0,
+             "sparse": 0, "chunks": 0}
+    with_sparse = enable_sparse and "sparse_terms" in tables
+    sparse_sql = (
+        "INSERT OR IGNORE INTO main.sparse_terms (decision_id, token_id, weight) "
+        "SELECT decision_id, token_id, weight FROM shard.sparse_terms"
+    )
+    if not pending:
+        if refill_sparse and with_sparse:
+            stats["sparse"] = conn.execute(sparse_sql).rowcount
+        return stats
+
+    with_chunks = enable_chunks and "chunk_meta" in tables and "vec_chunks" in tables
+    has_main_chunks = conn.execute(
+        "SELECT 1 FROM main.sqlite_master WHERE name = 'chunk_meta'"
+    ).fetchone() is not None
+    has_main_sparse = conn.execute(
+        "SELECT 1 FROM main.sqlite_master WHERE name = 'sparse_terms'"
+    ).fetchone() is not None
+
+    # Replace: remove the previous version of every merged decision
+    ids = "SELECT decision_id FROM temp.merge_ids"
+    conn.execute(f"DELETE FROM main.vec_decisions WHERE decision_id IN ({ids})")
+    if has_main_sparse:
+        conn.execute(f"DELETE FROM main.sparse_terms WHERE decision_id IN ({ids})")
+    if has_main_chunks:
+        conn.execute(
+            "DELETE FROM main.vec_chunks WHERE chunk_id IN "
+            f"(SELECT chunk_id FROM main.chunk_meta WHERE decision_id IN ({ids}))"
+        )
+        conn.execute(f"DELETE FROM main.chunk_meta WHERE decision_id IN ({ids})")
+
+    # Load in dependency order; embed_state last marks the decision complete
+    stats["dense"] = conn.execute(
+        "INSERT INTO main.vec_decisions (decision_id, embedding, language) "
+        "SELECT decision_id, embedding, language FROM shard.vec_decisions "
+        f"WHERE decision_id IN ({ids})"
+    ).rowcount
+    if with_sparse:
+        stats["sparse"] = conn.execute(
+            sparse_sql if refill_sparse else f"{sparse_sql} WHERE decision_id IN ({ids})"
+        ).rowcount
+    if with_chunks:
+        conn.execute(
+            "INSERT INTO main.chunk_meta (chunk_id, decision_id, chunk_index) "
+            "SELECT chunk_id, decision_id, chunk_index FROM shard.chunk_meta "
+            f"WHERE decision_id IN ({ids})"
+        )
+        stats["chunks"] = conn.execute(
+            "INSERT INTO main.vec_chunks (chunk_id, embedding, language) "
+            "SELECT c.chunk_id, c.embedding, c.language FROM shard.vec_chunks c "
+            "JOIN shard.chunk_meta m ON m.chunk_id = c.chunk_id "
+            f"WHERE m.decision_id IN ({ids})"
+        ).rowcount
+    if "embed_state" in tables:
+        conn.execute(
+            "INSERT OR REPLACE INTO main.embed_state (decision_id, text_hash) "
+            f"SELECT decision_id, text_hash FROM shard.embed_state WHERE decision_id IN ({ids})"
+        )
+
+    # Verify: every merged decision that the shard has vectors for arrived
+    expected = conn.execute(
+        f"SELECT COUNT(*) FROM shard.vec_decisions WHERE decision_id IN ({ids})"
+    ).fetchone()[0]
+    landed = conn.execute(
+        f"SELECT COUNT(*) FROM main.vec_decisions WHERE decision_id IN ({ids})"
+    ).fetchone()[0]
+    if landed != expected:
+        raise RuntimeError(
+            f"Row count mismatch for {info['path']}: expected {expected}, got {landed}"
+        )
+    return stats
+
 
 def merge_shards(
     shard_paths: list[Path],
     output_path: Path,
     *,
     enable_sparse: bool = False,
+    incremental: bool = False,
+    workers: int = 4,
 ) -> dict:
     """Merge multiple shard DBs into one combined vectors.db.
 
-    Reads from each shard and inserts into a fresh combined DB.
-    Uses atomic rename for safety.
+    Shards are inspected in parallel (tables, row counts), then attached
+    and bulk-copied one at a time, since SQLite has a single writer. The
+    output is written to a temp file and atomically renamed.
+
+    Args:
+        shard_paths: Shard DBs built with ``build_vectors --shard-index``.
+        output_path: Merged DB path.
+        enable_sparse: Merge sparse_terms too.
+        incremental: Start from the existing output DB and only replace new
+            or changed decisions; drop decisions absent from every shard.
+            A dropped ``sparse_terms`` table is reloaded from all shards.
+        workers: Threads used to inspect shards.
+
+    Returns:
+        Stats dict with totals, per-shard stats and throughput.
     """
-    from search_stack.build_vectors import (
-        create_vec_db,
-    )
+    from search_stack.build_vectors import _delete_decisions, create_vec_db
 
     t0 = time.time()
-    output_path = output_path.resolve()  # resolve symlinks for atomic rename
+    output_path = Path(output_path).resolve()  # resolve symlinks for atomic rename
     tmp_path = output_path.parent / f".{output_path.name}.tmp"
+    if tmp_path.exists():
+        tmp_path.unlink()
 
-    # Create target DB
-    conn = create_vec_db(str(tmp_path), enable_sparse=enable_sparse)
-
-    total_dense = 0
-    total_sparse = 0
-
-    for shard_path in shard_paths:
-        if not shard_path.exists():
-            logger.warning("Shard %s does not exist, skipping", shard_path)
-            continue
-
-        logger.info("Merging shard: %s", shard_path)
-
-        shard = sqlite3.connect(str(shard_path))
-        try:
-            shard.enable_load_extension(True)
-            import sqlite_vec
-            sqlite_vec.load(shard)
-        except Exception as exc:
-            logger.error("Failed to load sqlite-vec for shard %s: %s", shard_path, exc)
-            shard.close()
-            continue
+    existing = [Path(p) for p in shard_paths if Path(p).exists()]
+    for p in shard_paths:
+        if not Path(p).exists():
+            logger.warning("Shard %s does not exist, skipping", p)
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(existing) or 1))) as pool:
+        infos = list(pool.map(_inspect_shard, existing))
+    enable_chunks = any("chunk_meta" in info["tables"] for info in infos)
 
-        # Copy dense vectors
-        cursor = shard.execute(
-            "SELECT decision_id, embedding, language FROM vec_decisions"
-        )
-        batch = []
-        for row in cursor:
-            batch.append(row)
-            if len(batch) >= 1000:
-                conn.executemany(
-                    "INSERT OR IGNORE INTO vec_decisions (decision_id, embedding, language) "
-                    "VALUES (?, ?, ?)",
-                    batch,
+    refill_sparse = False
+    if incremental and output_path.exists():
+        logger.info("Incremental merge into %s", output_path)
+        shutil.copy2(output_path, tmp_path)
+        if enable_sparse:
+            probe = sqlite3.connect(str(tmp_path))
+            try:
+                refill_sparse = probe.execute(
+                    "SELECT 1 FROM sqlite_master WHERE name = 'sparse_terms'"
+                ).fetchone() is None
+            finally:
+                probe.close()
+            if refill_sparse:
+                logger.info(
+                    "%s has no sparse_terms (dropped after building postings); "
+                    "reloading them from all shards", output_path,
                 )
-                total_dense += len(batch)
-                batch.clear()
-        if batch:
-            conn.executemany(
-                "INSERT OR IGNORE INTO vec_decisions (decision_id, embedding, language) "
-                "VALUES (?, ?, ?)",
-                batch,
-            )
-            total_dense += len(batch)
+    conn = create_vec_db(str(tmp_path), enable_sparse=enable_sparse, enable_chunks=enable_chunks)
+
+    try:
+        for name in DEFERRED_INDEXES:
+            conn.execute(f"DROP INDEX IF EXISTS {name}")
         conn.commit()
 
-        # Copy sparse terms
-        if enable_sparse:
+        per_shard: list[dict] = []
+        for info in infos:
+            logger.info("Merging shard: %s", info["path"])
+            conn.execute("ATTACH DATABASE ? AS shard", (info["path"],))
             try:
-                cursor = shard.execute(
-                    "SELECT decision_id, token_id, weight FROM sparse_terms"
+                shard_t0 = time.time()
+                stats = _merge_one(
+                    conn, info, enable_sparse=enable_sparse, enable_chunks=enable_chunks,
+                    refill_sparse=refill_sparse,
                 )
-                batch = []
-                for row in cursor:
-                    batch.append(row)
-                    if len(batch) >= 10000:
-                        conn.executemany(
-                            "INSERT OR IGNORE INTO sparse_terms (decision_id, token_id, weight) "
-                            "VALUES (?, ?, ?)",
-                            batch,
-                        )
-                        total_sparse += len(batch)
-                        batch.clear()
-                if batch:
-                    conn.executemany(
-                        "INSERT OR IGNORE INTO sparse_terms (decision_id, token_id, weight) "
-                        "VALUES (?, ?, ?)",
-                        batch,
-                    )
-                    total_sparse += len(batch)
                 conn.commit()
-            except sqlite3.OperationalError:
-                logger.warning("No sparse_terms in shard %s", shard_path)
+                stats["seconds"] = round(time.time() - shard_t0, 2)
+                per_shard.append(stats)
+                logger.info(
+                    "Merged shard %s: %d decisions, dense=%d, sparse=%d, chunks=%d",
+                    stats["shard"], stats["decisions"], stats["dense"],
+                    stats["sparse"], stats["chunks"],
+                )
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.execute("DETACH DATABASE shard")
 
-        shard.close()
-        logger.info(
-            "Merged shard %s: total dense=%d, sparse=%d",
-            shard_path.name, total_dense, total_sparse,
-        )
+        removed = 0
+        if incremental and infos and all("embed_state" in i["tables"] for i in infos):
+            conn.execute("DROP TABLE IF EXISTS temp.live_ids")
+            conn.execute("CREATE TEMP TABLE live_ids (decision_id TEXT PRIMARY KEY)")
+            for info in infos:
+                conn.execute("ATTACH DATABASE ? AS shard", (info["path"],))
+                try:
+                    conn.execute(
+                        "INSERT OR IGNORE INTO temp.live_ids SELECT decision_id FROM shard.embed_state"
+                    )
+                    conn.commit()
+                finally:
+                    conn.execute("DETACH DATABASE shard")
+            stale = [r[0] for r in conn.execute(
+                "SELECT decision_id FROM main.embed_state "
+                "WHERE decision_id NOT IN (SELECT decision_id FROM temp.live_ids)"
+            )]
+            _delete_decisions(conn, stale)
+            conn.commit()
+            removed = len(stale)
+
+        index_t0 = time.time()
+        for name, (table, column) in DEFERRED_INDEXES.items():
+            if conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+            ).fetchone():
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({column})")
+        conn.commit()
+        index_seconds = time.time() - index_t0
+        conn.close()
+    except Exception:
+        conn.close()
+        if tmp_path.exists():
+            tmp_path.unlink()
+        raise
 
-    conn.close()
     os.replace(str(tmp_path), str(output_path))
 
     elapsed = time.time() - t0
+    total_dense = sum(s["dense"] for s in per_shard)
+    total_sparse = sum(s["sparse"] for s in per_shard)
+    total_chunks = sum(s["chunks"] for s in per_shard)
+    rows = total_dense + total_sparse + total_chunks
     stats = {
         "output": str(output_path),
-        "shards_merged": len(shard_paths),
+        "shards_merged": len(per_shard),
         "total_dense": total_dense,
         "total_sparse": total_sparse,
+        "total_chunks": total_chunks,
+        "removed": removed,
+        "index_seconds": round(index_seconds, 2),
         "elapsed_seconds": round(elapsed, 2),
+        "rows_per_second": round(rows / elapsed) if elapsed > 0 else rows,
+        "shards": per_shard,
     }
-    logger.info("Merge complete: %s", stats)
+    logger.info(
+        "Merge complete: %d dense, %d sparse, %d chunks in %.1fs (%d rows/s)",
+        total_dense, total_sparse, total_chunks, elapsed, stats["rows_per_second"],
+    )
     return stats
 
 
@@ -156,6 +341,17 @@ def main() -> None:
         action="store_true",
         help="Merge sparse_terms table too",
     )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Update the existing output DB with new/changed decisions only",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Threads used to inspect shards (default: 4)",
+    )
     parser.add_argument(
         "-v", "--verbose",
         action="store_true",
@@ -168,7 +364,13 @@ def main() -> None:
     )
 
     import json
-    stats = merge_shards(args.shards, args.output, enable_sparse=args.enable_sparse)
+    stats = merge_shards(
+        args.shards,
+        args.output,
+        enable_sparse=args.enable_sparse,
+        incremental=args.incremental,
+        workers=args.workers,
+    )
     print(json.dumps(stats, indent=2))
 
 
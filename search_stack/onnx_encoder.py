@@ -0,0 +1,384 @@
+"""ONNX Runtime int8 query encoder and cross-encoder for CPU serving.
+
+Exports BGE-M3 (dense CLS embedding + sparse lexical head) and the reranking
+cross-encoder to ONNX, applies dynamic int8 weight quantization, and serves
+them with ONNX Runtime. Serving needs only ``onnxruntime``, ``tokenizers``
+and NumPy — no PyTorch — which cuts MCP server cold start and resident
+memory. Exporting needs ``torch`` and ``transformers``.
+
+The runtime classes mirror the APIs mcp_server already calls:
+
+- :class:`OnnxQueryEncoder` — ``encode(...)`` like ``BGEM3FlagModel`` (dict
+  with ``dense_vecs`` / ``lexical_weights``) and a ``tokenizer`` callable
+- :class:`OnnxCrossEncoder` — ``predict(pairs)`` like sentence-transformers'
+  ``CrossEncoder`` (sigmoid scores for single-logit models)
+
+Usage::
+
+    python -m search_stack.onnx_encoder --out-dir ~/.swiss-caselaw/onnx
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Constants
+# ---------------------------------------------------------------------------
+
+QUERY_ENCODER_DIRNAME = "bge-m3-int8"
+"""Subdirectory of the ONNX model dir holding the query encoder."""
+
+CROSS_ENCODER_DIRNAME = "cross-encoder-int8"
+"""Subdirectory of the ONNX model dir holding the cross-encoder."""
+
+DEFAULT_QUERY_MODEL = "BAAI/bge-m3"
+DEFAULT_CROSS_MODEL = "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1"
+
+ONNX_OPSET = 17
+
+
+# ---------------------------------------------------------------------------
+# Output post-processing (shared by export checks and runtime)
+# ---------------------------------------------------------------------------
+
+
+def lexical_weights(
+    input_ids: np.ndarray,
+    token_weights: np.ndarray,
+    skip_ids: set[int],
+) -> list[dict[str, float]]:
+    """BGE-M3 sparse output: max ReLU weight per distinct token id.
+
+    Matches FlagEmbedding's ``_process_token_weights``: special tokens are
+    skipped, only positive weights are kept, keys are token ids as strings.
+    """
+    out: list[dict[str, float]] = []
+    for ids, weights in zip(input_ids, token_weights):
+        result: dict[str, float] = {}
+        for token_id, weight in zip(ids.tolist(), weights.tolist()):
+            if token_id in skip_ids or weight <= 0:
+                continue
+            key = str(token_id)
+            if weight > result.get(key, 0.0):
+                result[key] = float(weight)
+        out.append(result)
+    return out
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+# ---------------------------------------------------------------------------
+# Runtime
+# ---------------------------------------------------------------------------
+
+
+def _load_session(model_path: Path, threads: int | None):
+    import onnxruntime as ort  # type: ignore[import-untyped]
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if threads:
+        options.intra_op_num_threads = threads
+    return ort.InferenceSession(
+        str(model_path), sess_options=options, providers=["CPUExecutionProvider"],
+    )
+
+
+def _load_tokenizer(model_dir: Path, max_length: int, pad_id: int):
+    from tokenizers import Tokenizer  # type: ignore[import-untyped]
+
+    tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+    tokenizer.enable_truncation(max_length=max_length)
+    tokenizer.enable_padding(pad_id=pad_id)
+    return tokenizer
+
+
+class _TokenizerAdapter:
+    """``tokenizer(text, return_tensors=...)["input_ids"][0]`` over ``tokenizers``."""
+
+    def __init__(self, tokenizer):
+        self._tokenizer = tokenizer
+
+    def __call__(self, text: str, **_kwargs) -> dict:
+        return {"input_ids": [self._tokenizer.encode(text).ids]}
+
+
+class OnnxQueryEncoder:
+    """BGE-M3 dense + sparse query encoder on ONNX Runtime."""
+
+    def __init__(self, model_dir: Path, *, threads: int | None = None):
+        model_dir = Path(model_dir)
+        self.meta = json.loads((model_dir / "meta.json").read_text(encoding="utf-8"))
+        self.max_length = int(self.meta.get("max_length", 256))
+        special = self.meta["special_ids"]
+        self.skip_ids = {int(v) for v in special.values()}
+        self._tokenizer = _load_tokenizer(model_dir, self.max_length, int(special["pad"]))
+        self.tokenizer = _TokenizerAdapter(self._tokenizer)
+        self.session = _load_session(model_dir / "model.onnx", threads)
+
+    def _run(self, texts: list[str], max_length: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        self._tokenizer.enable_truncation(max_length=min(max_length, self.max_length))
+        encoded = self._tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encoded], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encoded], dtype=np.int64)
+        dense, token_weights = self.session.run(
+            ["dense", "token_weights"],
+            {"input_ids": input_ids, "attention_mask": attention_mask},
+        )
+        return input_ids, dense, token_weights
+
+    def encode(
+        self,
+        sentences: list[str] | str,
+        batch_size: int = 32,
+        max_length: int = 256,
+        return_dense: bool = True,
+        return_sparse: bool = False,
+        return_colbert_vecs: bool = False,
+    ) -> dict:
+        """Encode like ``BGEM3FlagModel.encode`` (colbert vectors unsupported)."""
+        if return_colbert_vecs:
+            raise ValueError("ColBERT vectors are not exported")
+        if isinstance(sentences, str):
+            sentences = [sentences]
+        dense_parts: list[np.ndarray] = []
+        sparse: list[dict[str, float]] = []
+        for start in range(0, len(sentences), max(1, batch_size)):
+            ids, dense, weights = self._run(sentences[start:start + batch_size], max_length)
+            dense_parts.append(dense.astype(np.float32))
+            if return_sparse:
+                sparse.extend(lexical_weights(ids, weights, self.skip_ids))
+        output: dict = {}
+        if return_dense:
+            output["dense_vecs"] = (
+                np.concatenate(dense_parts) if dense_parts else np.zeros((0, 0), np.float32)
+            )
+        if return_sparse:
+            output["lexical_weights"] = sparse
+        return output
+
+
+class OnnxCrossEncoder:
+    """Sequence-pair relevance scorer on ONNX Runtime."""
+
+    def __init__(self, model_dir: Path, *, threads: int | None = None):
+        model_dir = Path(model_dir)
+        self.meta = json.loads((model_dir / "meta.json").read_text(encoding="utf-8"))
+        self.max_length = int(self.meta.get("max_length", 512))
+        self._tokenizer = _load_tokenizer(
+            model_dir, self.max_length, int(self.meta["special_ids"]["pad"]),
+        )
+        self.session = _load_session(model_dir / "model.onnx", threads)
+        self._input_names = {i.name for i in self.session.get_inputs()}
+
+    def predict(self, pairs, batch_size: int = 32, **_kwargs) -> np.ndarray:
+        """Relevance score per (query, passage) pair."""
+        pairs = [(str(q), str(d)) for q, d in pairs]
+        scores: list[np.ndarray] = []
+        for start in range(0, len(pairs), max(1, batch_size)):
+            encoded = self._tokenizer.encode_batch(pairs[start:start + batch_size])
+            feeds = {
+                "input_ids": np.array([e.ids for e in encoded], dtype=np.int64),
+                "attention_mask": np.array([e.attention_mask for e in encoded], dtype=np.int64),
+            }
+            if "token_type_ids" in self._input_names:
+                feeds["token_type_ids"] = np.array([e.type_ids for e in encoded], dtype=np.int64)
+            (logits,) = self.session.run(["logits"], feeds)
+            scores.append(_sigmoid(logits[:, 0]) if logits.shape[1] == 1 else logits)
+        return np.concatenate(scores) if scores else np.zeros(0, dtype=np.float32)
+
+
+# ---------------------------------------------------------------------------
+# Export
+# ---------------------------------------------------------------------------
+
+
+def _quantize_into(fp32_path: Path, out_dir: Path) -> None:
+    from onnxruntime.quantization import QuantType, quantize_dynamic  # type: ignore[import-untyped]
+
+    quantize_dynamic(
+        str(fp32_path), str(out_dir / "model.onnx"), weight_type=QuantType.QInt8,
+    )
+
+
+def _special_ids(tokenizer) -> dict[str, int]:
+    ids = {
+        "cls": tokenizer.cls_token_id,
+        "eos": tokenizer.eos_token_id if tokenizer.eos_token_id is not None else tokenizer.sep_token_id,
+        "pad": tokenizer.pad_token_id,
+        "unk": tokenizer.unk_token_id,
+    }
+    return {k: int(v) for k, v in ids.items() if v is not None}
+
+
+def _finish_export(tmp_dir: Path, out_dir: Path, tokenizer, meta: dict) -> None:
+    tokenizer.save_pretrained(str(tmp_dir))
+    (tmp_dir / "meta.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    for stale in tmp_dir.glob("model_fp32*"):
+        stale.unlink()
+    if out_dir.exists():
+        shutil.rmtree(out_dir)
+    shutil.move(str(tmp_dir), str(out_dir))
+
+
+def export_query_encoder(
+    out_dir: Path,
+    *,
+    model_id: str = DEFAULT_QUERY_MODEL,
+    max_length: int = 256,
+    quantize: bool = True,
+) -> Path:
+    """Export BGE-M3 CLS dense + sparse head to ``out_dir/model.onnx``."""
+    import torch  # type: ignore[import-untyped]
+    from huggingface_hub import hf_hub_download
+    from transformers import AutoModel, AutoTokenizer  # type: ignore[import-untyped]
+
+    out_dir = Path(out_dir)
+    tokenizer = AutoTokenizer.from_pretrained(model_id)
+    model = AutoModel.from_pretrained(model_id).eval()
+    sparse_linear = torch.nn.Linear(model.config.hidden_size, 1)
+    sparse_linear.load_state_dict(
+        torch.load(hf_hub_download(model_id, "sparse_linear.pt"), map_location="cpu")
+    )
+
+    class _QueryGraph(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.model = model
+            self.sparse_linear = sparse_linear
+
+        def forward(self, input_ids, attention_mask):
+            hidden = self.model(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+            dense = torch.nn.functional.normalize(hidden[:, 0], dim=-1)
+            token_weights = torch.relu(self.sparse_linear(hidden)).squeeze(-1)
+            return dense, token_weights
+
+    sample = tokenizer(["Tierhalterhaftung Art. 56 OR"], return_tensors="pt")
+    out_dir.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(prefix=".onnx-export-", dir=out_dir.parent))
+    fp32_path = tmp_dir / ("model_fp32.onnx" if quantize else "model.onnx")
+    with torch.no_grad():
+        torch.onnx.export(
+            _QueryGraph().eval(),
+            (sample["input_ids"], sample["attention_mask"]),
+            str(fp32_path),
+            input_names=["input_ids", "attention_mask"],
+            output_names=["dense", "token_weights"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "seq"},
+                "attention_mask": {0: "batch", 1: "seq"},
+                "dense": {0: "batch"},
+                "token_weights": {0: "batch", 1: "seq"},
+            },
+            opset_version=ONNX_OPSET,
+        )
+    if quantize:
+        _quantize_into(fp32_path, tmp_dir)
+    _finish_export(tmp_dir, out_dir, tokenizer, {
+        "kind": "query_encoder",
+        "model_id": model_id,
+        "quantized": quantize,
+        "max_length": max_length,
+        "special_ids": _special_ids(tokenizer),
+    })
+    logger.info("Exported query encoder %s to %s", model_id, out_dir)
+    return out_dir
+
+
+def export_cross_encoder(
+    out_dir: Path,
+    *,
+    model_id: str = DEFAULT_CROSS_MODEL,
+    max_length: int = 512,
+    quantize: bool = True,
+) -> Path:
+    """Export a sequence-classification cross-encoder to ``out_dir/model.onnx``."""
+    import torch  # type: ignore[import-untyped]
+    from transformers import (  # type: ignore[import-untyped]
+        AutoModelForSequenceClassification,
+        AutoTokenizer,
+    )
+
+    out_dir = Path(out_dir)
+    tokenizer = AutoTokenizer.from_pretrained(model_id)
+    model = AutoModelForSequenceClassification.from_pretrained(model_id).eval()
+    sample = tokenizer(
+        [("Mietzins", "Herabsetzung des Mietzinses wegen Mängeln")], return_tensors="pt",
+    )
+    input_names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+
+    out_dir.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(prefix=".onnx-export-", dir=out_dir.parent))
+    fp32_path = tmp_dir / ("model_fp32.onnx" if quantize else "model.onnx")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[n] for n in input_names),
+            str(fp32_path),
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes={
+                **{n: {0: "batch", 1: "seq"} for n in input_names},
+                "logits": {0: "batch"},
+            },
+            opset_version=ONNX_OPSET,
+        )
+    if quantize:
+        _quantize_into(fp32_path, tmp_dir)
+    _finish_export(tmp_dir, out_dir, tokenizer, {
+        "kind": "cross_encoder",
+        "model_id": model_id,
+        "quantized": quantize,
+        "max_length": max_length,
+        "special_ids": _special_ids(tokenizer),
+    })
+    logger.info("Exported cross-encoder %s to %s", model_id, out_dir)
+    return out_dir
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+
+def main() -> None:
+    """Export the ONNX int8 serving graphs."""
+    parser = argparse.ArgumentParser(description="Export ONNX int8 query/cross encoders")
+    parser.add_argument(
+        "--out-dir",
+        type=Path,
+        default=Path.home() / ".swiss-caselaw" / "onnx",
+        help="ONNX model dir (mcp_server: SWISS_CASELAW_ONNX_DIR)",
+    )
+    parser.add_argument("--query-model", default=DEFAULT_QUERY_MODEL)
+    parser.add_argument("--cross-model", default=DEFAULT_CROSS_MODEL)
+    parser.add_argument("--skip-query", action="store_true", help="Do not export the query encoder")
+    parser.add_argument("--skip-cross", action="store_true", help="Do not export the cross-encoder")
+    parser.add_argument("--fp32", action="store_true", help="Skip int8 quantization")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if not args.skip_query:
+        export_query_encoder(
+            args.out_dir / QUERY_ENCODER_DIRNAME, model_id=args.query_model, quantize=not args.fp32,
+        )
+    if not args.skip_cross:
+        export_cross_encoder(
+            args.out_dir / CROSS_ENCODER_DIRNAME, model_id=args.cross_model, quantize=not args.fp32,
+        )
+
+
+if __name__ == "__main__":
+    main()
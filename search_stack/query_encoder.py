@@ -0,0 +1,294 @@
+"""Query-embedding cache and micro-batching encoder for the MCP server.
+
+Agent workloads send the same (or whitespace-variant) queries over and over,
+and each search needs the query's dense embedding for decision and chunk KNN
+plus its token ids for sparse retrieval. This module puts one encoder in
+front of the model:
+
+- :class:`QueryEmbeddingCache` — in-memory LRU plus an optional on-disk
+  SQLite tier, keyed by model namespace and normalized query text
+- :class:`MicroBatchEncoder` — callers from the server's thread pool block on
+  a future while a single worker thread coalesces concurrent misses (and
+  duplicate in-flight queries) into one batched forward pass
+
+Both keep counters that :meth:`MicroBatchEncoder.stats` reports as metrics.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import queue
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Constants
+# ---------------------------------------------------------------------------
+
+DISK_PRUNE_EVERY = 500
+"""Disk-tier inserts between row-cap checks."""
+
+
+# ---------------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class QueryEncoding:
+    """Model outputs for one query: packed float32 dense vector and token ids."""
+
+    dense: bytes | None
+    token_ids: tuple[int, ...] = ()
+
+
+def normalize_query(query: str) -> str:
+    """NFC-normalize and collapse whitespace (case is kept; the model sees it)."""
+    return " ".join(unicodedata.normalize("NFC", query).split())
+
+
+class QueryEmbeddingCache:
+    """LRU of :class:`QueryEncoding` with an optional SQLite second tier."""
+
+    def __init__(
+        self,
+        *,
+        capacity: int = 2048,
+        namespace: str = "",
+        disk_path: Path | None = None,
+        disk_max_rows: int = 200_000,
+    ):
+        self.capacity = max(0, capacity)
+        self.namespace = namespace
+        self.disk_max_rows = disk_max_rows
+        self._memory: OrderedDict[str, QueryEncoding] = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk: sqlite3.Connection | None = None
+        self._disk_inserts = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if disk_path is not None:
+            try:
+                Path(disk_path).parent.mkdir(parents=True, exist_ok=True)
+                self._disk = sqlite3.connect(str(disk_path), check_same_thread=False)
+                self._disk.execute("PRAGMA journal_mode=WAL")
+                self._disk.execute(
+                    "CREATE TABLE IF NOT EXISTS query_embeddings ("
+                    "key TEXT PRIMARY KEY, dense BLOB, token_ids TEXT NOT NULL, "
+                    "last_used REAL NOT NULL)"
+                )
+                self._disk.commit()
+            except sqlite3.Error as e:
+                logger.warning("Query embedding disk cache unavailable (%s): %s", disk_path, e)
+                self._disk = None
+
+    def key(self, query: str) -> str:
+        """Cache key: hash of namespace (model) and normalized query."""
+        raw = f"{self.namespace}\x00{normalize_query(query)}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> QueryEncoding | None:
+        with self._lock:
+            hit = self._memory.get(key)
+            if hit is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return hit
+            if self._disk is not None:
+                try:
+                    row = self._disk.execute(
+                        "SELECT dense, token_ids FROM query_embeddings WHERE key = ?", (key,),
+                    ).fetchone()
+                    if row is not None:
+                        self._disk.execute(
+                            "UPDATE query_embeddings SET last_used = ? WHERE key = ?",
+                            (time.time(), key),
+                        )
+                        self._disk.commit()
+                        enc = QueryEncoding(
+                            dense=row[0],
+                            token_ids=tuple(int(t) for t in row[1].split()),
+                        )
+                        self._remember(key, enc)
+                        self.disk_hits += 1
+                        return enc
+                except sqlite3.Error as e:
+                    logger.debug("Query embedding disk cache read failed: %s", e)
+            self.misses += 1
+            return None
+
+    def put(self, key: str, enc: QueryEncoding) -> None:
+        with self._lock:
+            self._remember(key, enc)
+            if self._disk is None or enc.dense is None:
+                return
+            try:
+                self._disk.execute(
+                    "INSERT OR REPLACE INTO query_embeddings (key, dense, token_ids, last_used) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, enc.dense, " ".join(map(str, enc.token_ids)), time.time()),
+                )
+                self._disk_inserts += 1
+                if self._disk_inserts % DISK_PRUNE_EVERY == 0:
+                    self._disk.execute(
+                        "DELETE FROM query_embeddings WHERE key IN ("
+                        "SELECT key FROM query_embeddings ORDER BY last_used DESC "
+                        "LIMIT -1 OFFSET ?)",
+                        (self.disk_max_rows,),
+                    )
+                self._disk.commit()
+            except sqlite3.Error as e:
+                logger.debug("Query embedding disk cache write failed: %s", e)
+
+    def _remember(self, key: str, enc: QueryEncoding) -> None:
+        if not self.capacity:
+            return
+        self._memory[key] = enc
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.capacity:
+            self._memory.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+
+# ---------------------------------------------------------------------------
+# Micro-batching encoder
+# ---------------------------------------------------------------------------
+
+
+class MicroBatchEncoder:
+    """Coalesce concurrent query encodings into batched model calls.
+
+    Args:
+        encode_batch: Encodes a list of queries in one forward pass and
+            returns one :class:`QueryEncoding` (or None on failure) per query.
+        cache: Cache consulted before and filled after encoding.
+        max_batch: Largest batch handed to ``encode_batch``.
+        max_wait: Seconds the worker waits for more queries after the
+            first one arrives (bounds the latency added to a lone query).
+    """
+
+    def __init__(
+        self,
+        encode_batch: Callable[[list[str]], list[QueryEncoding | None]],
+        cache: QueryEmbeddingCache,
+        *,
+        max_batch: int = 16,
+        max_wait: float = 0.005,
+    ):
+        self.encode_batch = encode_batch
+        self.cache = cache
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait)
+        self._queue: queue.Queue[tuple[str, str]] = queue.Queue()
+        self._inflight: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._worker: threading.Thread | None = None
+        self.batches = 0
+        self.batched_queries = 0
+        self.coalesced = 0
+        self.encode_seconds = 0.0
+        self.encode_seconds_max = 0.0
+
+    def encode(self, query: str, timeout: float | None = 30.0) -> QueryEncoding | None:
+        """Encoding for *query*, from cache or the next batch. None on failure."""
+        key = self.cache.key(query)
+        hit = self.cache.get(key)
+        if hit is not None:
+            return hit
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+            else:
+                future = Future()
+                self._inflight[key] = future
+                self._queue.put((key, normalize_query(query)))
+                self._ensure_worker()
+        try:
+            return future.result(timeout=timeout)
+        except Exception as e:
+            logger.debug("Query encoding failed: %s", e)
+            return None
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(
+                target=self._run, name="query-encoder", daemon=True,
+            )
+            self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(
+                        self._queue.get(timeout=remaining) if remaining > 0
+                        else self._queue.get_nowait()
+                    )
+                except queue.Empty:
+                    break
+            self._encode(batch)
+
+    def _encode(self, batch: list[tuple[str, str]]) -> None:
+        t0 = time.perf_counter()
+        try:
+            results = list(self.encode_batch([q for _, q in batch]))
+            if len(results) != len(batch):
+                raise RuntimeError(
+                    f"encode_batch returned {len(results)} encodings for {len(batch)} queries"
+                )
+            error = None
+        except Exception as e:
+            results, error = [None] * len(batch), e
+        elapsed = time.perf_counter() - t0
+        self.batches += 1
+        self.batched_queries += len(batch)
+        self.encode_seconds += elapsed
+        self.encode_seconds_max = max(self.encode_seconds_max, elapsed)
+
+        for (key, _), enc in zip(batch, results):
+            # Encodings without a dense vector are returned but not cached,
+            # so the next lookup retries the model.
+            if enc is not None and enc.dense is not None:
+                self.cache.put(key, enc)
+            with self._lock:
+                future = self._inflight.pop(key, None)
+            if future is None:
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(enc)
+
+    def stats(self) -> dict:
+        """Cache hit rates and encode latency counters."""
+        cache = self.cache
+        lookups = cache.memory_hits + cache.disk_hits + cache.misses
+        return {
+            "cache_entries": len(cache),
+            "memory_hits": cache.memory_hits,
+            "disk_hits": cache.disk_hits,
+            "misses": cache.misses,
+            "hit_rate": round((cache.memory_hits + cache.disk_hits) / lookups, 4) if lookups else 0.0,
+            "coalesced": self.coalesced,
+            "batches": self.batches,
+            "avg_batch_size": round(self.batched_queries / self.batches, 2) if self.batches else 0.0,
+            "encode_ms_avg": round(1000 * self.encode_seconds / self.batches, 1) if self.batches else 0.0,
+            "encode_ms_max": round(1000 * self.encode_seconds_max, 1),
+        }
@@ -0,0 +1,280 @@
+"""Memory-mapped postings file for BGE-M3 sparse (lexical) retrieval.
+
+The ``sparse_terms`` table stores one row per (decision_id, token_id, weight)
+with string ids, and scoring a query means a GROUP BY over every matching row.
+This module converts that table into a compact, token-sorted postings index:
+
+- documents are numbered by ordinal (``doc_ids.npy`` maps ordinal -> id)
+- each token's postings are ascending uint32 doc ordinals with uint8
+  weights (global linear scale), stored contiguously
+- per-token maximum weights give score upper bounds for MaxScore pruning
+
+:class:`SparsePostings` scores ``sum(weight)`` over the distinct query tokens,
+the same quantity as the SQL ``SUM(weight) ... GROUP BY decision_id`` query.
+
+On-disk layout (one directory, written atomically)::
+
+    meta.json         docs, postings, weight_scale, format version
+    doc_ids.npy       bytes (docs,)
+    tokens.npy        int64 (tokens,) sorted token ids
+    offsets.npy       int64 (tokens + 1)
+    max_weight.npy    float32 (tokens,) dequantized per-token maximum
+    post_docs.npy     uint32 (postings,)
+    post_weights.npy  uint8 (postings,)
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Constants
+# ---------------------------------------------------------------------------
+
+POSTINGS_FORMAT_VERSION = 1
+"""Bumped when the on-disk layout changes; older files are ignored."""
+
+READ_BATCH_SIZE = 1_000_000
+"""Rows fetched from sparse_terms per round trip while building."""
+
+
+# ---------------------------------------------------------------------------
+# Build
+# ---------------------------------------------------------------------------
+
+
+def build_sparse_postings(conn: sqlite3.Connection, out_dir: Path) -> dict:
+    """Build a postings directory from the ``sparse_terms`` table.
+
+    Rows are streamed in token order (``idx_sparse_token``) and each token's
+    postings are written straight into memory-mapped output arrays, so
+    memory stays bounded by the document id map and the largest single
+    posting list rather than the size of the table.
+
+    Args:
+        conn: Connection to a vector DB containing ``sparse_terms``.
+        out_dir: Target directory (replaced atomically).
+
+    Returns:
+        Stats dict with ``docs``, ``postings``, ``tokens``, ``bytes`` and
+        ``elapsed_seconds``.
+    """
+    t0 = time.time()
+    out_dir = Path(out_dir)
+
+    doc_ids = [r[0] for r in conn.execute(
+        "SELECT DISTINCT decision_id FROM sparse_terms ORDER BY decision_id"
+    )]
+    ordinal = {did: i for i, did in enumerate(doc_ids)}
+    total, max_w = conn.execute("SELECT COUNT(*), MAX(weight) FROM sparse_terms").fetchone()
+    max_w = float(max_w or 0.0)
+    scale = max_w / 255.0 if max_w > 0 else 1.0
+
+    out_dir.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(prefix=f".{out_dir.name}.", dir=out_dir.parent))
+    try:
+        post_docs = np.lib.format.open_memmap(
+            tmp_dir / "post_docs.npy", mode="w+", dtype=np.uint32, shape=(total,),
+        )
+        post_weights = np.lib.format.open_memmap(
+            tmp_dir / "post_weights.npy", mode="w+", dtype=np.uint8, shape=(total,),
+        )
+        tokens: list[int] = []
+        offsets: list[int] = [0]
+        token_max: list[float] = []
+        pos = 0
+
+        def _write_token(token_id: int, docs: list[int], weights: list[float]) -> None:
+            nonlocal pos
+            order = np.argsort(np.asarray(docs, dtype=np.uint32), kind="stable")
+            n = len(order)
+            # Round up so per-token maxima stay valid upper bounds after quantization.
+            quantized = np.clip(
+                np.ceil(np.asarray(weights, dtype=np.float32)[order] / scale - 1e-6), 1, 255,
+            ).astype(np.uint8)
+            post_docs[pos:pos + n] = np.asarray(docs, dtype=np.uint32)[order]
+            post_weights[pos:pos + n] = quantized
+            pos += n
+            tokens.append(token_id)
+            offsets.append(pos)
+            token_max.append(float(quantized.max()) * scale)
+
+        current: int | None = None
+        docs: list[int] = []
+        weights: list[float] = []
+        cur = conn.execute(
+            "SELECT token_id, decision_id, weight FROM sparse_terms ORDER BY token_id"
+        )
+        while True:
+            rows = cur.fetchmany(READ_BATCH_SIZE)
+            if not rows:
+                break
+            for token_id, decision_id, weight in rows:
+                if token_id != current:
+                    if docs:
+                        _write_token(current, docs, weights)
+                    current, docs, weights = token_id, [], []
+                docs.append(ordinal[decision_id])
+                weights.append(weight)
+        if docs:
+            _write_token(current, docs, weights)
+        post_docs.flush()
+        post_weights.flush()
+        del post_docs, post_weights
+
+        width = max([1] + [len(d.encode("utf-8")) for d in doc_ids])
+        np.save(tmp_dir / "doc_ids.npy", np.array([d.encode("utf-8") for d in doc_ids], dtype=f"S{width}"))
+        np.save(tmp_dir / "tokens.npy", np.asarray(tokens, dtype=np.int64))
+        np.save(tmp_dir / "offsets.npy", np.asarray(offsets, dtype=np.int64))
+        np.save(tmp_dir / "max_weight.npy", np.asarray(token_max, dtype=np.float32))
+        meta = {
+            "format_version": POSTINGS_FORMAT_VERSION,
+            "docs": len(doc_ids),
+            "postings": pos,
+            "tokens": len(tokens),
+            "weight_scale": scale,
+            "built_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        }
+        (tmp_dir / "meta.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+        if out_dir.exists():
+            old = out_dir.with_name(f".{out_dir.name}.old")
+            shutil.rmtree(old, ignore_errors=True)
+            os.replace(out_dir, old)
+            os.replace(tmp_dir, out_dir)
+            shutil.rmtree(old, ignore_errors=True)
+        else:
+            os.replace(tmp_dir, out_dir)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    size = sum(p.stat().st_size for p in out_dir.iterdir())
+    elapsed = time.time() - t0
+    logger.info(
+        "Built sparse postings %s: %d docs, %d postings, %.1f MB in %.1fs",
+        out_dir, len(doc_ids), pos, size / 1e6, elapsed,
+    )
+    return {
+        "postings_dir": str(out_dir),
+        "docs": len(doc_ids),
+        "postings": pos,
+        "tokens": len(tokens),
+        "bytes": size,
+        "elapsed_seconds": round(elapsed, 2),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Search
+# ---------------------------------------------------------------------------
+
+
+class SparsePostings:
+    """Memory-mapped postings with a MaxScore top-k scorer."""
+
+    def __init__(self, postings_dir: Path):
+        postings_dir = Path(postings_dir)
+        meta = json.loads((postings_dir / "meta.json").read_text(encoding="utf-8"))
+        if meta.get("format_version") != POSTINGS_FORMAT_VERSION:
+            raise ValueError(f"Unsupported postings format: {meta.get('format_version')}")
+        self.postings_dir = postings_dir
+        self.meta = meta
+        self.scale = float(meta["weight_scale"])
+        self.doc_ids = np.load(postings_dir / "doc_ids.npy", mmap_mode="r")
+        self.tokens = np.load(postings_dir / "tokens.npy")
+        self.offsets = np.load(postings_dir / "offsets.npy")
+        self.max_weight = np.load(postings_dir / "max_weight.npy")
+        self.post_docs = np.load(postings_dir / "post_docs.npy", mmap_mode="r")
+        self.post_weights = np.load(postings_dir / "post_weights.npy", mmap_mode="r")
+
+    def __len__(self) -> int:
+        return int(self.meta["docs"])
+
+    def _slots(self, token_ids: Iterable[int]) -> list[int]:
+        wanted = np.unique(np.asarray(list(token_ids), dtype=np.int64))
+        if not len(wanted) or not len(self.tokens):
+            return []
+        pos = np.searchsorted(self.tokens, wanted)
+        valid = pos < len(self.tokens)
+        pos, wanted = pos[valid], wanted[valid]
+        return pos[self.tokens[pos] == wanted].tolist()
+
+    def search(self, token_ids: Iterable[int], k: int) -> list[tuple[str, float]]:
+        """Top-*k* documents by summed weight over the distinct query tokens.
+
+        Lists are processed in decreasing max-weight order, accumulating
+        scores for every posting into a sparse accumulator over the
+        documents seen so far. Once the k-th best score exceeds the
+        combined upper bound of the remaining lists, no unseen document can
+        enter the top k, so the remaining lists are only probed (binary
+        search) for the current candidates whose bound still reaches it.
+        """
+        slots = self._slots(token_ids)
+        if k <= 0 or not slots:
+            return []
+        slots.sort(key=lambda s: -float(self.max_weight[s]))
+        bounds = np.array([float(self.max_weight[s]) for s in slots], dtype=np.float64)
+        remaining = np.append(np.cumsum(bounds[::-1])[::-1], 0.0)
+
+        # Scores live only for documents seen so far: a sorted array of doc
+        # ordinals merged with each list, so a query never touches the corpus.
+        touched = np.empty(0, dtype=np.int64)
+        acc = np.empty(0, dtype=np.float32)
+        candidates: np.ndarray | None = None
+        cand_scores: np.ndarray | None = None
+        for i, slot in enumerate(slots):
+            start, end = int(self.offsets[slot]), int(self.offsets[slot + 1])
+            docs = self.post_docs[start:end]
+            if candidates is None:
+                # Doc ordinals are sorted and unique within a list.
+                weights = self.post_weights[start:end].astype(np.float32) * self.scale
+                merged = np.union1d(touched, docs)
+                merged_acc = np.zeros(len(merged), dtype=np.float32)
+                merged_acc[np.searchsorted(merged, touched)] = acc
+                merged_acc[np.searchsorted(merged, docs)] += weights
+                touched, acc = merged, merged_acc
+                rest = remaining[i + 1]
+                if rest == 0.0:
+                    break
+                if len(touched) <= k:
+                    continue
+                theta = np.partition(acc, len(acc) - k)[len(acc) - k]
+                if rest < theta:
+                    keep = acc + rest >= theta
+                    candidates = touched[keep]
+                    cand_scores = acc[keep]
+            else:
+                pos = np.searchsorted(docs, candidates)
+                pos_clipped = np.minimum(pos, max(0, len(docs) - 1))
+                hit = (pos < len(docs)) & (docs[pos_clipped] == candidates) if len(docs) else (
+                    np.zeros(len(candidates), dtype=bool)
+                )
+                cand_scores[hit] += (
+                    self.post_weights[start:end][pos[hit]].astype(np.float32) * self.scale
+                )
+
+        if candidates is None:
+            nonzero = acc != 0
+            candidates = touched[nonzero]
+            cand_scores = acc[nonzero]
+        if not len(candidates):
+            return []
+        top = min(k, len(candidates))
+        best = np.argpartition(-cand_scores, top - 1)[:top]
+        best = best[np.argsort(-cand_scores[best], kind="stable")]
+        return [
+            (self.doc_ids[candidates[i]].decode("utf-8"), float(cand_scores[i]))
+            for i in best
+        ]
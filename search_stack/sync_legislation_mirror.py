@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+Mirror LexFind legislation metadata and change feeds into a local SQLite DB.
+
+The MCP server's legislation tools read this mirror before calling LexFind
+live (see _get_legislation / _browse_legislation_changes in mcp_server.py),
+so only entries older than the configured max age reach the upstream API.
+
+Each run is incremental:
+
+1. fetch the recent-changes feed of every selected entity and language and
+   store it as-is
+2. queue texts of law that appear in a feed with a change_date newer than
+   the entity's cursor (or are not mirrored yet), texts whose mirrored copy
+   is older than --max-age-days, and optional seed IDs (--seed-from-cache
+   reads the IDs the server already looked up from lexfind_cache.db); the
+   queue is a table committed together with the advanced cursor
+3. fetch each queued text once per language, upsert it and dequeue it;
+   texts cut off by --max-texts or whose fetch failed stay queued for the
+   next run (a text is dropped after MAX_FETCH_ATTEMPTS failed fetches)
+
+Responses can be recorded to, and replayed from, a JSON fixture
+(``--record`` / ``--replay``) for offline tests and latency benchmarks.
+
+Output: output/legislation_mirror.db
+
+Schema:
+    texts_of_law     — raw texts-of-law/{id}/with-version-groups JSON
+                       per (lexfind_id, language)
+    recent_changes   — raw entities/{id}/recent-changes JSON per
+                       (entity, language)
+    sync_state       — per-feed cursors (latest change_date seen)
+    sync_pending     — texts queued for fetching, kept across runs
+
+Usage:
+    python -m search_stack.sync_legislation_mirror
+    python -m search_stack.sync_legislation_mirror --entities ZH,BE --languages de,fr
+    python -m search_stack.sync_legislation_mirror --replay benchmarks/lexfind_replay.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Callable, Iterable
+
+log = logging.getLogger("sync_legislation_mirror")
+
+OUTPUT_DB = Path(os.environ.get("LEGISLATION_MIRROR_DB", "output/legislation_mirror.db"))
+LEXFIND_BASE_URL = os.environ.get("LEXFIND_BASE_URL", "https://www.lexfind.ch/api/fe").rstrip("/")
+LANGUAGES = ("de", "fr", "it")
+MAX_FETCH_ATTEMPTS = 5
+
+# Same mapping as mcp_server.LEXFIND_ENTITY_IDS (kept local so the sync job
+# does not import the server).
+ENTITY_IDS: dict[str, int] = {
+    "CH": 27, "AG": 1, "AI": 2, "AR": 3, "BE": 4, "BL": 5, "BS": 6,
+    "FR": 7, "GE": 8, "GL": 9, "GR": 10, "JU": 11, "LU": 12, "NE": 13,
+    "NW": 14, "OW": 15, "SG": 16, "SH": 17, "SO": 18, "SZ": 19, "TG": 20,
+    "TI": 21, "UR": 22, "VD": 23, "VS": 24, "ZG": 25, "ZH": 26, "INTLEX": 28,
+}
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS texts_of_law (
+    lexfind_id INTEGER NOT NULL,
+    language TEXT NOT NULL,
+    entity TEXT NOT NULL,
+    systematic_number TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (lexfind_id, language)
+);
+
+CREATE INDEX IF NOT EXISTS idx_texts_of_law_sr
+    ON texts_of_law(entity, systematic_number, language);
+CREATE INDEX IF NOT EXISTS idx_texts_of_law_fetched
+    ON texts_of_law(fetched_at);
+
+CREATE TABLE IF NOT EXISTS recent_changes (
+    entity TEXT NOT NULL,
+    language TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (entity, language)
+);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS sync_pending (
+    lexfind_id INTEGER NOT NULL,
+    language TEXT NOT NULL,
+    reason TEXT NOT NULL,
+    queued_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (lexfind_id, language)
+);
+"""
+
+Transport = Callable[[str, str, str], "dict | list | None"]
+"""(method, path, language) -> parsed JSON or None; path is relative to /{language}/."""
+
+
+# ---------------------------------------------------------------------------
+# Transports
+# ---------------------------------------------------------------------------
+
+
+class HttpTransport:
+    """Keep-alive HTTP client for the LexFind API."""
+
+    def __init__(self, base_url: str = LEXFIND_BASE_URL, timeout: float = 30.0):
+        import requests
+
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers["Accept"] = "application/json"
+
+    def __call__(self, method: str, path: str, language: str) -> dict | list | None:
+        url = f"{self.base_url}/{language}/{path}"
+        try:
+            resp = self.session.request(method, url, timeout=self.timeout)
+            if resp.status_code >= 400:
+                log.warning("LexFind %s: %s", resp.status_code, url)
+                return None
+            return resp.json()
+        except Exception as e:
+            log.warning("LexFind error for %s: %s", url, e)
+            return None
+
+
+def replay_key(method: str, path: str, language: str) -> str:
+    return f"{method.upper()} {language}/{path}"
+
+
+class ReplayTransport:
+    """Serve responses from a recorded fixture ({replay_key: response})."""
+
+    def __init__(self, path: Path):
+        self.responses: dict = json.loads(Path(path).read_text(encoding="utf-8"))
+        self.calls: list[str] = []
+
+    def __call__(self, method: str, path: str, language: str) -> dict | list | None:
+        key = replay_key(method, path, language)
+        self.calls.append(key)
+        return self.responses.get(key)
+
+
+class RecordingTransport:
+    """Wrap a transport and write every successful response to a fixture."""
+
+    def __init__(self, inner: Transport, path: Path):
+        self.inner = inner
+        self.path = Path(path)
+        self.responses: dict = {}
+
+    def __call__(self, method: str, path: str, language: str) -> dict | list | None:
+        result = self.inner(method, path, language)
+        if result is not None:
+            self.responses[replay_key(method, path, language)] = result
+        return result
+
+    def save(self) -> None:
+        self.path.write_text(
+            json.dumps(self.responses, ensure_ascii=False, indent=1, sort_keys=True),
+            encoding="utf-8",
+        )
+
+
+# ---------------------------------------------------------------------------
+# Sync
+# ---------------------------------------------------------------------------
+
+
+def open_mirror(db_path: Path) -> sqlite3.Connection:
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(db_path), timeout=10.0)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.executescript(SCHEMA_SQL)
+    return conn
+
+
+def _upsert_text(conn: sqlite3.Connection, data: dict, language: str, now: float) -> None:
+    conn.execute(
+        "INSERT OR REPLACE INTO texts_of_law "
+        "(lexfind_id, language, entity, systematic_number, payload, fetched_at) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (
+            data["id"],
+            language,
+            ((data.get("entity") or {}).get("abbreviation") or "").upper(),
+            (data.get("systematic_number") or "").strip(),
+            json.dumps(data, ensure_ascii=False),
+            now,
+        ),
+    )
+
+
+def seed_ids_from_cache(cache_db: Path) -> set[tuple[int, str]]:
+    """(lexfind_id, language) pairs the server has looked up (lexfind_cache.db)."""
+    if not cache_db.exists():
+        return set()
+    seeds: set[tuple[int, str]] = set()
+    conn = sqlite3.connect(f"file:{cache_db}?mode=ro", uri=True)
+    try:
+        for key, value in conn.execute(
+            "SELECT key, value FROM cache WHERE key LIKE 'sysnum:%' OR key LIKE 'law:%'"
+        ):
+            parts = key.split(":")
+            language = parts[1] if len(parts) > 2 else ""
+            raw = json.loads(value) if key.startswith("sysnum:") else parts[2]
+            try:
+                seeds.add((int(raw), language))
+            except (TypeError, ValueError):
+                continue
+    finally:
+        conn.close()
+    return {(lid, lang) for lid, lang in seeds if lang in LANGUAGES}
+
+
+def sync_mirror(
+    conn: sqlite3.Connection,
+    transport: Transport,
+    *,
+    entities: Iterable[str],
+    languages: Iterable[str] = ("de",),
+    max_age_seconds: float = 7 * 86400,
+    seed_ids: Iterable[tuple[int, str]] = (),
+    max_texts: int | None = None,
+) -> dict:
+    """Run one incremental sync; returns counters."""
+    now = time.time()
+    languages = list(languages)
+    stats = {
+        "feeds": 0, "feeds_failed": 0, "texts_fetched": 0, "texts_failed": 0,
+        "texts_dropped": 0, "queued": 0,
+    }
+
+    def enqueue(lexfind_id: int, language: str, reason: str) -> None:
+        conn.execute(
+            "INSERT OR IGNORE INTO sync_pending (lexfind_id, language, reason, queued_at) "
+            "VALUES (?, ?, ?, ?)",
+            (lexfind_id, language, reason, now),
+        )
+
+    mirrored = {(lid, lang) for lid, lang in conn.execute("SELECT lexfind_id, language FROM texts_of_law")}
+
+    for entity in entities:
+        entity = entity.upper()
+        entity_id = ENTITY_IDS.get(entity)
+        if entity_id is None:
+            log.warning("Unknown entity %s, skipping", entity)
+            continue
+        for language in languages:
+            feed = transport("GET", f"entities/{entity_id}/recent-changes", language)
+            if not isinstance(feed, dict):
+                stats["feeds_failed"] += 1
+                continue
+            stats["feeds"] += 1
+            conn.execute(
+                "INSERT OR REPLACE INTO recent_changes (entity, language, payload, fetched_at) "
+                "VALUES (?, ?, ?, ?)",
+                (entity, language, json.dumps(feed, ensure_ascii=False), now),
+            )
+            cursor_key = f"changes:{entity}:{language}"
+            row = conn.execute("SELECT value FROM sync_state WHERE key = ?", (cursor_key,)).fetchone()
+            cursor = row[0] if row else ""
+            newest = cursor
+            for change in feed.get("recent_changes", []):
+                lexfind_id = (change.get("text_of_law") or {}).get("id")
+                change_date = change.get("change_date") or ""
+                if lexfind_id is None:
+                    continue
+                newest = max(newest, change_date)
+                if change_date > cursor or (lexfind_id, language) not in mirrored:
+                    enqueue(lexfind_id, language, "changed")
+            # Safe to advance: the texts it covers are queued in the same commit.
+            conn.execute(
+                "INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)", (cursor_key, newest),
+            )
+
+    for lexfind_id, language in conn.execute(
+        "SELECT lexfind_id, language FROM texts_of_law WHERE fetched_at < ? ORDER BY fetched_at",
+        (now - max_age_seconds,),
+    ).fetchall():
+        enqueue(lexfind_id, language, "stale")
+    for lexfind_id, language in seed_ids:
+        if (lexfind_id, language) not in mirrored:
+            enqueue(lexfind_id, language, "seed")
+    conn.commit()
+
+    items = conn.execute(
+        "SELECT lexfind_id, language, attempts FROM sync_pending ORDER BY queued_at, rowid"
+    ).fetchall()
+    stats["queued"] = len(items)
+    if max_texts is not None:
+        items = items[:max_texts]
+    for i, (lexfind_id, language, attempts) in enumerate(items, 1):
+        data = transport("GET", f"texts-of-law/{lexfind_id}/with-version-groups", language)
+        if not isinstance(data, dict) or "id" not in data:
+            stats["texts_failed"] += 1
+            if attempts + 1 >= MAX_FETCH_ATTEMPTS:
+                log.warning(
+                    "Giving up on text %s (%s) after %d failed fetches",
+                    lexfind_id, language, attempts + 1,
+                )
+                stats["texts_dropped"] += 1
+                conn.execute(
+                    "DELETE FROM sync_pending WHERE lexfind_id = ? AND language = ?",
+                    (lexfind_id, language),
+                )
+            else:
+                conn.execute(
+                    "UPDATE sync_pending SET attempts = attempts + 1 "
+                    "WHERE lexfind_id = ? AND language = ?",
+                    (lexfind_id, language),
+                )
+            continue
+        _upsert_text(conn, data, language, now)
+        conn.execute(
+            "DELETE FROM sync_pending WHERE lexfind_id = ? AND language = ?",
+            (lexfind_id, language),
+        )
+        stats["texts_fetched"] += 1
+        if i % 100 == 0:
+            conn.commit()
+            log.info("Fetched %d/%d texts", i, len(items))
+    conn.commit()
+    stats["pending"] = conn.execute("SELECT COUNT(*) FROM sync_pending").fetchone()[0]
+    stats["texts_total"] = conn.execute("SELECT COUNT(*) FROM texts_of_law").fetchone()[0]
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Sync the local LexFind legislation mirror")
+    parser.add_argument("--db", type=Path, default=OUTPUT_DB)
+    parser.add_argument(
+        "--entities",
+        default=",".join(e for e in ENTITY_IDS if e not in {"CH", "INTLEX"}),
+        help="Comma-separated entities to sync (default: all cantons)",
+    )
+    parser.add_argument("--languages", default="de", help="Comma-separated languages (de,fr,it)")
+    parser.add_argument("--max-age-days", type=float, default=7.0, help="Refetch texts older than this")
+    parser.add_argument("--max-texts", type=int, help="Cap texts fetched in this run")
+    parser.add_argument(
+        "--seed-from-cache",
+        type=Path,
+        help="lexfind_cache.db of a running server; mirrors the texts it has looked up",
+    )
+    parser.add_argument("--replay", type=Path, help="Serve LexFind responses from a fixture")
+    parser.add_argument("--record", type=Path, help="Write fetched responses to a fixture")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format="%(asctime)s %(levelname)-7s %(message)s",
+        datefmt="%H:%M:%S",
+    )
+
+    transport: Transport = ReplayTransport(args.replay) if args.replay else HttpTransport()
+    if args.record:
+        transport = RecordingTransport(transport, args.record)
+
+    languages = [lang.strip() for lang in args.languages.split(",") if lang.strip() in LANGUAGES]
+    seeds = seed_ids_from_cache(args.seed_from_cache) if args.seed_from_cache else set()
+    conn = open_mirror(args.db)
+    try:
+        stats = sync_mirror(
+            conn,
+            transport,
+            entities=[e.strip() for e in args.entities.split(",") if e.strip()],
+            languages=languages,
+            max_age_seconds=args.max_age_days * 86400,
+            seed_ids=seeds,
+            max_texts=args.max_texts,
+        )
+    finally:
+        conn.close()
+    if args.record:
+        transport.save()
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
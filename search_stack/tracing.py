@@ -0,0 +1,359 @@
+"""Lightweight span timing, Prometheus metrics and a slow-query log.
+
+The MCP server wraps each tool call / REST request in :func:`trace` and each
+pipeline stage (DB open, FTS strategies, vector / sparse search, model
+encode, rerank, snippets, external HTTP calls) in :func:`span`:
+
+- every span feeds the ``swiss_caselaw_stage_seconds`` histogram
+- the request trace collects a per-stage breakdown (total seconds and call
+  count per stage; nested spans are counted in both stages)
+- requests slower than the configured threshold are appended to the
+  slow-query log as one JSON object per line
+
+The current trace lives in a :class:`contextvars.ContextVar`, so spans
+recorded in ``asyncio.to_thread`` workers land in the caller's trace; work
+handed to other threads or executors must be started with
+``contextvars.copy_context().run``. Requests that return an error payload
+instead of raising call :func:`mark_error` so they are still counted.
+:func:`render_prometheus` renders all metrics in the text exposition format.
+
+Cost per span is two ``perf_counter`` calls, a dict update and one
+uncontended lock acquisition (about a microsecond); set
+``SWISS_CASELAW_TRACING=0`` to turn spans into no-ops.
+"""
+
+from __future__ import annotations
+
+import bisect
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Constants
+# ---------------------------------------------------------------------------
+
+ENABLED = os.environ.get("SWISS_CASELAW_TRACING", "1").lower() not in {"0", "false", "no"}
+"""Global switch; when False, :func:`span` and :func:`trace` record nothing."""
+
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+"""Histogram upper bounds in seconds (``+Inf`` is implicit)."""
+
+METRIC_PREFIX = "swiss_caselaw"
+
+
+# ---------------------------------------------------------------------------
+# Metrics
+# ---------------------------------------------------------------------------
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a label tuple."""
+
+    def __init__(self, name: str, help_text: str, label_names: tuple[str, ...],
+                 buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series: dict[tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple[str, ...], value: float) -> None:
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # [per-bucket counts (+Inf last), sum, count]
+                series = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self._series[labels] = series
+            series[0][idx] += 1
+            series[1] += value
+            series[2] += 1
+
+    def snapshot(self) -> dict[tuple[str, ...], tuple[list[int], float, int]]:
+        with self._lock:
+            return {k: (list(v[0]), v[1], v[2]) for k, v in self._series.items()}
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in sorted(self.snapshot().items()):
+            base = _label_str(self.label_names, labels)
+            running = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                running += n
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                bucket_labels = _merge_labels(base, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {running}")
+            lines.append(f"{self.name}_sum{base} {total:.6f}")
+            lines.append(f"{self.name}_count{base} {count}")
+        return lines
+
+
+class Counter:
+    """Monotonic counter keyed by a label tuple."""
+
+    def __init__(self, name: str, help_text: str, label_names: tuple[str, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: tuple[str, ...], amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_label_str(self.label_names, labels)} {_num(value)}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_str(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+def _merge_labels(base: str, extra: str) -> str:
+    return "{" + (base[1:-1] + "," if base else "") + extra + "}"
+
+
+def _num(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else f"{value:.6f}"
+
+
+STAGE_SECONDS = Histogram(
+    f"{METRIC_PREFIX}_stage_seconds", "Time spent per pipeline stage.", ("stage",),
+)
+REQUEST_SECONDS = Histogram(
+    f"{METRIC_PREFIX}_request_seconds", "End-to-end time per tool call or REST request.",
+    ("kind", "name"),
+)
+REQUEST_ERRORS = Counter(
+    f"{METRIC_PREFIX}_request_errors_total", "Tool calls / requests that raised.",
+    ("kind", "name"),
+)
+SLOW_QUERIES = Counter(
+    f"{METRIC_PREFIX}_slow_queries_total", "Requests above the slow-query threshold.",
+    ("kind", "name"),
+)
+
+_COLLECTORS: list[Callable[[], Iterable[tuple[str, str, str, dict[tuple, float]]]]] = []
+"""Callbacks yielding (name, type, help, {label items: value}) at render time."""
+
+
+def register_collector(fn: Callable[[], Iterable[tuple[str, str, str, dict[tuple, float]]]]) -> None:
+    """Add a callback whose gauges/counters are rendered with the metrics.
+
+    Each yielded series is ``(name, "gauge" | "counter", help, values)``
+    where *values* maps a tuple of ``(label, value)`` pairs to a number.
+    Registering a function with the same qualified name again replaces it
+    (module reloads).
+    """
+    key = (getattr(fn, "__module__", None), getattr(fn, "__qualname__", None))
+    _COLLECTORS[:] = [
+        c for c in _COLLECTORS
+        if (getattr(c, "__module__", None), getattr(c, "__qualname__", None)) != key
+    ]
+    _COLLECTORS.append(fn)
+
+
+def render_prometheus() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines: list[str] = []
+    for metric in (REQUEST_SECONDS, STAGE_SECONDS, REQUEST_ERRORS, SLOW_QUERIES):
+        lines.extend(metric.render())
+    for collector in _COLLECTORS:
+        try:
+            series = list(collector())
+        except Exception as e:
+            logger.debug("Metrics collector failed: %s", e)
+            continue
+        for name, kind, help_text, values in series:
+            full = f"{METRIC_PREFIX}_{name}"
+            lines.append(f"# HELP {full} {help_text}")
+            lines.append(f"# TYPE {full} {kind}")
+            for label_items, value in sorted(values.items()):
+                labels = ",".join(f'{k}="{_escape(v)}"' for k, v in label_items)
+                lines.append(f"{full}{{{labels}}} {_num(value)}" if labels else f"{full} {_num(value)}")
+    return "\n".join(lines) + "\n"
+
+
+# ---------------------------------------------------------------------------
+# Spans and traces
+# ---------------------------------------------------------------------------
+
+
+class Trace:
+    """Per-request stage breakdown: stage -> [seconds, calls]."""
+
+    __slots__ = ("kind", "name", "attrs", "stages", "started", "lock", "error")
+
+    def __init__(self, kind: str, name: str, attrs: dict):
+        self.kind = kind
+        self.name = name
+        self.attrs = attrs
+        self.stages: dict[str, list] = {}
+        self.started = time.perf_counter()
+        self.lock = threading.Lock()
+        self.error: str | None = None
+
+    def add(self, stage: str, seconds: float) -> None:
+        with self.lock:
+            entry = self.stages.get(stage)
+            if entry is None:
+                self.stages[stage] = [seconds, 1]
+            else:
+                entry[0] += seconds
+                entry[1] += 1
+
+    def breakdown(self) -> dict[str, dict]:
+        with self.lock:
+            return {
+                stage: {"ms": round(1000 * seconds, 2), "calls": calls}
+                for stage, (seconds, calls) in sorted(self.stages.items(), key=lambda kv: -kv[1][0])
+            }
+
+
+_CURRENT: contextvars.ContextVar[Trace | None] = contextvars.ContextVar("swiss_caselaw_trace", default=None)
+
+
+class span:
+    """Time a block as *stage*: ``with span("fts"): ...``."""
+
+    __slots__ = ("stage", "t0")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.t0 = time.perf_counter() if ENABLED else None
+        return self
+
+    def __exit__(self, *_exc):
+        if self.t0 is None:
+            return False
+        elapsed = time.perf_counter() - self.t0
+        STAGE_SECONDS.observe((self.stage,), elapsed)
+        current = _CURRENT.get()
+        if current is not None:
+            current.add(self.stage, elapsed)
+        return False
+
+
+def traced(stage: str):
+    """Decorator form of :class:`span`."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+class trace:
+    """Root span of one tool call / request: ``with trace("tool", name, query=q): ...``.
+
+    Attributes (query, filters) are only used for the slow-query log.
+    """
+
+    __slots__ = ("record", "token")
+
+    def __init__(self, kind: str, name: str, **attrs):
+        self.record = Trace(kind, name, attrs) if ENABLED else None
+
+    def __enter__(self) -> Trace | None:
+        if self.record is not None:
+            self.token = _CURRENT.set(self.record)
+        return self.record
+
+    def __exit__(self, exc_type, _exc, _tb):
+        record = self.record
+        if record is None:
+            return False
+        _CURRENT.reset(self.token)
+        elapsed = time.perf_counter() - record.started
+        labels = (record.kind, record.name)
+        REQUEST_SECONDS.observe(labels, elapsed)
+        error = exc_type.__name__ if exc_type is not None else record.error
+        if error is not None:
+            REQUEST_ERRORS.inc(labels)
+        _slow_log.maybe_write(record, elapsed, error=error)
+        return False
+
+
+def current_trace() -> Trace | None:
+    return _CURRENT.get()
+
+
+def mark_error(reason: str) -> None:
+    """Count the current request as failed although it returned an error payload."""
+    current = _CURRENT.get()
+    if current is not None:
+        current.error = reason
+
+
+# ---------------------------------------------------------------------------
+# Slow-query log
+# ---------------------------------------------------------------------------
+
+
+class _SlowQueryLog:
+    def __init__(self):
+        self.path: Path | None = None
+        self.threshold = float("inf")
+        self._lock = threading.Lock()
+
+    def configure(self, path: Path | None, threshold_ms: float) -> None:
+        self.path = Path(path) if path else None
+        self.threshold = threshold_ms / 1000.0 if path and threshold_ms > 0 else float("inf")
+
+    def maybe_write(self, record: Trace, elapsed: float, *, error: str | None) -> None:
+        if elapsed < self.threshold or self.path is None:
+            return
+        SLOW_QUERIES.inc((record.kind, record.name))
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "kind": record.kind,
+            "name": record.name,
+            "duration_ms": round(1000 * elapsed, 1),
+            **({"error": error} if error else {}),
+            "attrs": {k: v for k, v in record.attrs.items() if v not in (None, "")},
+            "stages": record.breakdown(),
+        }
+        line = json.dumps(entry, ensure_ascii=False, default=str)
+        with self._lock:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+            except OSError as e:
+                logger.debug("Slow-query log write failed (%s): %s", self.path, e)
+
+
+_slow_log = _SlowQueryLog()
+
+
+def configure_slow_log(path: Path | None, threshold_ms: float) -> None:
+    """Append requests slower than *threshold_ms* to *path* (None disables)."""
+    _slow_log.configure(path, threshold_ms)
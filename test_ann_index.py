@@ -0,0 +1,145 @@
+"""Tests for the IVF-int8 ANN index and its use by mcp_server vector search."""
+
+import numpy as np
+import pytest
+
+import mcp_server
+from search_stack.ann_index import IVFIndex, build_ivf_index
+
+
+def _corpus(n=3000, dim=32, clusters=24, seed=7):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    vecs = centers[rng.integers(0, clusters, size=n)] + 0.35 * rng.normal(size=(n, dim))
+    vecs = (vecs / np.linalg.norm(vecs, axis=1, keepdims=True)).astype(np.float32)
+    ids = [f"d{i}__chunk_0" if i % 5 == 0 else f"d{i}" for i in range(n)]
+    langs = ["de" if i % 3 else "fr" for i in range(n)]
+    return ids, langs, vecs
+
+
+def _batches(ids, langs, vecs, size=500):
+    def factory():
+        for start in range(0, len(ids), size):
+            yield ids[start:start + size], langs[start:start + size], vecs[start:start + size]
+    return factory
+
+
+def _exact(vecs, q, k, mask=None):
+    sims = vecs @ q
+    if mask is not None:
+        sims = np.where(mask, sims, -np.inf)
+    return set(np.argsort(-sims)[:k].tolist())
+
+
+@pytest.fixture(scope="module")
+def built(tmp_path_factory):
+    ids, langs, vecs = _corpus()
+    courts = {f"d{i}": ("bger" if i % 2 else "bvger") for i in range(len(ids))}
+    out = tmp_path_factory.mktemp("ann") / "decisions"
+    stats = build_ivf_index(_batches(ids, langs, vecs), out, courts=courts, nlist=32)
+    return ids, langs, vecs, IVFIndex(out), stats
+
+
+def test_build_writes_compact_index(built):
+    ids, _langs, vecs, index, stats = built
+    assert stats["count"] == len(ids) == len(index)
+    assert stats["nlist"] == 32
+    assert index.codes.dtype == np.int8
+    assert index.offsets[-1] == len(ids)
+    assert stats["bytes"] < vecs.nbytes
+
+
+def test_recall_improves_with_nprobe(built):
+    ids, _langs, vecs, index, _ = built
+    rng = np.random.default_rng(1)
+    pos = {vid: i for i, vid in enumerate(ids)}
+
+    def recall(nprobe):
+        hits = 0
+        for qi in rng.choice(len(vecs), size=30, replace=False):
+            got = {pos[vid] for vid, _ in index.search(vecs[qi], 10, nprobe=nprobe)}
+            hits += len(got & _exact(vecs, vecs[qi], 10))
+        return hits / 300
+
+    low, full = recall(1), recall(32)
+    assert full >= 0.9
+    assert low <= full
+
+
+def test_distances_approximate_cosine(built):
+    _ids, _langs, vecs, index, _ = built
+    results = index.search(vecs[3], 5, nprobe=32)
+    assert results[0][0] == "d3"
+    assert abs(results[0][1]) < 0.02
+    assert [d for _, d in results] == sorted(d for _, d in results)
+
+
+def test_language_and_court_prefilter(built):
+    ids, langs, vecs, index, _ = built
+    fr = index.search(vecs[0], 20, nprobe=2, languages=["FR"])
+    assert len(fr) == 20
+    assert all(langs[ids.index(vid)] == "fr" for vid, _ in fr)
+
+    bger = index.search(vecs[0], 20, nprobe=2, courts=["bger"])
+    assert len(bger) == 20
+    for vid, _ in bger:
+        number = int(vid.split("__chunk_")[0][1:])
+        assert number % 2 == 1
+
+    assert index.search(vecs[0], 5, courts=["unknown_court"]) == []
+
+
+def test_search_vectors_uses_ann_index(built, monkeypatch):
+    _ids, _langs, vecs, index, _ = built
+    monkeypatch.setattr(mcp_server, "ANN_INDEX_DIR", index.index_dir.parent)
+    monkeypatch.setattr(mcp_server, "_ANN_INDEXES", {})
+    monkeypatch.setattr(mcp_server, "_get_vector_model", lambda: object())
+    monkeypatch.setattr(mcp_server, "_encode_queries", lambda _m, qs: [vecs[3].tobytes()] * len(qs))
+    monkeypatch.setattr(mcp_server, "_QUERY_ENCODER", None)
+    monkeypatch.setattr(mcp_server, "QUERY_EMBED_CACHE_PATH", None)
+    monkeypatch.setattr(mcp_server, "_get_vec_conn", lambda: pytest.fail("sqlite-vec used"))
+
+    scores = mcp_server._search_vectors("query", language="de", k=5)
+    assert len(scores) == 5
+    assert "d3" not in scores  # d3 is French
+    court_scores = mcp_server._search_vectors("query", k=5, court="bger")
+    assert "d3" in court_scores
+
+
+def test_sqlite_vec_fallback_applies_court_filter(tmp_path, monkeypatch):
+    import sqlite3
+
+    from db_schema import INSERT_COLUMNS, INSERT_SQL, SCHEMA_SQL
+
+    db_path = tmp_path / "decisions.db"
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA_SQL)
+    for i in range(10):
+        row = {"decision_id": f"d{i}", "court": "bger" if i % 2 else "bvger", "canton": "CH",
+               "docket_number": f"X{i}", "language": "de", "full_text": "text"}
+        conn.execute(INSERT_SQL, tuple(row.get(c) for c in INSERT_COLUMNS))
+    conn.commit()
+    conn.close()
+
+    class FakeVecConn:
+        def execute(self, sql, params):
+            k = params[1]
+            rows = [(f"d{i}", i / 10) for i in range(10)][:k]
+            return type("Cursor", (), {"fetchall": lambda self: rows})()
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(mcp_server, "DB_PATH", db_path)
+    monkeypatch.setattr(mcp_server, "METADATA_STORE_ENABLED", False)
+    monkeypatch.setattr(mcp_server, "ANN_INDEX_DIR", tmp_path / "no_ann")
+    monkeypatch.setattr(mcp_server, "_ANN_INDEXES", {})
+    monkeypatch.setattr(mcp_server, "_get_vector_model", lambda: object())
+    monkeypatch.setattr(mcp_server, "_encode_queries", lambda _m, qs: [b"\0" * 16] * len(qs))
+    monkeypatch.setattr(mcp_server, "_QUERY_ENCODER", None)
+    monkeypatch.setattr(mcp_server, "QUERY_EMBED_CACHE_PATH", None)
+    monkeypatch.setattr(mcp_server, "_get_vec_conn", lambda: FakeVecConn())
+
+    assert list(mcp_server._search_vectors("query", k=3, court="BGER")) == ["d1", "d3", "d5"]
+    assert mcp_server._search_vectors("query", k=3, court="unknown_court") == {}
+    assert len(mcp_server._search_vectors("query", k=3)) == 3
@@ -148,3 +148,52 @@ def test_find_appeal_chain_no_graph_db():
 
     assert "error" in result
     assert "not available" in result["error"]
+
+
+def _legacy_copy(db_path: Path, tmp_path: Path) -> Path:
+    """Copy of the graph without appeal_edges (pre-materialization build)."""
+    import sqlite3
+
+    legacy_path = tmp_path / "legacy_graph.db"
+    legacy = sqlite3.connect(str(legacy_path))
+    sqlite3.connect(str(db_path)).backup(legacy)
+    legacy.execute("DROP TABLE appeal_edges")
+    legacy.commit()
+    legacy.close()
+    return legacy_path
+
+
+def test_build_materializes_appeal_edges(tmp_path: Path):
+    import sqlite3
+
+    db_path = _build_chain_graph(tmp_path)
+    conn = sqlite3.connect(str(db_path))
+    edges = conn.execute(
+        "SELECT appellate_decision_id, prior_decision_id FROM appeal_edges ORDER BY 1"
+    ).fetchall()
+    conn.close()
+    assert edges == [("d_bger", "d_ober"), ("d_ober", "d_bezirk")]
+
+
+def test_appeal_edges_chain_matches_legacy_walk(tmp_path: Path):
+    from benchmarks.run_appeal_chain_benchmark import build_synthetic_graph
+
+    db_path = tmp_path / "reference_graph.db"
+    chains = build_synthetic_graph(db_path, depths=[9], chains=3, noise=5)
+    legacy_path = _legacy_copy(db_path, tmp_path)
+    ids = chains[9][1]
+
+    with patch.object(mcp_server, "_resolve_decision_id", lambda d: d):
+        for start in (ids[0], ids[4], ids[-1]):
+            with patch.object(mcp_server, "GRAPH_DB_PATH", db_path):
+                fast = mcp_server._find_appeal_chain(start)
+            with patch.object(mcp_server, "GRAPH_DB_PATH", legacy_path):
+                slow = mcp_server._find_appeal_chain(start)
+            assert "error" not in fast
+            assert fast["chain"] == slow["chain"]
+
+        with patch.object(mcp_server, "GRAPH_DB_PATH", db_path):
+            result = mcp_server._find_appeal_chain(ids[-1])
+    # Depth limit: the walk expands 6 levels below the top of the chain.
+    assert [c["decision_id"] for c in reversed(result["chain"])] == list(reversed(ids[2:-1]))
+    assert all(c["relation"] == "prior_instance" for c in result["chain"])
@@ -0,0 +1,105 @@
+"""Tests for the streaming, incremental statutes DB builder."""
+
+import json
+import sqlite3
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from search_stack import build_statutes_db as bsd
+
+AKN = "http://docs.oasis-open.org/legaldocml/ns/akn/3.0"
+
+
+def _law_xml(articles):
+    body = "".join(
+        f'<article eId="art_{num}"><num>Art. {num}</num><heading>{heading}</heading>'
+        f'<paragraph><content><p>{text}</p></content></paragraph></article>'
+        for num, heading, text in articles
+    )
+    return f'<akomaNtoso xmlns="{AKN}"><act><body><chapter>{body}</chapter></body></act></akomaNtoso>'
+
+
+@pytest.fixture
+def fedlex(tmp_path, monkeypatch):
+    fedlex_dir = tmp_path / "fedlex"
+    laws = {
+        "220": ("OR", [("1", "Abschluss", "Zum Abschlusse eines Vertrages"), ("41", "Haftung", "Wer einem andern")]),
+        "210": ("ZGB", [("1", "Anwendung", "Das Gesetz findet Anwendung"), ("8", "Beweislast", "Wo das Gesetz")]),
+        "101": ("BV", [("8", "Rechtsgleichheit", "Alle Menschen sind vor dem Gesetz gleich")]),
+    }
+    for sr, (_abbr, arts) in laws.items():
+        law_dir = fedlex_dir / "xml" / sr
+        law_dir.mkdir(parents=True)
+        (law_dir / "de.xml").write_text(_law_xml(arts), encoding="utf-8")
+    (fedlex_dir / "laws.json").write_text(json.dumps([
+        {"sr_number": sr, "abbr_de": abbr, "consolidation_date": "2024-01-01"}
+        for sr, (abbr, _arts) in laws.items()
+    ]), encoding="utf-8")
+    monkeypatch.setattr(bsd, "FEDLEX_DIR", fedlex_dir)
+    monkeypatch.setattr(bsd, "OUTPUT_DB", tmp_path / "statutes.db")
+    return fedlex_dir
+
+
+def _fts(db_path, query):
+    conn = sqlite3.connect(str(db_path))
+    try:
+        return [r[0] for r in conn.execute(
+            "SELECT sr_number || ':' || article_num FROM articles_fts WHERE articles_fts MATCH ? ORDER BY 1",
+            (query,),
+        )]
+    finally:
+        conn.close()
+
+
+def test_streaming_parse_matches_tree_parse(fedlex):
+    xml_path = fedlex / "xml" / "220" / "de.xml"
+    root = ET.parse(xml_path).getroot()
+    expected = []
+    for elem in root.findall(f".//{{{AKN}}}article"):
+        num, heading, text = bsd.parse_article(elem)
+        expected.append({"article_num": num, "heading": heading, "text": text})
+    assert list(bsd.iter_articles(xml_path)) == expected
+
+
+def test_build_then_incremental_rebuild(fedlex):
+    stats = bsd.build_db(workers=2)
+    assert stats["laws_parsed"] == 3
+    assert stats["articles"] == 5
+    assert set(stats["throughput"]) >= {"laws_per_s", "parse_mb_per_cpu_s", "fts_articles_per_s"}
+    assert _fts(bsd.OUTPUT_DB, "Haftung") == ["220:41"]
+
+    stats = bsd.build_db(workers=2)
+    assert stats["laws_parsed"] == 0
+    assert stats["laws_skipped"] == 3
+    assert stats["articles"] == 5
+
+    # Change one law, remove another: only those are touched.
+    (fedlex / "xml" / "220" / "de.xml").write_text(
+        _law_xml([("41", "Haftpflicht", "Wer einem andern widerrechtlich")]), encoding="utf-8",
+    )
+    for f in (fedlex / "xml" / "101").iterdir():
+        f.unlink()
+    (fedlex / "xml" / "101").rmdir()
+    stats = bsd.build_db(workers=2)
+    assert stats["laws_parsed"] == 1
+    assert stats["laws_skipped"] == 1
+    assert stats["laws_removed"] == 1
+    assert stats["articles"] == 3
+    assert _fts(bsd.OUTPUT_DB, "Haftung") == []
+    assert _fts(bsd.OUTPUT_DB, "Haftpflicht") == ["220:41"]
+    assert _fts(bsd.OUTPUT_DB, "Rechtsgleichheit") == []
+    assert _fts(bsd.OUTPUT_DB, "Beweislast") == ["210:8"]
+
+    conn = sqlite3.connect(str(bsd.OUTPUT_DB))
+    conn.execute("INSERT INTO articles_fts(articles_fts) VALUES('integrity-check')")  # raises if corrupt
+    conn.close()
+
+
+def test_changed_consolidation_date_forces_reparse(fedlex):
+    bsd.build_db(workers=1)
+    index = json.loads((fedlex / "laws.json").read_text(encoding="utf-8"))
+    index[0]["consolidation_date"] = "2025-01-01"
+    (fedlex / "laws.json").write_text(json.dumps(index), encoding="utf-8")
+    assert bsd.build_db(workers=1)["laws_parsed"] == 1
+    assert bsd.build_db(workers=1, full=True)["laws_parsed"] == 3
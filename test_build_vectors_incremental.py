@@ -0,0 +1,222 @@
+"""Tests for checkpointed, incremental and sharded builds in search_stack.build_vectors.
+
+A fake model and plain tables standing in for vec0 keep these offline.
+"""
+
+import json
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import search_stack.build_vectors as bv
+from search_stack.build_vectors import (
+    CHUNK_META_TABLE_SQL,
+    EMBED_STATE_SQL,
+    EMBEDDING_DIM,
+    ENCODE_BATCH_SIZE,
+    SPARSE_TABLES_SQL,
+    build_vectors,
+)
+
+
+def _fake_vec_db(path, *, enable_sparse=False, enable_chunks=False):
+    """Stand-in for create_vec_db with ordinary tables (no sqlite-vec)."""
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS vec_decisions "
+        "(decision_id TEXT PRIMARY KEY, embedding BLOB, language TEXT)"
+    )
+    conn.execute(EMBED_STATE_SQL)
+    if enable_sparse:
+        conn.executescript(SPARSE_TABLES_SQL)
+    if enable_chunks:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS vec_chunks "
+            "(chunk_id TEXT PRIMARY KEY, embedding BLOB, language TEXT)"
+        )
+        conn.executescript(CHUNK_META_TABLE_SQL)
+    conn.commit()
+    return conn
+
+
+@pytest.fixture
+def fake_build(monkeypatch, tmp_path):
+    encoded: list[str] = []
+
+    def fake_encode(_model, texts, batch_size=ENCODE_BATCH_SIZE):
+        encoded.extend(texts)
+        return np.ones((len(texts), EMBEDDING_DIM), dtype=np.float32)
+
+    def fake_encode_flag(_model, texts, batch_size=ENCODE_BATCH_SIZE, **_kwargs):
+        encoded.extend(texts)
+        sparse = [{len(t) % 7 + 1: 0.5, 100: 0.25} for t in texts]
+        return np.ones((len(texts), EMBEDDING_DIM), dtype=np.float32), sparse
+
+    monkeypatch.setattr(bv, "create_vec_db", _fake_vec_db)
+    monkeypatch.setattr(bv, "load_model", lambda *a, **k: object())
+    monkeypatch.setattr(bv, "encode_texts", fake_encode)
+    monkeypatch.setattr(bv, "encode_texts_flag", fake_encode_flag)
+
+    input_dir = tmp_path / "decisions"
+    input_dir.mkdir()
+
+    def write(rows):
+        (input_dir / "d.jsonl").write_text(
+            "\n".join(json.dumps(r) for r in rows) + "\n", encoding="utf-8",
+        )
+
+    return input_dir, tmp_path / "vectors.db", write, encoded
+
+
+def _regeste(i, suffix=""):
+    return {"decision_id": f"d{i}", "regeste": f"Regeste number {i} about Mietrecht{suffix}"}
+
+
+def _rows(db, sql):
+    conn = sqlite3.connect(str(db))
+    try:
+        return conn.execute(sql).fetchall()
+    finally:
+        conn.close()
+
+
+def test_incremental_build_only_embeds_changed(fake_build):
+    input_dir, db_path, write, encoded = fake_build
+    write([_regeste(i) for i in range(5)])
+    first = build_vectors(input_dir=input_dir, db_path=db_path, batch_size=2)
+    assert first["embedded"] == 5
+
+    encoded.clear()
+    write([_regeste(0, " (revised)")] + [_regeste(i) for i in range(1, 4)] + [_regeste(9)])
+    second = build_vectors(input_dir=input_dir, db_path=db_path, batch_size=2, incremental=True)
+    assert second["embedded"] == 2
+    assert second["skipped_unchanged"] == 3
+    assert second["removed"] == 1
+    assert len(encoded) == 2
+
+    conn = sqlite3.connect(str(db_path))
+    ids = {r[0] for r in conn.execute("SELECT decision_id FROM vec_decisions")}
+    assert ids == {"d0", "d1", "d2", "d3", "d9"}
+    assert conn.execute("SELECT COUNT(*) FROM embed_state").fetchone()[0] == 5
+    conn.close()
+
+
+def test_emptied_text_removes_old_vectors(fake_build):
+    input_dir, db_path, write, _encoded = fake_build
+    write([_regeste(i) for i in range(3)])
+    build_vectors(input_dir=input_dir, db_path=db_path, enable_sparse=True)
+
+    write([_regeste(0), {"decision_id": "d1", "regeste": None}, _regeste(2), _regeste(0, " dupe")])
+    stats = build_vectors(
+        input_dir=input_dir, db_path=db_path, enable_sparse=True, incremental=True,
+    )
+    assert (stats["skipped_no_text"], stats["skipped_dupe"], stats["removed"]) == (1, 1, 1)
+    for table in ("vec_decisions", "embed_state", "sparse_terms"):
+        assert _rows(db_path, f"SELECT DISTINCT decision_id FROM {table} ORDER BY 1") == [
+            ("d0",), ("d2",),
+        ]
+
+
+def test_interrupted_build_resumes_from_checkpoint(fake_build, monkeypatch):
+    input_dir, db_path, write, encoded = fake_build
+    write([_regeste(i) for i in range(6)])
+    real_insert = bv._insert_dense_batch
+    calls = {"n": 0}
+
+    def failing_insert(*args):
+        calls["n"] += 1
+        if calls["n"] == 2:
+            raise RuntimeError("simulated crash")
+        real_insert(*args)
+
+    monkeypatch.setattr(bv, "_insert_dense_batch", failing_insert)
+    with pytest.raises(RuntimeError):
+        build_vectors(input_dir=input_dir, db_path=db_path, batch_size=2)
+    assert not db_path.exists()
+
+    encoded.clear()
+    stats = build_vectors(input_dir=input_dir, db_path=db_path, batch_size=2, incremental=True)
+    assert stats["skipped_unchanged"] == 2
+    assert stats["embedded"] == 4
+    assert db_path.exists()
+
+
+def test_chunk_batch_and_replacement(fake_build):
+    input_dir, db_path, write, _encoded = fake_build
+    row = _regeste(1)
+    row["full_text"] = "A. Sachverhalt\n\nErster Teil.\n\nB. Erwägungen\n\nZweiter Teil."
+    write([row])
+    build_vectors(input_dir=input_dir, db_path=db_path, enable_chunks=True)
+
+    row["full_text"] = "Nur ein Abschnitt."
+    write([row])
+    build_vectors(input_dir=input_dir, db_path=db_path, enable_chunks=True, incremental=True)
+
+    conn = sqlite3.connect(str(db_path))
+    meta = conn.execute("SELECT chunk_id FROM chunk_meta ORDER BY chunk_index").fetchall()
+    vec = conn.execute("SELECT COUNT(*) FROM vec_chunks").fetchone()[0]
+    conn.close()
+    assert len(meta) == vec == 2
+
+
+def test_dropped_sparse_terms_block_incremental_builds(fake_build):
+    input_dir, db_path, write, _encoded = fake_build
+    write([_regeste(i) for i in range(4)])
+    first = build_vectors(
+        input_dir=input_dir, db_path=db_path, enable_sparse=True,
+        build_postings=True, drop_sparse_table=True,
+    )
+    assert first["sparse_postings"]["docs"] == 4
+
+    # A second build in a row must not rebuild the postings from a partial table.
+    write([_regeste(0, " (revised)")] + [_regeste(i) for i in range(1, 4)])
+    with pytest.raises(ValueError, match="no sparse_terms"):
+        build_vectors(
+            input_dir=input_dir, db_path=db_path, enable_sparse=True,
+            build_postings=True, incremental=True,
+        )
+    with pytest.raises(ValueError, match="cannot be combined"):
+        build_vectors(
+            input_dir=input_dir, db_path=db_path, enable_sparse=True,
+            build_postings=True, drop_sparse_table=True, incremental=True,
+        )
+
+    second = build_vectors(
+        input_dir=input_dir, db_path=db_path, enable_sparse=True, build_postings=True,
+    )
+    assert second["sparse_postings"]["docs"] == 4
+    third = build_vectors(
+        input_dir=input_dir, db_path=db_path, enable_sparse=True,
+        build_postings=True, incremental=True,
+    )
+    assert third["skipped_unchanged"] == 4
+    assert third["sparse_postings"]["docs"] == 4
+
+
+def test_split_jsonl_by_shard_keeps_order_and_assignment(tmp_path):
+    input_dir = tmp_path / "decisions"
+    input_dir.mkdir()
+    rows = [_regeste(i) for i in range(20)] + [_regeste(3, " later copy")]
+    (input_dir / "a.jsonl").write_text(
+        "\n".join(json.dumps(r) for r in rows) + "\nnot json\n\n", encoding="utf-8",
+    )
+
+    dirs = bv._split_jsonl_by_shard(input_dir, tmp_path / "split", 3)
+    seen = []
+    for i, d in enumerate(dirs):
+        shard_rows = list(bv._iter_rows_from_jsonl(d))
+        assert {bv._shard_of(r["decision_id"], 3) for r in shard_rows} <= {i}
+        seen.extend(shard_rows)
+    assert len(seen) == len(rows)
+    d3 = [r["regeste"] for r in seen if r["decision_id"] == "d3"]
+    assert d3 == [_regeste(3)["regeste"], _regeste(3, " later copy")["regeste"]]
+
+
+def test_shard_assignment_is_stable():
+    from search_stack.build_vectors import _shard_of, shard_db_path
+
+    assert _shard_of("bger_6B_1/2024", 4) == _shard_of("bger_6B_1/2024", 4)
+    assert {_shard_of(f"d{i}", 4) for i in range(100)} == {0, 1, 2, 3}
+    assert shard_db_path(Path("out/vectors.db"), 2) == Path("out/vectors_shard_2.db")
@@ -0,0 +1,123 @@
+"""Tests for the batched, budgeted cross-encoder rerank stage."""
+
+import time
+
+import pytest
+
+import mcp_server
+
+
+class FakeCrossEncoder:
+    """Scores a pair by the number embedded in the passage title."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.batches = []
+
+    def predict(self, pairs, batch_size=32):
+        self.batches.append(len(pairs))
+        if self.delay:
+            time.sleep(self.delay)
+        return [float(doc.split()[0]) for _q, doc in pairs]
+
+
+def _candidates(n, *, ce_scores=None):
+    """n candidates with descending base score; title carries the CE score."""
+    ce_scores = ce_scores or list(range(n))
+    return [
+        (float(n - i), 0.0, i, {"decision_id": f"d{i}", "title": f"{ce_scores[i]} title"})
+        for i in range(n)
+    ]
+
+
+@pytest.fixture
+def encoder(monkeypatch):
+    fake = FakeCrossEncoder()
+    monkeypatch.setattr(mcp_server, "CROSS_ENCODER_ENABLED", True)
+    monkeypatch.setattr(mcp_server, "_get_cross_encoder", lambda: fake)
+    monkeypatch.setattr(mcp_server, "CROSS_ENCODER_TOP_N", 40)
+    monkeypatch.setattr(mcp_server, "CROSS_ENCODER_BATCH_SIZE", 8)
+    monkeypatch.setattr(mcp_server, "CROSS_ENCODER_STABLE_K", 5)
+    monkeypatch.setattr(mcp_server, "CROSS_ENCODER_BUDGET_MS", 0)
+    monkeypatch.setattr(mcp_server, "_CROSS_SCORE_CACHE", mcp_server.OrderedDict())
+    return fake
+
+
+def _boosts(result):
+    return {row["decision_id"]: score for score, _b, _i, row in result}
+
+
+def test_scores_are_cached_per_query(encoder):
+    scored = _candidates(10)
+    first = mcp_server._apply_cross_encoder_boosts(scored, "Mietzins  Herabsetzung")
+    calls = len(encoder.batches)
+    second = mcp_server._apply_cross_encoder_boosts(scored, "Mietzins Herabsetzung")
+    assert len(encoder.batches) == calls
+    assert _boosts(first) == _boosts(second)
+    mcp_server._apply_cross_encoder_boosts(scored, "Eigenbedarf")
+    assert len(encoder.batches) > calls
+
+
+def test_cache_key_tracks_document_text_and_backend(encoder, monkeypatch):
+    scored = _candidates(4)
+    mcp_server._apply_cross_encoder_boosts(scored, "Mietzins")
+
+    # A DB update changed one decision's text: only that one is rescored.
+    updated = [(s, b, i, dict(row)) for s, b, i, row in scored]
+    updated[2][3]["regeste"] = "Neue Regeste"
+    encoder.batches.clear()
+    mcp_server._apply_cross_encoder_boosts(updated, "Mietzins")
+    assert sum(encoder.batches) == 1
+
+    class OnnxCrossEncoder(FakeCrossEncoder):
+        pass
+
+    onnx = OnnxCrossEncoder()
+    monkeypatch.setattr(mcp_server, "_get_cross_encoder", lambda: onnx)
+    mcp_server._apply_cross_encoder_boosts(scored, "Mietzins")
+    assert sum(onnx.batches) == 4
+
+
+def test_short_passages_are_batched_more_densely():
+    pairs = [(f"d{i}", "q", "x" * 50) for i in range(10)] + [
+        (f"l{i}", "q", "x" * 5000) for i in range(3)
+    ]
+    batches = mcp_server._length_bucketed_batches(pairs)
+    sizes = [len(b) for b in batches]
+    assert sum(sizes) == 13
+    assert max(len(doc) for _d, _q, doc in batches[0]) == 50
+    assert len(batches[0]) == 10
+
+
+def test_early_exit_when_top_k_is_stable(encoder, monkeypatch):
+    monkeypatch.setattr(mcp_server, "CROSS_ENCODER_WEIGHT", 0.5)
+    # Base scores fall off steeply, so late candidates cannot catch up.
+    scored = [
+        (100.0 - 10 * i, 0.0, i, {"decision_id": f"d{i}", "title": f"{i % 3} t"})
+        for i in range(40)
+    ]
+    result = mcp_server._apply_cross_encoder_boosts(scored, "q")
+    assert sum(encoder.batches) < 40
+    assert len(result) == 40
+    top = sorted(result, key=lambda x: -x[0])[:5]
+    assert [row["decision_id"] for *_r, row in top] == ["d0", "d1", "d2", "d3", "d4"]
+
+
+def test_budget_caps_scored_candidates(encoder, monkeypatch):
+    encoder.delay = 0.02
+    monkeypatch.setattr(mcp_server, "CROSS_ENCODER_BUDGET_MS", 30)
+    monkeypatch.setattr(mcp_server, "CROSS_ENCODER_STABLE_K", 100)
+    started = time.perf_counter()
+    result = mcp_server._apply_cross_encoder_boosts(_candidates(40), "q")
+    assert time.perf_counter() - started < 0.2
+    assert sum(encoder.batches) < 40
+    assert len(result) == 40
+
+
+def test_failure_keeps_original_scores(encoder, monkeypatch):
+    def broken(pairs, batch_size=32):
+        raise RuntimeError("onnx session died")
+
+    monkeypatch.setattr(encoder, "predict", broken)
+    scored = _candidates(5)
+    assert mcp_server._apply_cross_encoder_boosts(scored, "q") == scored
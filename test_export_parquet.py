@@ -0,0 +1,136 @@
+"""Tests for the parallel, incremental per-court Parquet export."""
+
+import json
+import sqlite3
+
+import pyarrow.parquet as pq
+import pytest
+
+import export_parquet
+from db_schema import INSERT_COLUMNS, INSERT_SQL, SCHEMA_SQL
+
+
+def _decision(did, court, decision_date, text="Sachverhalt"):
+    return {
+        "decision_id": did, "court": court, "canton": "CH", "docket_number": did.upper(),
+        "decision_date": decision_date, "language": "de", "full_text": text,
+        "source_url": f"https://example.ch/{did}",
+    }
+
+
+DECISIONS = [
+    _decision("bger_3", "bger", "2021-05-01"),
+    _decision("bger_1", "bger", "2019-01-10"),
+    _decision("bger_5", "bger", None),
+    _decision("bger_2", "bger", "2023-02-02"),
+    _decision("bger_4", "bger", "2019-01-10"),
+    _decision("bvger_1", "bvger", "2020-03-03"),
+    _decision("bvger_2", "bvger", "2018-03-03"),
+]
+
+
+def _insert(conn, rows):
+    conn.executemany(INSERT_SQL, [tuple(row.get(c) for c in INSERT_COLUMNS) for row in rows])
+    conn.commit()
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(export_parquet, "ROW_GROUP_SIZE", 2)
+    path = tmp_path / "decisions.db"
+    conn = sqlite3.connect(str(path))
+    conn.executescript(SCHEMA_SQL)
+    _insert(conn, DECISIONS)
+    conn.close()
+    return path
+
+
+def _mtimes(dataset):
+    return {p.name: p.stat().st_mtime_ns for p in dataset.glob("*.parquet")}
+
+
+def test_rows_are_sorted_into_row_groups_with_statistics(db, tmp_path):
+    dataset = tmp_path / "dataset"
+    assert export_parquet.export_from_db(db, dataset, workers=2) == {"bger": 5, "bvger": 2}
+
+    pf = pq.ParquetFile(dataset / "bger.parquet")
+    assert pf.metadata.num_row_groups == 3
+    assert pf.read().column("decision_id").to_pylist() == ["bger_1", "bger_4", "bger_3", "bger_2", "bger_5"]
+
+    date_idx = export_parquet.DECISION_SCHEMA.get_field_index("decision_date")
+    first = pf.metadata.row_group(0)
+    stats = first.column(date_idx).statistics
+    assert (stats.min, stats.max) == ("2019-01-10", "2019-01-10")
+    assert [c.column_index for c in first.sorting_columns] == [1, date_idx, 0]
+    text_idx = export_parquet.DECISION_SCHEMA.get_field_index("full_text")
+    assert not first.column(text_idx).is_stats_set
+
+    manifest = json.loads((dataset / export_parquet.MANIFEST_NAME).read_text())
+    groups = manifest["courts"]["bger"]["row_groups"]
+    assert [(g["rows"], g["min_date"], g["max_date"]) for g in groups] == [
+        (2, "2019-01-10", "2019-01-10"), (2, "2021-05-01", "2023-02-02"), (1, None, None),
+    ]
+
+
+def test_only_changed_courts_are_rewritten(db, tmp_path):
+    dataset = tmp_path / "dataset"
+    export_parquet.export_from_db(db, dataset, workers=2)
+    before = json.loads((dataset / export_parquet.MANIFEST_NAME).read_text())["courts"]
+    mtimes = _mtimes(dataset)
+
+    assert export_parquet.export_from_db(db, dataset, workers=2) == {"bger": 5, "bvger": 2}
+    assert _mtimes(dataset) == mtimes
+
+    conn = sqlite3.connect(str(db))
+    conn.execute("UPDATE decisions SET regeste = 'Neu' WHERE decision_id = 'bvger_1'")
+    _insert(conn, [_decision("bger_6", "bger", "2024-01-01")])
+    conn.close()
+    assert export_parquet.export_from_db(db, dataset, workers=2) == {"bger": 6, "bvger": 2}
+    assert _mtimes(dataset)["bvger.parquet"] != mtimes["bvger.parquet"]
+    assert pq.read_table(dataset / "bvger.parquet").column("regeste").to_pylist() == [None, "Neu"]
+
+    # bger_6 sorts before the undated bger_5: only the last row group changed
+    after = json.loads((dataset / export_parquet.MANIFEST_NAME).read_text())["courts"]
+    assert export_parquet.changed_row_groups(before["bger"], after["bger"]) == [2]
+
+    mtimes = _mtimes(dataset)
+    export_parquet.export_from_db(db, dataset, workers=2, full=True)
+    assert all(_mtimes(dataset)[name] != mtime for name, mtime in mtimes.items())
+
+
+def test_missing_file_and_stale_courts(db, tmp_path):
+    dataset = tmp_path / "dataset"
+    export_parquet.export_from_db(db, dataset, workers=1)
+    (dataset / "bger.parquet").unlink()
+    (dataset / "gone_court.parquet").write_bytes(b"old")
+
+    export_parquet.export_from_db(db, dataset, workers=1)
+    assert sorted(p.name for p in dataset.glob("*.parquet")) == ["bger.parquet", "bvger.parquet"]
+    assert pq.ParquetFile(dataset / "bger.parquet").metadata.num_rows == 5
+
+
+def test_jsonl_export_dedups_sorts_and_skips_unchanged(tmp_path, monkeypatch):
+    monkeypatch.setattr(export_parquet, "ROW_GROUP_SIZE", 2)
+    source = tmp_path / "decisions"
+    source.mkdir()
+    (source / "a.jsonl").write_text(
+        "\n".join(json.dumps(d) for d in DECISIONS[:4]) + "\nnot json\n\n", encoding="utf-8",
+    )
+    duplicate = _decision("bger_1", "bger", "2000-01-01", text="later copy")
+    incomplete = {**_decision("bvger_9", "bvger", "2020-01-01"), "canton": None}
+    (source / "b.jsonl").write_text(
+        "\n".join(json.dumps(d) for d in [duplicate, incomplete, *DECISIONS[4:]]) + "\n", encoding="utf-8",
+    )
+    dataset = tmp_path / "dataset"
+
+    assert export_parquet.export_parquet(source, dataset, workers=2) == {"bger": 5, "bvger": 2}
+    table = pq.read_table(dataset / "bger.parquet")
+    assert table.column("decision_id").to_pylist() == ["bger_1", "bger_4", "bger_3", "bger_2", "bger_5"]
+    assert table.column("full_text").to_pylist()[0] == "Sachverhalt"
+
+    mtimes = _mtimes(dataset)
+    with open(source / "b.jsonl", "a", encoding="utf-8") as f:
+        f.write(json.dumps(_decision("bvger_3", "bvger", "2022-01-01")) + "\n")
+    assert export_parquet.export_parquet(source, dataset, workers=2) == {"bger": 5, "bvger": 3}
+    assert _mtimes(dataset)["bger.parquet"] == mtimes["bger.parquet"]
+    assert _mtimes(dataset)["bvger.parquet"] != mtimes["bvger.parquet"]
@@ -0,0 +1,129 @@
+"""Tests for the SQLite Fedlex article cache and its JSON migration."""
+
+import json
+import multiprocessing
+import sqlite3
+
+import pytest
+
+import mcp_server
+
+
+@pytest.fixture
+def cache_paths(tmp_path, monkeypatch):
+    db_path = tmp_path / "fedlex_cache.db"
+    json_path = tmp_path / "fedlex_cache.json"
+    monkeypatch.setattr(mcp_server, "FEDLEX_CACHE_DB_PATH", db_path)
+    monkeypatch.setattr(mcp_server, "FEDLEX_CACHE_PATH", json_path)
+    monkeypatch.setattr(mcp_server, "_FEDLEX_DB", None)
+    monkeypatch.setattr(mcp_server, "_FEDLEX_DB_FAILURES", 0)
+    monkeypatch.setattr(mcp_server, "_FEDLEX_DB_RETRY_AT", 0.0)
+    return db_path, json_path
+
+
+def test_json_cache_is_migrated_once(cache_paths):
+    _db_path, json_path = cache_paths
+    json_path.write_text(json.dumps({
+        "u|OR|41||de": {
+            "fedlex_url": "https://www.fedlex.admin.ch/eli/cc/27/317_321_377/de",
+            "text_excerpt": "Art. 41 OR: Wer einem andern widerrechtlich Schaden zufügt ...",
+            "fetched_at": "2099-01-01T00:00:00+00:00",
+        },
+        "u|OR|42||de": {"fedlex_url": None, "text_excerpt": ""},
+    }), encoding="utf-8")
+    hit = mcp_server._fedlex_cache_get("u|OR|41||de")
+    assert hit["text_excerpt"].startswith("Art. 41 OR")
+    assert mcp_server._fedlex_cache_get("u|OR|42||de") is None
+
+    # A second process (fresh connection) does not import again.
+    json_path.write_text(json.dumps({"u|ZGB|1||de": {"text_excerpt": "Art. 1 ZGB"}}), encoding="utf-8")
+    with mcp_server._FEDLEX_DB_LOCK:
+        mcp_server._FEDLEX_DB[1].close()
+        mcp_server._FEDLEX_DB = None
+    assert mcp_server._fedlex_cache_get("u|ZGB|1||de") is None
+
+
+def test_upsert_and_expiry(cache_paths, monkeypatch):
+    mcp_server._fedlex_cache_put("k", "https://a", "old")
+    mcp_server._fedlex_cache_put("k", "https://b", "new")
+    assert mcp_server._fedlex_cache_get("k") == {"fedlex_url": "https://b", "text_excerpt": "new"}
+
+    monkeypatch.setattr(mcp_server, "FEDLEX_CACHE_TTL_DAYS", -1)
+    mcp_server._fedlex_cache_put("k", "https://b", "new")
+    assert mcp_server._fedlex_cache_get("k") is None
+
+
+def test_locked_db_on_first_open_is_retried(cache_paths, monkeypatch):
+    real_migrate = mcp_server._migrate_fedlex_json_cache
+    attempts = []
+
+    def locked_once(conn):
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise sqlite3.OperationalError("database is locked")
+        real_migrate(conn)
+
+    monkeypatch.setattr(mcp_server, "_migrate_fedlex_json_cache", locked_once)
+    mcp_server._fedlex_cache_put("k", None, "lost")
+    mcp_server._fedlex_cache_put("k", None, "lost")
+    assert len(attempts) == 1  # backing off, not hammering the lock
+
+    monkeypatch.setattr(mcp_server, "_FEDLEX_DB_RETRY_AT", 0.0)
+    mcp_server._fedlex_cache_put("k", None, "kept")
+    assert mcp_server._fedlex_cache_get("k") == {"fedlex_url": None, "text_excerpt": "kept"}
+    assert mcp_server._FEDLEX_DB_FAILURES == 0
+
+
+def test_size_is_bounded(cache_paths, monkeypatch):
+    monkeypatch.setattr(mcp_server, "FEDLEX_CACHE_MAX_ROWS", 5)
+    monkeypatch.setattr(mcp_server, "FEDLEX_CACHE_EVICT_EVERY", 4)
+    monkeypatch.setattr(mcp_server, "_FEDLEX_WRITES", 0)
+    for i in range(12):
+        mcp_server._fedlex_cache_put(f"k{i}", None, f"text {i}")
+    with mcp_server._FEDLEX_DB_LOCK:
+        keys = [r[0] for r in mcp_server._FEDLEX_DB[1].execute("SELECT key FROM articles")]
+    assert len(keys) == 5
+    assert mcp_server._fedlex_cache_get("k11") is not None
+
+
+def _write_keys(db_path, json_path, worker, n):
+    mcp_server.FEDLEX_CACHE_DB_PATH = db_path
+    mcp_server.FEDLEX_CACHE_PATH = json_path
+    for i in range(n):
+        mcp_server._fedlex_cache_put(f"w{worker}:{i}", None, f"excerpt {worker}/{i}")
+
+
+def test_concurrent_processes_do_not_lose_entries(cache_paths):
+    db_path, json_path = cache_paths
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=_write_keys, args=(db_path, json_path, w, 50)) for w in range(3)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(timeout=60)
+        assert p.exitcode == 0
+    conn = sqlite3.connect(str(db_path))
+    assert conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0] == 150
+    assert conn.execute("SELECT COUNT(*) FROM meta WHERE key = 'json_migrated'").fetchone()[0] == 1
+    conn.close()
+
+
+def test_resolve_statute_materials_uses_cache(cache_paths, monkeypatch):
+    fetches = []
+
+    def fake_fetch(*, url, article, paragraph):
+        fetches.append(url)
+        return {"fedlex_url": url, "text_excerpt": f"Art. {article} ZGB ..."}
+
+    monkeypatch.setattr(mcp_server, "_fetch_fedlex_article_text", fake_fetch)
+    request = [{"law_code": "ZGB", "article": "8"}]
+    first = mcp_server._resolve_statute_materials(
+        statute_requests=request, fedlex_urls=[], preferred_language="de",
+    )
+    second = mcp_server._resolve_statute_materials(
+        statute_requests=request, fedlex_urls=[], preferred_language="de",
+    )
+    assert first[0]["status"] == "fetched"
+    assert second[0]["status"] == "cache_hit"
+    assert second[0]["text_excerpt"] == first[0]["text_excerpt"]
+    assert len(fetches) == 1
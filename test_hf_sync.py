@@ -0,0 +1,106 @@
+"""Tests for hf_sync delta uploads against a local directory as the remote."""
+
+import json
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+import hf_sync
+import publish
+
+
+def _shard(path, n, tag="a"):
+    pq.write_table(pa.table({"decision_id": [f"{tag}{i}" for i in range(n)]}), path)
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    local = tmp_path / "dataset"
+    local.mkdir()
+    for court, n in (("bger", 3), ("bvger", 2), ("zh_obergericht", 4)):
+        _shard(local / f"{court}.parquet", n)
+    return local
+
+
+def test_only_changed_shards_are_uploaded(dataset, tmp_path):
+    remote = hf_sync.LocalDirRemote(tmp_path / "remote")
+    manifest = tmp_path / "hf_manifest.json"
+
+    plan = hf_sync.sync(dataset, remote, manifest_path=manifest)
+    assert len(plan["upload"]) == 3
+    assert len(remote.commits) == 1
+    assert (tmp_path / "remote" / "data" / "bger.parquet").read_bytes() == (dataset / "bger.parquet").read_bytes()
+    files = json.loads(manifest.read_text())["files"]
+    assert files["data/zh_obergericht.parquet"]["rows"] == 4
+
+    plan = hf_sync.sync(dataset, remote, manifest_path=manifest)
+    assert plan["upload"] == [] and plan["unchanged"] == 3
+    assert len(remote.commits) == 1
+
+    _shard(dataset / "bvger.parquet", 5, tag="b")
+    plan = hf_sync.sync(dataset, remote, manifest_path=manifest)
+    assert plan["upload"] == ["data/bvger.parquet"]
+    assert plan["rows_uploaded"] == 5
+    assert remote.commits[-1]["uploads"] == ["data/bvger.parquet"]
+
+
+def test_dry_run_reports_transfer_without_touching_remote(dataset, tmp_path):
+    remote = hf_sync.LocalDirRemote(tmp_path / "remote")
+    manifest = tmp_path / "hf_manifest.json"
+    plan = hf_sync.sync(dataset, remote, manifest_path=manifest, dry_run=True)
+    expected = sum(p.stat().st_size for p in dataset.glob("*.parquet"))
+    assert plan["upload_bytes"] == expected
+    assert plan["committed"] is False
+    assert not (tmp_path / "remote").exists()
+    assert not manifest.exists()
+
+
+def test_prune_deletes_only_managed_shards_in_the_same_commit(dataset, tmp_path):
+    remote_root = tmp_path / "remote"
+    (remote_root / "data" / "daily").mkdir(parents=True)
+    (remote_root / "data" / "daily" / "2025-01-01_bger.parquet").write_bytes(b"daily")
+    remote = hf_sync.LocalDirRemote(remote_root)
+    manifest = tmp_path / "hf_manifest.json"
+    hf_sync.sync(dataset, remote, manifest_path=manifest, prune=True)
+
+    (dataset / "bvger.parquet").unlink()
+    _shard(dataset / "bger.parquet", 7, tag="c")
+    plan = hf_sync.sync(dataset, remote, manifest_path=manifest, prune=True)
+    assert plan["delete"] == ["data/bvger.parquet"]
+    assert remote.commits[-1] == {
+        "message": remote.commits[-1]["message"],
+        "uploads": ["data/bger.parquet"],
+        "deletions": ["data/bvger.parquet"],
+    }
+    assert not (remote_root / "data" / "bvger.parquet").exists()
+    assert (remote_root / "data" / "daily" / "2025-01-01_bger.parquet").exists()
+
+
+def test_missing_manifest_is_rebuilt_from_remote_hashes(dataset, tmp_path):
+    remote = hf_sync.LocalDirRemote(tmp_path / "remote")
+    hf_sync.sync(dataset, remote, manifest_path=tmp_path / "first.json")
+
+    plan = hf_sync.sync(dataset, remote, manifest_path=tmp_path / "elsewhere.json")
+    assert plan["upload"] == []
+    assert len(remote.commits) == 1
+
+
+def test_publish_upload_step_uses_delta_sync(dataset, tmp_path, monkeypatch):
+    card = tmp_path / "dataset_card.md"
+    card.write_text("# Swiss case law\n")
+    remote = hf_sync.LocalDirRemote(tmp_path / "remote")
+    monkeypatch.setattr(hf_sync, "HubRemote", lambda repo_id: remote)
+    monkeypatch.setattr(publish, "DATASET_DIR", dataset)
+    monkeypatch.setattr(publish, "REPO_DIR", tmp_path)
+    monkeypatch.setattr(publish, "HF_MANIFEST_PATH", tmp_path / "hf_manifest.json")
+
+    assert publish.step_4_upload_hf(dry_run=True) is True
+    assert remote.commits == []
+
+    assert publish.step_4_upload_hf() is True
+    assert sorted(remote.commits[0]["uploads"]) == [
+        "README.md", "data/bger.parquet", "data/bvger.parquet", "data/zh_obergericht.parquet",
+    ]
+    assert publish.step_4_upload_hf() is True
+    assert len(remote.commits) == 1
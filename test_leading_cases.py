@@ -0,0 +1,143 @@
+"""Tests for the leading-cases engine (FTS5 DB + attached reference graph)."""
+
+import json
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+import mcp_server
+from db_schema import INSERT_COLUMNS, INSERT_SQL, SCHEMA_SQL
+from search_stack.build_reference_graph import build_graph
+
+
+ROWS = [
+    {
+        "decision_id": "bger_a",
+        "docket_number": "4A_100/2019",
+        "court": "bger",
+        "canton": "CH",
+        "language": "de",
+        "decision_date": "2019-05-01",
+        "title": "",
+        "regeste": "Tierhalterhaftung nach Art. 56 OR.",
+        "full_text": "Tierhalterhaftung, Art. 56 OR.",
+    },
+    {
+        "decision_id": "bger_b",
+        "docket_number": "4A_200/2019",
+        "court": "bger",
+        "canton": "CH",
+        "language": "de",
+        "decision_date": "2019-06-01",
+        "title": "",
+        "regeste": "Tierhalterhaftung ohne Sorgfaltsbeweis.",
+        "full_text": "Tierhalterhaftung.",
+    },
+    {
+        "decision_id": "bger_c",
+        "docket_number": "4A_300/2019",
+        "court": "bger",
+        "canton": "CH",
+        "language": "de",
+        "decision_date": "2019-07-01",
+        "title": "",
+        "regeste": "Mietrecht.",
+        "full_text": "Mietrecht, Kündigung.",
+    },
+    {
+        "decision_id": "bger_s1",
+        "docket_number": "4A_400/2020",
+        "court": "bger",
+        "canton": "CH",
+        "language": "de",
+        "decision_date": "2020-01-10",
+        "title": "",
+        "regeste": "",
+        "full_text": "Vgl. 4A_100/2019 und 4A_200/2019 sowie 4A_300/2019.",
+    },
+    {
+        "decision_id": "bger_s2",
+        "docket_number": "4A_500/2020",
+        "court": "bger",
+        "canton": "CH",
+        "language": "de",
+        "decision_date": "2020-02-10",
+        "title": "",
+        "regeste": "",
+        "full_text": "Siehe 4A_100/2019.",
+    },
+]
+
+
+def _build_fts_db(path: Path, rows: list[dict]) -> None:
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA_SQL)
+    for row in rows:
+        conn.execute(INSERT_SQL, tuple(row.get(col) for col in INSERT_COLUMNS))
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def leading_dbs(tmp_path, monkeypatch):
+    input_dir = tmp_path / "decisions"
+    input_dir.mkdir()
+    (input_dir / "sample.jsonl").write_text(
+        "\n".join(json.dumps(r) for r in ROWS) + "\n", encoding="utf-8"
+    )
+    graph_path = tmp_path / "reference_graph.db"
+    build_graph(input_dir=input_dir, db_path=graph_path)
+    db_path = tmp_path / "decisions.db"
+    _build_fts_db(db_path, ROWS)
+    monkeypatch.setattr(mcp_server, "DB_PATH", db_path)
+    monkeypatch.setattr(mcp_server, "GRAPH_DB_PATH", graph_path)
+    return graph_path
+
+
+def test_build_graph_materializes_authority(leading_dbs):
+    conn = sqlite3.connect(leading_dbs)
+    rows = dict(conn.execute(
+        "SELECT decision_id, cite_count FROM decision_authority"
+    ).fetchall())
+    conn.close()
+    assert rows == {"bger_a": 2, "bger_b": 1, "bger_c": 1}
+
+
+def test_query_path_ranks_fts_hits_by_authority(leading_dbs):
+    result = mcp_server._find_leading_cases(query="Tierhalterhaftung", limit=5)
+    assert [r["decision_id"] for r in result["results"]] == ["bger_a", "bger_b"]
+    assert result["results"][0]["citation_count"] == 2
+    assert result["results"][0]["docket_number"] == "4A_100/2019"
+    assert result["query"] == "Tierhalterhaftung"
+
+
+def test_query_path_applies_statute_filter_in_same_plan(leading_dbs):
+    result = mcp_server._find_leading_cases(
+        query="Tierhalterhaftung", law_code="OR", article="56", limit=5,
+    )
+    assert [r["decision_id"] for r in result["results"]] == ["bger_a"]
+
+
+def test_query_path_without_authority_table(leading_dbs):
+    conn = sqlite3.connect(leading_dbs)
+    conn.execute("DROP TABLE decision_authority")
+    conn.commit()
+    conn.close()
+    result = mcp_server._find_leading_cases(query="Tierhalterhaftung", limit=1)
+    assert [(r["decision_id"], r["citation_count"]) for r in result["results"]] == [
+        ("bger_a", 2),
+    ]
+
+
+def test_global_path_uses_authority(leading_dbs):
+    result = mcp_server._find_leading_cases(limit=2)
+    assert result["results"][0]["decision_id"] == "bger_a"
+    assert result["results"][0]["court"] == "bger"
+    assert result["total"] == 2
+
+
+def test_missing_graph_returns_error(leading_dbs, monkeypatch, tmp_path):
+    monkeypatch.setattr(mcp_server, "GRAPH_DB_PATH", tmp_path / "missing.db")
+    result = mcp_server._find_leading_cases(query="Tierhalterhaftung")
+    assert result == {"error": "Reference graph not available."}
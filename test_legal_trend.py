@@ -0,0 +1,175 @@
+"""Tests for analyze_legal_trend: statute histograms, decision_year, sampling."""
+
+import json
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+import mcp_server
+from db_schema import (
+    INSERT_COLUMNS,
+    INSERT_SQL,
+    SCHEMA_SQL,
+    decision_year,
+    migrate_decisions_schema,
+)
+from search_stack.build_reference_graph import build_graph
+
+
+def _row(i: int, date: str, text: str, court: str = "bger") -> dict:
+    return {
+        "decision_id": f"{court}_{i}",
+        "docket_number": f"4A_{i}/{date[:4]}",
+        "court": court,
+        "canton": "CH",
+        "language": "de",
+        "decision_date": date,
+        "title": "",
+        "regeste": "",
+        "full_text": text,
+    }
+
+
+ROWS = (
+    [_row(i, "2018-03-01", "Haftung nach Art. 41 OR.") for i in range(3)]
+    + [_row(10 + i, "2019-05-01", "Haftung nach Art. 41 Abs. 1 OR.") for i in range(2)]
+    + [_row(20, "2019-07-01", "Haftung, Art. 41 OR.", court="bvger")]
+    + [_row(30 + i, "2020-01-15", "Mietrecht, Kündigung.") for i in range(4)]
+)
+
+
+def _build_fts_db(path: Path, rows: list[dict]) -> None:
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA_SQL)
+    migrate_decisions_schema(conn)
+    for row in rows:
+        row = dict(row, decision_year=decision_year(row["decision_date"]))
+        conn.execute(INSERT_SQL, tuple(row.get(col) for col in INSERT_COLUMNS))
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def trend_dbs(tmp_path, monkeypatch):
+    input_dir = tmp_path / "decisions"
+    input_dir.mkdir()
+    (input_dir / "sample.jsonl").write_text(
+        "\n".join(json.dumps(r) for r in ROWS) + "\n", encoding="utf-8"
+    )
+    graph_path = tmp_path / "reference_graph.db"
+    build_graph(input_dir=input_dir, db_path=graph_path)
+    db_path = tmp_path / "decisions.db"
+    _build_fts_db(db_path, ROWS)
+    monkeypatch.setattr(mcp_server, "DB_PATH", db_path)
+    monkeypatch.setattr(mcp_server, "GRAPH_DB_PATH", graph_path)
+    return graph_path
+
+
+def _years(result: dict) -> dict[int, int]:
+    return {y["year"]: y["count"] for y in result["years"]}
+
+
+def test_decision_year_helper():
+    assert decision_year("2019-05-01") == 2019
+    assert decision_year(None) is None
+    assert decision_year("unknown") is None
+    assert decision_year("0001-01-01") is None
+
+
+def test_statute_trend_reads_histogram(trend_dbs):
+    result = mcp_server.analyze_legal_trend(law_code="OR", article="41")
+    assert _years(result) == {2018: 3, 2019: 3}
+    assert result["total"] == 6
+    assert "partial" not in result
+
+    by_court = mcp_server.analyze_legal_trend(law_code="OR", article="41", court="bvger")
+    assert _years(by_court) == {2019: 1}
+
+
+def test_statute_trend_partial_year_filter_falls_back_to_join(trend_dbs):
+    result = mcp_server.analyze_legal_trend(
+        law_code="OR", article="41", date_from="2019-06-01",
+    )
+    assert _years(result) == {2019: 1}
+
+
+def test_statute_trend_without_histogram_table(trend_dbs):
+    conn = sqlite3.connect(trend_dbs)
+    conn.execute("DROP TABLE statute_year_counts")
+    conn.commit()
+    conn.close()
+    result = mcp_server.analyze_legal_trend(law_code="OR", article="41")
+    assert _years(result) == {2018: 3, 2019: 3}
+
+
+def test_fts_trend_exact_counts(trend_dbs):
+    result = mcp_server.analyze_legal_trend(query="Haftung")
+    assert _years(result) == {2018: 3, 2019: 3}
+    assert "estimated" not in result
+
+
+def test_fts_trend_samples_common_terms(trend_dbs, monkeypatch):
+    monkeypatch.setattr(mcp_server, "TREND_SAMPLE_THRESHOLD", 3)
+    result = mcp_server.analyze_legal_trend(query="Haftung")
+    assert result["estimated"] is True
+    assert result["sample_every"] == 2
+    assert all(y["count"] % 2 == 0 for y in result["years"])
+
+    assert all(y["estimated"] for y in result["years"])
+    assert "exact=true" in result["note"]
+    assert "(estimate)" in mcp_server._format_trend_response(result)
+
+    exact = mcp_server.analyze_legal_trend(query="Haftung", exact=True)
+    assert "estimated" not in exact
+    assert exact["total"] == 6
+
+
+def test_filtered_fts_trends_are_exact(trend_dbs, monkeypatch):
+    monkeypatch.setattr(mcp_server, "TREND_SAMPLE_THRESHOLD", 3)
+    broad = mcp_server.analyze_legal_trend(query="Haftung", date_from="2018-01-01")
+    assert "estimated" not in broad
+    assert _years(broad) == {2018: 3, 2019: 3}
+
+    by_court = mcp_server.analyze_legal_trend(query="Haftung", court="bvger")
+    assert "estimated" not in by_court
+    assert _years(by_court) == {2019: 1}
+
+    by_date = mcp_server.analyze_legal_trend(query="Haftung", date_from="2019-01-01")
+    assert "estimated" not in by_date
+    assert _years(by_date) == {2019: 3}
+
+
+def test_iter_legal_trend_streams_cumulative_partials(trend_dbs):
+    results = list(mcp_server.iter_legal_trend(query="Haftung OR Mietrecht", window=3))
+    assert len(results) > 1
+    assert all(r["partial"] for r in results[:-1])
+    assert results[-1]["partial"] is False
+    totals = [r["total"] for r in results]
+    assert totals == sorted(totals)
+    assert _years(results[-1]) == {2018: 3, 2019: 3, 2020: 4}
+
+
+def test_migrate_adds_and_backfills_decision_year(tmp_path):
+    db_path = tmp_path / "old.db"
+    conn = sqlite3.connect(db_path)
+    conn.executescript(
+        SCHEMA_SQL.replace("canonical_key TEXT,\n        decision_year INTEGER", "canonical_key TEXT")
+    )
+    legacy_cols = [c for c in INSERT_COLUMNS if c != "decision_year"]
+    conn.execute(
+        f"INSERT INTO decisions ({', '.join(legacy_cols)}) "
+        f"VALUES ({', '.join('?' for _ in legacy_cols)})",
+        tuple(ROWS[0].get(c) for c in legacy_cols),
+    )
+    conn.commit()
+
+    assert migrate_decisions_schema(conn) == ["decision_year"]
+    assert migrate_decisions_schema(conn) == []
+    assert conn.execute("SELECT decision_year FROM decisions").fetchone()[0] == 2018
+    assert conn.execute(
+        "SELECT COUNT(*) FROM decisions_fts WHERE decisions_fts MATCH 'Haftung'"
+    ).fetchone()[0] == 1
+    indexes = {r[1] for r in conn.execute("PRAGMA index_list(decisions)")}
+    assert "idx_decisions_year" in indexes
+    conn.close()
@@ -0,0 +1,144 @@
+"""Tests for the local legislation mirror (sync job + mirror-first tool lookups)."""
+
+import copy
+import json
+from pathlib import Path
+
+import pytest
+
+import mcp_server
+from search_stack.sync_legislation_mirror import ReplayTransport, open_mirror, sync_mirror
+
+FIXTURE = Path(__file__).parent / "benchmarks" / "lexfind_replay.json"
+
+
+@pytest.fixture
+def mirror(tmp_path, monkeypatch):
+    db_path = tmp_path / "legislation_mirror.db"
+    conn = open_mirror(db_path)
+    stats = sync_mirror(conn, ReplayTransport(FIXTURE), entities=["ZH", "BE"])
+    assert stats["texts_fetched"] == 6
+    monkeypatch.setattr(mcp_server, "LEGISLATION_MIRROR_DB_PATH", db_path)
+    monkeypatch.setattr(mcp_server, "_get_legislation_local", lambda *a, **k: None)
+    monkeypatch.setattr(mcp_server, "_lexfind_cache_get", lambda key: None)
+    monkeypatch.setattr(mcp_server, "_lexfind_cache_set", lambda key, value: None)
+    yield conn
+    conn.close()
+
+
+def _no_upstream(*args, **kwargs):
+    raise AssertionError("LexFind called for a fresh mirror entry")
+
+
+def test_incremental_sync_only_refetches_changed_texts(mirror):
+    transport = ReplayTransport(FIXTURE)
+    stats = sync_mirror(mirror, transport, entities=["ZH", "BE"])
+    assert stats["feeds"] == 2
+    assert stats["texts_fetched"] == 0
+
+    # A newer change in the ZH feed queues exactly that text.
+    key = "GET de/entities/26/recent-changes"
+    feed = copy.deepcopy(transport.responses[key])
+    feed["recent_changes"][1]["change_date"] = "2025-01-10"
+    transport.responses[key] = feed
+    transport.calls.clear()
+    stats = sync_mirror(mirror, transport, entities=["ZH", "BE"])
+    assert stats["texts_fetched"] == 1
+    assert "GET de/texts-of-law/10012/with-version-groups" in transport.calls
+    cursor = mirror.execute("SELECT value FROM sync_state WHERE key = 'changes:ZH:de'").fetchone()[0]
+    assert cursor == "2025-01-10"
+
+
+def test_cut_off_and_failed_texts_stay_queued(mirror):
+    transport = ReplayTransport(FIXTURE)
+    key = "GET de/entities/26/recent-changes"
+    feed = copy.deepcopy(transport.responses[key])
+    for change in feed["recent_changes"]:
+        change["change_date"] = "2025-02-01"
+    transport.responses[key] = feed
+    ids = [c["text_of_law"]["id"] for c in feed["recent_changes"]]
+    failing = f"GET de/texts-of-law/{ids[1]}/with-version-groups"
+    saved = transport.responses.pop(failing)
+
+    stats = sync_mirror(mirror, transport, entities=["ZH"], max_texts=2)
+    assert (stats["texts_fetched"], stats["texts_failed"], stats["pending"]) == (1, 1, 2)
+    cursor = mirror.execute("SELECT value FROM sync_state WHERE key = 'changes:ZH:de'").fetchone()[0]
+    assert cursor == "2025-02-01"
+
+    # The cursor has moved past these changes; the queue still delivers them.
+    transport.responses[failing] = saved
+    transport.calls.clear()
+    stats = sync_mirror(mirror, transport, entities=["ZH"])
+    assert (stats["texts_fetched"], stats["pending"]) == (2, 0)
+    fetched = {c.split("/")[2] for c in transport.calls if "texts-of-law" in c}
+    assert fetched == {str(i) for i in ids[1:]}
+
+
+def test_text_is_dropped_after_repeated_failures(mirror, monkeypatch):
+    import search_stack.sync_legislation_mirror as sync
+
+    monkeypatch.setattr(sync, "MAX_FETCH_ATTEMPTS", 2)
+    transport = ReplayTransport(FIXTURE)
+    del transport.responses["GET de/texts-of-law/20023/with-version-groups"]
+    mirror.execute("UPDATE texts_of_law SET fetched_at = 0 WHERE lexfind_id = 20023")
+    mirror.commit()
+    assert sync_mirror(mirror, transport, entities=[])["pending"] == 1
+    stats = sync_mirror(mirror, transport, entities=[])
+    assert (stats["texts_dropped"], stats["pending"]) == (1, 0)
+
+
+def test_stale_texts_are_refetched(mirror):
+    mirror.execute("UPDATE texts_of_law SET fetched_at = 0 WHERE lexfind_id = 20023")
+    mirror.commit()
+    transport = ReplayTransport(FIXTURE)
+    stats = sync_mirror(mirror, transport, entities=[])
+    assert transport.calls == ["GET de/texts-of-law/20023/with-version-groups"]
+    assert stats["texts_fetched"] == 1
+
+
+def test_cantonal_lookup_is_served_from_mirror(mirror, monkeypatch):
+    monkeypatch.setattr(mcp_server, "_lexfind_request", _no_upstream)
+    by_sr = mcp_server._get_legislation(systematic_number="700.1", canton="ZH")
+    assert by_sr["lexfind_id"] == 10013
+    assert by_sr["entity"] == "ZH"
+    assert by_sr["current_version"]["title"] == "Planungs- und Baugesetz (PBG)"
+
+    by_id = mcp_server._get_legislation(lexfind_id=20022, include_versions=True)
+    assert by_id["systematic_number"] == "721.0"
+    assert len(by_id["versions"]) == 2
+
+    changes = mcp_server._browse_legislation_changes(canton="BE")
+    assert [c["lexfind_id"] for c in changes["changes"]] == [20021, 20022, 20023]
+
+
+def test_stale_entry_goes_live_and_survives_upstream_failure(mirror, monkeypatch):
+    mirror.execute("UPDATE texts_of_law SET fetched_at = 0")
+    mirror.execute("UPDATE recent_changes SET fetched_at = 0")
+    mirror.commit()
+    calls = []
+
+    def failing(method, path, language="de", json_body=None, timeout=None):
+        calls.append(path)
+        return None
+
+    monkeypatch.setattr(mcp_server, "_lexfind_request", failing)
+    result = mcp_server._get_legislation(lexfind_id=10011)
+    assert calls == ["texts-of-law/10011/with-version-groups"]
+    assert result["systematic_number"] == "131.1"
+
+    changes = mcp_server._browse_legislation_changes(canton="ZH")
+    assert calls[-1] == "entities/26/recent-changes"
+    assert len(changes["changes"]) == 3
+
+
+def test_missing_mirror_falls_through_to_live(tmp_path, monkeypatch):
+    monkeypatch.setattr(mcp_server, "LEGISLATION_MIRROR_DB_PATH", tmp_path / "absent.db")
+    monkeypatch.setattr(mcp_server, "_lexfind_cache_get", lambda key: None)
+    monkeypatch.setattr(mcp_server, "_lexfind_cache_set", lambda key, value: None)
+    payload = json.loads(FIXTURE.read_text(encoding="utf-8"))
+    monkeypatch.setattr(
+        mcp_server, "_lexfind_request",
+        lambda method, path, language="de", **_kw: payload.get(f"{method} {language}/{path}"),
+    )
+    result = mcp_server._get_legislation(lexfind_id=20021)
+    assert result["entity"] == "BE"
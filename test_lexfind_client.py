@@ -0,0 +1,142 @@
+"""Tests for the pooled LexFind client and its two-tier cache (local stub server)."""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import mcp_server
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def _reply(self, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.hits.append(self.path)
+        time.sleep(self.server.delay)
+        self._reply({"path": self.path})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        with self.server.lock:
+            self.server.hits.append(self.path)
+        self._reply({"id": 7, "echo": body})
+
+    def log_message(self, *_args):
+        pass
+
+
+@pytest.fixture
+def stub(monkeypatch, tmp_path):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    server.daemon_threads = True
+    server.connections = 0
+    server.hits = []
+    server.lock = threading.Lock()
+    server.delay = 0.0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    monkeypatch.setattr(mcp_server, "LEXFIND_BASE_URL", f"http://127.0.0.1:{server.server_port}")
+    monkeypatch.setattr(mcp_server, "LEXFIND_CACHE_DB_PATH", tmp_path / "lexfind_cache.db")
+    monkeypatch.setattr(mcp_server, "_LEXFIND_SESSION", None)
+    monkeypatch.setattr(mcp_server, "_LEXFIND_MEMORY", mcp_server.OrderedDict())
+    monkeypatch.setattr(mcp_server, "_lexfind_cache_broken", False)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_sequential_calls_reuse_one_connection(stub):
+    for i in range(5):
+        assert mcp_server._lexfind_request("GET", f"texts-of-law/{i}") == {"path": f"/de/texts-of-law/{i}"}
+    resp = mcp_server._lexfind_request("POST", "fulltext-search", json_body={"search_text": "Miete"})
+    assert resp == {"id": 7, "echo": {"search_text": "Miete"}}
+    assert stub.connections == 1
+
+
+def test_concurrent_identical_requests_share_one_upstream_call(stub):
+    stub.delay = 0.2
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(
+            lambda _i: mcp_server._lexfind_request("GET", "entities/27/recent-changes"), range(8),
+        ))
+    assert all(r == {"path": "/de/entities/27/recent-changes"} for r in results)
+    assert stub.hits == ["/de/entities/27/recent-changes"]
+    assert not mcp_server._LEXFIND_INFLIGHT
+
+
+def test_cached_and_coalesced_results_are_private_copies(stub):
+    value = {"title": "OR", "articles": [1, 2]}
+    mcp_server._lexfind_cache_set("law:de:3:False", value)
+    value["articles"].append(3)
+    first = mcp_server._lexfind_cache_get("law:de:3:False")
+    first["articles"].clear()
+    assert mcp_server._lexfind_cache_get("law:de:3:False") == {"title": "OR", "articles": [1, 2]}
+
+    stub.delay = 0.2
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(
+            lambda _i: mcp_server._lexfind_request("GET", "entities/1/recent-changes"), range(4),
+        ))
+    assert stub.hits == ["/de/entities/1/recent-changes"]
+    assert len({id(r) for r in results}) == len(results)
+
+
+def test_memory_tier_serves_hits_without_sqlite(stub, monkeypatch):
+    mcp_server._lexfind_cache_set("law:de:1:False", {"title": "OR"})
+
+    def no_db():
+        raise AssertionError("SQLite opened on a memory hit")
+
+    monkeypatch.setattr(mcp_server, "_get_lexfind_cache_conn", no_db)
+    assert mcp_server._lexfind_cache_get("law:de:1:False") == {"title": "OR"}
+
+
+def test_disk_tier_refills_memory(stub):
+    mcp_server._lexfind_cache_set("law:de:2:False", {"title": "ZGB"})
+    mcp_server._LEXFIND_MEMORY.clear()
+    assert mcp_server._lexfind_cache_get("law:de:2:False") == {"title": "ZGB"}
+    assert "law:de:2:False" in mcp_server._LEXFIND_MEMORY
+    assert mcp_server._lexfind_cache_get("law:de:missing:False") is None
+
+
+def test_memory_tier_is_bounded(stub, monkeypatch):
+    monkeypatch.setattr(mcp_server, "LEXFIND_MEMORY_CACHE_SIZE", 3)
+    for i in range(5):
+        mcp_server._lexfind_cache_set(f"search:{i}", i)
+    assert list(mcp_server._LEXFIND_MEMORY) == ["search:2", "search:3", "search:4"]
+
+
+def test_eviction_trims_expired_and_oldest_rows(stub, monkeypatch):
+    monkeypatch.setattr(mcp_server, "LEXFIND_CACHE_MAX_ROWS", 3)
+    monkeypatch.setattr(mcp_server, "LEXFIND_CACHE_EVICT_EVERY", 10_000)
+    for i in range(6):
+        mcp_server._lexfind_cache_set(f"search:{i}", i)
+    with mcp_server._LEXFIND_DB_LOCK:
+        conn = mcp_server._get_lexfind_cache_conn()
+        conn.execute("UPDATE cache SET expires_at = 0 WHERE key = 'search:5'")
+        conn.commit()
+    assert mcp_server._lexfind_cache_evict() == 3
+    with mcp_server._LEXFIND_DB_LOCK:
+        keys = [r[0] for r in mcp_server._get_lexfind_cache_conn().execute(
+            "SELECT key FROM cache ORDER BY key"
+        )]
+    assert keys == ["search:2", "search:3", "search:4"]
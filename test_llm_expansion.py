@@ -2,12 +2,19 @@
 
 from __future__ import annotations
 
+import json
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest.mock import patch
 
 import pytest
 
 import mcp_server
+from benchmarks.run_load_benchmark import build_fixture_db
+from search_stack import tracing
 from mcp_server import (
     _expand_query_with_llm,
     _build_query_strategies,
@@ -155,6 +162,105 @@ class TestBuildQueryStrategiesIntegration:
             mcp_server.LLM_EXPANSION_ENABLED = orig
 
 
+# ---------------------------------------------------------------------------
+# Local fake completion endpoint
+# ---------------------------------------------------------------------------
+
+
+class _FakeCompletionHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        with self.server.lock:
+            self.server.queries.append(body["messages"][0]["content"])
+        time.sleep(self.server.delay)
+        payload = json.dumps({"content": [{"type": "text", "text": "Mietvertrag\nbail à loyer\n"}]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *_args):
+        pass
+
+
+@pytest.fixture
+def fake_llm(tmp_path, monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeCompletionHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.queries = []
+    server.delay = 0.0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(mcp_server, "LLM_EXPANSION_ENABLED", True)
+    monkeypatch.setattr(mcp_server, "ANTHROPIC_API_KEY", "test-key")
+    monkeypatch.setattr(mcp_server, "LLM_EXPANSION_URL", f"http://127.0.0.1:{server.server_port}/v1/messages")
+    monkeypatch.setattr(mcp_server, "LLM_EXPANSION_CACHE_DB_PATH", tmp_path / "llm_expansion_cache.db")
+    monkeypatch.setattr(mcp_server, "_LLM_EXPANSION_CACHE", mcp_server.OrderedDict())
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_concurrent_identical_queries_share_one_request(fake_llm):
+    fake_llm.delay = 0.2
+    queries = ["Mietrecht Kündigung", "mietrecht  kündigung", "MIETRECHT Kündigung "] * 3
+    with ThreadPoolExecutor(max_workers=len(queries)) as pool:
+        results = list(pool.map(_expand_query_with_llm, queries))
+    assert all(r == ["Mietvertrag", "bail à loyer"] for r in results)
+    assert len(fake_llm.queries) == 1
+
+
+def test_expansions_persist_across_restarts(fake_llm):
+    assert _expand_query_with_llm("Eigenbedarf") == ["Mietvertrag", "bail à loyer"]
+    # Simulate a restart: empty memory tier, fresh DB connection.
+    mcp_server._LLM_EXPANSION_CACHE.clear()
+    with mcp_server._LLM_EXPANSION_LOCK:
+        mcp_server._LLM_EXPANSION_DB[1].close()
+        mcp_server._LLM_EXPANSION_DB = None
+    assert _expand_query_with_llm("eigenbedarf") == ["Mietvertrag", "bail à loyer"]
+    assert len(fake_llm.queries) == 1
+
+
+def test_memory_tier_is_bounded(fake_llm, monkeypatch):
+    monkeypatch.setattr(mcp_server, "LLM_EXPANSION_MEMORY_SIZE", 2)
+    for q in ("a1", "a2", "a3"):
+        _expand_query_with_llm(q)
+    assert list(mcp_server._LLM_EXPANSION_CACHE) == ["a2", "a3"]
+
+
+def test_deadline_bounds_the_wait_and_late_result_is_cached(fake_llm):
+    fake_llm.delay = 0.5
+    future = mcp_server._start_llm_expansion("Kündigungsschutz")
+    t0 = time.perf_counter()
+    assert mcp_server._await_llm_expansion(future, t0 + 0.05) == []
+    assert time.perf_counter() - t0 < 0.3
+    assert future.result(timeout=5) == ["Mietvertrag", "bail à loyer"]
+    assert mcp_server._llm_expansion_cache_get("kündigungsschutz") == ["Mietvertrag", "bail à loyer"]
+
+
+def test_search_merges_expansion_only_when_in_time(fake_llm, tmp_path, monkeypatch):
+    db_path = tmp_path / "decisions.db"
+    build_fixture_db(db_path, 100, seed=5)
+    monkeypatch.setattr(mcp_server, "DB_PATH", db_path)
+    monkeypatch.setattr(mcp_server, "LLM_EXPANSION_DEADLINE_MS", 100)
+
+    fake_llm.delay = 1.0
+    with tracing.trace("tool", "slow_llm") as record:
+        t0 = time.perf_counter()
+        mcp_server.search_fts5(query="Mietzins Herabsetzung", limit=5)
+        elapsed = time.perf_counter() - t0
+    assert elapsed < 0.8
+    assert "fts.llm_expanded" not in record.stages
+
+    fake_llm.delay = 0.0
+    with tracing.trace("tool", "fast_llm") as record:
+        mcp_server.search_fts5(query="Mietzins Erhöhung", limit=5)
+    assert "fts.llm_expanded" in record.stages
+
+
 # ---------------------------------------------------------------------------
 # Live tests (require ANTHROPIC_API_KEY and network access)
 # ---------------------------------------------------------------------------
@@ -0,0 +1,74 @@
+import time
+
+from benchmarks.run_load_benchmark import (
+    StageRecorder,
+    build_fixture_db,
+    compare_to_baseline,
+    instrument,
+    load_query_mix,
+    run_load,
+    summarize,
+)
+
+
+def test_stage_recorder_reports_exclusive_time():
+    recorder = StageRecorder()
+    inner = recorder.timed("snippet", lambda: time.sleep(0.05))
+    outer = recorder.timed("rerank", lambda: (inner(), time.sleep(0.01)))
+
+    outer()  # outside a request: not recorded
+    recorder.begin()
+    outer()
+    stages = recorder.end()
+    assert set(stages) == {"rerank", "snippet"}
+    assert stages["snippet"] >= 0.05
+    assert 0.01 <= stages["rerank"] < 0.04
+
+
+def test_summarize_and_baseline_gate():
+    samples = {"total": [0.01 * i for i in range(1, 101)], "fts": [0.002] * 50}
+    stages = summarize(samples, completed=100)
+    assert stages["total"]["p50_ms"] == 510.0
+    assert stages["total"]["p99_ms"] == 1000.0
+    assert stages["fts"]["share"] == 0.5
+
+    baseline = {"total": {"p95_ms": 700.0}, "fts": {"p95_ms": 0.5}}
+    regressions = compare_to_baseline(stages, baseline, max_regression=0.25, min_baseline_ms=1.0)
+    assert [r["stage"] for r in regressions] == ["total"]
+    assert compare_to_baseline(stages, baseline, max_regression=0.5, min_baseline_ms=1.0) == []
+
+
+def test_query_mix_formats(tmp_path):
+    path = tmp_path / "mix.jsonl"
+    path.write_text('{"query": "Miete", "court": "bger"}\nTierhalter Hund\n\n', encoding="utf-8")
+    assert load_query_mix(path) == [
+        {"query": "Miete", "court": "bger"},
+        {"query": "Tierhalter Hund", "limit": 10},
+    ]
+
+
+def test_fixture_replay_records_fts_stage(tmp_path, monkeypatch):
+    import mcp_server
+
+    db_path = tmp_path / "decisions.db"
+    mix = build_fixture_db(db_path, 200, seed=3)
+    assert any(item.get("op") == "get" for item in mix)
+
+    monkeypatch.setattr(mcp_server, "DB_PATH", db_path)
+    for attr in ("get_db", "_rerank_rows", "_search_by_docket", "_search_vectors",
+                 "_search_vectors_chunks", "_search_sparse", "_apply_cross_encoder_boosts",
+                 "_select_best_passage_snippet"):
+        monkeypatch.setattr(mcp_server, attr, getattr(mcp_server, attr))
+    recorder = StageRecorder()
+    instrument(mcp_server, recorder)
+
+    def call(item):
+        recorder.begin()
+        if item.get("op") != "get":
+            mcp_server.search_fts5(**item)
+        return recorder.end()
+
+    result = run_load(call, mix, requests=20, concurrency=2, rate=None)
+    assert result["errors"] == 0
+    assert len(result["samples"]["total"]) == 20
+    assert result["samples"].get("fts")
@@ -0,0 +1,117 @@
+"""Tests for search_stack.merge_shards (plain tables stand in for vec0)."""
+
+import sqlite3
+
+import pytest
+
+import search_stack.build_vectors as bv
+import search_stack.merge_shards as ms
+
+
+def _plain_vec_db(path, *, enable_sparse=False, enable_chunks=False):
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS vec_decisions "
+        "(decision_id TEXT PRIMARY KEY, embedding BLOB, language TEXT)"
+    )
+    conn.execute(bv.EMBED_STATE_SQL)
+    if enable_sparse:
+        conn.executescript(bv.SPARSE_TABLES_SQL)
+    if enable_chunks:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS vec_chunks "
+            "(chunk_id TEXT PRIMARY KEY, embedding BLOB, language TEXT)"
+        )
+        conn.executescript(bv.CHUNK_META_TABLE_SQL)
+    conn.commit()
+    return conn
+
+
+@pytest.fixture(autouse=True)
+def plain_tables(monkeypatch):
+    monkeypatch.setattr(bv, "create_vec_db", _plain_vec_db)
+    monkeypatch.setattr(ms, "_open_shard", lambda path: sqlite3.connect(str(path)))
+
+
+def _shard(path, docs):
+    """docs: {decision_id: text_hash}; each gets 2 sparse terms and 1 chunk."""
+    conn = _plain_vec_db(str(path), enable_sparse=True, enable_chunks=True)
+    for did, text_hash in docs.items():
+        conn.execute("INSERT INTO vec_decisions VALUES (?, ?, 'de')", (did, text_hash.encode()))
+        conn.executemany(
+            "INSERT INTO sparse_terms VALUES (?, ?, 0.5)", [(did, 10), (did, 11)],
+        )
+        conn.execute("INSERT INTO chunk_meta VALUES (?, ?, 0)", (f"{did}__chunk_0", did))
+        conn.execute("INSERT INTO vec_chunks VALUES (?, ?, 'de')", (f"{did}__chunk_0", b"x"))
+        conn.execute("INSERT INTO embed_state VALUES (?, ?)", (did, text_hash))
+    conn.commit()
+    conn.close()
+    return path
+
+
+def _rows(db, sql):
+    conn = sqlite3.connect(str(db))
+    try:
+        return conn.execute(sql).fetchall()
+    finally:
+        conn.close()
+
+
+def test_merge_copies_all_tables_and_builds_indexes(tmp_path):
+    shards = [
+        _shard(tmp_path / "s0.db", {"a": "h1", "b": "h1"}),
+        _shard(tmp_path / "s1.db", {"c": "h1"}),
+    ]
+    out = tmp_path / "vectors.db"
+    stats = ms.merge_shards(shards, out, enable_sparse=True)
+
+    assert stats["total_dense"] == 3
+    assert stats["total_sparse"] == 6
+    assert stats["total_chunks"] == 3
+    assert [s["decisions"] for s in stats["shards"]] == [2, 1]
+    assert _rows(out, "SELECT COUNT(*) FROM chunk_meta") == [(3,)]
+    indexes = {r[0] for r in _rows(out, "SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {"idx_sparse_token", "idx_chunk_meta_decision"} <= indexes
+
+
+def test_incremental_merge_replaces_changed_and_drops_removed(tmp_path):
+    out = tmp_path / "vectors.db"
+    ms.merge_shards(
+        [_shard(tmp_path / "s0.db", {"a": "h1", "b": "h1"}), _shard(tmp_path / "s1.db", {"c": "h1"})],
+        out, enable_sparse=True,
+    )
+
+    (tmp_path / "s0.db").unlink()
+    (tmp_path / "s1.db").unlink()
+    shards = [
+        _shard(tmp_path / "s0.db", {"a": "h1", "b": "h2"}),
+        _shard(tmp_path / "s1.db", {"d": "h1"}),
+    ]
+    stats = ms.merge_shards(shards, out, enable_sparse=True, incremental=True)
+
+    assert [s["decisions"] for s in stats["shards"]] == [1, 1]
+    assert stats["removed"] == 1
+    assert _rows(out, "SELECT decision_id, embedding FROM vec_decisions ORDER BY 1") == [
+        ("a", b"h1"), ("b", b"h2"), ("d", b"h1"),
+    ]
+    assert _rows(out, "SELECT COUNT(*) FROM sparse_terms") == [(6,)]
+    assert _rows(out, "SELECT COUNT(*) FROM vec_chunks") == [(3,)]
+
+
+def test_incremental_merge_reloads_dropped_sparse_terms(tmp_path):
+    out = tmp_path / "vectors.db"
+    s0 = _shard(tmp_path / "s0.db", {"a": "h1", "b": "h1"})
+    s1 = _shard(tmp_path / "s1.db", {"c": "h1"})
+    ms.merge_shards([s0, s1], out, enable_sparse=True)
+    bv.build_sparse_postings_for_db(out, drop_table=True)
+
+    # Second build in a row: only "b" changed, but the postings are rebuilt
+    # from sparse_terms, which must cover every decision again.
+    s0.unlink()
+    _shard(s0, {"a": "h1", "b": "h2"})
+    stats = ms.merge_shards([s0, s1], out, enable_sparse=True, incremental=True)
+    assert [s["decisions"] for s in stats["shards"]] == [1, 0]
+    assert _rows(out, "SELECT decision_id, COUNT(*) FROM sparse_terms GROUP BY 1 ORDER BY 1") == [
+        ("a", 2), ("b", 2), ("c", 2),
+    ]
+    assert bv.build_sparse_postings_for_db(out)["docs"] == 3
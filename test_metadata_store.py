@@ -0,0 +1,204 @@
+"""Tests for the in-memory metadata store used by the search path."""
+
+import os
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import mcp_server
+from db_schema import INSERT_COLUMNS, INSERT_SQL, SCHEMA_SQL
+
+
+def _row(decision_id, court, docket, date, language="de", canton="CH"):
+    return {
+        "decision_id": decision_id,
+        "court": court,
+        "canton": canton,
+        "docket_number": docket,
+        "decision_date": date,
+        "language": language,
+        "title": "",
+        "regeste": "",
+        "full_text": "text",
+    }
+
+
+ROWS = [
+    _row("bger_4A_1_2020", "bger", "4A_1/2020", "2020-03-01"),
+    _row("bger_4A.1.2020", "bger", "4A.1.2020", "2020-03-01"),  # formatting twin
+    _row("bvger_E-1_2019", "bvger", "E-1/2019", "2019-06-01", language="fr"),
+    _row("zh_og_1", "zh_obergericht", "LB190001", "2018-01-01", canton="ZH"),
+]
+
+
+def _build_db(path: Path, rows: list[dict]) -> None:
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA_SQL)
+    for row in rows:
+        conn.execute(INSERT_SQL, tuple(row.get(col) for col in INSERT_COLUMNS))
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def store_env(tmp_path, monkeypatch):
+    db_path = tmp_path / "decisions.db"
+    _build_db(db_path, ROWS)
+    monkeypatch.setattr(mcp_server, "DB_PATH", db_path)
+    monkeypatch.setattr(mcp_server, "GRAPH_DB_PATH", tmp_path / "missing_graph.db")
+    monkeypatch.setattr(mcp_server, "METADATA_STORE_ENABLED", True)
+    monkeypatch.setattr(mcp_server, "_METADATA_STORE", None)
+    monkeypatch.setattr(mcp_server, "_METADATA_STORE_FAILURES", 0)
+    monkeypatch.setattr(mcp_server, "_METADATA_STORE_RETRY_AT", 0.0)
+    return db_path
+
+
+def test_store_disabled_by_default(monkeypatch):
+    monkeypatch.setattr(mcp_server, "METADATA_STORE_ENABLED", False)
+    assert mcp_server._get_metadata_store() is None
+
+
+def test_store_loads_compact_columns(store_env):
+    store = mcp_server._get_metadata_store(wait=True)
+    assert store is not None
+    assert len(store) == len(ROWS)
+    assert store.nbytes < 100 * len(ROWS)
+    assert set(store.positions(["bger_4A_1_2020", "unknown"])) == {"bger_4A_1_2020"}
+
+
+def test_store_filters_like_sql(store_env):
+    store = mcp_server._get_metadata_store(wait=True)
+    ids = [r["decision_id"] for r in ROWS] + ["not_in_db"]
+    assert store.filter_ids(ids, court="BGER") == ["bger_4A_1_2020", "bger_4A.1.2020"]
+    assert store.filter_ids(ids, language="fr") == ["bvger_E-1_2019"]
+    assert store.filter_ids(ids, canton="zh") == ["zh_og_1"]
+    assert store.filter_ids(ids, date_from="2019-01-01", date_to="2019-12-31") == [
+        "bvger_E-1_2019",
+    ]
+    assert store.filter_ids(ids, court="no_such_court") == []
+
+
+def test_store_dedupes_canonical_twins(store_env):
+    store = mcp_server._get_metadata_store(wait=True)
+    ids = ["bger_4A.1.2020", "bger_4A_1_2020", "zh_og_1"]
+    assert store.dedupe_ids(ids) == ["bger_4A.1.2020", "zh_og_1"]
+
+    rows = [{"decision_id": did, "court": "x", "docket_number": did, "decision_date": ""} for did in ids]
+    assert [r["decision_id"] for r in mcp_server._dedupe_results_by_decision_id(rows)] == [
+        "bger_4A.1.2020", "zh_og_1",
+    ]
+
+
+def test_store_refreshes_on_db_generation_change(store_env):
+    store = mcp_server._get_metadata_store(wait=True)
+    _build_db(store_env.with_name("new.db"), ROWS[:2])
+    os.replace(store_env.with_name("new.db"), store_env)
+    refreshed = mcp_server._get_metadata_store(wait=True)
+    assert refreshed is not store
+    assert len(refreshed) == 2
+
+
+def test_extra_candidates_respect_filters(store_env, monkeypatch):
+    assert mcp_server._get_metadata_store(wait=True) is not None
+    conn = mcp_server.get_db()
+    try:
+        ids = [r["decision_id"] for r in ROWS]
+        kwargs = dict(
+            where=" AND d.court = ?",
+            params=["bger"],
+            filters={"court": "bger", "canton": None, "language": None,
+                     "date_from": None, "date_to": None},
+        )
+        with_store = mcp_server._fetch_extra_candidate_rows(conn, ids, **kwargs)
+        assert [r["decision_id"] for r in with_store] == ["bger_4A_1_2020"]
+
+        monkeypatch.setattr(mcp_server, "METADATA_STORE_ENABLED", False)
+        without_store = mcp_server._fetch_extra_candidate_rows(conn, ids, **kwargs)
+        assert sorted(r["decision_id"] for r in without_store) == [
+            "bger_4A.1.2020", "bger_4A_1_2020",
+        ]
+    finally:
+        conn.close()
+
+
+def test_failed_load_is_retried_after_backoff(store_env, monkeypatch):
+    real_load = mcp_server._load_metadata_store
+    calls = []
+
+    def flaky_load():
+        calls.append(1)
+        if len(calls) == 1:
+            raise sqlite3.OperationalError("database is locked")
+        return real_load()
+
+    monkeypatch.setattr(mcp_server, "_load_metadata_store", flaky_load)
+    assert mcp_server._get_metadata_store(wait=True) is None
+    assert mcp_server._get_metadata_store(wait=True) is None  # inside the backoff window
+    assert len(calls) == 1
+
+    monkeypatch.setattr(mcp_server, "_METADATA_STORE_RETRY_AT", 0.0)
+    assert mcp_server._get_metadata_store(wait=True) is not None
+    assert mcp_server._METADATA_STORE_FAILURES == 0
+
+
+def _graph_db(path, script):
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE decision_citations (source_decision_id TEXT, target_ref TEXT, mention_count INTEGER);
+        CREATE TABLE decision_statutes (decision_id TEXT, statute_id TEXT, mention_count INTEGER);
+    """ + script)
+    conn.commit()
+    conn.close()
+
+
+def _incoming(ids):
+    signals = mcp_server._load_graph_signal_map(ids, query_statutes=set(), query_citations=set())
+    return {did: s["incoming_citations"] for did, s in signals.items()}
+
+
+def test_store_authority_matches_weighted_sql_signal(store_env, tmp_path, monkeypatch):
+    graph_path = tmp_path / "graph.db"
+    _graph_db(graph_path, """
+        CREATE TABLE citation_targets (source_decision_id TEXT, target_ref TEXT,
+                                       target_decision_id TEXT, confidence_score REAL);
+        CREATE TABLE decision_authority (decision_id TEXT PRIMARY KEY, cite_count INTEGER NOT NULL);
+        INSERT INTO decision_citations VALUES ('zh_og_1', 'BGE 1', 3), ('bvger_E-1_2019', 'BGE 1', 2);
+        INSERT INTO citation_targets VALUES ('zh_og_1', 'BGE 1', 'bger_4A_1_2020', 0.9),
+                                            ('bvger_E-1_2019', 'BGE 1', 'bger_4A_1_2020', NULL);
+        INSERT INTO decision_authority VALUES ('bger_4A_1_2020', 2);
+    """)
+    monkeypatch.setattr(mcp_server, "GRAPH_DB_PATH", graph_path)
+    ids = ["bger_4A_1_2020", "zh_og_1"]
+
+    monkeypatch.setattr(mcp_server, "METADATA_STORE_ENABLED", False)
+    without_store = _incoming(ids)
+    monkeypatch.setattr(mcp_server, "METADATA_STORE_ENABLED", True)
+    store = mcp_server._get_metadata_store(wait=True)
+    assert store.authority_loaded
+    assert _incoming(ids) == without_store
+    assert without_store == {"bger_4A_1_2020": pytest.approx(3 * 0.9 + 2), "zh_og_1": 0.0}
+
+
+def test_graph_without_citation_targets_falls_back_to_sql(store_env, tmp_path, monkeypatch):
+    graph_path = tmp_path / "graph.db"
+    _graph_db(graph_path, """
+        ALTER TABLE decision_citations ADD COLUMN target_decision_id TEXT;
+        INSERT INTO decision_citations VALUES ('zh_og_1', 'BGE 1', 4, 'bger_4A_1_2020');
+    """)
+    monkeypatch.setattr(mcp_server, "GRAPH_DB_PATH", graph_path)
+    ids = ["bger_4A_1_2020", "zh_og_1"]
+
+    monkeypatch.setattr(mcp_server, "METADATA_STORE_ENABLED", False)
+    without_store = _incoming(ids)
+    monkeypatch.setattr(mcp_server, "METADATA_STORE_ENABLED", True)
+    assert mcp_server._get_metadata_store(wait=True) is not None
+    assert _incoming(ids) == without_store == {"bger_4A_1_2020": 4.0, "zh_og_1": 0.0}
+
+    # No resolved targets at all: the store has nothing to serve
+    _graph_db(tmp_path / "bare.db", "")
+    monkeypatch.setattr(mcp_server, "GRAPH_DB_PATH", tmp_path / "bare.db")
+    monkeypatch.setattr(mcp_server, "_METADATA_STORE", None)
+    assert not mcp_server._get_metadata_store(wait=True).authority_loaded
@@ -40,7 +40,7 @@ def test_collect_statute_requests_merges_explicit_and_extracted():
     assert len(labels) == len(refs)
 
 
-def test_draft_mock_decision_includes_cases_and_statutes(monkeypatch):
+def test_draft_mock_decision_includes_cases_and_statutes(monkeypatch, tmp_path):
     def _fake_search(query: str, **_kwargs):
         q = (query or "").lower()
         if "art. 3 asylg" in q:
@@ -56,8 +56,8 @@ def test_draft_mock_decision_includes_cases_and_statutes(monkeypatch):
         "_search_graph_decisions_for_statutes",
         lambda **_kwargs: [],
     )
-    monkeypatch.setattr(mcp_server, "_load_fedlex_cache", lambda: {})
-    monkeypatch.setattr(mcp_server, "_save_fedlex_cache", lambda cache: None)
+    monkeypatch.setattr(mcp_server, "FEDLEX_CACHE_DB_PATH", tmp_path / "fedlex_cache.db")
+    monkeypatch.setattr(mcp_server, "FEDLEX_CACHE_PATH", tmp_path / "fedlex_cache.json")
     monkeypatch.setattr(
         mcp_server,
         "_fetch_fedlex_article_text",
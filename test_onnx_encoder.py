@@ -0,0 +1,146 @@
+"""Tests for the ONNX Runtime int8 encoders.
+
+The parity tests compare an exported int8 graph against the PyTorch models
+on a fixture query set; they are ``live`` (model download + export) and read
+the graphs from SWISS_CASELAW_ONNX_DIR.
+"""
+
+import os
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import mcp_server
+from search_stack import onnx_encoder
+from search_stack.onnx_encoder import lexical_weights
+
+
+def test_lexical_weights_max_per_token_and_skips_specials():
+    ids = np.array([[0, 15, 27, 15, 2, 1]])
+    weights = np.array([[0.9, 0.2, 0.0, 0.4, 0.8, 0.0]], dtype=np.float32)
+    out = lexical_weights(ids, weights, skip_ids={0, 1, 2, 3})
+    assert out == [{"15": pytest.approx(0.4)}]
+
+
+def test_backend_torch_never_loads_onnx(monkeypatch, tmp_path):
+    (tmp_path / onnx_encoder.QUERY_ENCODER_DIRNAME).mkdir()
+    (tmp_path / onnx_encoder.QUERY_ENCODER_DIRNAME / "model.onnx").write_bytes(b"")
+    monkeypatch.setattr(mcp_server, "ONNX_MODEL_DIR", tmp_path)
+    monkeypatch.setattr(mcp_server, "ENCODER_BACKEND", "torch")
+    assert mcp_server._load_onnx_model("query") is None
+
+
+def test_auto_backend_prefers_exported_graph(monkeypatch, tmp_path):
+    loaded = []
+
+    class FakeEncoder:
+        def __init__(self, model_dir, threads=None):
+            loaded.append(Path(model_dir).name)
+
+    monkeypatch.setattr(onnx_encoder, "OnnxCrossEncoder", FakeEncoder)
+    monkeypatch.setattr(mcp_server, "ONNX_MODEL_DIR", tmp_path)
+    monkeypatch.setattr(mcp_server, "ENCODER_BACKEND", "auto")
+    assert mcp_server._load_onnx_model("cross") is None  # not exported yet
+
+    (tmp_path / onnx_encoder.CROSS_ENCODER_DIRNAME).mkdir()
+    (tmp_path / onnx_encoder.CROSS_ENCODER_DIRNAME / "model.onnx").write_bytes(b"")
+    assert isinstance(mcp_server._load_onnx_model("cross"), FakeEncoder)
+    assert loaded == [onnx_encoder.CROSS_ENCODER_DIRNAME]
+
+
+# ---------------------------------------------------------------------------
+# Parity against PyTorch (live)
+# ---------------------------------------------------------------------------
+
+PARITY_QUERIES = [
+    "Tierhalterhaftung Hundebiss",
+    "Kündigung Mietvertrag Eigenbedarf",
+    "responsabilité du détenteur d'animal",
+    "licenziamento immediato giusti motivi",
+    "Art. 8 EMRK Familiennachzug",
+    "Verjährung Schadenersatz Art. 60 OR",
+    "bail à loyer résiliation abusive",
+    "Steuerhinterziehung Busse Verschulden",
+    "unentgeltliche Rechtspflege Aussichtslosigkeit",
+    "protection des données surveillance vidéo",
+    "BGE 140 III 86",
+    "Invalidenrente Validenkarriere Einkommensvergleich",
+]
+
+PARITY_PASSAGES = [
+    "Der Halter eines Tieres haftet für den von ihm verursachten Schaden (Art. 56 OR).",
+    "Die Kündigung wegen dringenden Eigenbedarfs des Vermieters ist zulässig.",
+    "Le détenteur d'un animal répond du dommage causé par celui-ci.",
+    "Il datore di lavoro può disdire immediatamente il rapporto per cause gravi.",
+    "Der Anspruch auf Familiennachzug stützt sich auf Art. 8 EMRK.",
+    "Der Anspruch auf Schadenersatz verjährt mit Ablauf eines Jahres.",
+    "La résiliation du bail est annulable si elle contrevient à la bonne foi.",
+    "Wer vorsätzlich Steuern hinterzieht, wird mit Busse bestraft.",
+]
+
+ONNX_DIR = Path(os.environ.get("SWISS_CASELAW_ONNX_DIR", str(mcp_server.ONNX_MODEL_DIR)))
+
+
+def _top_k(sims, k):
+    return list(np.argsort(-sims)[:k])
+
+
+@pytest.mark.live
+def test_query_encoder_parity_with_pytorch():
+    pytest.importorskip("onnxruntime")
+    flag = pytest.importorskip("FlagEmbedding")
+    model_dir = ONNX_DIR / onnx_encoder.QUERY_ENCODER_DIRNAME
+    if not (model_dir / "model.onnx").exists():
+        pytest.skip(f"no exported query encoder in {model_dir}")
+
+    reference = flag.BGEM3FlagModel(onnx_encoder.DEFAULT_QUERY_MODEL, use_fp16=False)
+    candidate = onnx_encoder.OnnxQueryEncoder(model_dir)
+    texts = PARITY_QUERIES + PARITY_PASSAGES
+    ref = reference.encode(texts, max_length=256, return_dense=True, return_sparse=True)
+    got = candidate.encode(texts, max_length=256, return_dense=True, return_sparse=True)
+
+    ref_dense = np.asarray(ref["dense_vecs"], dtype=np.float32)
+    got_dense = got["dense_vecs"]
+    cosines = (ref_dense * got_dense).sum(axis=1) / (
+        np.linalg.norm(ref_dense, axis=1) * np.linalg.norm(got_dense, axis=1)
+    )
+    assert cosines.min() >= 0.98
+
+    n = len(PARITY_QUERIES)
+    agree = 0
+    for i in range(n):
+        ref_rank = _top_k(ref_dense[n:] @ ref_dense[i], 3)
+        got_rank = _top_k(got_dense[n:] @ got_dense[i], 3)
+        agree += ref_rank[0] == got_rank[0]
+        assert len(set(ref_rank) & set(got_rank)) >= 2
+    assert agree / n >= 0.9
+
+    for ref_w, got_w in zip(ref["lexical_weights"], got["lexical_weights"]):
+        ref_tokens = {t for t, w in ref_w.items() if w > 0.05}
+        got_tokens = {t for t, w in got_w.items() if w > 0.05}
+        union = ref_tokens | got_tokens
+        assert not union or len(ref_tokens & got_tokens) / len(union) >= 0.8
+
+
+@pytest.mark.live
+def test_cross_encoder_rank_agreement_with_pytorch():
+    pytest.importorskip("onnxruntime")
+    st = pytest.importorskip("sentence_transformers")
+    model_dir = ONNX_DIR / onnx_encoder.CROSS_ENCODER_DIRNAME
+    if not (model_dir / "model.onnx").exists():
+        pytest.skip(f"no exported cross-encoder in {model_dir}")
+
+    reference = st.CrossEncoder(onnx_encoder.DEFAULT_CROSS_MODEL)
+    candidate = onnx_encoder.OnnxCrossEncoder(model_dir)
+    for query in PARITY_QUERIES:
+        pairs = [(query, passage) for passage in PARITY_PASSAGES]
+        ref = np.asarray(reference.predict(pairs), dtype=np.float32)
+        got = candidate.predict(pairs)
+        assert int(np.argmax(ref)) == int(np.argmax(got)) or (
+            abs(float(ref.max() - ref[np.argmax(got)])) < 0.02
+        )
+        ref_ranks = np.argsort(np.argsort(-ref))
+        got_ranks = np.argsort(np.argsort(-got))
+        spearman = np.corrcoef(ref_ranks, got_ranks)[0, 1]
+        assert spearman >= 0.85
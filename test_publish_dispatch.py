@@ -70,3 +70,106 @@ def test_publish_runs_ingest_with_flag(monkeypatch):
     publish.main()
 
     assert called["ingest"] is True
+
+
+def _dag_env(monkeypatch, tmp_path, specs):
+    monkeypatch.setattr(publish, "STEP_SPECS", specs)
+    monkeypatch.setattr(publish, "STATE_PATH", tmp_path / "publish_state.json")
+    monkeypatch.setattr(publish, "REPORT_PATH", tmp_path / "publish_report.json")
+    monkeypatch.setattr(publish, "_is_rebuild_day", lambda full_rebuild=False: full_rebuild)
+
+
+def test_publish_runs_independent_steps_concurrently(monkeypatch, tmp_path):
+    import json
+    import threading
+
+    barrier = threading.Barrier(2, timeout=5)
+    order: list[str] = []
+
+    def _parallel(name):
+        def step(dry_run: bool = False) -> bool:
+            barrier.wait()  # raises BrokenBarrierError unless both run at once
+            order.append(name)
+            return True
+        return step
+
+    def _last(dry_run: bool = False) -> bool:
+        order.append("stats")
+        return True
+
+    _dag_env(monkeypatch, tmp_path, {
+        "fts": publish.StepSpec(),
+        "export": publish.StepSpec(),
+        "stats": publish.StepSpec(after=("fts", "export")),
+    })
+    monkeypatch.setattr(publish, "STEPS", [
+        ("fts", "FTS", _parallel("fts")),
+        ("export", "Export", _parallel("export")),
+        ("stats", "Stats", _last),
+    ])
+    monkeypatch.setattr(sys, "argv", ["publish.py", "--max-cpus", "2", "--max-memory-gb", "2"])
+
+    publish.main()
+
+    assert sorted(order[:2]) == ["export", "fts"]
+    assert order[2] == "stats"
+    report = json.loads((tmp_path / "publish_report.json").read_text())
+    assert report["critical_path"][-1] == "stats"
+    assert report["steps"]["stats"]["after"] == ["export", "fts"]
+
+
+def test_publish_memory_budget_serializes_steps(monkeypatch, tmp_path):
+    import threading
+    import time
+
+    lock = threading.Lock()
+    active = {"now": 0, "max": 0}
+
+    def _step(dry_run: bool = False) -> bool:
+        with lock:
+            active["now"] += 1
+            active["max"] = max(active["max"], active["now"])
+        time.sleep(0.05)
+        with lock:
+            active["now"] -= 1
+        return True
+
+    _dag_env(monkeypatch, tmp_path, {
+        "a": publish.StepSpec(memory_gb=3.0),
+        "b": publish.StepSpec(memory_gb=3.0),
+    })
+    monkeypatch.setattr(publish, "STEPS", [("a", "A", _step), ("b", "B", _step)])
+    monkeypatch.setattr(sys, "argv", ["publish.py", "--max-cpus", "4", "--max-memory-gb", "4"])
+
+    publish.main()
+
+    assert active["max"] == 1
+
+
+def test_publish_skips_steps_with_unchanged_inputs(monkeypatch, tmp_path):
+    source = tmp_path / "decisions"
+    source.mkdir()
+    (source / "bger.jsonl").write_text("{}\n")
+    output = tmp_path / "dataset"
+    calls: list[int] = []
+
+    def _export(dry_run: bool = False) -> bool:
+        calls.append(1)
+        output.mkdir(exist_ok=True)
+        return True
+
+    _dag_env(monkeypatch, tmp_path, {3: publish.StepSpec(inputs=(source,), outputs=(output,))})
+    monkeypatch.setattr(publish, "STEPS", [(3, "Export Parquet", _export)])
+    monkeypatch.setattr(sys, "argv", ["publish.py"])
+
+    publish.main()
+    publish.main()
+    assert len(calls) == 1
+
+    (source / "bger.jsonl").write_text("{}\n{}\n")
+    publish.main()
+    assert len(calls) == 2
+
+    monkeypatch.setattr(sys, "argv", ["publish.py", "--force"])
+    publish.main()
+    assert len(calls) == 3
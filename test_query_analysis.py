@@ -0,0 +1,85 @@
+"""Tests for the shared, memoized QueryAnalysis used across search stages."""
+
+import mcp_server
+
+
+def test_analysis_is_memoized_per_query():
+    mcp_server._analyze_query.cache_clear()
+    first = mcp_server._analyze_query("Asyl und Wegweisung")
+    second = mcp_server._analyze_query("Asyl und Wegweisung")
+    assert first is second
+    info = mcp_server._analyze_query.cache_info()
+    assert info.hits == 1 and info.misses == 1
+
+
+def test_analysis_matches_individual_helpers():
+    query = "BGer 4A_291/2017 Art. 8 Abs. 1 EMRK"
+    analysis = mcp_server._analyze_query(query)
+    assert analysis.rank_terms == tuple(mcp_server._extract_rank_terms(query))
+    assert analysis.statute_refs == mcp_server._extract_query_statute_refs(query)
+    assert analysis.citation_refs == mcp_server._extract_query_citation_refs(query)
+    assert list(analysis.inline_docket_candidates) == (
+        mcp_server._extract_inline_docket_candidates(query)
+    )
+    assert analysis.has_numeric_terms
+    assert "bger" in analysis.preferred_courts
+
+
+def test_analysis_puts_collapsed_docket_first():
+    analysis = mcp_server._analyze_query("6B 1234 2025")
+    assert analysis.is_docket_query
+    assert analysis.inline_docket_candidates[0] == mcp_server._collapse_spaced_docket(
+        "6B 1234 2025"
+    )
+
+
+def test_precompiled_highlight_patterns_match_uncached_path():
+    query = "Tierhalterhaftung Hund"
+    analysis = mcp_server._analyze_query(query)
+    text = "Die Tierhalterhaftung für den Hund; Tierhalterhaftung gilt."
+    with_patterns = mcp_server._highlight_terms(
+        text, analysis.rank_terms, analysis.cleaned_phrase, query,
+        patterns=analysis.highlight_patterns,
+    )
+    without = mcp_server._highlight_terms(
+        text, list(analysis.rank_terms), analysis.cleaned_phrase, query,
+    )
+    assert with_patterns == without
+    assert with_patterns.count("<mark>Tierhalterhaftung</mark>") == 2
+    assert "<mark><mark>" not in with_patterns
+
+
+def test_anchor_pattern_tolerates_umlaut_and_eszett_spellings():
+    analysis = mcp_server._analyze_query("Tierhalterhaftung Strasse Kündigung")
+    anchor = analysis.anchor_pattern
+    for text in ("STRAßE", "Kuendigung", "Kündigung", "tierhalterhaftung"):
+        assert anchor.search(text.translate(mcp_server._ANCHOR_FOLD_TABLE)), text
+
+
+def test_snippet_scans_only_windows_around_hits(monkeypatch):
+    monkeypatch.setattr(mcp_server, "SNIPPET_SCAN_CHARS", 5000)
+    filler = "Allgemeine Ausführungen ohne Bezug. " * 40
+    relevant = "Die Kündigung des Mietvertrags war missbräuchlich. "
+    late = "Mietvertrag Kündigung " * 3
+    text = filler + relevant + filler + ("x" * 10000) + late
+    analysis = mcp_server._analyze_query("Kündigung Mietvertrag")
+    snippet = mcp_server._select_best_passage_snippet(
+        text,
+        rank_terms=analysis.rank_terms,
+        phrase=analysis.cleaned_phrase,
+        raw_query="Kündigung Mietvertrag",
+        fallback="fallback",
+        analysis=analysis,
+    )
+    plain = snippet.replace("<mark>", "").replace("</mark>", "")
+    assert plain.startswith("Die Kündigung des Mietvertrags")
+
+
+def test_snippet_without_hits_returns_fallback():
+    snippet = mcp_server._select_best_passage_snippet(
+        "Nichts Passendes hier.",
+        rank_terms=["emrk"],
+        phrase="emrk",
+        fallback="fts snippet",
+    )
+    assert snippet == "fts snippet"
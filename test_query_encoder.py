@@ -0,0 +1,170 @@
+"""Tests for the query-embedding cache and micro-batching encoder."""
+
+import threading
+
+import mcp_server
+from search_stack.query_encoder import (
+    MicroBatchEncoder,
+    QueryEmbeddingCache,
+    QueryEncoding,
+    normalize_query,
+)
+
+
+def _recording_encoder(calls, delay=None):
+    def encode_batch(queries):
+        calls.append(list(queries))
+        if delay is not None:
+            delay.wait(2)
+        return [QueryEncoding(dense=q.encode(), token_ids=(len(q),)) for q in queries]
+    return encode_batch
+
+
+def test_normalize_query_collapses_whitespace_keeps_case():
+    assert normalize_query("  Miete \n Kündigung ") == "Miete Kündigung"
+    assert normalize_query("Ku\u0308ndigung") == normalize_query("K\u00fcndigung")
+    assert normalize_query("Miete") != normalize_query("miete")
+
+
+def test_cache_hits_for_equivalent_queries():
+    calls = []
+    encoder = MicroBatchEncoder(_recording_encoder(calls), QueryEmbeddingCache())
+    first = encoder.encode("Miete  Kündigung")
+    second = encoder.encode(" Miete Kündigung")
+    assert first == second
+    assert len(calls) == 1
+    stats = encoder.stats()
+    assert stats["memory_hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    path = tmp_path / "qe.db"
+    calls = []
+    MicroBatchEncoder(
+        _recording_encoder(calls), QueryEmbeddingCache(namespace="m", disk_path=path),
+    ).encode("Tierhalterhaftung")
+
+    fresh = MicroBatchEncoder(
+        _recording_encoder(calls), QueryEmbeddingCache(namespace="m", disk_path=path),
+    )
+    enc = fresh.encode("Tierhalterhaftung")
+    assert enc == QueryEncoding(dense=b"Tierhalterhaftung", token_ids=(17,))
+    assert len(calls) == 1
+    assert fresh.stats()["disk_hits"] == 1
+
+    other_model = MicroBatchEncoder(
+        _recording_encoder(calls), QueryEmbeddingCache(namespace="n", disk_path=path),
+    )
+    other_model.encode("Tierhalterhaftung")
+    assert len(calls) == 2
+
+
+def test_memory_lru_is_bounded():
+    cache = QueryEmbeddingCache(capacity=2)
+    for q in ("a", "b", "c"):
+        cache.put(cache.key(q), QueryEncoding(dense=q.encode()))
+    assert len(cache) == 2
+    assert cache.get(cache.key("a")) is None
+
+
+def test_concurrent_queries_share_one_forward_pass():
+    calls = []
+    release = threading.Event()
+    encoder = MicroBatchEncoder(
+        _recording_encoder(calls, delay=release), QueryEmbeddingCache(), max_wait=0.2,
+    )
+    results = {}
+
+    def worker(q):
+        results[q] = encoder.encode(q)
+
+    queries = ["q1", "q2", "q3", "q1"]
+    threads = [threading.Thread(target=worker, args=(q,)) for q in queries]
+    for t in threads:
+        t.start()
+    release.set()
+    for t in threads:
+        t.join(5)
+
+    assert sum(len(c) for c in calls) == 3
+    assert len(calls) == 1
+    assert results["q2"].dense == b"q2"
+    assert encoder.stats()["coalesced"] == 1
+
+
+def test_encoder_failure_returns_none():
+    def broken(_queries):
+        raise RuntimeError("model crashed")
+
+    encoder = MicroBatchEncoder(broken, QueryEmbeddingCache())
+    assert encoder.encode("x") is None
+    assert len(encoder.cache) == 0
+
+
+def test_short_batch_result_fails_every_waiter():
+    release = threading.Event()
+
+    def short(queries):
+        release.wait(2)
+        return [QueryEncoding(dense=b"x")] * (len(queries) - 1)
+
+    encoder = MicroBatchEncoder(short, QueryEmbeddingCache(), max_wait=0.2)
+    results = {}
+
+    def worker(q):
+        results[q] = encoder.encode(q, timeout=5)
+
+    threads = [threading.Thread(target=worker, args=(q,)) for q in ("a", "b", "c")]
+    for t in threads:
+        t.start()
+    release.set()
+    for t in threads:
+        t.join(5)
+
+    # No future is left pending until its timeout, and nothing is cached.
+    assert results == {"a": None, "b": None, "c": None}
+    assert not encoder._inflight
+    assert len(encoder.cache) == 0
+
+
+def test_server_searches_encode_each_query_once(monkeypatch):
+    calls = []
+
+    def fake_encode_queries(_model, queries):
+        calls.append(list(queries))
+        return [b"\x00" * 16 for _ in queries]
+
+    monkeypatch.setattr(mcp_server, "_get_vector_model", lambda: object())
+    monkeypatch.setattr(mcp_server, "_encode_queries", fake_encode_queries)
+    monkeypatch.setattr(mcp_server, "_tokenize_query", lambda _m, q: [5, 6])
+    monkeypatch.setattr(mcp_server, "_QUERY_ENCODER", None)
+    monkeypatch.setattr(mcp_server, "QUERY_EMBED_CACHE_PATH", None)
+    monkeypatch.setattr(mcp_server, "_search_ann", lambda *a, **k: [])
+
+    mcp_server._search_vectors("Mietzins Herabsetzung")
+    mcp_server._search_vectors_chunks("Mietzins Herabsetzung")
+    assert mcp_server._sparse_query_token_ids("Mietzins  Herabsetzung") == [5, 6]
+    assert calls == [["Mietzins Herabsetzung"]]
+    assert mcp_server._query_encoder_stats()["memory_hits"] == 2
+
+
+def test_failed_dense_encode_keeps_sparse_token_ids(monkeypatch):
+    calls = []
+
+    def failing_encode_queries(_model, queries):
+        calls.append(list(queries))
+        return [None] * len(queries)
+
+    monkeypatch.setattr(mcp_server, "_get_vector_model", lambda: object())
+    monkeypatch.setattr(mcp_server, "_encode_queries", failing_encode_queries)
+    monkeypatch.setattr(mcp_server, "_tokenize_query", lambda _m, q: [7, 8])
+    monkeypatch.setattr(mcp_server, "_QUERY_ENCODER", None)
+    monkeypatch.setattr(mcp_server, "QUERY_EMBED_CACHE_PATH", None)
+
+    assert mcp_server._search_vectors("Kündigungsschutz") == {}
+    assert mcp_server._sparse_query_token_ids("Kündigungsschutz") == [7, 8]
+    # Partial encodings are not cached, so the dense vector is retried.
+    assert len(calls) == 2
+    assert len(mcp_server._get_query_encoder().cache) == 0
@@ -97,8 +97,9 @@ def test_db_parquet_alignment():
     db_cols = set(INSERT_COLUMNS)
     pq_cols = {f.name for f in DECISION_SCHEMA}
 
-    # These columns are only in the DB (json_data is a blob, canonical_key is dedup index)
-    db_only_expected = {"json_data", "canonical_key"}
+    # These columns are only in the DB (json_data is a blob, canonical_key is
+    # dedup index, decision_year is derived from decision_date for trends)
+    db_only_expected = {"json_data", "canonical_key", "decision_year"}
     # These columns are only in Parquet (computed fields)
     pq_only_expected = {
         "has_full_text", "text_length", "chamber", "docket_number_2",
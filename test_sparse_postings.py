@@ -0,0 +1,144 @@
+"""Tests for the memory-mapped sparse postings and their use by mcp_server."""
+
+import sqlite3
+
+import numpy as np
+import pytest
+
+import mcp_server
+from search_stack.build_vectors import build_sparse_postings_for_db, sparse_postings_dir
+from search_stack.sparse_postings import SparsePostings, build_sparse_postings
+
+
+def _sparse_db(path, n_docs=400, vocab=300, seed=3):
+    rng = np.random.default_rng(seed)
+    conn = sqlite3.connect(str(path))
+    conn.execute(
+        "CREATE TABLE sparse_terms (decision_id TEXT NOT NULL, token_id INTEGER NOT NULL, "
+        "weight REAL NOT NULL)"
+    )
+    rows = []
+    for d in range(n_docs):
+        # Zipf-ish token draws so some lists are long and some short.
+        tokens = np.unique(np.minimum(rng.zipf(1.3, size=40), vocab))
+        for t in tokens:
+            rows.append((f"doc_{d}", int(t), float(rng.uniform(0.02, 0.4))))
+    conn.executemany("INSERT INTO sparse_terms VALUES (?, ?, ?)", rows)
+    conn.commit()
+    return conn
+
+
+def _sql_top(conn, token_ids, k):
+    placeholders = ",".join("?" * len(token_ids))
+    return conn.execute(
+        f"SELECT decision_id, SUM(weight) AS score FROM sparse_terms "
+        f"WHERE token_id IN ({placeholders}) GROUP BY decision_id "
+        f"ORDER BY score DESC LIMIT ?",
+        (*token_ids, k),
+    ).fetchall()
+
+
+@pytest.fixture(scope="module")
+def built(tmp_path_factory):
+    tmp = tmp_path_factory.mktemp("sparse")
+    conn = _sparse_db(tmp / "vectors.db")
+    stats = build_sparse_postings(conn, tmp / "vectors_sparse")
+    return conn, SparsePostings(tmp / "vectors_sparse"), stats
+
+
+def test_build_writes_compact_postings(built):
+    conn, postings, stats = built
+    total = conn.execute("SELECT COUNT(*) FROM sparse_terms").fetchone()[0]
+    assert stats["postings"] == total
+    assert len(postings) == conn.execute(
+        "SELECT COUNT(DISTINCT decision_id) FROM sparse_terms"
+    ).fetchone()[0]
+    assert postings.post_docs.dtype == np.uint32
+    assert postings.post_weights.dtype == np.uint8
+    assert list(postings.tokens) == sorted(postings.tokens)
+
+
+@pytest.mark.parametrize("token_ids", [[1, 2, 3], [5, 17, 40, 120], [2, 2, 9, 300], [250]])
+def test_maxscore_matches_sql_scores(built, token_ids):
+    conn, postings, _ = built
+    exact = dict(conn.execute(
+        f"SELECT decision_id, SUM(weight) FROM sparse_terms WHERE token_id IN "
+        f"({','.join('?' * len(token_ids))}) GROUP BY decision_id",
+        token_ids,
+    ).fetchall())
+    got = postings.search(token_ids, 10)
+    assert len(got) == min(10, len(exact))
+    # Quantization error is bounded by one step per query token.
+    tolerance = postings.scale * len(set(token_ids))
+    kth_exact = sorted(exact.values(), reverse=True)[len(got) - 1]
+    for doc_id, score in got:
+        assert abs(score - exact[doc_id]) <= tolerance
+        assert exact[doc_id] >= kth_exact - 2 * tolerance
+    assert [s for _, s in got] == sorted((s for _, s in got), reverse=True)
+
+
+def test_unknown_tokens_and_empty_queries(built):
+    _conn, postings, _ = built
+    assert postings.search([10**6], 5) == []
+    assert postings.search([], 5) == []
+    assert postings.search([1], 0) == []
+
+
+def test_search_accumulates_only_touched_docs(built, monkeypatch):
+    _conn, postings, _ = built
+    lengths = np.diff(postings.offsets)
+    slot = int(np.argmin(lengths))
+    rare, list_len = int(postings.tokens[slot]), int(lengths[slot])
+    sizes = []
+    real_zeros = np.zeros
+
+    def spy_zeros(shape, *args, **kwargs):
+        sizes.append(int(np.prod(shape)))
+        return real_zeros(shape, *args, **kwargs)
+
+    monkeypatch.setattr(np, "zeros", spy_zeros)
+    got = postings.search([rare], 5)
+    assert got and max(sizes) <= list_len
+
+
+def test_streamed_build_matches_posting_lists(built, tmp_path, monkeypatch):
+    conn, postings, _ = built
+    # Tiny batches so posting lists straddle fetch boundaries.
+    monkeypatch.setattr("search_stack.sparse_postings.READ_BATCH_SIZE", 7)
+    build_sparse_postings(conn, tmp_path / "streamed")
+    streamed = SparsePostings(tmp_path / "streamed")
+    for name in ("tokens", "offsets", "post_docs", "post_weights", "max_weight"):
+        assert np.array_equal(getattr(streamed, name), getattr(postings, name))
+    doc_ids = [d.decode() for d in np.load(tmp_path / "streamed" / "doc_ids.npy")]
+    for i, token in enumerate(streamed.tokens[:25]):
+        start, end = streamed.offsets[i], streamed.offsets[i + 1]
+        expected = sorted(r[0] for r in conn.execute(
+            "SELECT decision_id FROM sparse_terms WHERE token_id = ?", (int(token),)
+        ))
+        assert [doc_ids[j] for j in streamed.post_docs[start:end]] == expected
+
+
+def test_build_for_db_can_drop_table(tmp_path):
+    db = tmp_path / "vectors.db"
+    _sparse_db(db, n_docs=20).close()
+    stats = build_sparse_postings_for_db(db, drop_table=True)
+    assert stats["sparse_terms_dropped"] is True
+    assert (sparse_postings_dir(db) / "meta.json").exists()
+    conn = sqlite3.connect(str(db))
+    assert conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'sparse_terms'"
+    ).fetchone() is None
+    conn.close()
+    assert build_sparse_postings_for_db(db) == {}
+
+
+def test_search_sparse_uses_postings(built, monkeypatch):
+    conn, postings, _ = built
+    monkeypatch.setattr(mcp_server, "SPARSE_POSTINGS_DIR", postings.postings_dir)
+    monkeypatch.setattr(mcp_server, "_SPARSE_POSTINGS", None)
+    monkeypatch.setattr(mcp_server, "_sparse_query_token_ids", lambda _q: [1, 2, 3])
+    monkeypatch.setattr(mcp_server, "_get_vec_conn", lambda: pytest.fail("SQL path used"))
+
+    scores = mcp_server._search_sparse("query", k=5)
+    assert list(scores) == [doc_id for doc_id, _ in postings.search([1, 2, 3], 5)]
+    assert set(scores) <= {doc_id for doc_id, _ in _sql_top(conn, [1, 2, 3], 50)}
@@ -0,0 +1,148 @@
+"""Tests for indexed, cached get_law / get_commentary lookups."""
+
+import json
+import sqlite3
+
+import pytest
+
+import mcp_server
+from search_stack import build_ok_commentaries_db as bok
+from search_stack import build_statutes_db as bsd
+
+AKN = "http://docs.oasis-open.org/legaldocml/ns/akn/3.0"
+OR_ARTICLES = [("10", "Erfüllungsort"), ("2", "Nebenpunkte"), ("1a", "Einigung"), ("41", "Haftung"), ("41a", "Regress")]
+
+
+def _law_xml(articles):
+    body = "".join(
+        f'<article eId="art_{num}"><num>Art. {num}</num><heading>{heading}</heading>'
+        f'<paragraph><content><p>Text zu {heading}</p></content></paragraph></article>'
+        for num, heading in articles
+    )
+    return f'<akomaNtoso xmlns="{AKN}"><act><body>{body}</body></act></akomaNtoso>'
+
+
+def _write_fedlex(fedlex_dir, or_articles):
+    law_dir = fedlex_dir / "xml" / "220"
+    law_dir.mkdir(parents=True, exist_ok=True)
+    (law_dir / "de.xml").write_text(_law_xml(or_articles), encoding="utf-8")
+    (fedlex_dir / "laws.json").write_text(json.dumps([{
+        "sr_number": "220", "abbr_de": "OR", "abbr_fr": "CO", "abbr_it": "CO",
+        "title_de": "Obligationenrecht", "consolidation_date": "2024-01-01",
+    }]), encoding="utf-8")
+
+
+@pytest.fixture
+def statutes_db(tmp_path, monkeypatch):
+    fedlex_dir = tmp_path / "fedlex"
+    _write_fedlex(fedlex_dir, OR_ARTICLES)
+    monkeypatch.setattr(bsd, "FEDLEX_DIR", fedlex_dir)
+    monkeypatch.setattr(bsd, "OUTPUT_DB", tmp_path / "statutes.db")
+    bsd.build_db(workers=1)
+    monkeypatch.setattr(mcp_server, "STATUTES_DB_PATH", tmp_path / "statutes.db")
+    return fedlex_dir
+
+
+def test_get_law_uses_alias_table_and_sort_key(statutes_db):
+    listing = mcp_server.get_law(abbreviation="co")
+    assert listing["sr_number"] == "220"
+    assert [a["article_num"] for a in listing["articles"]] == ["1a", "2", "10", "41", "41a"]
+
+    exact = mcp_server.get_law(abbreviation="OR", article="41")
+    assert [a["article_num"] for a in exact["articles"]] == ["41"]
+    prefix = mcp_server.get_law(sr_number="220", article="4")
+    assert [a["article_num"] for a in prefix["articles"]] == ["41", "41a"]
+    assert "error" in mcp_server.get_law(abbreviation="XYZ")
+
+    conn = sqlite3.connect(str(mcp_server.STATUTES_DB_PATH))
+    plan = " ".join(r[-1] for r in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT article_num, heading FROM articles "
+        "WHERE sr_number = ? AND lang = ? ORDER BY sort_key, article_num", ("220", "de"),
+    ))
+    conn.close()
+    assert "idx_articles_sr_lang_sort" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_article_prefix_match_ignores_case(statutes_db):
+    conn = sqlite3.connect(str(mcp_server.STATUTES_DB_PATH))
+    conn.execute(
+        "INSERT INTO articles (sr_number, article_num, heading, text, lang) "
+        "VALUES ('220', '6A', 'Stillschweigende Annahme', 'Text', 'de')"
+    )
+    conn.commit()
+    result = mcp_server.get_law(sr_number="220", article="6a")
+    assert [a["article_num"] for a in result["articles"]] == ["6A"]
+
+    plan = " ".join(r[-1] for r in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT article_num FROM articles WHERE sr_number = ? "
+        "AND article_num >= ? COLLATE NOCASE AND article_num < ? COLLATE NOCASE AND lang = ?",
+        ("220", "6a", "6a\U0010ffff", "de"),
+    ))
+    conn.close()
+    assert "idx_articles_sr_art_nocase" in plan
+
+
+def test_cache_hits_are_isolated_from_callers(statutes_db):
+    first = mcp_server.get_law(abbreviation="OR", article="2")
+    first["articles"][0]["heading"] = "changed by caller"
+    first["articles"].clear()
+    again = mcp_server.get_law(abbreviation="OR", article="2")
+    assert again["articles"][0]["heading"] == "Nebenpunkte"
+    again["articles"].append({"article_num": "x"})
+    assert len(mcp_server.get_law(abbreviation="OR", article="2")["articles"]) == 1
+
+
+def test_results_are_cached_until_db_is_rebuilt(statutes_db):
+    first = mcp_server.get_law(abbreviation="OR", article="2")
+    hits = mcp_server._STATUTE_CACHE_STATS["hits"]
+    assert mcp_server.get_law(abbreviation="OR", article="2") == first
+    assert mcp_server._STATUTE_CACHE_STATS["hits"] == hits + 1
+
+    _write_fedlex(statutes_db, [("2", "Vorbehaltene Nebenpunkte")])
+    bsd.build_db(workers=1)
+    rebuilt = mcp_server.get_law(abbreviation="OR", article="2")
+    assert rebuilt["articles"][0]["heading"] == "Vorbehaltene Nebenpunkte"
+
+
+def test_legacy_statutes_schema_still_works(tmp_path, monkeypatch):
+    db_path = tmp_path / "statutes.db"
+    conn = sqlite3.connect(str(db_path))
+    conn.executescript("""
+        CREATE TABLE laws (sr_number TEXT PRIMARY KEY, title_de TEXT, title_fr TEXT, title_it TEXT,
+                           abbr_de TEXT, abbr_fr TEXT, abbr_it TEXT, consolidation_date TEXT, work_uri TEXT);
+        CREATE TABLE articles (id INTEGER PRIMARY KEY, sr_number TEXT, article_num TEXT,
+                               heading TEXT, text TEXT, lang TEXT);
+        INSERT INTO laws (sr_number, title_de, abbr_de) VALUES ('210', 'Zivilgesetzbuch', 'ZGB');
+        INSERT INTO articles (sr_number, article_num, heading, text, lang) VALUES
+            ('210', '8', 'Beweislast', 'Wo das Gesetz', 'de'),
+            ('210', '1', 'Anwendung', 'Das Gesetz', 'de');
+    """)
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(mcp_server, "STATUTES_DB_PATH", db_path)
+
+    listing = mcp_server.get_law(abbreviation="zgb")
+    assert [a["article_num"] for a in listing["articles"]] == ["1", "8"]
+    assert mcp_server._fetch_statute_text(law_code="ZGB", article="8")["text_de"] == "Wo das Gesetz"
+
+
+def test_get_commentary_uses_normalized_columns(tmp_path, monkeypatch):
+    input_path = tmp_path / "commentaries.json"
+    input_path.write_text(json.dumps([
+        {"ok_uuid": f"c{num}", "legislative_act_uuid": "act", "sr_number": "999.1", "abbr": "TestG",
+         "article_num": num, "title": f"Art. {num} TestG", "language": lang, "content_text": f"Kommentar {num}"}
+        for num, lang in [("12", "de"), ("3", "de"), ("3", "fr"), ("3a", "de")]
+    ]), encoding="utf-8")
+    monkeypatch.setattr(bok, "INPUT_FILE", input_path)
+    monkeypatch.setattr(bok, "OUTPUT_DB", tmp_path / "ok_commentaries.db")
+    bok.build_db()
+    monkeypatch.setattr(mcp_server, "OK_COMMENTARIES_DB_PATH", tmp_path / "ok_commentaries.db")
+
+    listing = mcp_server.get_commentary(abbreviation="testg")
+    assert listing["sr_number"] == "999.1"
+    assert [a["article_num"] for a in listing["articles"]] == ["3", "3", "3a", "12"]
+
+    article = mcp_server.get_commentary(abbreviation="testg", article="3", language="fr")
+    assert article["language"] == "fr"
+    assert mcp_server.get_commentary(abbreviation="testg", article="3", language="fr") == article
@@ -0,0 +1,148 @@
+"""Tests for search_stack.tracing and the server's per-stage instrumentation."""
+
+import asyncio
+import json
+import time
+
+import pytest
+
+import mcp_server
+from benchmarks.run_load_benchmark import build_fixture_db
+from search_stack import tracing
+
+
+@pytest.fixture
+def slow_log(tmp_path):
+    path = tmp_path / "slow.jsonl"
+    tracing.configure_slow_log(path, 0.001)
+    yield path
+    tracing.configure_slow_log(None, 0)
+
+
+def _entries(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_spans_in_worker_threads_join_the_request_trace(slow_log):
+    async def handler():
+        with tracing.trace("tool", "unit_test", query="Miete", court=None) as record:
+            await asyncio.to_thread(_work)
+            return record
+
+    def _work():
+        with tracing.span("fts.nl_and"):
+            with tracing.span("snippet"):
+                time.sleep(0.002)
+        with tracing.span("snippet"):
+            pass
+
+    record = asyncio.run(handler())
+    assert set(record.stages) == {"fts.nl_and", "snippet"}
+    assert record.stages["snippet"][1] == 2
+
+    (entry,) = _entries(slow_log)
+    assert entry["name"] == "unit_test"
+    assert entry["attrs"] == {"query": "Miete"}
+    assert entry["stages"]["snippet"]["calls"] == 2
+
+
+def test_fast_requests_are_not_logged(tmp_path):
+    path = tmp_path / "slow.jsonl"
+    tracing.configure_slow_log(path, 10_000)
+    try:
+        with tracing.trace("tool", "fast"):
+            pass
+    finally:
+        tracing.configure_slow_log(None, 0)
+    assert not path.exists()
+
+
+def test_prometheus_rendering():
+    hist = tracing.Histogram("t_seconds", "test", ("stage",), buckets=(0.01, 0.1))
+    hist.observe(("fts",), 0.005)
+    hist.observe(("fts",), 0.05)
+    hist.observe(("fts",), 5.0)
+    lines = hist.render()
+    assert 't_seconds_bucket{stage="fts",le="0.01"} 1' in lines
+    assert 't_seconds_bucket{stage="fts",le="0.1"} 2' in lines
+    assert 't_seconds_bucket{stage="fts",le="+Inf"} 3' in lines
+    assert 't_seconds_count{stage="fts"} 3' in lines
+
+    text = tracing.render_prometheus()
+    assert "# TYPE swiss_caselaw_stage_seconds histogram" in text
+    assert 'swiss_caselaw_cross_encoder_cache_lookups_total{result="hit"}' in text
+
+
+def test_disabled_tracing_records_nothing(monkeypatch):
+    monkeypatch.setattr(tracing, "ENABLED", False)
+    with tracing.trace("tool", "off") as record:
+        with tracing.span("fts"):
+            pass
+    assert record is None
+
+
+def test_span_overhead_is_microseconds():
+    n = 20_000
+    with tracing.trace("tool", "overhead"):
+        t0 = time.perf_counter()
+        for _ in range(n):
+            with tracing.span("overhead"):
+                pass
+        per_span = (time.perf_counter() - t0) / n
+    # A search opens a few dozen spans and takes tens of milliseconds.
+    assert per_span < 20e-6
+
+
+def test_tool_call_slow_log_has_stage_breakdown(tmp_path, monkeypatch, slow_log):
+    db_path = tmp_path / "decisions.db"
+    build_fixture_db(db_path, 100, seed=5)
+    monkeypatch.setattr(mcp_server, "DB_PATH", db_path)
+
+    asyncio.run(mcp_server.handle_call_tool(
+        "search_decisions", {"query": "Mietzins Herabsetzung", "limit": 5},
+    ))
+    (entry,) = _entries(slow_log)
+    assert entry["kind"] == "tool"
+    assert entry["name"] == "search_decisions"
+    assert entry["attrs"]["query"] == "Mietzins Herabsetzung"
+    assert "db_open" in entry["stages"]
+    assert any(stage.startswith("fts.") for stage in entry["stages"])
+    assert "rerank" in entry["stages"]
+
+
+def test_trace_attrs_skip_free_text_arguments():
+    attrs = mcp_server._trace_attrs({
+        "query": "Mietzins " * 40,
+        "court": "bger",
+        "limit": 5,
+        "facts": "Der Vermieter kündigte am 3. März ...",
+        "question": "Ist die Kündigung gültig?",
+        "statute_references": [{"law": "OR"}],
+    })
+    assert set(attrs) == {"query", "court", "limit"}
+    assert len(attrs["query"]) <= mcp_server._TRACE_QUERY_CHARS + 3
+
+
+def test_llm_expansion_executor_keeps_request_trace(monkeypatch):
+    def fake_fetch(_query):
+        with tracing.span("http.llm_expansion"):
+            return None
+
+    monkeypatch.setattr(mcp_server, "LLM_EXPANSION_ENABLED", True)
+    monkeypatch.setattr(mcp_server, "ANTHROPIC_API_KEY", "test-key")
+    monkeypatch.setattr(mcp_server, "_fetch_llm_expansion", fake_fetch)
+    with tracing.trace("tool", "expansion") as record:
+        assert mcp_server._start_llm_expansion("Kündigung Mietvertrag Trace").result(5) == []
+    assert "http.llm_expansion" in record.stages
+
+
+def test_error_payloads_count_as_request_errors(slow_log):
+    def errors():
+        return tracing.REQUEST_ERRORS._values.get(("tool", "no_such_tool"), 0)
+
+    before = errors()
+    (content,) = asyncio.run(mcp_server.handle_call_tool("no_such_tool", {}))
+    assert content.text.startswith("Unknown tool")
+    assert errors() == before + 1
+    (entry,) = _entries(slow_log)
+    assert entry["error"] == "UnknownTool"
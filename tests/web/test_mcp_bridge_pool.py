@@ -0,0 +1,202 @@
+"""Tests for the multiplexed MCPBridge worker pool (against a stub stdio server)."""
+from __future__ import annotations
+
+import asyncio
+import sys
+import textwrap
+import time
+
+import pytest
+
+from web_api import mcp_bridge
+
+STUB_SERVER = textwrap.dedent('''
+    import json, os, sys, threading, time
+
+    lock = threading.Lock()
+
+    def reply(msg_id, text):
+        out = {"jsonrpc": "2.0", "id": msg_id,
+               "result": {"content": [{"type": "text", "text": text}]}}
+        with lock:
+            sys.stdout.write(json.dumps(out) + "\\n")
+            sys.stdout.flush()
+
+    def handle(msg):
+        name = msg["params"]["name"]
+        args = msg["params"]["arguments"]
+        if name == "crash":
+            if "log" in args:
+                with open(args["log"], "a") as f:
+                    f.write("crash\\n")
+            os._exit(1)
+        if name == "sleep":
+            time.sleep(args["seconds"])
+        reply(msg["id"], str(os.getpid()))
+
+    for line in sys.stdin:
+        msg = json.loads(line)
+        if msg.get("method") == "initialize":
+            if os.environ.get("STUB_MCP_HANG_ON_INIT"):
+                continue
+            reply(msg["id"], "init")
+        elif msg.get("method") == "tools/call":
+            threading.Thread(target=handle, args=(msg,), daemon=True).start()
+''')
+
+
+@pytest.fixture
+def stub_server(tmp_path, monkeypatch):
+    path = tmp_path / "stub_mcp_server.py"
+    path.write_text(STUB_SERVER, encoding="utf-8")
+    monkeypatch.setattr(mcp_bridge, "MCP_SERVER_PATH", str(path))
+    monkeypatch.setattr(mcp_bridge, "PYTHON", sys.executable)
+    return path
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_calls_are_multiplexed_on_one_worker(stub_server):
+    async def scenario():
+        bridge = mcp_bridge.MCPBridge(workers=1)
+        await bridge.start()
+        try:
+            started = time.monotonic()
+            results = await asyncio.gather(*(
+                bridge.call_tool("sleep", {"seconds": 0.5}) for _ in range(4)
+            ))
+            return results, time.monotonic() - started
+        finally:
+            await bridge.stop()
+
+    results, elapsed = _run(scenario())
+    assert len(set(results)) == 1
+    assert elapsed < 1.5  # serialized calls would take >= 2s
+
+
+def test_calls_spread_over_least_loaded_workers(stub_server):
+    async def scenario():
+        bridge = mcp_bridge.MCPBridge(workers=3)
+        await bridge.start()
+        try:
+            pids = await asyncio.gather(*(
+                bridge.call_tool("sleep", {"seconds": 0.2}) for _ in range(6)
+            ))
+            return pids, bridge.stats
+        finally:
+            await bridge.stop()
+
+    pids, stats = _run(scenario())
+    assert len(set(pids)) == 3
+    assert [s["calls"] for s in stats] == [2, 2, 2]
+
+
+def test_crashed_worker_is_restarted(stub_server):
+    async def scenario():
+        bridge = mcp_bridge.MCPBridge(workers=1)
+        await bridge.start()
+        try:
+            first = await bridge.call_tool("pid", {})
+            with pytest.raises(RuntimeError):
+                await bridge.call_tool("crash", {})
+            second = await bridge.call_tool("pid", {})
+            return first, second
+        finally:
+            await bridge.stop()
+
+    first, second = _run(scenario())
+    assert first != second
+
+
+def test_call_is_not_resent_after_worker_died_mid_call(stub_server, tmp_path):
+    log = tmp_path / "crashes.log"
+
+    async def scenario():
+        bridge = mcp_bridge.MCPBridge(workers=2)
+        await bridge.start()
+        try:
+            with pytest.raises(RuntimeError):
+                await bridge.call_tool("crash", {"log": str(log)})
+        finally:
+            await bridge.stop()
+
+    _run(scenario())
+    assert log.read_text().splitlines() == ["crash"]
+
+
+def test_unsent_call_is_retried_and_dead_worker_restarted(stub_server):
+    async def scenario():
+        bridge = mcp_bridge.MCPBridge(workers=2)
+        await bridge.start()
+        try:
+            dead, alive = bridge._workers
+            dead_pid = dead._proc.pid
+
+            async def gone(_msg):
+                await dead._kill_proc()
+                raise mcp_bridge._RequestNotSent("MCP subprocess not running")
+
+            dead._write = gone
+            result = await bridge.call_tool("pid", {})
+            del dead._write
+            # The next pick schedules exactly one restart and keeps a handle on it.
+            await bridge.call_tool("pid", {})
+            await bridge.call_tool("pid", {})
+            restarts = list(bridge._restarts.values())
+            await asyncio.gather(*restarts)
+            return result, alive._proc.pid, dead_pid, dead, restarts, bridge._restarts
+        finally:
+            await bridge.stop()
+
+    result, alive_pid, dead_pid, dead, restarts, pending = _run(scenario())
+    assert result == str(alive_pid)
+    assert len(restarts) == 1
+    assert not pending
+    assert dead.calls == 0
+
+
+def test_timeout_fails_only_the_slow_call(stub_server, monkeypatch):
+    monkeypatch.setattr(mcp_bridge, "TOOL_TIMEOUT", 0.3)
+
+    async def scenario():
+        bridge = mcp_bridge.MCPBridge(workers=1)
+        await bridge.start()
+        try:
+            slow = asyncio.create_task(bridge.call_tool("sleep", {"seconds": 2}))
+            fast = await bridge.call_tool("pid", {})
+            with pytest.raises(RuntimeError, match="timed out"):
+                await slow
+            return fast, bridge.is_running
+        finally:
+            await bridge.stop()
+
+    fast, running = _run(scenario())
+    assert fast.isdigit()
+    assert running
+
+
+def test_failed_handshake_kills_and_reaps_child(stub_server, monkeypatch):
+    monkeypatch.setattr(mcp_bridge, "TOOL_TIMEOUT", 0.3)
+    monkeypatch.setenv("STUB_MCP_HANG_ON_INIT", "1")
+    spawned = []
+    real_exec = asyncio.create_subprocess_exec
+
+    async def tracking_exec(*args, **kwargs):
+        proc = await real_exec(*args, **kwargs)
+        spawned.append(proc)
+        return proc
+
+    monkeypatch.setattr(mcp_bridge.asyncio, "create_subprocess_exec", tracking_exec)
+
+    async def scenario():
+        worker = mcp_bridge._MCPWorker(0)
+        with pytest.raises(RuntimeError, match="timed out"):
+            await worker.start()
+        return worker
+
+    worker = _run(scenario())
+    assert len(spawned) == 1
+    assert spawned[0].returncode is not None  # killed and waited for
+    assert not worker.is_running
@@ -1,10 +1,14 @@
-"""MCP Bridge — manages mcp_server.py as a stdio subprocess.
+"""MCP Bridge — manages a pool of mcp_server.py stdio subprocesses.
 
-Sends JSON-RPC 2.0 messages over stdin/stdout to call MCP tools.
+Sends JSON-RPC 2.0 messages over stdin/stdout to call MCP tools. Each worker
+multiplexes concurrent calls by JSON-RPC id (the MCP server handles requests
+concurrently), and the bridge routes every call to the least-loaded healthy
+worker so one slow tool call no longer blocks all other chat sessions.
 """
 from __future__ import annotations
 
 import asyncio
+import itertools
 import json
 import logging
 import os
@@ -19,81 +23,250 @@ MCP_SERVER_PATH = os.environ.get(
 )
 PYTHON = os.environ.get("MCP_PYTHON", sys.executable)
 TOOL_TIMEOUT = float(os.environ.get("MCP_TOOL_TIMEOUT", "120"))
+MCP_WORKERS = max(1, int(os.environ.get("MCP_WORKERS", "2")))
 
 
-class MCPBridge:
-    """Manages a single mcp_server.py subprocess via JSON-RPC over stdio."""
+class _RequestNotSent(RuntimeError):
+    """The worker was gone before the request reached its stdin."""
+
+
+class _MCPWorker:
+    """One mcp_server.py subprocess with id-multiplexed JSON-RPC calls."""
 
-    def __init__(self):
+    def __init__(self, index: int):
+        self.index = index
         self._proc: asyncio.subprocess.Process | None = None
-        self._request_id = 0
-        self._lock = asyncio.Lock()
+        self._ids = itertools.count(1)
+        self._pending: dict[int, asyncio.Future] = {}
+        self._write_lock = asyncio.Lock()
+        self._start_lock = asyncio.Lock()
         self._initialized = False
+        self._reader_task: asyncio.Task | None = None
         self._stderr_task: asyncio.Task | None = None
+        self._stderr_tail: list[str] = []
+        self.calls = 0
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._pending)
+
+    @property
+    def is_running(self) -> bool:
+        return self._proc is not None and self._proc.returncode is None
+
+    @property
+    def is_healthy(self) -> bool:
+        return self._initialized and self.is_running
+
+    @property
+    def is_starting(self) -> bool:
+        return self._start_lock.locked()
 
     async def start(self) -> None:
-        if self._proc is not None and self._proc.returncode is None:
-            return
-
-        logger.info("Starting MCP subprocess: %s %s", PYTHON, MCP_SERVER_PATH)
-        self._proc = await asyncio.create_subprocess_exec(
-            PYTHON, MCP_SERVER_PATH,
-            stdin=asyncio.subprocess.PIPE,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            limit=4 * 1024 * 1024,  # 4MB — search results can exceed default 64KB
-        )
-        self._initialized = False
+        async with self._start_lock:
+            if self.is_healthy:
+                return
+            await self._kill_proc()
 
-        # MCP handshake: send initialize, then initialized notification
-        init_resp = await self._send_request("initialize", {
-            "protocolVersion": "2024-11-05",
-            "capabilities": {},
-            "clientInfo": {"name": "web_api", "version": "1.0.0"},
-        })
-        logger.info("MCP initialized: %s", json.dumps(init_resp.get("result", {}))[:200])
+            logger.info(
+                "Starting MCP worker %d: %s %s", self.index, PYTHON, MCP_SERVER_PATH,
+            )
+            self._proc = await asyncio.create_subprocess_exec(
+                PYTHON, MCP_SERVER_PATH,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                limit=4 * 1024 * 1024,  # 4MB — search results can exceed default 64KB
+            )
+            self._stderr_tail = []
+            # Drain stderr in background to prevent pipe buffer deadlock
+            self._stderr_task = asyncio.create_task(self._drain_stderr(self._proc))
+            self._reader_task = asyncio.create_task(self._read_loop(self._proc))
 
-        await self._send_notification("notifications/initialized", {})
-        self._initialized = True
+            try:
+                # MCP handshake: send initialize, then initialized notification
+                init_resp = await self.request("initialize", {
+                    "protocolVersion": "2024-11-05",
+                    "capabilities": {},
+                    "clientInfo": {"name": "web_api", "version": "1.0.0"},
+                })
+                if "error" in init_resp:
+                    raise RuntimeError(f"MCP initialize failed: {init_resp['error']}")
+                await self.notify("notifications/initialized", {})
+            except BaseException:
+                # Never leave a half-started child behind: kill and reap it
+                # (also on cancellation) before propagating.
+                logger.error("MCP worker %d failed to start", self.index)
+                await self._kill_proc()
+                raise
+            logger.info(
+                "MCP worker %d initialized: %s",
+                self.index, json.dumps(init_resp.get("result", {}))[:200],
+            )
+            self._initialized = True
 
-        # Drain stderr in background to prevent pipe buffer deadlock
-        self._stderr_task = asyncio.create_task(self._drain_stderr())
+    async def stop(self) -> None:
+        self._initialized = False
+        proc = self._proc
+        if proc and proc.returncode is None and proc.stdin is not None:
+            proc.stdin.close()
+            try:
+                await asyncio.wait_for(proc.wait(), timeout=5)
+            except asyncio.TimeoutError:
+                proc.kill()
+        await self._kill_proc()
 
-    async def _drain_stderr(self) -> None:
+    async def request(self, method: str, params: dict) -> dict:
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            await self._write({
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "method": method,
+                "params": params,
+            })
+            return await asyncio.wait_for(future, timeout=TOOL_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.error(
+                "MCP worker %d: %s timed out after %ss", self.index, method, TOOL_TIMEOUT,
+            )
+            try:
+                await self.notify("notifications/cancelled", {
+                    "requestId": request_id,
+                    "reason": "timeout",
+                })
+            except Exception as e:
+                logger.debug("MCP cancel notification failed: %s", e)
+            raise RuntimeError(f"MCP tool call timed out after {TOOL_TIMEOUT:g}s")
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def notify(self, method: str, params: dict) -> None:
+        await self._write({
+            "jsonrpc": "2.0",
+            "method": method,
+            "params": params,
+        })
+
+    async def _write(self, msg: dict) -> None:
+        """Write a JSON-RPC message as a single newline-delimited JSON line."""
+        proc = self._proc
+        if not proc or proc.stdin is None or proc.returncode is not None:
+            raise _RequestNotSent("MCP subprocess not running")
+        line = json.dumps(msg, separators=(",", ":")) + "\n"
+        async with self._write_lock:
+            try:
+                proc.stdin.write(line.encode())
+                await proc.stdin.drain()
+            except (BrokenPipeError, ConnectionResetError) as e:
+                raise _RequestNotSent(f"MCP subprocess not running: {e}") from e
+
+    async def _read_loop(self, proc: asyncio.subprocess.Process) -> None:
+        """Route responses to their waiting callers by JSON-RPC id."""
+        error = "MCP subprocess closed"
+        try:
+            while proc.stdout is not None:
+                line = await proc.stdout.readline()
+                if not line:
+                    break
+                try:
+                    resp = json.loads(line.decode())
+                except Exception as e:
+                    logger.error("MCP worker %d read error: %s", self.index, e)
+                    continue
+                # Skip notifications and server-initiated requests
+                if "id" not in resp or "method" in resp:
+                    continue
+                future = self._pending.get(resp["id"])
+                if future is not None and not future.done():
+                    future.set_result(resp)
+        except asyncio.CancelledError:
+            error = "MCP worker stopped"
+        except Exception as e:
+            error = f"MCP read error: {e}"
+        finally:
+            if proc is self._proc:
+                self._initialized = False
+            stderr_out = "\n".join(self._stderr_tail[-5:])
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(RuntimeError(f"{error}. stderr: {stderr_out}"))
+
+    async def _drain_stderr(self, proc: asyncio.subprocess.Process) -> None:
         """Read stderr continuously to prevent pipe buffer deadlock."""
         try:
-            while self._proc and self._proc.stderr:
-                line = await self._proc.stderr.readline()
+            while proc.stderr:
+                line = await proc.stderr.readline()
                 if not line:
                     break
-                logger.debug("MCP stderr: %s", line.decode(errors="replace").rstrip())
+                text = line.decode(errors="replace").rstrip()
+                self._stderr_tail = (self._stderr_tail + [text])[-20:]
+                logger.debug("MCP[%d] stderr: %s", self.index, text)
         except asyncio.CancelledError:
             pass
         except Exception:
             pass
 
-    async def stop(self) -> None:
-        if self._stderr_task:
-            self._stderr_task.cancel()
-            self._stderr_task = None
-        if self._proc and self._proc.returncode is None:
-            self._proc.stdin.close()
+    async def _kill_proc(self) -> None:
+        """Kill the subprocess and fail any calls still waiting on it."""
+        self._initialized = False
+        proc, self._proc = self._proc, None
+        if proc and proc.returncode is None:
             try:
-                await asyncio.wait_for(self._proc.wait(), timeout=5)
+                proc.kill()
+            except ProcessLookupError:
+                pass
+            try:
+                await asyncio.wait_for(proc.wait(), timeout=3)
             except asyncio.TimeoutError:
-                self._proc.kill()
-            self._proc = None
-        self._initialized = False
+                logger.warning("MCP worker %d: pid %s not reaped after kill", self.index, proc.pid)
+        for task in (self._reader_task, self._stderr_task):
+            if task and not task.done():
+                task.cancel()
+        self._reader_task = None
+        self._stderr_task = None
 
-    async def call_tool(self, name: str, arguments: dict) -> str:
-        """Call an MCP tool and return the text result."""
-        if not self._initialized:
-            await self.start()
 
-        resp = await self._send_request("tools/call", {
-            "name": name,
-            "arguments": arguments,
-        })
+class MCPBridge:
+    """Pool of warm mcp_server.py workers behind a single call_tool API."""
+
+    def __init__(self, workers: int | None = None):
+        size = MCP_WORKERS if workers is None else max(1, workers)
+        self._workers = [_MCPWorker(i) for i in range(size)]
+        # Background restarts by worker index; holding the task keeps it
+        # from being garbage-collected and stops duplicate restarts.
+        self._restarts: dict[int, asyncio.Task] = {}
+
+    async def start(self) -> None:
+        await asyncio.gather(*(w.start() for w in self._workers if not w.is_healthy))
+
+    async def stop(self) -> None:
+        await asyncio.gather(*(w.stop() for w in self._workers))
+
+    async def call_tool(self, name: str, arguments: dict) -> str:
+        """Call an MCP tool and return the text result.
+
+        A call that could not be sent because its worker was already gone is
+        retried once on another (or the restarted) worker. Once the request
+        has been written it is never resent, since the tool may have run;
+        a worker dying mid-call and tool errors surface to the caller.
+        """
+        resp = None
+        for attempt in range(2):
+            worker = await self._pick_worker()
+            try:
+                resp = await worker.request("tools/call", {
+                    "name": name,
+                    "arguments": arguments,
+                })
+                break
+            except _RequestNotSent:
+                if attempt:
+                    raise
+                logger.warning("MCP worker %d gone before %s was sent, retrying", worker.index, name)
+        worker.calls += 1
 
         if "error" in resp:
             raise RuntimeError(f"MCP error: {resp['error']}")
@@ -103,92 +276,45 @@ class MCPBridge:
         texts = [c.get("text", "") for c in content if c.get("type") == "text"]
         return "\n".join(texts)
 
-    async def _send_request(self, method: str, params: dict) -> dict:
-        async with self._lock:
-            self._request_id += 1
-            msg = {
-                "jsonrpc": "2.0",
-                "id": self._request_id,
-                "method": method,
-                "params": params,
-            }
-            return await self._send_and_receive(msg)
-
-    async def _send_notification(self, method: str, params: dict) -> None:
-        async with self._lock:
-            msg = {
-                "jsonrpc": "2.0",
-                "method": method,
-                "params": params,
-            }
-            await self._write(msg)
-
-    async def _send_and_receive(self, msg: dict) -> dict:
-        await self._write(msg)
-        target_id = msg.get("id")
-
-        while True:
-            resp = await self._read()
-            if resp is None:
-                stderr_out = ""
-                if self._proc and self._proc.stderr:
-                    try:
-                        stderr_out = (await asyncio.wait_for(
-                            self._proc.stderr.read(4096), timeout=1
-                        )).decode(errors="replace")
-                    except (asyncio.TimeoutError, Exception):
-                        pass
-                raise RuntimeError(f"MCP subprocess closed. stderr: {stderr_out}")
-
-            # Skip notifications (no id)
-            if "id" not in resp:
-                continue
-            if resp.get("id") == target_id:
-                return resp
-
-    async def _write(self, msg: dict) -> None:
-        """Write a JSON-RPC message as a single newline-delimited JSON line."""
-        if not self._proc or self._proc.stdin is None:
-            raise RuntimeError("MCP subprocess not running")
-        line = json.dumps(msg, separators=(",", ":")) + "\n"
-        self._proc.stdin.write(line.encode())
-        await self._proc.stdin.drain()
-
-    async def _read(self) -> dict | None:
-        """Read one newline-delimited JSON line from the MCP subprocess."""
-        if not self._proc or self._proc.stdout is None:
-            return None
-
+    async def _pick_worker(self) -> _MCPWorker:
+        healthy = [w for w in self._workers if w.is_healthy]
+        if not healthy:
+            # Restart everything that is down; use whichever comes up.
+            await self.start()
+            healthy = [w for w in self._workers if w.is_healthy]
+            if not healthy:
+                raise RuntimeError("No MCP worker available")
+        elif len(healthy) < len(self._workers):
+            for w in self._workers:
+                if not w.is_healthy and not w.is_starting and w.index not in self._restarts:
+                    task = asyncio.create_task(self._restart(w))
+                    self._restarts[w.index] = task
+                    task.add_done_callback(
+                        lambda _t, i=w.index: self._restarts.pop(i, None)
+                    )
+        return min(healthy, key=lambda w: (w.in_flight, w.calls))
+
+    async def _restart(self, worker: _MCPWorker) -> None:
         try:
-            line = await asyncio.wait_for(
-                self._proc.stdout.readline(), timeout=TOOL_TIMEOUT,
-            )
-            if not line:
-                return None
-            return json.loads(line.decode())
-
-        except asyncio.TimeoutError:
-            logger.error("MCP read timeout after %ss — killing subprocess", TOOL_TIMEOUT)
-            await self._kill_proc()
-            return None
+            await worker.start()
         except Exception as e:
-            logger.error("MCP read error: %s", e)
-            return None
-
-    async def _kill_proc(self) -> None:
-        """Kill the MCP subprocess so the singleton getter restarts it."""
-        if self._proc and self._proc.returncode is None:
-            self._proc.kill()
-            try:
-                await asyncio.wait_for(self._proc.wait(), timeout=3)
-            except asyncio.TimeoutError:
-                pass
-        self._proc = None
-        self._initialized = False
+            logger.error("Restarting MCP worker %d failed: %s", worker.index, e)
 
     @property
     def is_running(self) -> bool:
-        return self._proc is not None and self._proc.returncode is None
+        return any(w.is_running for w in self._workers)
+
+    @property
+    def stats(self) -> list[dict]:
+        return [
+            {
+                "worker": w.index,
+                "running": w.is_running,
+                "in_flight": w.in_flight,
+                "calls": w.calls,
+            }
+            for w in self._workers
+        ]
 
 
 # Module-level singleton